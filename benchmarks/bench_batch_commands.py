@@ -0,0 +1,57 @@
+"""コマンド一括送信のベンチマーク
+
+小さなコマンドN件を run_command() で1件ずつ実行した場合と、
+run_commands() でパイプライン送信した場合の所要時間を比較する。
+PowerShellの代わりにshを使う（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_batch_commands.py [--count 500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+
+def _start_session() -> PowerShellSession:
+    """スタブシェルのセッションを起動する"""
+    session = PowerShellSession(
+        "bench", ".", shell_command=["sh"], read_mode="chunk", encoding="utf-8"
+    )
+    session.start()
+    return session
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+    commands = [f"echo {i}" for i in range(args.count)]
+
+    session = _start_session()
+    start = time.perf_counter()
+    for command in commands:
+        session.run_command(command, timeout=10)
+    sequential = time.perf_counter() - start
+    session.stop()
+
+    session = _start_session()
+    start = time.perf_counter()
+    for _ in session.run_commands(commands, timeout=10):
+        pass
+    pipelined = time.perf_counter() - start
+    session.stop()
+
+    print(f"{'mode':>10} {'total s':>10} {'cmds/s':>10}")
+    for name, elapsed in (("sequential", sequential), ("pipelined", pipelined)):
+        print(f"{name:>10} {elapsed:>10.3f} {args.count / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""broadcast()のベンチマーク
+
+同じコマンドを複数のセッションで実行する時間を、1セッションずつ
+run_command()で実行する場合とbroadcast()で並行実行する場合とで比較する。
+PowerShellの代わりにshを使い、--work でコマンドの実行時間を模擬する
+（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_broadcast.py [--sessions 16] [--work 0.2]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.config import SessionManagerConfig  # noqa: E402
+from claude_session_manager.core.manager import SessionManager  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--work", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    manager = SessionManager(
+        max_sessions=args.sessions,
+        config=SessionManagerConfig(warm_pool_size=0, output_encoding="utf-8"),
+    )
+    for i in range(args.sessions):
+        session = PowerShellSession(
+            f"session-{i + 1}",
+            ".",
+            config=manager.config,
+            reactor=manager.reactor,
+            shell_command=["sh"],
+        )
+        session.start()
+        manager.sessions[session.session_id] = session
+
+    command = f"sleep {args.work}; echo done"
+    try:
+        start = time.perf_counter()
+        for session in manager.sessions.values():
+            session.run_command(command, timeout=30)
+        sequential = time.perf_counter() - start
+
+        report = manager.broadcast(command, max_concurrency=args.concurrency, timeout=30)
+
+        print(f"{args.sessions} sessions, {args.work}s per command:")
+        print(f"  sequential run_command : {sequential:.2f}s")
+        print(f"  broadcast (limit {args.concurrency:>2})  : {report.elapsed:.2f}s")
+        print(f"  {report.summary}")
+    finally:
+        manager.shutdown_all(deadline=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""アイドルセッション休止のベンチマーク
+
+多数の論理セッションを開き、利用者が順に切り替えて使う状況を模擬する。
+全セッションを実行し続ける場合と、実行中セッション数に上限を設けて
+使われていない順に休止する場合とで、シェルプロセス数・開いているfd数と、
+休止中のセッションへコマンドを送ってから結果が返るまでの時間を比較する。
+PowerShellの代わりにshを使う（/procのあるLinux向け）。
+
+使い方:
+    uv run python benchmarks/bench_hibernation.py [--sessions 50] [--live 8]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.config import SessionManagerConfig  # noqa: E402
+from claude_session_manager.core.manager import SessionManager  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+
+def _open_fds() -> int:
+    """このプロセスが開いているfd数"""
+    return len(os.listdir("/proc/self/fd"))
+
+
+def _wait_output(session, text: str, timeout: float = 10) -> None:
+    """出力にtextが現れるまで読み取る"""
+    output = ""
+    end = time.monotonic() + timeout
+    while text not in output and time.monotonic() < end:
+        output += session.get_output()
+        time.sleep(0.001)
+
+
+def _run(sessions: int, live: Optional[int]) -> None:
+    """セッションを開いて順に使い、資源と応答時間を表示する"""
+    manager = SessionManager(
+        max_sessions=sessions,
+        config=SessionManagerConfig(
+            warm_pool_size=0, output_encoding="utf-8", max_live_sessions=live
+        ),
+    )
+    working_dir = tempfile.mkdtemp()
+    baseline_fds = _open_fds()
+    try:
+        for i in range(sessions):
+            session_id = f"session-{i + 1}"
+            session = PowerShellSession(
+                session_id,
+                working_dir,
+                config=manager.config,
+                reactor=manager.reactor,
+                shell_command=["sh"],
+            )
+            session.start()
+            manager.sessions[session_id] = session
+            manager.touch(session_id)
+
+        # 利用者が順にセッションを切り替えてコマンドを送る
+        latencies = []
+        for round_ in range(2):
+            for i in range(sessions):
+                session_id = f"session-{i + 1}"
+                marker = f"done-{round_}-{i}"
+                start = time.perf_counter()
+                manager.send_command(session_id, f"echo {marker}")
+                _wait_output(manager.sessions[session_id], marker)
+                latencies.append(time.perf_counter() - start)
+
+        stats = manager.hibernation_stats
+        label = "all live" if live is None else f"live budget {live}"
+        print(f"{label}:")
+        print(f"  shell processes : {stats.live_sessions}")
+        print(f"  extra open fds  : {_open_fds() - baseline_fds}")
+        print(f"  hibernations    : {stats.hibernations}, revivals {stats.revivals}")
+        print(
+            f"  send->output    : median {statistics.median(latencies) * 1000:.1f} ms, "
+            f"max {max(latencies) * 1000:.1f} ms"
+        )
+    finally:
+        manager.shutdown_all(deadline=2)
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--live", type=int, default=8)
+    args = parser.parse_args()
+
+    _run(args.sessions, None)
+    _run(args.sessions, args.live)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""出力のないセッションのアイドル時CPU使用量のベンチマーク
+
+出力のないセッションを複数起動し、プロセス全体のCPU時間を比較する。
+- polling: 以前のUIの更新ループと同じく100msごとに全セッションを確認する
+- events: イベントを購読し、届いた時だけ確認する
+PowerShellの代わりにshを使う（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_idle_cpu.py [--sessions 16] [--seconds 5]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.config import SessionManagerConfig  # noqa: E402
+from claude_session_manager.core.manager import SessionManager  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+
+def poll(manager: SessionManager, stop: threading.Event) -> int:
+    """100msごとに全セッションの出力と状態を確認する（以前の更新ループ）"""
+    ticks = 0
+    while not stop.wait(0.1):
+        manager.apply_hibernation_policy()
+        for session in manager.get_sessions().values():
+            session.get_output()
+            session.output_stats
+        ticks += 1
+    return ticks
+
+
+def measure(seconds: float, work) -> float:
+    """workを実行している間のCPU時間（ミリ秒/秒）を返す"""
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    work(seconds)
+    elapsed = time.perf_counter() - started
+    return (time.process_time() - started_cpu) * 1000 / elapsed
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    manager = SessionManager(
+        max_sessions=args.sessions,
+        config=SessionManagerConfig(warm_pool_size=0, output_encoding="utf-8"),
+    )
+    for i in range(args.sessions):
+        session = PowerShellSession(
+            f"session-{i + 1}",
+            ".",
+            config=manager.config,
+            reactor=manager.reactor,
+            shell_command=["sh"],
+        )
+        manager.sessions[session.session_id] = session
+        manager._event_source.watch(session.session_id, session)
+        session.start()
+
+    def polling(seconds: float) -> None:
+        stop = threading.Event()
+        thread = threading.Thread(target=poll, args=(manager, stop))
+        thread.start()
+        time.sleep(seconds)
+        stop.set()
+        thread.join()
+
+    received = []
+
+    def events(seconds: float) -> None:
+        manager.events.subscribe(received.append)
+        time.sleep(seconds)
+        manager.events.unsubscribe(received.append)
+
+    try:
+        time.sleep(0.5)  # 起動時の出力が落ち着くのを待つ
+        polling_cpu = measure(args.seconds, polling)
+        events_cpu = measure(args.seconds, events)
+
+        print(f"{args.sessions} quiet sessions, {args.seconds}s each:")
+        print(f"  polling every 100ms : {polling_cpu:6.2f} ms CPU/s")
+        print(f"  event subscription  : {events_cpu:6.2f} ms CPU/s ({len(received)} events)")
+    finally:
+        manager.shutdown_all(deadline=2)
+
+
+if __name__ == "__main__":
+    main()
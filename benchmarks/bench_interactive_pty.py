@@ -0,0 +1,108 @@
+"""POSIX疑似端末バックエンドのベンチマーク
+
+インタラクティブセッションについて、コマンド送信からプロンプトが
+返るまでの往復時間と、大量出力の読み取りスループットを測る。
+複数セッションは1つの共有リアクターで読み取る（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_interactive_pty.py [--sessions 4] [--round-trips 200] [--megabytes 16]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.interactive_session import (  # noqa: E402
+    READ_UNTIL_MATCHED,
+    InteractivePowerShellSession,
+)
+from claude_session_manager.core.reactor import OutputReactor  # noqa: E402
+
+PROMPT = "bench$ "
+PROMPT_PATTERN = r"bench\$ $"
+
+
+def _start_session(session_id: str, working_dir: str, reactor: OutputReactor):
+    """shを起動し、最初のプロンプトまで読み進めたセッションを返す"""
+    session = InteractivePowerShellSession(
+        session_id,
+        working_dir,
+        shell_command=["sh"],
+        prompt_patterns=[PROMPT_PATTERN],
+        reactor=reactor,
+    )
+    session.env["PS1"] = PROMPT
+    session.start()
+    session.read_until(PROMPT_PATTERN, timeout=10)
+    return session
+
+
+def _round_trips(session, count: int, results: list[float]) -> None:
+    """送信からプロンプト受信までの時間をcount回測る"""
+    for _ in range(count):
+        start = time.perf_counter()
+        session.send_command("true")
+        result = session.read_until(PROMPT_PATTERN, timeout=10)
+        if result.reason != READ_UNTIL_MATCHED:
+            raise RuntimeError(f"prompt not seen: {result.reason}")
+        results.append(time.perf_counter() - start)
+
+
+def _throughput(session, megabytes: int) -> float:
+    """大量出力を読み切るまでの MB/s を返す"""
+    start = time.perf_counter()
+    session.send_command(f"head -c {megabytes * 1024 * 1024} /dev/zero | tr '\\0' x")
+    result = session.read_until(PROMPT_PATTERN, timeout=120)
+    elapsed = time.perf_counter() - start
+    if result.reason != READ_UNTIL_MATCHED:
+        raise RuntimeError(f"prompt not seen: {result.reason}")
+    return megabytes / elapsed
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--round-trips", type=int, default=200)
+    parser.add_argument("--megabytes", type=int, default=16)
+    args = parser.parse_args()
+    working_dir = tempfile.mkdtemp()
+
+    reactor = OutputReactor()
+    sessions = [
+        _start_session(f"bench-{i}", working_dir, reactor)
+        for i in range(args.sessions)
+    ]
+    try:
+        latencies: list[float] = []
+        threads = [
+            threading.Thread(target=_round_trips, args=(s, args.round_trips, latencies))
+            for s in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latencies.sort()
+        print(f"sessions: {args.sessions}, threads: {threading.active_count()}")
+        print(
+            "round trip: "
+            f"median {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms"
+        )
+        print(f"throughput: {_throughput(sessions[0], args.megabytes):.1f} MB/s")
+    finally:
+        for session in sessions:
+            session.stop()
+        reactor.close()
+
+
+if __name__ == "__main__":
+    main()
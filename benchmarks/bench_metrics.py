@@ -0,0 +1,79 @@
+"""メトリクス記録のベンチマーク
+
+出力の読み取りループで呼ぶCounter.inc()とHistogram.record()の1回あたりの
+コストを、ロックで保護した単純なカウンターと比較する。--threads で同時に
+記録するスレッド数を変えられる。
+
+使い方:
+    uv run python benchmarks/bench_metrics.py [--ops 200000] [--threads 4]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.metrics import Counter, Histogram  # noqa: E402
+
+
+class LockedCounter:
+    """比較用のロックで保護したカウンター"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+
+def measure(record, ops: int, threads: int) -> float:
+    """全スレッドでops回ずつ記録し、1回あたりのナノ秒を返す"""
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(ops):
+            record()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return elapsed / (ops * threads) * 1e9
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    counter = Counter()
+    locked = LockedCounter()
+    histogram = Histogram()
+    cases = [
+        ("no-op", lambda: None),
+        ("LockedCounter.inc", locked.inc),
+        ("Counter.inc", counter.inc),
+        ("Histogram.record", lambda: histogram.record(0.0123)),
+    ]
+
+    print(f"{args.threads} threads x {args.ops} ops:")
+    for name, record in cases:
+        ns = measure(record, args.ops, args.threads)
+        print(f"  {name:<18}: {ns:7.1f} ns/op")
+    assert counter.value == args.ops * args.threads
+
+
+if __name__ == "__main__":
+    main()
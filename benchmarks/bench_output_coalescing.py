@@ -0,0 +1,103 @@
+"""出力チャンクのまとめと適応的な読み取りサイズのベンチマーク
+
+1. キュー単体: 1 KiBのチャンクを大量に届け、read_output()と同じ方法で
+   読み取り側が取り出すまでのCPU時間/MBを、queue.Queueと
+   CoalescingQueueで比較する。
+2. 疑似端末: shで大量出力を行い、プロンプトが返るまでのCPU時間/MBを、
+   1 KiB固定の読み取りと適応的な読み取りで比較する（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_output_coalescing.py [--megabytes 50]
+"""
+
+import argparse
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.interactive_session import (  # noqa: E402
+    InteractivePowerShellSession,
+)
+from claude_session_manager.core.output_queue import CoalescingQueue  # noqa: E402
+from claude_session_manager.core.reactor import OutputReactor  # noqa: E402
+
+CHUNK = "x" * 1023 + "\n"
+
+
+def _queue_cpu_per_mb(output_queue, megabytes: int) -> float:
+    """生産者スレッドと読み取りループのCPU秒/MBを測る"""
+    count = megabytes * 1024
+
+    def produce():
+        for _ in range(count):
+            output_queue.put(CHUNK)
+
+    received = 0
+    start = time.process_time()
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while received < count * len(CHUNK):
+        try:
+            received += len(output_queue.get(timeout=0.1))
+        except queue.Empty:
+            continue
+    producer.join()
+    return (time.process_time() - start) / megabytes
+
+
+def _pty_cpu_per_mb(megabytes: int, max_read_size: int) -> float:
+    """疑似端末の大量出力を読み切るまでのCPU秒/MBを測る"""
+    reactor = OutputReactor(read_size=1024, max_read_size=max_read_size)
+    session = InteractivePowerShellSession(
+        "bench",
+        tempfile.mkdtemp(),
+        shell_command=["sh"],
+        reactor=reactor,
+        prompt_patterns=[r"bench\$ $"],
+    )
+    session.env["PS1"] = "bench$ "
+    session.start()
+    try:
+        session.read_until(r"bench\$ $", timeout=10)
+        start = time.process_time()
+        session.send_command(
+            f"head -c {megabytes * 1024 * 1024} /dev/zero | tr '\\0' x"
+        )
+        session.read_until(r"bench\$ $", timeout=300)
+        elapsed = time.process_time() - start
+        stats = session.read_stats
+        print(
+            f"  max read {max_read_size:>7}: {elapsed / megabytes * 1000:.1f} ms CPU/MB, "
+            f"{stats.chunks} chunks, avg {stats.average_chunk_size:.0f} chars"
+        )
+        return elapsed / megabytes
+    finally:
+        session.stop()
+        reactor.close()
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=int, default=50)
+    args = parser.parse_args()
+
+    plain = _queue_cpu_per_mb(queue.Queue(), args.megabytes)
+    coalesced = _queue_cpu_per_mb(CoalescingQueue(), args.megabytes)
+    print("queue only:")
+    print(f"  queue.Queue     : {plain * 1000:.1f} ms CPU/MB")
+    print(f"  CoalescingQueue : {coalesced * 1000:.1f} ms CPU/MB")
+
+    print("pty session:")
+    fixed = _pty_cpu_per_mb(args.megabytes, max_read_size=1024)
+    adaptive = _pty_cpu_per_mb(args.megabytes, max_read_size=1024 * 1024)
+    print(f"  CPU/MB reduction: {(1 - adaptive / fixed) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
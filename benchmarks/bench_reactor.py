@@ -0,0 +1,85 @@
+"""出力読み取り方式のベンチマーク
+
+セッションごとの読み取りスレッド方式と共有リアクター方式について、
+4/16/64セッションで出力1MBあたりのCPU時間を比較する。
+シェルの代わりに大量の行を出力するPythonプロセスを起動して計測する。
+
+使い方:
+    uv run python benchmarks/bench_reactor.py [--mb-per-session 4]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.reactor import OutputReactor  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+# 1行64バイトの出力を指定MB分生成する子プロセス
+_GENERATOR = (
+    "import sys\n"
+    "line = b'x' * 63 + b'\\n'\n"
+    "block = line * 1024\n"
+    "for _ in range(int(sys.argv[1]) * 1024 * 1024 // len(block)):\n"
+    "    sys.stdout.buffer.write(block)\n"
+)
+
+
+def run_case(session_count: int, mb_per_session: int, use_reactor: bool) -> float:
+    """
+    1ケースを実行し、1MBあたりのCPU時間（ミリ秒）を返す
+
+    Args:
+        session_count: 同時セッション数
+        mb_per_session: セッションごとの出力量（MB）
+        use_reactor: 共有リアクターを使うか
+
+    Returns:
+        出力1MBあたりの本プロセスのCPU時間（ミリ秒）
+    """
+    reactor = OutputReactor() if use_reactor else None
+    command = [sys.executable, "-c", _GENERATOR, str(mb_per_session)]
+    sessions = [
+        PowerShellSession(f"bench-{i}", ".", reactor=reactor, shell_command=command)
+        for i in range(session_count)
+    ]
+    expected = mb_per_session * 1024 * 1024
+    received = [0] * session_count
+
+    cpu_start = time.process_time()
+    for session in sessions:
+        session.start()
+
+    while min(received) < expected:
+        for i, session in enumerate(sessions):
+            received[i] += len(session.get_output())
+        time.sleep(0.005)
+    cpu_used = time.process_time() - cpu_start
+
+    for session in sessions:
+        session.stop()
+    if reactor:
+        reactor.close()
+
+    total_mb = session_count * mb_per_session
+    return cpu_used * 1000 / total_mb
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb-per-session", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'thread ms/MB':>14} {'reactor ms/MB':>14}")
+    for count in (4, 16, 64):
+        threaded = run_case(count, args.mb_per_session, use_reactor=False)
+        reactor = run_case(count, args.mb_per_session, use_reactor=True)
+        print(f"{count:>8} {threaded:>14.2f} {reactor:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
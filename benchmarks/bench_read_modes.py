@@ -0,0 +1,110 @@
+"""出力読み取りモードのベンチマーク
+
+行モード（readline）とチャンクモード（os.read + インクリメンタルデコーダー）について、
+100MBの出力ストリームのスループットと、改行のないプロンプトの初回バイト到達時間を比較する。
+
+使い方:
+    uv run python benchmarks/bench_read_modes.py [--mb 100]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+# 1行64バイトの出力を指定MB分生成する子プロセス
+_GENERATOR = (
+    "import sys\n"
+    "line = b'x' * 63 + b'\\n'\n"
+    "block = line * 1024\n"
+    "for _ in range(int(sys.argv[1]) * 1024 * 1024 // len(block)):\n"
+    "    sys.stdout.buffer.write(block)\n"
+)
+
+# 改行なしのプロンプトを出して待機する子プロセス
+_PROMPT = "import sys, time; sys.stdout.write('PS> '); sys.stdout.flush(); time.sleep(10)"
+
+
+def measure_throughput(read_mode: str, megabytes: int) -> tuple[float, float]:
+    """
+    指定モードで出力を読み切るまでの時間を計測する
+
+    Args:
+        read_mode: 読み取りモード（"line" または "chunk"）
+        megabytes: 出力量（MB）
+
+    Returns:
+        (スループット MB/s, 1MBあたりのCPU時間 ms)
+    """
+    session = PowerShellSession(
+        "bench",
+        ".",
+        read_mode=read_mode,
+        encoding="utf-8",
+        shell_command=[sys.executable, "-c", _GENERATOR, str(megabytes)],
+    )
+    expected = megabytes * 1024 * 1024
+    received = 0
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    session.start()
+    while received < expected:
+        received += len(session.get_output())
+        time.sleep(0.001)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    session.stop()
+
+    return megabytes / wall, cpu * 1000 / megabytes
+
+
+def measure_prompt_latency(read_mode: str, timeout: float = 3.0) -> float:
+    """
+    改行なしプロンプトが読み取られるまでの時間を計測する
+
+    Args:
+        read_mode: 読み取りモード
+        timeout: 打ち切り秒数
+
+    Returns:
+        到達時間（ミリ秒）、タイムアウト時はinf
+    """
+    session = PowerShellSession(
+        "bench",
+        ".",
+        read_mode=read_mode,
+        encoding="utf-8",
+        shell_command=[sys.executable, "-c", _PROMPT],
+    )
+    start = time.perf_counter()
+    session.start()
+    latency = float("inf")
+    while time.perf_counter() - start < timeout:
+        if session.get_output():
+            latency = (time.perf_counter() - start) * 1000
+            break
+        time.sleep(0.001)
+    session.stop()
+    return latency
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'MB/s':>10} {'CPU ms/MB':>10} {'prompt ms':>10}")
+    for mode in ("line", "chunk"):
+        throughput, cpu_per_mb = measure_throughput(mode, args.mb)
+        latency = measure_prompt_latency(mode)
+        print(f"{mode:>6} {throughput:>10.1f} {cpu_per_mb:>10.2f} {latency:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
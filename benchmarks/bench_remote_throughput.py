@@ -0,0 +1,133 @@
+"""デーモンのソケットAPIで購読者へ届く出力のスループットのベンチマーク
+
+SessionServerを起動し、shのセッションでseqを実行して、出力がクライアントへ
+届くまでの速さ（MB/s）を比較する。
+- subscribe: "output"通知のフレームで受け取る（前回以降の出力をまとめて1フレーム）
+- read: read要求を繰り返して受け取る（要求ごとに1往復）
+サーバーとクライアントは同じプロセスで動かす（GILを共有するため実際より遅めに出る）。
+PowerShellの代わりにshを使う（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_remote_throughput.py [--lines 1000000] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.config import SessionManagerConfig  # noqa: E402
+from claude_session_manager.core.manager import SessionManager  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+from claude_session_manager.remote import SessionClient, SessionServer  # noqa: E402
+
+
+def expected_chars(lines: int) -> int:
+    """seq 1 linesの出力の文字数"""
+    total = 0
+    digits = 1
+    while 10 ** (digits - 1) <= lines:
+        low = 10 ** (digits - 1)
+        high = min(lines, 10**digits - 1)
+        total += (high - low + 1) * (digits + 1)
+        digits += 1
+    return total
+
+
+def by_subscribe(client: SessionClient, session_id: str, lines: int) -> tuple[int, int, int]:
+    """購読で受け取る（受け取った文字数・フレーム数・欠落した文字数）"""
+    target = expected_chars(lines)
+    received = frames = gap = 0
+    with client.subscribe(session_id) as subscription:
+        client.send_command(session_id, f"seq 1 {lines}")
+        while received + gap < target:
+            frame = subscription.next(timeout=10)
+            received += len(frame.text)
+            gap += frame.gap
+            frames += 1
+    return received, frames, gap
+
+
+def by_read(client: SessionClient, session_id: str, lines: int) -> tuple[int, int, int]:
+    """read要求の繰り返しで受け取る（受け取った文字数・要求数・欠落した文字数）"""
+    target = expected_chars(lines)
+    cursor = client.connection.call("read", session_id=session_id)["next_cursor"]
+    received = requests = gap = 0
+    client.send_command(session_id, f"seq 1 {lines}")
+    while received + gap < target:
+        result = client.connection.call(
+            "read", session_id=session_id, cursor=cursor, timeout=10
+        )
+        received += len(result["text"])
+        gap += result["gap"]
+        cursor = result["next_cursor"]
+        requests += 1
+    return received, requests, gap
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="csm-bench-")
+    path = os.path.join(directory, "daemon.sock")
+    manager = SessionManager(
+        max_sessions=1,
+        config=SessionManagerConfig(
+            warm_pool_size=0,
+            output_encoding="utf-8",
+            # 計測中に出力を捨てないよう、全体が入る大きさにする
+            output_buffer_size=args.lines * 2,
+            output_buffer_max_chars=expected_chars(args.lines) * 2,
+        ),
+    )
+    server = SessionServer(manager, path).start()
+    try:
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            partial(PowerShellSession, shell_command=["sh"]),
+        ):
+            client = SessionClient(path)
+            client.create_session("bench", ".")
+            client.start("bench")
+
+        print(f"seq 1 {args.lines} ({expected_chars(args.lines) / 1e6:.1f} MB), "
+              f"best of {args.repeat}:")
+        for name, receive, unit in (
+            ("subscribe", by_subscribe, "frames"),
+            ("read loop", by_read, "requests"),
+        ):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                received, messages, gap = receive(client, "bench", args.lines)
+                elapsed = time.perf_counter() - started
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, received, messages, gap)
+                # 次の計測の前に前回の出力を捨てる
+                manager.get_session("bench").get_output()
+            elapsed, received, messages, gap = best
+            print(
+                f"  {name:10}: {received / elapsed / 1e6:7.1f} MB/s  "
+                f"{messages:6d} {unit:8} ({args.lines / messages:8.0f} lines each)  "
+                f"gap {gap}"
+            )
+        client.close()
+    finally:
+        server.close()
+        manager.shutdown_all(deadline=2)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""ジョブスケジューラーのベンチマーク
+
+同じ数のジョブを、セッション数を変えたプールへ投入し、全ジョブの完了時間と
+待ち時間・実行時間の統計を表示する（プールの大きさを決める目安）。
+PowerShellの代わりにshを使い、--work でジョブの実行時間を模擬する
+（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_scheduler.py [--jobs 64] [--work 0.05]
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import wait
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.config import SessionManagerConfig  # noqa: E402
+from claude_session_manager.core.manager import SessionManager  # noqa: E402
+from claude_session_manager.core.scheduler import JobScheduler  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+
+def _run(pool_size: int, jobs: int, work: float) -> None:
+    """pool_size個のセッションでjobs件のジョブを実行して統計を表示する"""
+    manager = SessionManager(
+        max_sessions=pool_size,
+        config=SessionManagerConfig(warm_pool_size=0, output_encoding="utf-8"),
+    )
+    for i in range(pool_size):
+        session = PowerShellSession(
+            f"session-{i + 1}",
+            ".",
+            config=manager.config,
+            reactor=manager.reactor,
+            shell_command=["sh"],
+        )
+        session.start()
+        manager.sessions[session.session_id] = session
+
+    try:
+        with JobScheduler(manager) as scheduler:
+            start = time.perf_counter()
+            futures = [scheduler.submit(f"sleep {work}") for _ in range(jobs)]
+            wait(futures)
+            elapsed = time.perf_counter() - start
+            stats = scheduler.stats
+        print(
+            f"  pool {pool_size:>2}: {elapsed:6.2f}s, {jobs / elapsed:6.1f} jobs/s, "
+            f"wait avg {stats.average_wait * 1000:7.1f} ms / max {stats.max_wait * 1000:7.1f} ms, "
+            f"service avg {stats.average_service * 1000:5.1f} ms"
+        )
+    finally:
+        manager.shutdown_all(deadline=2)
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--work", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{args.jobs} jobs x {args.work}s:")
+    for pool_size in (1, 2, 4, 8):
+        _run(pool_size, args.jobs, args.work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""ウォームプールのベンチマーク
+
+セッションの start() から最初のコマンド結果が返るまでの時間を、
+コールドスタートとウォームプール利用時で比較する。
+PowerShellの代わりにshを使い、--startup-delay でシェルの起動コストを模擬する
+（POSIX環境向け）。
+
+使い方:
+    uv run python benchmarks/bench_warm_pool.py [--sessions 8] [--startup-delay 0.5]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from claude_session_manager.core.pool import ShellPool  # noqa: E402
+from claude_session_manager.core.session import PowerShellSession  # noqa: E402
+
+
+def _time_to_ready(shell_command, working_dir, pool=None) -> float:
+    """start()から最初のコマンドが完了するまでの秒数を測る"""
+    session = PowerShellSession(
+        "bench",
+        working_dir,
+        pool=pool,
+        shell_command=shell_command,
+        read_mode="chunk",
+        encoding="utf-8",
+    )
+    start = time.perf_counter()
+    session.start()
+    session.run_command("true", timeout=30)
+    elapsed = time.perf_counter() - start
+    session.stop()
+    return elapsed
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--startup-delay", type=float, default=0.5)
+    args = parser.parse_args()
+    shell_command = ["sh", "-c", f"sleep {args.startup_delay}; exec sh"]
+    working_dir = tempfile.mkdtemp()
+
+    cold = [
+        _time_to_ready(shell_command, working_dir) for _ in range(args.sessions)
+    ]
+
+    pool = ShellPool(shell_command, size=2, default_working_dir=working_dir)
+    pool.start()
+    warm = []
+    for _ in range(args.sessions):
+        # 操作の合間を模擬して補充の時間を与える
+        time.sleep(args.startup_delay)
+        warm.append(_time_to_ready(shell_command, working_dir, pool=pool))
+    stats = pool.stats
+    pool.close()
+
+    print(f"{'mode':>6} {'median ms':>10} {'max ms':>10}")
+    for name, samples in (("cold", cold), ("warm", warm)):
+        print(
+            f"{name:>6} {statistics.median(samples) * 1000:>10.1f}"
+            f" {max(samples) * 1000:>10.1f}"
+        )
+    print(f"pool hits={stats.hits} misses={stats.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """設定管理モジュール"""
 
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -9,11 +10,56 @@ class SessionManagerConfig:
 
     max_sessions: int = 4
     default_working_dir: str = "."
-    output_buffer_size: int = 1000
+    output_buffer_size: int = 1000  # 未読出力として保持する最大行数
+    output_buffer_max_chars: int = 1024 * 1024  # 未読出力として保持する最大文字数
+    output_overflow_policy: str = "drop_oldest"  # drop_oldest / drop_newest / block
     ui_update_interval_ms: int = 100
     window_width: int = 1200
     window_height: int = 800
 
+    # 出力読み取り設定
+    use_io_reactor: bool = True  # 全セッションの出力を1スレッドで多重化（POSIXのみ）
+    output_read_mode: str = "chunk"  # "chunk"（バイト列単位）または "line"（行単位）
+    output_encoding: Optional[str] = None  # Noneの場合はロケールの文字コード
+    stdin_queue_max_bytes: int = 1024 * 1024  # 標準入力の書き込み待ちとして保持する最大量
+
+    # インタラクティブセッションのbusy / idle判定に追加するプロンプト正規表現
+    prompt_patterns: tuple[str, ...] = ()
+    # インタラクティブセッションのシェル起動コマンド（空の場合はOSごとの既定）
+    interactive_shell_command: tuple[str, ...] = ()
+    # インタラクティブセッションの画面モデルが保持するスクロールバック行数
+    terminal_scrollback_lines: int = 1000
+
+    # ウォームプール設定（起動済みシェルを用意してセッション起動を高速化）
+    warm_pool_size: int = 2  # 待機させるシェル数の上限（全ディレクトリの合計、0で無効）
+
+    # 休止設定（多数の論理セッションを少数の実行中セッションで支える）
+    max_live_sessions: Optional[int] = None  # 同時に実行する最大セッション数（Noneで無制限）
+    hibernate_idle_seconds: Optional[float] = None  # この秒数使われていなければ休止（Noneで無効）
+    hibernation_dir: Optional[str] = None  # 休止中の出力の退避先（Noneの場合は一時ディレクトリ）
+    hibernate_quiet_seconds: float = 30.0  # send_command()後、この秒数出力がなければ休止してよい
+
+    # broadcast()設定（同じコマンドを複数セッションで実行）
+    broadcast_concurrency: int = 8  # 同時に実行するセッション数
+    broadcast_timeout: Optional[float] = None  # セッションごとの完了待ち秒数（Noneで無制限）
+
+    # ヘルスウォッチドッグ設定（終了・停滞したセッションの検出と自動再起動）
+    watchdog_interval: float = 5.0  # 停滞を確認する間隔（秒。終了は通知で即座に検出する）
+    watchdog_stall_seconds: float = 60.0  # 処理中のまま出力がない秒数がこれ以上なら停滞
+    auto_restart: bool = False  # 終了したセッションを自動で再起動するか
+    restart_backoff_initial: float = 1.0  # 終了から再起動までの秒数（続けて終了するたびに倍）
+    restart_backoff_max: float = 60.0  # 再起動までの秒数の上限
+    restart_stable_seconds: float = 30.0  # 再起動後この秒数終了しなければ待ち時間を戻す
+
+    # メトリクス設定
+    metrics_port: Optional[int] = None  # /metrics を返すローカルポート（Noneで無効、0で自動）
+
+    # デーモン設定
+    daemon_socket_path: Optional[str] = None  # デーモンのソケット（Noneの場合は既定のパス）
+
+    # 終了設定
+    shutdown_deadline: float = 3.0  # 終了要求から強制終了へ切り替えるまでの秒数
+
     # GUI設計指針に基づく設定
     grid_spacing: int = 8  # 8ptグリッドシステム
     button_min_size: tuple[int, int] = (48, 48)  # アクセシビリティ基準
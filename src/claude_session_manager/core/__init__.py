@@ -1,6 +1,12 @@
 """Core module - セッション管理の核となる機能"""
 
+from .async_session import AsyncPowerShellSession, AsyncSessionManager
 from .manager import SessionManager
 from .session import PowerShellSession
 
-__all__ = ["SessionManager", "PowerShellSession"]
+__all__ = [
+    "SessionManager",
+    "PowerShellSession",
+    "AsyncSessionManager",
+    "AsyncPowerShellSession",
+]
@@ -0,0 +1,448 @@
+"""asyncio版セッション管理モジュール
+
+asyncio.create_subprocess_exec でシェルを起動し、1つのイベントループで
+多数のセッションをポーリングスレッドなしに駆動する。
+出力はスレッド版と同じOutputBufferに格納するため、Tk UIからは
+get_output() / read_since() をそのまま使える。
+"""
+
+import asyncio
+import codecs
+import locale
+import logging
+import os
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from ..config import SessionManagerConfig
+from .output_buffer import POLICY_BLOCK, OutputBuffer, OutputBufferStats, OutputRead
+from .process_tree import (
+    PROCESS_GROUP_KWARGS,
+    is_process_group_alive,
+    kill_process_tree,
+    terminate_process_tree,
+)
+from .session import CHUNK_READ_SIZE, DEFAULT_SHELL_COMMAND
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPowerShellSession:
+    """asyncioサブプロセスでPowerShellを管理するクラス"""
+
+    def __init__(
+        self,
+        session_id: str,
+        working_dir: str,
+        *,
+        config: Optional[SessionManagerConfig] = None,
+        shell_command: Optional[list[str]] = None,
+        encoding: Optional[str] = None,
+    ):
+        """
+        Args:
+            session_id: セッション識別子
+            working_dir: 作業ディレクトリパス
+            config: セッションマネージャー設定（個別引数が優先される）
+            shell_command: シェル起動コマンド（Noneの場合はPowerShell）
+            encoding: 出力の文字コード（例: "utf-8", "cp932"）
+
+        Raises:
+            ValueError: 未知の文字コードの場合
+        """
+        config = config or SessionManagerConfig()
+        encoding = encoding or config.output_encoding or locale.getpreferredencoding(
+            False
+        )
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise ValueError(f"Unknown encoding: {encoding}")
+
+        self.session_id = session_id
+        self.working_dir = working_dir
+        self.shell_command = shell_command or list(DEFAULT_SHELL_COMMAND)
+        self.encoding = encoding
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._output_buffer = OutputBuffer(
+            max_lines=config.output_buffer_size,
+            max_chars=config.output_buffer_max_chars,
+            policy=config.output_overflow_policy,
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._output_event: Optional[asyncio.Event] = None
+        self._space_event: Optional[asyncio.Event] = None
+        self._eof = False
+        self._last_output_time = 0.0
+
+    async def start(self) -> None:
+        """PowerShellプロセスを起動する"""
+        working_path = Path(self.working_dir)
+        if not working_path.exists():
+            raise FileNotFoundError(f"Working directory not found: {self.working_dir}")
+
+        self._loop = asyncio.get_running_loop()
+        self._output_event = asyncio.Event()
+        self._space_event = asyncio.Event()
+        self._output_buffer.reopen()
+        self._output_buffer.set_space_listener(self._on_buffer_space)
+        self._eof = False
+        self._last_output_time = time.monotonic()
+
+        self.process = await asyncio.create_subprocess_exec(
+            *self.shell_command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=self.working_dir,
+            **PROCESS_GROUP_KWARGS,
+        )
+        self._reader_task = asyncio.create_task(self._read_output())
+
+    async def send(self, command: str) -> None:
+        """
+        コマンドを送信する（パイプが詰まっている場合は空くまで待つ）
+
+        Args:
+            command: 実行するコマンド
+
+        Raises:
+            RuntimeError: セッションが実行中でない場合
+            ValueError: コマンドが空文字列の場合
+        """
+        if not self.is_running():
+            raise RuntimeError("Session is not running")
+
+        if not command or command.strip() == "":
+            raise ValueError("Command cannot be empty")
+
+        if command.strip().lower() in ("cls", "clear"):
+            self._output_buffer.put("[CLEAR_SCREEN]\n", block=False)
+            self._notify_output()
+
+        self.process.stdin.write((command + "\n").encode(self.encoding))
+        await self.process.stdin.drain()
+
+    def send_command(self, command: str) -> None:
+        """
+        コマンドを送信する（別スレッド、例えばTkスレッドから呼び出し可能）
+
+        送信はイベントループ上で非同期に行われる。送信の失敗は呼び出し元へ
+        返せないため、ログに記録する。
+
+        Args:
+            command: 実行するコマンド
+
+        Raises:
+            RuntimeError: セッションが実行中でない場合
+            ValueError: コマンドが空文字列の場合
+        """
+        if not self.is_running() or self._loop is None:
+            raise RuntimeError("Session is not running")
+
+        if not command or command.strip() == "":
+            raise ValueError("Command cannot be empty")
+
+        future = asyncio.run_coroutine_threadsafe(self.send(command), self._loop)
+        future.add_done_callback(self._on_send_done)
+
+    def _on_send_done(self, future: Future) -> None:
+        """send_command()の送信が失敗していればログに記録する"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(
+                "Failed to send command to %s: %s", self.session_id, error, exc_info=error
+            )
+
+    async def output(self, from_cursor: Optional[int] = None) -> AsyncIterator[OutputRead]:
+        """
+        出力を非同期に順次受け取る
+
+        使用例:
+            async for chunk in session.output():
+                print(chunk.text, end="")
+
+        Args:
+            from_cursor: 読み始めるカーソル（Noneの場合は現在の末尾から）
+
+        Yields:
+            新しい出力（gapが正なら保持範囲外の欠落あり）
+        """
+        cursor = self._output_buffer.tail if from_cursor is None else from_cursor
+        while True:
+            if self._output_event is None:
+                return
+            # 読む前にクリアすることで、読んだ直後に届いた出力も取りこぼさない
+            self._output_event.clear()
+            result = self._output_buffer.read_since(cursor)
+            if result.text or result.gap:
+                cursor = result.cursor
+                yield result
+                continue
+            if self._eof:
+                return
+            await self._output_event.wait()
+
+    async def wait_idle(
+        self, idle_time: float = 0.5, timeout: Optional[float] = None
+    ) -> bool:
+        """
+        出力が idle_time 秒途絶えるまで待つ
+
+        Args:
+            idle_time: 出力なしとみなす秒数
+            timeout: 待機の最大秒数（Noneの場合は無制限）
+
+        Returns:
+            アイドルになった場合True、タイムアウトした場合False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            quiet_until = self._last_output_time + idle_time
+            if now >= quiet_until or self._eof:
+                return True
+            wait = quiet_until - now
+            if deadline is not None:
+                if now >= deadline:
+                    return False
+                wait = min(wait, deadline - now)
+            await asyncio.sleep(wait)
+
+    async def stop(self, timeout: float = 2.0) -> None:
+        """
+        プロセスツリーを停止する
+
+        シェルから起動された子プロセスを含むツリー全体に終了を要求し、
+        期限までに終わらなければツリーごと強制終了する。
+
+        Args:
+            timeout: 終了要求後に強制終了へ切り替えるまでの秒数
+        """
+        process = self.process
+        if process and process.returncode is None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            try:
+                process.stdin.close()
+            except (AttributeError, OSError):
+                pass
+            terminate_process_tree(process.pid)
+            if os.name == "posix":
+                # Windowsのterminate()は強制終了になるため、期限切れの場合に任せる
+                try:
+                    process.terminate()
+                except ProcessLookupError:
+                    pass
+            try:
+                await asyncio.wait_for(process.wait(), timeout)
+                # シェルの終了後も出力パイプを握った子プロセスが残っていないか確認する
+                while is_process_group_alive(process.pid) and loop.time() < deadline:
+                    await asyncio.sleep(0.02)
+                finished = not is_process_group_alive(process.pid)
+            except asyncio.TimeoutError:
+                finished = False
+            if not finished:
+                kill_process_tree(process.pid)
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+
+        self._output_buffer.set_space_listener(None)
+        self._eof = True
+        self._notify_output()
+        self.process = None
+
+    def is_running(self) -> bool:
+        """
+        プロセスが実行中かチェックする
+
+        Returns:
+            実行中ならTrue
+        """
+        return self.process is not None and self.process.returncode is None
+
+    def get_output(self) -> str:
+        """
+        出力を取得する（非ブロッキング、既定の読み手として消費する）
+
+        Returns:
+            前回の呼び出し以降の出力
+        """
+        return self._output_buffer.get()
+
+    def read_since(self, cursor: int) -> OutputRead:
+        """
+        カーソル以降の出力を読む（バッファは消費しない）
+
+        Args:
+            cursor: 前回の戻り値のcursor
+
+        Returns:
+            新しい出力・次のカーソル・欠落量
+        """
+        return self._output_buffer.read_since(cursor)
+
+    @property
+    def output_cursor(self) -> int:
+        """現在の出力末尾のカーソル"""
+        return self._output_buffer.tail
+
+    @property
+    def output_stats(self) -> OutputBufferStats:
+        """出力バッファの統計情報"""
+        return self._output_buffer.stats
+
+    async def _read_output(self) -> None:
+        """出力読み取りタスク"""
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        stdout = self.process.stdout
+        while True:
+            data = await stdout.read(CHUNK_READ_SIZE)
+            text = decoder.decode(data, final=not data)
+            if text:
+                await self._put_output(text)
+            if not data:
+                break
+        self._eof = True
+        self._notify_output()
+
+    async def _put_output(self, text: str) -> None:
+        """
+        出力をバッファへ格納する
+
+        blockポリシーで満杯の場合は空きができるまで読み取りを止める
+        （イベントループ自体は止めない）。
+        """
+        while not self._output_buffer.put(text, block=False):
+            if self._output_buffer.policy != POLICY_BLOCK:
+                return
+            self._space_event.clear()
+            if self._output_buffer.put(text, block=False):
+                break
+            await self._space_event.wait()
+        self._last_output_time = time.monotonic()
+        self._notify_output()
+
+    def _notify_output(self) -> None:
+        """output()の待機者を起こす"""
+        if self._output_event is not None:
+            self._output_event.set()
+
+    def _on_buffer_space(self) -> None:
+        """バッファに空きができたことを読み取りタスクへ通知する（任意のスレッドから）"""
+        loop = self._loop
+        if loop is None or self._space_event is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._space_event.set)
+        except RuntimeError:
+            # ループが既に閉じられている
+            pass
+
+
+class AsyncSessionManager:
+    """複数のAsyncPowerShellSessionを管理するクラス"""
+
+    def __init__(
+        self,
+        max_sessions: int = 4,
+        config: Optional[SessionManagerConfig] = None,
+    ):
+        """
+        Args:
+            max_sessions: 最大セッション数
+            config: セッションマネージャー設定（Noneの場合は既定値）
+        """
+        self.max_sessions = max_sessions
+        self.config = config or SessionManagerConfig()
+        self.sessions: dict[str, AsyncPowerShellSession] = {}
+
+    def create_session(
+        self, session_id: str, working_dir: str
+    ) -> AsyncPowerShellSession:
+        """
+        新規セッションを作成する（起動は await session.start() で行う）
+
+        Args:
+            session_id: セッション識別子
+            working_dir: 作業ディレクトリパス
+
+        Returns:
+            作成されたセッション
+
+        Raises:
+            RuntimeError: 最大セッション数を超える場合
+            ValueError: 重複したセッションIDの場合
+        """
+        if len(self.sessions) >= self.max_sessions:
+            raise RuntimeError(
+                f"Maximum session limit reached: {self.max_sessions}"
+            )
+
+        if session_id in self.sessions:
+            raise ValueError(f"Session ID already exists: {session_id}")
+
+        session = AsyncPowerShellSession(session_id, working_dir, config=self.config)
+        self.sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id: str) -> Optional[AsyncPowerShellSession]:
+        """
+        セッションを取得する
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            AsyncPowerShellSession、存在しない場合はNone
+        """
+        return self.sessions.get(session_id)
+
+    async def delete_session(self, session_id: str) -> None:
+        """
+        セッションを停止して削除する
+
+        Args:
+            session_id: セッション識別子
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        if session_id not in self.sessions:
+            raise KeyError(f"Session not found: {session_id}")
+
+        session = self.sessions.pop(session_id)
+        await session.stop()
+
+    def list_sessions(self) -> list[str]:
+        """
+        セッション一覧を取得する
+
+        Returns:
+            セッションIDのリスト
+        """
+        return list(self.sessions.keys())
+
+    async def start_all(self) -> None:
+        """未起動の全セッションを並行して起動する"""
+        await asyncio.gather(
+            *(s.start() for s in self.sessions.values() if not s.is_running())
+        )
+
+    async def stop_all(self) -> None:
+        """全セッションを並行して停止する"""
+        await asyncio.gather(*(s.stop() for s in self.sessions.values()))
@@ -0,0 +1,297 @@
+"""コマンド完了検出モジュール
+
+コマンドを一意な開始・終了マーカーで囲んでシェルへ送り、出力ストリームから
+マーカーを検出して完了・終了コード・所要時間を求める。
+マーカー自体は出力ストリームから取り除くため、UIパネルには表示されない。
+"""
+
+import itertools
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import PureWindowsPath
+from typing import Optional
+
+# マーカーの共通接頭辞
+MARKER_PREFIX = "__CSM_"
+
+# 開始: __CSM_BEGIN_<token>__ / 終了: __CSM_END_<token>_<ok>_<code>__
+_MARKER_RE = re.compile(
+    r"__CSM_(?P<kind>BEGIN|END)_(?P<token>[0-9a-f]+)"
+    r"(?:_(?P<ok>[01])_(?P<code>-?\d*))?__(?:\r?\n)?"
+)
+
+# マーカー1個の最大長（これより長い保留は誤検出として解放する）
+_MAX_MARKER_LENGTH = 64
+
+# PowerShell系のシェル実行ファイル名
+_POWERSHELL_NAMES = ("powershell", "powershell.exe", "pwsh", "pwsh.exe")
+
+
+@dataclass
+class CommandResult:
+    """run_command()の実行結果"""
+
+    command: str
+    output: str = ""
+    exit_code: Optional[int] = None  # シェルが終了した場合などはNone
+    success: bool = False
+    duration: Optional[float] = None  # 実行開始から完了までの秒数
+    time_to_first_byte: Optional[float] = None  # 実行開始から最初の出力までの秒数
+    queue_time: Optional[float] = None  # 送信から実行開始（開始マーカー）までの秒数
+
+
+@dataclass
+class PendingCommand:
+    """完了待ちのコマンド"""
+
+    token: str
+    result: CommandResult
+    sent_at: float = 0.0
+    started_at: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event)
+    parts: list[str] = field(default_factory=list)
+
+
+def is_powershell(shell_command: list[str]) -> bool:
+    """
+    シェル起動コマンドがPowerShellか判定する
+
+    Args:
+        shell_command: シェル起動コマンド
+
+    Returns:
+        PowerShell（powershell / pwsh）ならTrue
+    """
+    if not shell_command:
+        return False
+    # PureWindowsPathは "/" と "\\" のどちらの区切りも解釈する
+    return PureWindowsPath(shell_command[0]).name.lower() in _POWERSHELL_NAMES
+
+
+def wrap_command(command: str, token: str, powershell: bool = True) -> str:
+    """
+    コマンドを開始・終了マーカーの出力で囲む
+
+    マーカー文字列は連結で組み立て、コマンドのエコーが
+    マーカーとして誤検出されないようにする。
+
+    Args:
+        command: 実行するコマンド
+        token: コマンドを識別する一意なトークン
+        powershell: PowerShell構文で囲むか（Falseの場合はPOSIX sh構文）
+
+    Returns:
+        シェルへ送るコマンド
+    """
+    if powershell:
+        return (
+            "$global:LASTEXITCODE = 0; "
+            f"Write-Output ('__CSM' + '_BEGIN_{token}__'); "
+            f"try {{ {command}; $__csm_ok = [int]$? }} "
+            "catch { $__csm_ok = 0; Write-Output $_ }; "
+            f"Write-Output ('__CSM' + '_END_{token}_' + $__csm_ok + '_' "
+            "+ $LASTEXITCODE + '__')"
+        )
+    return (
+        f"printf '%s\\n' '__CSM''_BEGIN_{token}__'; "
+        f"{command}\n"
+        "__csm_rc=$?; "
+        f"printf '%s\\n' \"__CSM\"\"_END_{token}_$([ $__csm_rc -eq 0 ] && echo 1 || echo 0)"
+        "_${__csm_rc}__\""
+    )
+
+
+class CommandTracker:
+    """マーカー付きコマンドの完了を出力ストリームから検出するクラス（スレッドセーフ）"""
+
+    def __init__(self) -> None:
+        self._pending: dict[str, PendingCommand] = {}
+        self._active: Optional[PendingCommand] = None
+        # 終了マーカーを検出したが、まだ完了を通知していないコマンド
+        self._completed: list[PendingCommand] = []
+        self._partial = ""
+        self._lock = threading.Lock()
+        self._prefix = uuid.uuid4().hex[:8]
+        self._counter = itertools.count(1)
+
+    def register(self, command: str) -> PendingCommand:
+        """
+        完了を待つコマンドを登録する
+
+        Args:
+            command: 実行するコマンド
+
+        Returns:
+            登録したコマンド（tokenをwrap_command()に渡す）
+        """
+        token = f"{self._prefix}{next(self._counter):x}"
+        pending = PendingCommand(token=token, result=CommandResult(command=command))
+        with self._lock:
+            self._pending[token] = pending
+        return pending
+
+    def mark_sent(self, *pendings: PendingCommand) -> None:
+        """
+        コマンドを送信した時刻を記録する
+
+        Args:
+            pendings: register()の戻り値（まとめて送信したものは同時刻になる）
+        """
+        sent_at = time.monotonic()
+        for pending in pendings:
+            pending.sent_at = sent_at
+
+    def discard(self, pending: PendingCommand) -> None:
+        """
+        コマンドの完了待ちをやめる（マーカーはその後も出力から除去される）
+
+        Args:
+            pending: register()の戻り値
+        """
+        pending.done.set()
+
+    def unregister(self, *pendings: PendingCommand) -> None:
+        """
+        送信できなかったコマンドの登録を取り消す
+
+        Args:
+            pendings: register()の戻り値
+        """
+        with self._lock:
+            for pending in pendings:
+                self._pending.pop(pending.token, None)
+                pending.done.set()
+
+    @property
+    def in_flight(self) -> int:
+        """完了していないコマンドの数"""
+        with self._lock:
+            return len(self._pending)
+
+    def feed(self, text: str) -> str:
+        """
+        出力を解析し、マーカーを取り除いた出力を返す
+
+        マーカーがチャンク境界で分割される可能性がある末尾部分だけを保留し、
+        それ以外（改行のないプロンプトなど）は即座に返す。
+        完了したコマンドの通知は、戻り値を出力バッファへ格納した後に
+        release()で行う（呼ばれなかった場合は次のfeed()で通知する）。
+
+        Args:
+            text: シェルからの出力
+
+        Returns:
+            UIへ渡す出力（マーカーを除去済み）
+        """
+        self.release()
+        with self._lock:
+            if not self._pending and not self._partial:
+                return text
+
+            text = self._partial + text
+            self._partial = ""
+            now = time.monotonic()
+            out: list[str] = []
+            pos = 0
+            for match in _MARKER_RE.finditer(text):
+                self._capture(text[pos : match.start()], now, out)
+                self._handle_marker(match, now)
+                pos = match.end()
+
+            rest = text[pos:]
+            hold = self._holdback_start(rest)
+            self._capture(rest[:hold], now, out)
+            self._partial = rest[hold:]
+            return "".join(out)
+
+    def release(self) -> None:
+        """
+        feed()で完了したコマンドの待機者に通知する
+
+        run_command()から戻った時点でその出力がget_output()で読めるよう、
+        feed()の戻り値を出力バッファへ格納した後に呼ぶ。
+        """
+        with self._lock:
+            completed, self._completed = self._completed, []
+        for pending in completed:
+            pending.done.set()
+
+    def flush(self) -> str:
+        """
+        シェル終了時に保留中の出力を返し、未完了のコマンドを打ち切る
+
+        Returns:
+            保留していた出力
+        """
+        self.release()
+        with self._lock:
+            rest, self._partial = self._partial, ""
+            for pending in self._pending.values():
+                pending.result.output = "".join(pending.parts)
+                pending.done.set()
+            self._pending.clear()
+            self._active = None
+            return rest
+
+    def _capture(self, text: str, now: float, out: list[str]) -> None:
+        """通常の出力を実行中コマンドの結果に記録し、UI向けに渡す"""
+        if not text:
+            return
+        active = self._active
+        if active is not None:
+            if active.result.time_to_first_byte is None and text.strip():
+                active.result.time_to_first_byte = now - active.started_at
+            active.parts.append(text)
+        out.append(text)
+
+    def _handle_marker(self, match: re.Match, now: float) -> None:
+        """開始・終了マーカーを処理する"""
+        pending = self._pending.get(match.group("token"))
+        if pending is None:
+            return
+
+        if match.group("kind") == "BEGIN":
+            pending.started_at = now
+            pending.result.queue_time = now - pending.sent_at
+            self._active = pending
+            return
+
+        result = pending.result
+        code = match.group("code")
+        exit_code = int(code) if code not in (None, "") else 0
+        success = match.group("ok") == "1"
+        if not success and exit_code == 0:
+            # コマンドレットの失敗は終了コードを持たないため1とする
+            exit_code = 1
+        result.exit_code = exit_code
+        result.success = success
+        started_at = pending.sent_at if pending.started_at is None else pending.started_at
+        result.duration = now - started_at
+        result.output = "".join(pending.parts)
+        del self._pending[pending.token]
+        if self._active is pending:
+            self._active = None
+        self._completed.append(pending)
+
+    @staticmethod
+    def _holdback_start(text: str) -> int:
+        """
+        次のチャンクと繋がってマーカーになり得る末尾部分の開始位置を求める
+
+        Returns:
+            保留を始める位置（保留不要ならlen(text)）
+        """
+        index = text.rfind(MARKER_PREFIX)
+        if index != -1:
+            tail = text[index:]
+            if len(tail) < _MAX_MARKER_LENGTH and "\n" not in tail:
+                # 終端の "__" まで届いていない途中のマーカー
+                return index
+            return len(text)
+        for length in range(min(len(MARKER_PREFIX) - 1, len(text)), 0, -1):
+            if MARKER_PREFIX.startswith(text[-length:]):
+                return len(text) - length
+        return len(text)
@@ -0,0 +1,279 @@
+"""セッションイベントモジュール
+
+セッションの作成・起動・終了・出力・busy / idle の変化・出力の破棄を
+型付きのイベントとして購読者へ配信する。UIや外部ツールは全セッションを
+定期的に確認する代わりに、イベントを受け取った時だけ状態を読み直す。
+
+イベントは「状態が変わった」ことの通知で、値はその時点のもの。
+受け取った側は必要に応じてセッションから現在の状態を読む。
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+from .hibernation import activity_marker, is_session_busy
+
+
+@dataclass(frozen=True)
+class SessionEvent:
+    """セッションイベントの基底クラス"""
+
+    session_id: str
+
+
+@dataclass(frozen=True)
+class SessionCreated(SessionEvent):
+    """セッションが作成された"""
+
+    interactive: bool = False
+
+
+@dataclass(frozen=True)
+class SessionDeleted(SessionEvent):
+    """セッションが削除された"""
+
+
+@dataclass(frozen=True)
+class SessionStarted(SessionEvent):
+    """シェルが起動した（再起動・休止からの再開を含む）"""
+
+
+@dataclass(frozen=True)
+class SessionExited(SessionEvent):
+    """シェルが終了した"""
+
+    requested: bool = False  # stop()・休止などで終了を要求していた場合True
+
+
+@dataclass(frozen=True)
+class OutputAvailable(SessionEvent):
+    """新しい出力が届いた（進捗表示の行の書き換えを含む）"""
+
+    cursor: Optional[int] = None  # 出力位置（取得できない場合はNone）
+
+
+@dataclass(frozen=True)
+class BusyStateChanged(SessionEvent):
+    """処理中（busy）かどうかが変わった"""
+
+    busy: bool = False
+
+
+@dataclass(frozen=True)
+class OutputDropped(SessionEvent):
+    """出力バッファがあふれ、出力を破棄した"""
+
+    dropped_lines: int = 0  # 破棄した行数（累計）
+    dropped_chars: int = 0  # 破棄した文字数（累計）
+
+
+EventCallback = Callable[[SessionEvent], None]
+
+
+@dataclass(frozen=True)
+class _Subscription:
+    """購読者と受け取るイベントの型"""
+
+    callback: EventCallback
+    event_types: Optional[tuple[type, ...]]
+
+
+class EventBus:
+    """セッションイベントを購読者へ配信するクラス（スレッドセーフ）
+
+    publish()は呼び出したスレッド（読み取りスレッド・リアクタースレッドなど）で
+    購読者を順に呼ぶ。購読者は処理を長く止めないこと（UIは受け取った
+    イベントをキューへ渡すだけにする）。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # 配信中に変更されても影響しないよう、変更のたびに作り直す
+        self._subscriptions: tuple[_Subscription, ...] = ()
+
+    def subscribe(
+        self,
+        callback: EventCallback,
+        event_types: Optional[Union[type, tuple[type, ...]]] = None,
+    ) -> None:
+        """
+        イベントを購読する
+
+        Args:
+            callback: イベントごとに呼ばれるコールバック
+            event_types: 受け取るイベントの型（Noneの場合はすべて）
+        """
+        if isinstance(event_types, type):
+            event_types = (event_types,)
+        with self._lock:
+            self._subscriptions += (_Subscription(callback, event_types),)
+
+    def unsubscribe(self, callback: EventCallback) -> None:
+        """
+        購読を解除する（未登録なら何もしない）
+
+        Args:
+            callback: subscribe()で登録したコールバック
+        """
+        with self._lock:
+            self._subscriptions = tuple(
+                s for s in self._subscriptions if s.callback != callback
+            )
+
+    @property
+    def has_subscribers(self) -> bool:
+        """購読者がいるか"""
+        return bool(self._subscriptions)
+
+    def publish(self, event: SessionEvent) -> None:
+        """
+        イベントを購読者へ配信する
+
+        Args:
+            event: 配信するイベント
+        """
+        for subscription in self._subscriptions:
+            types = subscription.event_types
+            if types is not None and not isinstance(event, types):
+                continue
+            try:
+                subscription.callback(event)
+            except Exception:
+                # 1つの購読者の例外で他の購読者と読み取りスレッドを止めない
+                pass
+
+
+@dataclass(frozen=True)
+class _ObservedState:
+    """イベントの判定に使うセッションの状態"""
+
+    alive: bool
+    cursor: Optional[int]
+    pending_line: Optional[str]
+    busy: bool
+    dropped_lines: int
+    dropped_chars: int
+
+
+def _observe(session: Any) -> _ObservedState:
+    """セッションの現在の状態を読み取る（プロセスの確認などのシステムコールは行わない）"""
+    alive = (
+        session.process is not None
+        and not session.stop_requested
+        and not session.output_ended
+    )
+    stats = session.output_stats
+    return _ObservedState(
+        alive=alive,
+        cursor=activity_marker(session),
+        pending_line=session.pending_line,
+        busy=is_session_busy(session),
+        dropped_lines=stats.dropped_lines if stats is not None else 0,
+        dropped_chars=stats.dropped_chars if stats is not None else 0,
+    )
+
+
+def _diff(
+    session_id: str, before: _ObservedState, after: _ObservedState, session: Any
+) -> list[SessionEvent]:
+    """状態の変化をイベントにする"""
+    events: list[SessionEvent] = []
+    if after.alive and not before.alive:
+        events.append(SessionStarted(session_id))
+    if after.cursor != before.cursor or after.pending_line != before.pending_line:
+        events.append(OutputAvailable(session_id, after.cursor))
+    if (after.dropped_lines, after.dropped_chars) > (
+        before.dropped_lines,
+        before.dropped_chars,
+    ):
+        events.append(
+            OutputDropped(session_id, after.dropped_lines, after.dropped_chars)
+        )
+    if after.busy != before.busy:
+        events.append(BusyStateChanged(session_id, after.busy))
+    if before.alive and not after.alive:
+        events.append(
+            SessionExited(
+                session_id,
+                requested=session.stop_requested,
+            )
+        )
+    return events
+
+
+@dataclass
+class _Watched:
+    """変化の通知を受け取っているセッション"""
+
+    session: Any
+    state: _ObservedState
+    # 同じセッションの通知を順に処理し、状態の前後関係を保つ
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class SessionEventSource:
+    """セッションの状態の変化をイベントにして発行するクラス（スレッドセーフ）
+
+    セッションのset_change_listener()で変化の通知を受け取り、前回の状態と
+    比べて変わったものだけをイベントにする。購読者がいない間も状態は読み直し、
+    発行だけを省く（後から購読した側に古い状態との差分が届かないようにする）。
+    """
+
+    def __init__(self, bus: EventBus):
+        """
+        Args:
+            bus: イベントの配信先
+        """
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._watched: dict[str, _Watched] = {}
+
+    def watch(self, session_id: str, session: Any) -> None:
+        """
+        セッションの変化の通知を受け取るよう登録する
+
+        Args:
+            session_id: セッション識別子
+            session: set_change_listener()を持つセッション（持たない場合は何もしない）
+        """
+        if not hasattr(session, "set_change_listener"):
+            return
+        with self._lock:
+            self._watched[session_id] = _Watched(session, _observe(session))
+        session.set_change_listener(lambda: self.update(session_id, session))
+
+    def forget(self, session_id: str) -> None:
+        """
+        セッションの登録を解除する（未登録なら何もしない）
+
+        Args:
+            session_id: セッション識別子
+        """
+        with self._lock:
+            watched = self._watched.pop(session_id, None)
+        if watched is not None:
+            watched.session.set_change_listener(None)
+
+    def update(self, session_id: str, session: Any) -> None:
+        """
+        セッションの状態を読み直し、変化をイベントとして発行する
+
+        セッションの各スレッドから呼ばれる。セッション内部のロックを
+        保持したまま呼ばないこと。
+
+        Args:
+            session_id: セッション識別子
+            session: セッション
+        """
+        with self._lock:
+            watched = self._watched.get(session_id)
+        if watched is None or watched.session is not session:
+            return
+        with watched.lock:
+            after = _observe(session)
+            before, watched.state = watched.state, after
+        if not self.bus.has_subscribers:
+            return
+        for event in _diff(session_id, before, after, session):
+            self.bus.publish(event)
@@ -0,0 +1,238 @@
+"""アイドルセッションの休止（ハイバネーション）モジュール
+
+セッションごとにシェルプロセス・読み取り用のfdやスレッド・出力バッファを
+持つため、同時に開けるセッション数には限りがある。一定時間使われていない
+セッションを休止し（出力を一時ファイルへ退避してプロセスを停止し、
+カレントディレクトリを記録する）、フォーカスやコマンド送信の
+時点で透過的に再開することで、多数の論理セッションを少数の実行中
+セッションで支える。
+
+カレントディレクトリは休止の前にシェルへ問い合わせる（PowerShellの
+Set-Locationはプロセスのカレントディレクトリを変えないため）。
+再開は新しいシェルの起動になるため、引き継げない状態がある。
+- シェル内で設定した環境変数・変数・関数は失われる
+- 処理中などで問い合わせに応答しなかったPowerShellは、移動先を記録できず
+  元の作業ディレクトリで再開する
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .command import is_powershell
+from .prompt_detector import STATE_BUSY
+
+# 休止の前にシェルへカレントディレクトリを問い合わせる最大秒数
+CWD_QUERY_TIMEOUT = 2.0
+
+
+@dataclass
+class HibernatedSession:
+    """休止中のセッションの記録"""
+
+    session_id: str
+    working_dir: str  # 休止時のシェルのカレントディレクトリ（取得できなければ作業ディレクトリ）
+    spill_path: Optional[str]  # 退避した出力のファイル（出力がなければNone）
+    spilled_chars: int  # 退避した文字数
+    hibernated_at: float  # 休止した時刻（time.monotonic()）
+
+
+@dataclass(frozen=True)
+class HibernationStats:
+    """休止の統計情報"""
+
+    live_sessions: int  # 実行中のセッション数
+    hibernated_sessions: int  # 休止中のセッション数
+    hibernations: int  # 休止した回数（累計）
+    revivals: int  # 再開した回数（累計）
+    spilled_chars: int  # 現在ディスクへ退避している文字数
+
+
+class ScrollbackSpill:
+    """休止中のセッションの出力を一時ファイルへ退避するクラス（スレッドセーフ）"""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: 退避先ディレクトリ（Noneの場合は一時ディレクトリを作成し、
+                       close()で削除する）
+        """
+        self._directory = directory
+        self._own_directory = directory is None
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Optional[str]:
+        """退避先ディレクトリ（まだ作成していない場合はNone）"""
+        return self._directory
+
+    def write(self, session_id: str, text: str) -> Optional[str]:
+        """
+        出力をファイルへ書き出す
+
+        Args:
+            session_id: セッション識別子（ファイル名に使う）
+            text: 退避する出力
+
+        Returns:
+            書き出したファイルのパス（出力が空の場合はNone）
+        """
+        if not text:
+            return None
+        with self._lock:
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix="claude-session-spill-")
+            else:
+                os.makedirs(self._directory, exist_ok=True)
+            self._counter += 1
+            safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in session_id)
+            path = os.path.join(self._directory, f"{safe_id}-{self._counter}.log")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def read(self, path: Optional[str]) -> str:
+        """
+        退避した出力を読み戻してファイルを削除する
+
+        Args:
+            path: write()が返したパス（Noneの場合は空文字列を返す）
+
+        Returns:
+            退避していた出力
+        """
+        if path is None:
+            return ""
+        with open(path, encoding="utf-8", newline="") as f:
+            text = f.read()
+        self.discard(path)
+        return text
+
+    def discard(self, path: Optional[str]) -> None:
+        """
+        退避したファイルを読まずに削除する
+
+        Args:
+            path: write()が返したパス（Noneの場合は何もしない）
+        """
+        if path is None:
+            return
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """自分で作成した一時ディレクトリを削除する"""
+        with self._lock:
+            if self._own_directory and self._directory is not None:
+                shutil.rmtree(self._directory, ignore_errors=True)
+                self._directory = None
+
+
+def process_cwd(pid: Any) -> Optional[str]:
+    """
+    プロセスのカレントディレクトリを取得する（/procのあるLinux用）
+
+    PowerShellのSet-Locationはプロセスのカレントディレクトリを変えないため、
+    PowerShellでは起動時のディレクトリが返る。
+
+    Args:
+        pid: プロセスID
+
+    Returns:
+        カレントディレクトリ（取得できない場合はNone）
+    """
+    if not isinstance(pid, int) or pid <= 0:
+        return None
+    try:
+        return os.readlink(f"/proc/{pid}/cwd")
+    except OSError:
+        return None
+
+
+def shell_cwd(session: Any, timeout: float = CWD_QUERY_TIMEOUT) -> Optional[str]:
+    """
+    セッションのシェルのカレントディレクトリを取得する
+
+    コマンドの完了を検出できるセッション（run_command()を持つ）ではシェルへ
+    問い合わせる（PowerShellは(Get-Location).Path、それ以外はpwd）。応答が
+    なければ/procから取得するが、PowerShellではプロセスのカレントディレクトリが
+    Set-Locationに追従しないため取得しない（process_cwd()を参照）。
+
+    Args:
+        session: セッション
+        timeout: シェルの応答を待つ最大秒数
+
+    Returns:
+        カレントディレクトリ（取得できない場合はNone）
+    """
+    powershell = is_powershell(session.shell_command)
+    if hasattr(session, "run_command"):
+        query = "(Get-Location).Path" if powershell else "pwd"
+        try:
+            result = session.run_command(query, timeout=timeout)
+        except (RuntimeError, TimeoutError):
+            result = None
+        if result is not None and result.success and result.output.strip():
+            # 最後の行がパス（プロファイルなどが出力した行は飛ばす）
+            return result.output.strip().splitlines()[-1].strip()
+    if powershell:
+        return None
+    return process_cwd(session.process.pid if session.process is not None else None)
+
+
+def is_session_busy(
+    session: Any, quiet_seconds: Optional[float] = None, now: Optional[float] = None
+) -> bool:
+    """
+    休止させてはいけない処理中のセッションか判定する
+
+    プロンプト検出がbusyのセッションと、完了待ちのrun_command()が
+    あるセッションは処理中とみなす。quiet_secondsを指定した場合は、
+    send_command()の入力が書き込み待ちのセッションと、send_command()の後
+    その秒数以内に入力または出力があったセッションも処理中とみなす
+    （send_command()は完了を追跡しないため、出力が途切れるまでを処理中とする）。
+
+    Args:
+        session: セッション
+        quiet_seconds: send_command()・send_commands()の完了とみなす無出力の秒数（Noneの場合は考慮しない）
+        now: 現在時刻（time.monotonic()、Noneの場合は現在）
+
+    Returns:
+        処理中の場合True
+    """
+    detector = session.prompt_detector
+    if detector is not None and detector.state == STATE_BUSY:
+        return True
+    if session.commands_in_flight > 0:
+        return True
+    if quiet_seconds is None:
+        return False
+    if session.input_backpressured:
+        return True
+    activity = session.command_activity_at
+    if activity is None:
+        return False
+    return (time.monotonic() if now is None else now) - activity < quiet_seconds
+
+
+def activity_marker(session: Any) -> Optional[int]:
+    """
+    出力の進み具合を表す値を取得する（値が変わっていれば出力があった）
+
+    Args:
+        session: セッション
+
+    Returns:
+        出力位置または受信文字数（取得できない場合はNone）
+    """
+    cursor = session.output_cursor
+    if cursor is not None:
+        return cursor
+    return session.read_stats.chars
@@ -1,11 +1,30 @@
-"""インタラクティブPowerShellセッション（Windows専用）"""
+"""インタラクティブPowerShellセッション
 
+Windowsではpywinptyの疑似端末上で、POSIXではos.openpty()の疑似端末上で
+シェルを起動する。POSIXではマスター側fdを共有リアクターに登録するため、
+セッションごとの読み取りスレッドを持たない。
+"""
+
+import codecs
+import dataclasses
 import os
 import platform
 import queue
+import re
+import shutil
 import threading
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence, Union
+
+from .metrics import SessionMetrics
+from .output_queue import CoalescingQueue, OutputReadStats
+from .posix_pty import DEFAULT_WINDOW_SIZE, POSIX_PTY_AVAILABLE, PosixPtyProcess
+from .process_tree import kill_process_tree
+from .prompt_detector import PromptDetector
+from .reactor import AdaptiveReadSize, OutputReactor
+from .stdin_writer import StdinWriter, StdinWriterStats
+from .terminal_screen import DEFAULT_SCROLLBACK_LINES, TerminalScreen
 
 # Windows環境でのみpywinptyをインポート
 if platform.system() == "Windows":
@@ -20,29 +39,107 @@ else:
     PYWINPTY_AVAILABLE = False
     PtyProcess = None  # type: ignore
 
+# 現在の環境でインタラクティブセッションを利用できるか
+INTERACTIVE_AVAILABLE = PYWINPTY_AVAILABLE or POSIX_PTY_AVAILABLE
+
+# Windowsで起動するシェル
+WINDOWS_SHELL_COMMAND = ["powershell", "-NoLogo", "-NoProfile"]
+
+# Windowsの読み取りスレッドが1回に読み取る文字数（負荷に応じて増減）
+WINDOWS_READ_SIZE = 1024
+WINDOWS_MAX_READ_SIZE = 64 * 1024
+
+# PowerShellの既定プロンプト（"PS C:\\path> "、後続の制御シーケンスを許容）
+PROMPT_PATTERN = re.compile(r"PS [^\r\n>]*> ?(?:\x1b\[[0-9;?]*[A-Za-z])*$")
+
+# read_until()の終了理由
+READ_UNTIL_MATCHED = "matched"  # パターンに一致した
+READ_UNTIL_IDLE = "idle"  # idle_timeout秒間出力がなかった
+READ_UNTIL_TIMEOUT = "timeout"  # timeout秒経過した
+READ_UNTIL_EXITED = "exited"  # プロセスが終了した
+
+# パターン照合で直前の出力から遡る最大文字数
+READ_UNTIL_LOOKBEHIND = 4096
+
+
+@dataclass(frozen=True)
+class ReadUntilResult:
+    """read_until()の結果"""
+
+    output: str  # 読み取った出力（一致した場合は一致部分の末尾まで）
+    reason: str  # 終了理由（READ_UNTIL_*）
+    match: Optional[re.Match] = None  # 一致結果（照合対象は出力末尾の一部）
+    elapsed: float = 0.0  # 所要時間（秒）
+
+
+def default_posix_shell_command() -> list[str]:
+    """
+    POSIXで起動する既定のシェルを返す
+
+    PowerShell（pwsh）がインストールされていればそれを使い、
+    なければログインシェル（$SHELL、未設定なら/bin/sh）を使う。
+
+    Returns:
+        シェル起動コマンド
+    """
+    if shutil.which("pwsh"):
+        return ["pwsh", "-NoLogo", "-NoProfile"]
+    return [os.environ.get("SHELL") or "/bin/sh"]
+
 
 class InteractivePowerShellSession:
-    """インタラクティブPowerShellセッション（Windows専用）"""
+    """インタラクティブPowerShellセッション（Windows / POSIX）"""
 
-    def __init__(self, session_id: str, working_dir: str):
+    # 出力は画面モデルへ反映するため、行単位の出力バッファ・カーソル・上書き中の行は持たない
+    # （出力の進み具合はread_statsで分かる）
+    output_cursor = None
+    output_stats = None
+    pending_line = None
+    # コマンドの完了はプロンプト検出で判定する（run_command()・send_command()の追跡はしない）
+    commands_in_flight = 0
+    command_activity_at = None
+
+    def __init__(
+        self,
+        session_id: str,
+        working_dir: str,
+        *,
+        prompt_patterns: Optional[Iterable[str]] = None,
+        shell_command: Optional[Sequence[str]] = None,
+        reactor: Optional[OutputReactor] = None,
+        dimensions: tuple[int, int] = DEFAULT_WINDOW_SIZE,
+        encoding: str = "utf-8",
+        scrollback_lines: int = DEFAULT_SCROLLBACK_LINES,
+        metrics: Optional[SessionMetrics] = None,
+    ):
         """
         Args:
             session_id: セッション識別子
             working_dir: 作業ディレクトリパス
+            prompt_patterns: busy / idle 判定に使う追加のプロンプト正規表現
+                             （claude、Python REPLなど）
+            shell_command: シェル起動コマンド（Noneの場合はOSごとの既定）
+            reactor: 出力を読み取る共有リアクター（POSIXのみ。
+                     Noneの場合はセッション専用のリアクターを使う）
+            dimensions: 端末サイズ（行, 列）
+            encoding: 端末の文字コード（POSIXのみ）
+            scrollback_lines: 画面モデルのスクロールバック行数
+            metrics: 出力量・コマンド数の記録先（Noneの場合は記録しない）
 
         Raises:
-            RuntimeError: Windows以外のOSで実行した場合、
-                         またはpywinptyが利用不可の場合
+            RuntimeError: 疑似端末を利用できないOSで実行した場合、
+                         またはWindowsでpywinptyが利用不可の場合
         """
         # OS検知
-        if platform.system() != "Windows":
+        self._posix = platform.system() != "Windows"
+        if self._posix and not POSIX_PTY_AVAILABLE:
             raise RuntimeError(
-                "InteractivePowerShellSession is only supported on Windows. "
+                "InteractivePowerShellSession is not supported on this platform. "
                 f"Current OS: {platform.system()}"
             )
 
         # pywinpty可用性チェック
-        if not PYWINPTY_AVAILABLE:
+        if not self._posix and not PYWINPTY_AVAILABLE:
             raise RuntimeError(
                 "pywinpty is not available. "
                 "Please install it: pip install pywinpty"
@@ -51,20 +148,66 @@ class InteractivePowerShellSession:
         self.session_id = session_id
         self.working_dir = working_dir
         self.env = os.environ.copy()  # 環境変数を完全継承
-        self.process: Optional[PtyProcess] = None
+        if self._posix:
+            # 端末種別が未設定だとシェルの行編集が無効になる
+            self.env.setdefault("TERM", "xterm-256color")
+        if shell_command:
+            self.shell_command = list(shell_command)
+        elif self._posix:
+            self.shell_command = default_posix_shell_command()
+        else:
+            self.shell_command = list(WINDOWS_SHELL_COMMAND)
+        self.dimensions = dimensions
+        self.encoding = encoding
+        self.reactor = reactor
+        self.metrics = metrics
+        self.process: Optional[Union[PtyProcess, PosixPtyProcess]] = None
+        # 休止中か（hibernate()で停止し、resume()で再開する）
+        self.hibernated = False
+
+        # POSIXの読み書き用（start()で作成）
+        self._own_reactor = False
+        self._pty_fd: Optional[int] = None
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._stdin_writer: Optional[StdinWriter] = None
 
         # タイムアウト制御用
-        self._output_queue: queue.Queue = queue.Queue()
+        # 短時間に届いたチャンクはまとめて格納する
+        self._output_queue = CoalescingQueue()
+        self._read_sizer = AdaptiveReadSize(
+            WINDOWS_READ_SIZE, WINDOWS_READ_SIZE, WINDOWS_MAX_READ_SIZE
+        )
         self._output_thread: Optional[threading.Thread] = None
         self._stop_flag = threading.Event()
+        # 出力がEOFに達したか（start()で解除）と、予期しない終了の通知先
+        self._output_ended = False
+        self._exit_listener: Optional[Callable[[], None]] = None
+        # 出力・コマンド・起動状態が変わった時の通知先
+        self._change_listener: Optional[Callable[[], None]] = None
+        # read_until()で一致部分より後ろに届いていた未読の出力
+        self._unread = ""
+        # プロンプト検出による busy / idle 判定
+        self.prompt_detector = PromptDetector(prompt_patterns)
+        # エスケープシーケンスを解釈した画面（UIは変化した行だけを描画する）
+        self.screen = TerminalScreen(*dimensions, scrollback_lines=scrollback_lines)
 
     def start(self) -> None:
-        """疑似端末でPowerShellを起動"""
+        """疑似端末でシェルを起動
+
+        Raises:
+            RuntimeError: シェルを起動できない場合
+        """
+        self._output_ended = False
+        if self._posix:
+            self._start_posix()
+            return
+
         try:
             self.process = PtyProcess.spawn(
-                ["powershell", "-NoLogo", "-NoProfile"],
+                self.shell_command,
                 cwd=self.working_dir,
                 env=self.env,
+                dimensions=self.dimensions,
             )
         except FileNotFoundError:
             raise RuntimeError("PowerShell not found in PATH")
@@ -79,6 +222,64 @@ class InteractivePowerShellSession:
             target=self._read_output_loop, daemon=True
         )
         self._output_thread.start()
+        self._notify_change()
+
+    def _start_posix(self) -> None:
+        """POSIX疑似端末でシェルを起動し、マスター側fdをリアクターに登録"""
+        try:
+            self.process = PosixPtyProcess.spawn(
+                self.shell_command,
+                cwd=self.working_dir,
+                env=self.env,
+                dimensions=self.dimensions,
+            )
+        except FileNotFoundError:
+            raise RuntimeError(f"Shell not found: {self.shell_command[0]}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to start interactive session: {e}")
+
+        self._stop_flag.clear()
+        if self.reactor is None:
+            self.reactor = OutputReactor()
+            self._own_reactor = True
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        self._pty_fd = self.process.fd
+        # 読み取り用の登録と衝突しないよう、書き込みは複製したfdで行う
+        stream = os.fdopen(os.dup(self._pty_fd), "wb", buffering=0)
+        self._stdin_writer = StdinWriter(stream, reactor=self.reactor)
+        self.reactor.register(self._pty_fd, self._on_pty_output)
+        self._notify_change()
+
+    def _on_pty_output(self, data: bytes) -> None:
+        """疑似端末の出力を受け取る（リアクタースレッドで実行）
+
+        Args:
+            data: 読み取ったバイト列（EOF時は空）
+        """
+        if self.metrics is not None and data:
+            self.metrics.output_bytes.inc(len(data))
+        # マルチバイト文字がチャンク境界で分断されても正しくデコードする
+        try:
+            text = self._decoder.decode(data, final=not data)
+            if text:
+                if self.metrics is not None:
+                    self.metrics.output_lines.inc(text.count("\n"))
+                self.prompt_detector.feed(text)
+                self.screen.feed(text)
+                self._output_queue.put(text)
+                self._notify_change()
+        finally:
+            if not data:
+                # EOF後はコールバックが呼ばれないため、格納・通知に失敗しても終了は記録する
+                self._on_output_end()
+
+    def _on_output_end(self) -> None:
+        """読み取りの終了を記録し、予期しない終了なら通知する"""
+        self._output_ended = True
+        listener = self._exit_listener
+        if listener is not None and not self._stop_flag.is_set():
+            listener()
+        self._notify_change()
 
     def _read_output_loop(self) -> None:
         """バックグラウンドで出力を読み取り、キューに格納
@@ -88,12 +289,20 @@ class InteractivePowerShellSession:
         """
         while not self._stop_flag.is_set() and self.process:
             try:
-                # ノンブロッキングで1024バイトずつ読み取り
-                chunk = self.process.read(1024)
+                # 出力が溜まっている間は読み取りサイズを増やす
+                chunk = self.process.read(self._read_sizer.size)
+                self._read_sizer.update(len(chunk))
                 if chunk:
+                    if self.metrics is not None:
+                        self.metrics.output_bytes.inc(len(chunk))
+                        self.metrics.output_lines.inc(chunk.count("\n"))
+                    self.prompt_detector.feed(chunk)
+                    self.screen.feed(chunk)
                     self._output_queue.put(chunk)
+                    self._notify_change()
             except Exception:
                 break
+        self._on_output_end()
 
     def send_command(self, command: str) -> None:
         """コマンドを送信
@@ -106,7 +315,33 @@ class InteractivePowerShellSession:
         """
         if not self.is_running():
             raise RuntimeError("Session is not running")
-        self.process.write(command + "\n")
+        self.prompt_detector.command_sent()
+        if self._stdin_writer is None:
+            self.process.write(command + "\n")
+        elif not self._stdin_writer.write((command + "\n").encode(self.encoding)):
+            raise RuntimeError("Input queue is full")
+        if self.metrics is not None:
+            self.metrics.commands_sent.inc()
+        self._notify_change()
+
+    def set_window_size(self, rows: int, cols: int) -> None:
+        """端末サイズを変更
+
+        Args:
+            rows: 行数
+            cols: 列数
+
+        Raises:
+            ValueError: 行数・列数が正でない場合
+            RuntimeError: セッションが実行中でない場合
+        """
+        if rows <= 0 or cols <= 0:
+            raise ValueError("rows and cols must be positive")
+        if not self.is_running():
+            raise RuntimeError("Session is not running")
+        self.process.setwinsize(rows, cols)
+        self.screen.resize(rows, cols)
+        self.dimensions = (rows, cols)
 
     def read_output(self, timeout: Optional[int] = None) -> str:
         """出力を読み取り（タイムアウト付き）
@@ -123,15 +358,11 @@ class InteractivePowerShellSession:
         if not self.is_running():
             raise RuntimeError("Session is not running")
 
-        output_chunks = []
+        output_chunks = [self._take_unread()]
 
         if timeout is None:
             # タイムアウトなし：現在のキューをすべて取得
-            while not self._output_queue.empty():
-                try:
-                    output_chunks.append(self._output_queue.get_nowait())
-                except queue.Empty:
-                    break
+            output_chunks.append(self._output_queue.get_all())
         else:
             # タイムアウトあり：指定時間待機して取得
             end_time = time.time() + timeout
@@ -144,6 +375,125 @@ class InteractivePowerShellSession:
 
         return "".join(output_chunks)
 
+    def read_until(
+        self,
+        pattern: Union[str, re.Pattern, None] = None,
+        timeout: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> ReadUntilResult:
+        """パターンが現れるまで出力を読み取り（一致した時点で即座に返す）
+
+        届いた出力ごとに、蓄積した出力の末尾（最大READ_UNTIL_LOOKBEHIND文字）
+        だけを照合するため、長い出力でも照合コストは増えない。
+        一致部分より後ろの出力は次回の読み取りに残す。
+
+        Args:
+            pattern: 待つ正規表現（Noneの場合はPowerShellのプロンプト）
+            timeout: 全体の最大待機秒数（Noneの場合は無制限）
+            idle_timeout: 出力が途絶えたとみなす秒数（Noneの場合は判定しない）
+
+        Returns:
+            読み取った出力と終了理由
+
+        Raises:
+            RuntimeError: セッションが実行中でない場合
+        """
+        if not self.is_running():
+            raise RuntimeError("Session is not running")
+
+        if pattern is None:
+            regex = PROMPT_PATTERN
+        elif isinstance(pattern, str):
+            regex = re.compile(pattern)
+        else:
+            regex = pattern
+
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        last_output = start
+        output_chunks: list[str] = []
+        window = ""
+
+        chunk = self._take_unread()
+        while True:
+            if chunk:
+                last_output = time.monotonic()
+                # 前回までの末尾に新しい出力を繋げて照合する
+                offset = max(0, len(window) - READ_UNTIL_LOOKBEHIND)
+                window = window[offset:] + chunk
+                match = regex.search(window)
+                if match:
+                    # 一致部分より後ろは次回の読み取りへ回す
+                    rest = min(len(window) - match.end(), len(chunk))
+                    if rest:
+                        self._unread = chunk[len(chunk) - rest :] + self._unread
+                        chunk = chunk[: len(chunk) - rest]
+                    output_chunks.append(chunk)
+                    return ReadUntilResult(
+                        "".join(output_chunks),
+                        READ_UNTIL_MATCHED,
+                        match,
+                        time.monotonic() - start,
+                    )
+                output_chunks.append(chunk)
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                reason = READ_UNTIL_TIMEOUT
+                break
+            if idle_timeout is not None and now - last_output >= idle_timeout:
+                reason = READ_UNTIL_IDLE
+                break
+            if not self.is_running() and self._output_queue.empty():
+                reason = READ_UNTIL_EXITED
+                break
+
+            # 終了判定のため最大0.1秒ごとに起きる
+            wait = 0.1
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            if idle_timeout is not None:
+                wait = min(wait, last_output + idle_timeout - now)
+            try:
+                chunk = self._output_queue.get(timeout=max(wait, 0))
+            except queue.Empty:
+                chunk = ""
+
+        return ReadUntilResult(
+            "".join(output_chunks), reason, None, time.monotonic() - start
+        )
+
+    @property
+    def input_backpressured(self) -> bool:
+        """シェルが入力を読み取らず、書き込み待ちが残っているか"""
+        writer = self._stdin_writer
+        return writer is not None and writer.backpressured
+
+    @property
+    def input_stats(self) -> Optional[StdinWriterStats]:
+        """標準入力の書き込みキューの統計情報（Windows・未起動の場合はNone）"""
+        writer = self._stdin_writer
+        return writer.stats if writer is not None else None
+
+    @property
+    def read_stats(self) -> OutputReadStats:
+        """出力読み取りの統計情報（チャンク数/秒、平均チャンクサイズ、キューの深さなど）"""
+        if self._pty_fd is not None and self.reactor is not None:
+            read_size = self.reactor.read_size_for(self._pty_fd)
+        else:
+            read_size = self._read_sizer.size
+        return dataclasses.replace(self._output_queue.stats, read_size=read_size)
+
+    @property
+    def state(self) -> str:
+        """プロンプト検出による状態（"unknown" / "busy" / "idle"）"""
+        return self.prompt_detector.state
+
+    def _take_unread(self) -> str:
+        """read_until()が残した未読の出力を取り出す"""
+        unread, self._unread = self._unread, ""
+        return unread
+
     def is_running(self) -> bool:
         """セッションが実行中か確認
 
@@ -152,18 +502,173 @@ class InteractivePowerShellSession:
         """
         return self.process is not None and self.process.isalive()
 
-    def stop(self) -> None:
+    def stop(self, timeout: float = 2.0) -> bool:
         """セッションを終了
 
-        出力読み取りスレッドを停止し、プロセスを終了します。
+        プロセスに終了を要求し、timeout秒以内に終了しなければ
+        プロセスツリーごと強制終了します。
+
+        Args:
+            timeout: 強制終了へ切り替えるまでの秒数
+
+        Returns:
+            強制終了が必要だった場合True
         """
-        self._stop_flag.set()
+        self.request_stop()
+        if self.wait_stopped(timeout):
+            return False
+        self.force_stop()
+        return True
 
-        if self._output_thread and self._output_thread.is_alive():
-            self._output_thread.join(timeout=2)
+    def hibernate(self, timeout: float = 2.0) -> str:
+        """休止のためにシェルを停止し、画面の内容を取り出す
+
+        画面モデルは空の状態に作り直し、スクロールバックのメモリを解放する。
+
+        Args:
+            timeout: 強制終了へ切り替えるまでの秒数
+
+        Returns:
+            スクロールバックと画面の内容（行区切りは CR LF）
+        """
+        self.stop(timeout)
+        screen = self.screen
+        lines = list(screen.scrollback) + screen.display()
+        while lines and not lines[-1]:
+            lines.pop()
+        self.screen = TerminalScreen(
+            *self.dimensions, scrollback_lines=screen.scrollback_lines
+        )
+        self._output_queue.get_all()
+        self._unread = ""
+        self.hibernated = True
+        self._notify_change()
+        return "\r\n".join(lines)
+
+    def resume(self, scrollback: str = "") -> None:
+        """休止したセッションを再開
+
+        退避していた内容を画面モデルへ戻してからシェルを起動する。
+
+        Args:
+            scrollback: hibernate()が返した内容
+
+        Raises:
+            RuntimeError: シェルを起動できない場合
+        """
+        if scrollback:
+            self.screen.feed(scrollback + "\r\n")
+        self.start()
+        self.hibernated = False
+
+    def restart(self) -> None:
+        """シェルを起動し直す（終了・停滞したシェルの復旧用）
+
+        画面モデルは保持するため、スクロールバックは再起動をまたいで残る。
+
+        Raises:
+            RuntimeError: シェルを起動できない場合
+        """
+        self.stop()
+        self.start()
+
+    @property
+    def stop_requested(self) -> bool:
+        """stop()などで終了を要求済みか（start()で解除される）"""
+        return self._stop_flag.is_set()
+
+    @property
+    def output_ended(self) -> bool:
+        """疑似端末の出力がEOFに達し、読み取りが終わったか（start()で解除される）"""
+        return self._output_ended
+
+    def set_exit_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """シェルが予期せず終了した時（出力のEOF）に呼ばれるコールバックを設定
+
+        読み取りスレッドまたはリアクタースレッドから呼ばれる。
+        stop()などで終了を要求した後のEOFでは呼ばれない。
+
+        Args:
+            listener: コールバック（Noneで解除）
+        """
+        self._exit_listener = listener
+
+    def set_change_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """出力の格納・コマンドの送信・シェルの起動と終了の後に呼ばれるコールバックを設定
+
+        変化を起こしたスレッド（読み取りスレッド・リアクタースレッド・
+        コマンドを送信したスレッド）から呼ばれる。何が変わったかは渡さないため、
+        呼ばれた側が状態を読み直す。
+
+        Args:
+            listener: コールバック（Noneで解除）
+        """
+        self._change_listener = listener
+
+    def _notify_change(self) -> None:
+        """状態が変わったことを通知"""
+        listener = self._change_listener
+        if listener is not None:
+            listener()
+
+    def request_stop(self) -> None:
+        """終了を要求（終了を待たずに戻る）"""
+        self._stop_flag.set()
+        self._notify_change()
 
         if self.process:
             try:
-                self.process.terminate(force=True)
+                # POSIXではまず端末切断とSIGTERMで穏やかに終了させる
+                self.process.terminate(force=not self._posix)
             except Exception:
                 pass
+
+    def wait_stopped(self, timeout: float = 0) -> bool:
+        """request_stop()後にプロセスの終了を待つ
+
+        Args:
+            timeout: 待機の最大秒数（0の場合は確認のみ）
+
+        Returns:
+            終了した場合True
+        """
+        deadline = time.monotonic() + timeout
+        while self.is_running():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.05, remaining))
+
+        self._release_pty()
+        self._join_output_thread()
+        return True
+
+    def force_stop(self) -> None:
+        """プロセスツリーを強制終了"""
+        if self.process:
+            kill_process_tree(getattr(self.process, "pid", None))
+            if isinstance(self.process, PosixPtyProcess):
+                self.process.wait(timeout=1)
+        self._release_pty()
+        self._join_output_thread()
+
+    def _release_pty(self) -> None:
+        """POSIX疑似端末のfdとセッション専用のリアクターを解放"""
+        if self._pty_fd is None:
+            return
+        self.reactor.unregister(self._pty_fd)
+        self._pty_fd = None
+        if self._stdin_writer is not None:
+            self._stdin_writer.close()
+            self._stdin_writer.stream.close()
+            self._stdin_writer = None
+        self.process.close()
+        if self._own_reactor:
+            self.reactor.close()
+            self.reactor = None
+            self._own_reactor = False
+
+    def _join_output_thread(self) -> None:
+        """出力読み取りスレッドの終了を待つ"""
+        if self._output_thread and self._output_thread.is_alive():
+            self._output_thread.join(timeout=1)
@@ -0,0 +1,153 @@
+"""キャリッジリターン対応の行モデルモジュール
+
+pip / npm / pytest などは進捗表示を \\r による上書きで更新する。
+これをそのまま出力バッファとテキストウィジェットへ流すと、途中経過の
+行が数千行も溜まる。このモジュールは「現在行」を保持して \\r による
+上書きをその場で反映し、行が改行で確定した時点の最終状態だけを出力する。
+
+出力されるテキストの規約:
+- 改行は LF に正規化する（CRLF は LF になる）
+- 上書き中の行（\\r を含む行）は改行で確定するまで出力しない
+- 上書きが始まる前に行の先頭部分を出力済みだった場合は、確定時に
+  "\\r" + 行全体 を出力する（読み手は最終行をその内容で置き換える）
+- 出力済みの部分行は末尾のMAX_EMITTED_CHARS文字だけ覚えておく。それより長い
+  行が上書きされた場合は先頭が分からないため、"\\r" + \\r以降の内容 を出力する
+"""
+
+import threading
+from typing import Optional
+
+# 上書きに備えて覚えておく出力済みの部分行の最大文字数
+# （改行のない長い出力でメモリと連結の手間が増え続けないようにする）
+MAX_EMITTED_CHARS = 4096
+
+
+class LineCollapser:
+    """\\r による上書きを現在行にまとめるクラス（スレッドセーフ）"""
+
+    def __init__(self) -> None:
+        # 現在行のうち出力済みの部分（上書きが始まる前の部分行。末尾だけ覚える）
+        self._emitted = ""
+        # 出力済みの部分行が長すぎて先頭を捨てたか
+        self._emitted_truncated = False
+        # 上書き中の現在行（Noneの場合は上書きなし）
+        self._line: Optional[list[str]] = None
+        self._col = 0
+        # チャンク末尾の \r（次のチャンクが \n で始まれば CRLF）
+        self._cr_pending = False
+        self._collapsed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending_line(self) -> Optional[str]:
+        """上書き中の現在行（上書き中でなければNone）"""
+        with self._lock:
+            return "".join(self._line) if self._line is not None else None
+
+    @property
+    def collapsed_updates(self) -> int:
+        """出力せずにまとめた上書きの回数"""
+        with self._lock:
+            return self._collapsed
+
+    def feed(self, text: str) -> str:
+        """
+        出力を現在行に反映し、確定した部分を返す
+
+        Args:
+            text: デコード済みの出力
+
+        Returns:
+            出力バッファへ渡すテキスト（上書き中の現在行は含まない）
+        """
+        with self._lock:
+            if self._cr_pending:
+                text = "\r" + text
+                self._cr_pending = False
+            if text.endswith("\r"):
+                text = text[:-1]
+                self._cr_pending = True
+            if not text:
+                return ""
+            if "\r" not in text and self._line is None:
+                # 上書きのない通常の出力はそのまま通す
+                newline = text.rfind("\n")
+                if newline >= 0:
+                    self._reset_emitted()
+                    self._append_emitted(text[newline + 1 :])
+                else:
+                    self._append_emitted(text)
+                return text
+
+            out = []
+            segments = text.replace("\r\n", "\n").split("\n")
+            last = len(segments) - 1
+            for i, segment in enumerate(segments):
+                if self._line is None and "\r" not in segment:
+                    out.append(segment)
+                    if i < last:
+                        self._reset_emitted()
+                    else:
+                        self._append_emitted(segment)
+                else:
+                    self._overlay(segment)
+                    if i < last:
+                        out.append(self._finish_line())
+                if i < last:
+                    out.append("\n")
+            return "".join(out)
+
+    def flush(self) -> str:
+        """
+        上書き中の現在行を確定して返す（EOF時に呼ぶ）
+
+        Returns:
+            確定した現在行（上書き中でなければ空文字列）
+        """
+        with self._lock:
+            self._cr_pending = False
+            if self._line is None:
+                self._reset_emitted()
+                return ""
+            return self._finish_line()
+
+    def _overlay(self, segment: str) -> None:
+        """\\r で区切られた部分を現在行に上書きする（ロック保持中に呼ぶ）"""
+        if self._line is None:
+            # 先頭の分からない部分行は引き継がず、\r以降の内容だけで行を作る
+            self._line = [] if self._emitted_truncated else list(self._emitted)
+            self._col = len(self._line)
+        for j, part in enumerate(segment.split("\r")):
+            if j:
+                self._col = 0
+                self._collapsed += 1
+            self._line[self._col : self._col + len(part)] = part
+            self._col += len(part)
+
+    def _finish_line(self) -> str:
+        """上書き中の現在行を確定して出力用の文字列にする（ロック保持中に呼ぶ）"""
+        line = "".join(self._line)
+        emitted = self._emitted
+        truncated = self._emitted_truncated
+        self._line = None
+        self._col = 0
+        self._reset_emitted()
+        if truncated:
+            return "\r" + line
+        if not emitted:
+            return line
+        # 出力済みの部分行から変わっていなければ出し直さない
+        return "" if line == emitted else "\r" + line
+
+    def _append_emitted(self, text: str) -> None:
+        """出力済みの部分行に追加する（末尾MAX_EMITTED_CHARS文字だけ残す。ロック保持中に呼ぶ）"""
+        if len(self._emitted) + len(text) <= MAX_EMITTED_CHARS:
+            self._emitted += text
+            return
+        self._emitted = (self._emitted + text[-MAX_EMITTED_CHARS:])[-MAX_EMITTED_CHARS:]
+        self._emitted_truncated = True
+
+    def _reset_emitted(self) -> None:
+        """出力済みの部分行を空にする（行が確定したとき。ロック保持中に呼ぶ）"""
+        self._emitted = ""
+        self._emitted_truncated = False
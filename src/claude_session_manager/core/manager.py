@@ -1,26 +1,190 @@
 """セッションマネージャーモジュール"""
 
-from typing import Optional, Union
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional, Union
 
-from .session import PowerShellSession
+from ..config import SessionManagerConfig
+from .events import EventBus, SessionCreated, SessionDeleted, SessionEventSource
+from .hibernation import (
+    HibernatedSession,
+    HibernationStats,
+    ScrollbackSpill,
+    activity_marker,
+    is_session_busy,
+    shell_cwd,
+)
+from .metrics import MetricsRegistry, SessionMetrics, process_rss_bytes
+from .pool import PoolStats, ShellPool
+from .reactor import OutputReactor, is_reactor_supported
+from .session import DEFAULT_SHELL_COMMAND, PowerShellSession
+from .watchdog import SessionHealth, SessionWatchdog
 from .interactive_session import (
+    INTERACTIVE_AVAILABLE,
     InteractivePowerShellSession,
-    PYWINPTY_AVAILABLE,
 )
 
 
+@dataclass
+class ShutdownReport:
+    """shutdown_all()の結果"""
+
+    stopped: list[str] = field(default_factory=list)  # 期限内に終了したセッション
+    hard_killed: list[str] = field(default_factory=list)  # 強制終了したセッション
+    errors: dict[str, str] = field(default_factory=dict)  # 停止処理で例外が出たセッション
+    elapsed: float = 0.0  # 所要時間（秒）
+
+
+@dataclass
+class BroadcastResult:
+    """broadcast()のセッションごとの結果"""
+
+    session_id: str
+    command: str
+    output: str = ""
+    exit_code: Optional[int] = None  # 完了しなかった場合はNone
+    success: bool = False
+    duration: Optional[float] = None  # 実行開始から完了（または打ち切り）までの秒数
+    timed_out: bool = False  # タイムアウトで結果を諦めた場合True
+    error: Optional[str] = None  # 実行できなかった・完了しなかった理由
+
+
+@dataclass
+class BroadcastReport:
+    """broadcast()の集計結果"""
+
+    command: str
+    results: list[BroadcastResult] = field(default_factory=list)  # 完了した順
+    elapsed: float = 0.0  # 所要時間（秒）
+
+    @property
+    def succeeded(self) -> list[str]:
+        """成功したセッションID"""
+        return [r.session_id for r in self.results if r.success]
+
+    @property
+    def failed(self) -> list[str]:
+        """失敗した（実行できなかった場合を含む）セッションID"""
+        return [r.session_id for r in self.results if not r.success and not r.timed_out]
+
+    @property
+    def timed_out(self) -> list[str]:
+        """タイムアウトしたセッションID"""
+        return [r.session_id for r in self.results if r.timed_out]
+
+    @property
+    def summary(self) -> str:
+        """1行の要約（例: "git pull: 3 ok, 1 failed, 0 timed out in 2.1s"）"""
+        return (
+            f"{self.command}: {len(self.succeeded)} ok, {len(self.failed)} failed, "
+            f"{len(self.timed_out)} timed out in {self.elapsed:.1f}s"
+        )
+
+
 class SessionManager:
-    """複数のPowerShellSessionを管理するクラス"""
+    """複数のPowerShellSessionを管理するクラス（スレッドセーフ）
+
+    ロックは2段階:
+    - 登録ロック: セッションの辞書と休止の記録を守る。短時間だけ保持し、
+      プロセスの起動・停止の間は保持しない
+    - セッションごとのロック: 休止・再開・削除などの状態遷移を直列化する。
+      別のセッションの操作は互いに待たない
 
-    def __init__(self, max_sessions: int = 4):
+    両方を取る場合は必ずセッションのロックを先に取る。他のセッションを
+    休止させる処理（実行中セッション数の上限など）はセッションのロックを
+    待たずに試し、操作中のセッションは飛ばす。
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 4,
+        config: Optional[SessionManagerConfig] = None,
+    ):
         """
         Args:
-            max_sessions: 最大セッション数
+            max_sessions: 最大セッション数（休止中のセッションを含む）
+            config: セッションマネージャー設定（Noneの場合は既定値）
+
+        Raises:
+            ValueError: 設定の実行中セッション数の上限が正でない場合
         """
         self.max_sessions = max_sessions
+        self.config = config or SessionManagerConfig()
         self.sessions: dict[
             str, Union[PowerShellSession, InteractivePowerShellSession]
         ] = {}
+        # 同時に実行するセッション数の上限（超えた分は使われていない順に休止する）
+        self.max_live_sessions = self.config.max_live_sessions
+        if self.max_live_sessions is not None and self.max_live_sessions <= 0:
+            raise ValueError("max_live_sessions must be positive")
+        self._hibernated: dict[str, HibernatedSession] = {}
+        self._spill = ScrollbackSpill(self.config.hibernation_dir)
+        # 最後に使われた時刻と、その時点の出力位置（LRUと休止判定に使う）
+        self._last_used: dict[str, float] = {}
+        self._activity: dict[str, Optional[int]] = {}
+        self._hibernations = 0
+        self._revivals = 0
+        # 登録ロック（sessions・休止の記録・LRU情報・統計を守る）
+        self._registry_lock = threading.Lock()
+        # セッションごとのロック（休止・再開・削除を直列化する）
+        self._session_locks: dict[str, threading.RLock] = {}
+        # 実行中セッション数の上限による休止を直列化する
+        self._budget_lock = threading.Lock()
+        # broadcast()のワーカー（呼び出しごとに作らず、最初のbroadcast()で作成して使い回す）
+        self._broadcast_executor: Optional[ThreadPoolExecutor] = None
+        self._broadcast_executor_lock = threading.Lock()
+        # 全セッションで共有する出力リアクター（利用不可の環境ではNone）
+        self.reactor: Optional[OutputReactor] = None
+        if self.config.use_io_reactor and is_reactor_supported():
+            self.reactor = OutputReactor()
+        # 起動済みシェルのウォームプール（warm_up()で事前起動を開始する）
+        self.pool: Optional[ShellPool] = None
+        if self.config.warm_pool_size > 0:
+            self.pool = ShellPool(
+                DEFAULT_SHELL_COMMAND,
+                size=self.config.warm_pool_size,
+                default_working_dir=self.config.default_working_dir,
+            )
+        # セッションの作成・起動・終了・出力などのイベント（UIやツールが購読する）
+        self.events = EventBus()
+        self._event_source = SessionEventSource(self.events)
+        # セッションごと・全体の計測値
+        self.metrics = MetricsRegistry()
+        self._register_global_metrics()
+        # 終了・停滞したセッションの監視（start_watchdog()で監視スレッドを起動する）
+        self.watchdog = SessionWatchdog(
+            self,
+            interval=self.config.watchdog_interval,
+            stall_seconds=self.config.watchdog_stall_seconds,
+            auto_restart=self.config.auto_restart,
+            backoff_initial=self.config.restart_backoff_initial,
+            backoff_max=self.config.restart_backoff_max,
+            stable_seconds=self.config.restart_stable_seconds,
+        )
+
+    def warm_up(self) -> None:
+        """ウォームプールの事前起動を開始する（プール無効時は何もしない）"""
+        if self.pool is not None:
+            self.pool.start()
+
+    def start_watchdog(self) -> None:
+        """ヘルスウォッチドッグの監視スレッドを起動する"""
+        self.watchdog.start()
+
+    @property
+    def connected(self) -> bool:
+        """セッションを操作できるか（手元のマネージャーは常にTrue。attachしたUIの代理と揃える）"""
+        return True
+
+    @property
+    def pool_stats(self) -> Optional[PoolStats]:
+        """ウォームプールの統計情報（プール無効時はNone）"""
+        return self.pool.stats if self.pool is not None else None
 
     def create_session(
         self, session_id: str, working_dir: str, interactive: bool = False
@@ -41,26 +205,49 @@ class SessionManager:
                          またはインタラクティブモードが利用不可の場合
             ValueError: 重複したセッションIDの場合
         """
-        if len(self.sessions) >= self.max_sessions:
-            raise RuntimeError(
-                f"Maximum session limit reached: {self.max_sessions}"
-            )
+        with self._registry_lock:
+            # 上限の確認と登録を同じロックの中で行う（同時に呼ばれても超えない）
+            if len(self.sessions) >= self.max_sessions:
+                raise RuntimeError(
+                    f"Maximum session limit reached: {self.max_sessions}"
+                )
 
-        if session_id in self.sessions:
-            raise ValueError(f"Session ID already exists: {session_id}")
+            if session_id in self.sessions:
+                raise ValueError(f"Session ID already exists: {session_id}")
 
-        # インタラクティブモード判定
-        if interactive:
-            if not PYWINPTY_AVAILABLE:
-                raise RuntimeError(
-                    "Interactive mode is not available. "
-                    "pywinpty is required (Windows only)."
+            # インタラクティブモード判定
+            if interactive:
+                if not INTERACTIVE_AVAILABLE:
+                    raise RuntimeError(
+                        "Interactive mode is not available. "
+                        "pywinpty is required on Windows."
+                    )
+                session = InteractivePowerShellSession(
+                    session_id,
+                    working_dir,
+                    prompt_patterns=self.config.prompt_patterns,
+                    shell_command=self.config.interactive_shell_command or None,
+                    reactor=self.reactor,
+                    scrollback_lines=self.config.terminal_scrollback_lines,
+                    metrics=SessionMetrics(self.metrics, session_id),
+                )
+            else:
+                session = PowerShellSession(
+                    session_id,
+                    working_dir,
+                    config=self.config,
+                    reactor=self.reactor,
+                    pool=self.pool,
+                    metrics=SessionMetrics(self.metrics, session_id),
                 )
-            session = InteractivePowerShellSession(session_id, working_dir)
-        else:
-            session = PowerShellSession(session_id, working_dir)
 
-        self.sessions[session_id] = session
+            self.sessions[session_id] = session
+            self._session_locks[session_id] = threading.RLock()
+            self._last_used[session_id] = time.monotonic()
+        self.watchdog.watch(session_id, session)
+        self._event_source.watch(session_id, session)
+        self._register_session_metrics(session_id, session)
+        self.events.publish(SessionCreated(session_id, interactive=interactive))
         return session
 
     def get_session(
@@ -76,24 +263,657 @@ class SessionManager:
             PowerShellSession または InteractivePowerShellSession、
             存在しない場合はNone
         """
-        return self.sessions.get(session_id)
+        with self._registry_lock:
+            return self.sessions.get(session_id)
+
+    def get_sessions(
+        self,
+    ) -> dict[str, Union[PowerShellSession, InteractivePowerShellSession]]:
+        """
+        全セッションを取得する
+
+        Returns:
+            セッションIDとセッションの辞書（呼び出し時点のコピー）
+        """
+        with self._registry_lock:
+            return dict(self.sessions)
 
     def delete_session(self, session_id: str) -> None:
         """
         セッションを削除する
 
+        登録の解除は即座に行い、プロセスの停止はその後に行う。
+        停止中に同じIDで新しいセッションを作成できる。
+
+        Args:
+            session_id: セッション識別子
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        with self._session_locked(session_id):
+            with self._registry_lock:
+                session = self.sessions.pop(session_id)
+                self._session_locks.pop(session_id, None)
+                record = self._hibernated.pop(session_id, None)
+                self._last_used.pop(session_id, None)
+                self._activity.pop(session_id, None)
+            # 停止による終了のイベントは発行しない（削除のイベントだけにする）
+            self._event_source.forget(session_id)
+            if record is not None:
+                self._spill.discard(record.spill_path)
+            else:
+                session.stop()
+        if self.pool is not None:
+            # どのセッションも使わなくなったディレクトリ専用のシェルを終了する
+            self.pool.retain(other.working_dir for other in self.get_sessions().values())
+        self.metrics.remove(session=session_id)
+        self.events.publish(SessionDeleted(session_id))
+
+    def touch(
+        self, session_id: str
+    ) -> Union[PowerShellSession, InteractivePowerShellSession]:
+        """
+        セッションが使われたことを記録する（フォーカス時などに呼ぶ）
+
+        休止中のセッションは再開する。実行中のセッション数が上限を超えた場合は、
+        最も長く使われていないセッションを休止する。
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            セッション
+
+        Raises:
+            KeyError: セッションが存在しない場合
+            RuntimeError: セッションを再開できない場合
+        """
+        with self._session_locked(session_id):
+            with self._registry_lock:
+                session = self.sessions[session_id]
+                self._last_used[session_id] = time.monotonic()
+                hibernated = session_id in self._hibernated
+            if hibernated:
+                self._revive_locked(session_id)
+        # 他のセッションを休止するので、このセッションのロックは放してから行う
+        self._enforce_live_budget(keep=session_id)
+        return session
+
+    def restart_session(
+        self, session_id: str
+    ) -> Union[PowerShellSession, InteractivePowerShellSession]:
+        """
+        セッションのシェルを起動し直す（出力バッファと画面は保持する）
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            再起動したセッション
+
+        Raises:
+            KeyError: セッションが存在しない場合
+            RuntimeError: 休止中の場合（revive()を使う）、またはシェルを起動できない場合
+            FileNotFoundError: 作業ディレクトリが存在しない場合
+        """
+        with self._session_locked(session_id):
+            with self._registry_lock:
+                session = self.sessions[session_id]
+                if session_id in self._hibernated:
+                    raise RuntimeError(f"Session is hibernated: {session_id}")
+            session.restart()
+            with self._registry_lock:
+                if self.sessions.get(session_id) is session:
+                    self._last_used[session_id] = time.monotonic()
+                    self._activity[session_id] = activity_marker(session)
+        self._restarts.inc()
+        self.metrics.counter(
+            "claude_session_restarts_total", "Shell restarts", session=session_id
+        ).inc()
+        return session
+
+    def _register_global_metrics(self) -> None:
+        """マネージャー全体の計測値を登録する"""
+        self.metrics.gauge(
+            "claude_session_manager_sessions",
+            "Registered sessions (including hibernated ones)",
+            function=lambda: len(self.list_sessions()),
+        )
+        self.metrics.gauge(
+            "claude_session_manager_live_sessions",
+            "Sessions with a running shell",
+            function=lambda: self.hibernation_stats.live_sessions,
+        )
+        self.metrics.gauge(
+            "claude_session_manager_hibernated_sessions",
+            "Hibernated sessions",
+            function=lambda: self.hibernation_stats.hibernated_sessions,
+        )
+        self.metrics.counter(
+            "claude_session_manager_hibernations_total",
+            "Sessions hibernated",
+            function=lambda: self.hibernation_stats.hibernations,
+        )
+        self.metrics.gauge(
+            "claude_session_manager_rss_bytes",
+            "Resident memory of the session manager process",
+            function=process_rss_bytes,
+        )
+        self._restarts = self.metrics.counter(
+            "claude_session_manager_restarts_total", "Shell restarts in all sessions"
+        )
+
+    def _register_session_metrics(
+        self,
+        session_id: str,
+        session: Union[PowerShellSession, InteractivePowerShellSession],
+    ) -> None:
+        """セッションの状態から読み出す計測値を登録する（削除時にまとめて外す）"""
+
+        def output_stat(name: str) -> Callable[[], Optional[int]]:
+            def read() -> Optional[int]:
+                stats = session.output_stats
+                return getattr(stats, name) if stats is not None else None
+
+            return read
+
+        def stdin_pending() -> Optional[int]:
+            stats = session.input_stats
+            return stats.pending_bytes if stats is not None else None
+
+        def shell_rss() -> Optional[int]:
+            if not session.is_running():
+                return None
+            return process_rss_bytes(session.process.pid)
+
+        self.metrics.gauge(
+            "claude_session_up",
+            "1 if the shell is running",
+            function=lambda: int(session.is_running()),
+            session=session_id,
+        )
+        self.metrics.gauge(
+            "claude_session_output_buffered_chars",
+            "Unread output held in the scrollback buffer",
+            function=output_stat("buffered_chars"),
+            session=session_id,
+        )
+        self.metrics.gauge(
+            "claude_session_output_buffered_lines",
+            "Unread lines queued for the output panel",
+            function=output_stat("buffered_lines"),
+            session=session_id,
+        )
+        self.metrics.counter(
+            "claude_session_output_dropped_lines_total",
+            "Output lines dropped by the buffer overflow policy",
+            function=output_stat("dropped_lines"),
+            session=session_id,
+        )
+        self.metrics.gauge(
+            "claude_session_stdin_queue_bytes",
+            "Input waiting to be written to the shell",
+            function=stdin_pending,
+            session=session_id,
+        )
+        self.metrics.gauge(
+            "claude_session_rss_bytes",
+            "Resident memory of the shell process",
+            function=shell_rss,
+            session=session_id,
+        )
+
+    def get_session_health(self) -> dict[str, SessionHealth]:
+        """
+        監視中のセッションの健全性を取得する
+
+        Returns:
+            セッションIDと健全性（"healthy" / "stalled" / "dead"）の辞書
+            （未起動・停止済み・休止中のセッションは含まない）
+        """
+        return self.watchdog.health()
+
+    def send_command(self, session_id: str, command: str) -> None:
+        """
+        セッションへコマンドを送信する（休止中の場合は再開してから送る）
+
+        Args:
+            session_id: セッション識別子
+            command: 送信するコマンド
+
+        Raises:
+            KeyError: セッションが存在しない場合
+            RuntimeError: セッションが実行中でない場合、または再開できない場合
+        """
+        self.touch(session_id).send_command(command)
+
+    def broadcast(
+        self,
+        command: str,
+        session_ids: Optional[list[str]] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        on_result: Optional[Callable[[BroadcastResult], None]] = None,
+    ) -> BroadcastReport:
+        """
+        同じコマンドを複数のセッションで並行して実行し、結果を集計する
+
+        実行中のセッション数がmax_concurrencyを超えないよう、空きができる
+        たびに次のセッションへ送る。休止中のセッションは送る直前に再開する。
+        タイムアウトしたコマンドはシェル側では打ち切らず、結果だけを諦める。
+
+        Args:
+            command: 実行するコマンド
+            session_ids: 対象のセッションID（Noneの場合は全セッション）
+            max_concurrency: 同時に実行するセッション数（Noneの場合は設定値）
+            timeout: セッションごとの完了を待つ最大秒数（Noneの場合は設定値）
+            on_result: セッションの結果が出るたびに完了順で呼ばれるコールバック
+                       （呼び出し元のスレッドで呼ばれる）
+
+        Returns:
+            セッションごとの結果（完了順）と所要時間
+
+        Raises:
+            KeyError: 存在しないセッションIDが含まれる場合
+            ValueError: コマンドが空文字列の場合、またはmax_concurrencyが正でない場合
+        """
+        if not command or command.strip() == "":
+            raise ValueError("Command cannot be empty")
+        if max_concurrency is None:
+            max_concurrency = self.config.broadcast_concurrency
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        if timeout is None:
+            timeout = self.config.broadcast_timeout
+        known = self.list_sessions()
+        if session_ids is None:
+            session_ids = known
+        for session_id in session_ids:
+            if session_id not in known:
+                raise KeyError(f"Session not found: {session_id}")
+
+        started = time.monotonic()
+        report = BroadcastReport(command)
+
+        def collect(result: BroadcastResult) -> None:
+            report.results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        waiting = deque(session_ids)
+        running: dict[Future, str] = {}
+        executor = self._get_broadcast_executor()
+        while waiting or running:
+            while waiting and len(running) < max_concurrency:
+                session_id = waiting.popleft()
+                try:
+                    # 休止の判定と再開は呼び出し元のスレッドで行う
+                    session = self._prepare_broadcast(session_id)
+                except (KeyError, RuntimeError, OSError) as e:
+                    collect(BroadcastResult(session_id, command, error=str(e)))
+                    continue
+                future = executor.submit(
+                    self._run_broadcast_command, session_id, session, command, timeout
+                )
+                running[future] = session_id
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                collect(future.result())
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def _get_broadcast_executor(self) -> ThreadPoolExecutor:
+        """
+        broadcast()のワーカーを取得する（初回に作成する）
+
+        同時に実行するコマンドはセッション数を超えないため、ワーカー数の上限は
+        最大セッション数にする（スレッドは必要になった分だけ起動される）。
+        """
+        with self._broadcast_executor_lock:
+            if self._broadcast_executor is None:
+                self._broadcast_executor = ThreadPoolExecutor(
+                    max(1, self.max_sessions), thread_name_prefix="broadcast"
+                )
+            return self._broadcast_executor
+
+    def _prepare_broadcast(
+        self, session_id: str
+    ) -> Union[PowerShellSession, InteractivePowerShellSession]:
+        """
+        broadcast()の送信先を用意する（休止中なら再開する）
+
+        Raises:
+            RuntimeError: 実行中でない、またはコマンドの完了を検出できない場合
+        """
+        session = self.touch(session_id)
+        if not hasattr(session, "run_command"):
+            raise RuntimeError("Session does not support run_command")
+        if not session.is_running():
+            raise RuntimeError("Session is not running")
+        return session
+
+    @staticmethod
+    def _run_broadcast_command(
+        session_id: str,
+        session: PowerShellSession,
+        command: str,
+        timeout: Optional[float],
+    ) -> BroadcastResult:
+        """1セッションでコマンドを実行して結果に変換する（ワーカースレッドで実行）"""
+        started = time.monotonic()
+        try:
+            result = session.run_command(command, timeout=timeout)
+        except TimeoutError as e:
+            return BroadcastResult(
+                session_id,
+                command,
+                duration=time.monotonic() - started,
+                timed_out=True,
+                error=str(e),
+            )
+        except (RuntimeError, ValueError) as e:
+            return BroadcastResult(
+                session_id, command, duration=time.monotonic() - started, error=str(e)
+            )
+        return BroadcastResult(
+            session_id,
+            command,
+            output=result.output,
+            exit_code=result.exit_code,
+            success=result.success,
+            duration=result.duration,
+        )
+
+    def hibernate(self, session_id: str) -> bool:
+        """
+        セッションを休止する
+
+        シェルのカレントディレクトリを記録し、未読の出力を
+        ディスクへ退避してからプロセスを停止する。処理中かどうかは確認しない。
+        シェル内で設定した環境変数などは引き継がれない（hibernationモジュールを参照）。
+
         Args:
             session_id: セッション識別子
 
+        Returns:
+            休止した場合True（実行中でない、または休止済みの場合False）
+
         Raises:
             KeyError: セッションが存在しない場合
         """
-        if session_id not in self.sessions:
-            raise KeyError(f"Session not found: {session_id}")
+        with self._session_locked(session_id):
+            return self._hibernate_locked(session_id)
+
+    def _hibernate_locked(self, session_id: str) -> bool:
+        """hibernate()の本体（セッションのロック保持中に呼ぶ）"""
+        with self._registry_lock:
+            session = self.sessions[session_id]
+            if session_id in self._hibernated:
+                return False
+        if not session.is_running():
+            return False
+
+        working_dir = shell_cwd(session)
+        scrollback = session.hibernate()
+        record = HibernatedSession(
+            session_id=session_id,
+            working_dir=working_dir or session.working_dir,
+            spill_path=self._spill.write(session_id, scrollback),
+            spilled_chars=len(scrollback),
+            hibernated_at=time.monotonic(),
+        )
+        with self._registry_lock:
+            if self.sessions.get(session_id) is not session:
+                # 休止中にshutdown_all()で登録が解除された
+                self._spill.discard(record.spill_path)
+                return False
+            self._hibernated[session_id] = record
+            self._hibernations += 1
+        return True
+
+    def _try_hibernate(self, session_id: str) -> bool:
+        """
+        他のスレッドが操作していなければセッションを休止する（処理中なら休止しない）
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            休止した場合True
+        """
+        try:
+            lock = self._acquire(session_id, blocking=False)
+        except KeyError:
+            return False
+        if lock is None:
+            return False
+        try:
+            with self._registry_lock:
+                session = self.sessions[session_id]
+            if is_session_busy(session, self.config.hibernate_quiet_seconds):
+                return False
+            return self._hibernate_locked(session_id)
+        finally:
+            lock.release()
+
+    def revive(
+        self, session_id: str
+    ) -> Union[PowerShellSession, InteractivePowerShellSession]:
+        """
+        休止中のセッションを再開する
+
+        記録したカレントディレクトリ（存在しない場合は元の作業ディレクトリ）で
+        シェルを起動し、退避していた出力を戻す。
+        実行中セッション数の上限は確認しない（touch()を使う）。
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            再開したセッション
+
+        Raises:
+            KeyError: セッションが存在しない、または休止中でない場合
+            RuntimeError: シェルを起動できない場合
+        """
+        with self._session_locked(session_id):
+            return self._revive_locked(session_id)
+
+    def _revive_locked(
+        self, session_id: str
+    ) -> Union[PowerShellSession, InteractivePowerShellSession]:
+        """revive()の本体（セッションのロック保持中に呼ぶ）"""
+        with self._registry_lock:
+            record = self._hibernated.get(session_id)
+            if record is None:
+                raise KeyError(f"Session is not hibernated: {session_id}")
+            session = self.sessions[session_id]
+        if session.is_running():
+            # 休止後にUIなどから直接起動された
+            with self._registry_lock:
+                self._hibernated.pop(session_id, None)
+            self._spill.discard(record.spill_path)
+            session.hibernated = False
+            return session
+
+        if os.path.isdir(record.working_dir):
+            session.working_dir = record.working_dir
+        scrollback = self._spill.read(record.spill_path)
+        try:
+            session.resume(scrollback)
+        except Exception:
+            # 休止状態のまま、退避した出力を失わないようにする
+            record.spill_path = self._spill.write(session_id, scrollback)
+            raise
+
+        with self._registry_lock:
+            self._hibernated.pop(session_id, None)
+            self._revivals += 1
+            if self.sessions.get(session_id) is session:
+                self._last_used[session_id] = time.monotonic()
+                self._activity[session_id] = activity_marker(session)
+        return session
+
+    def is_hibernated(self, session_id: str) -> bool:
+        """
+        セッションが休止中か確認する
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            休止中の場合True
+        """
+        with self._registry_lock:
+            return session_id in self._hibernated
+
+    def get_hibernation_record(self, session_id: str) -> Optional[HibernatedSession]:
+        """
+        休止中のセッションの記録を取得する
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            休止の記録（休止中でない場合はNone）
+        """
+        with self._registry_lock:
+            return self._hibernated.get(session_id)
+
+    def apply_hibernation_policy(self, now: Optional[float] = None) -> list[str]:
+        """
+        休止ポリシーを適用する（UIの更新ループなどから定期的に呼ぶ）
+
+        出力のあったセッションは使われたものとみなす。設定の秒数以上
+        使われていないセッションを休止し、さらに実行中のセッション数が
+        上限を超えていれば使われていない順に休止する。処理中の
+        セッションと、他のスレッドが操作中のセッションは休止しない。
 
-        session = self.sessions[session_id]
-        session.stop()
-        del self.sessions[session_id]
+        Args:
+            now: 現在時刻（time.monotonic()。テスト用）
+
+        Returns:
+            休止したセッションIDのリスト
+        """
+        if now is None:
+            now = time.monotonic()
+        sessions = self.get_sessions()
+        for session_id, session in sessions.items():
+            if self.is_hibernated(session_id):
+                if not session.is_running():
+                    continue
+                # 休止後に直接起動されたセッションは記録を破棄する
+                try:
+                    lock = self._acquire(session_id, blocking=False)
+                except KeyError:
+                    continue
+                if lock is None:
+                    continue
+                try:
+                    if self.is_hibernated(session_id):
+                        self._revive_locked(session_id)
+                finally:
+                    lock.release()
+            marker = activity_marker(session)
+            with self._registry_lock:
+                if self.sessions.get(session_id) is not session:
+                    continue
+                if marker != self._activity.get(session_id):
+                    self._activity[session_id] = marker
+                    self._last_used[session_id] = now
+                self._last_used.setdefault(session_id, now)
+
+        hibernated = []
+        idle_seconds = self.config.hibernate_idle_seconds
+        if idle_seconds is not None:
+            for session_id in sessions:
+                with self._registry_lock:
+                    last_used = self._last_used.get(session_id)
+                if last_used is None or now - last_used < idle_seconds:
+                    continue
+                if self._try_hibernate(session_id):
+                    hibernated.append(session_id)
+        hibernated.extend(self._enforce_live_budget())
+        return hibernated
+
+    def _enforce_live_budget(self, keep: Optional[str] = None) -> list[str]:
+        """
+        実行中のセッション数が上限を超えた分を、使われていない順に休止する
+
+        セッションのロックを保持したまま呼ばないこと。
+
+        Args:
+            keep: 休止の対象から外すセッションID（フォーカスしたセッション）
+
+        Returns:
+            休止したセッションIDのリスト
+        """
+        if self.max_live_sessions is None:
+            return []
+        with self._budget_lock:
+            with self._registry_lock:
+                ordered = sorted(
+                    self.sessions.items(),
+                    key=lambda item: self._last_used.get(item[0], 0.0),
+                )
+                hibernated_ids = set(self._hibernated)
+            live = [
+                session_id
+                for session_id, session in ordered
+                if session_id not in hibernated_ids and session.is_running()
+            ]
+            excess = len(live) - self.max_live_sessions
+            hibernated = []
+            for session_id in live:
+                if excess <= 0:
+                    break
+                if session_id == keep:
+                    continue
+                if self._try_hibernate(session_id):
+                    hibernated.append(session_id)
+                    excess -= 1
+            return hibernated
+
+    @property
+    def hibernation_stats(self) -> HibernationStats:
+        """休止の統計情報"""
+        with self._registry_lock:
+            sessions = dict(self.sessions)
+            records = list(self._hibernated.values())
+            hibernated_ids = set(self._hibernated)
+            hibernations = self._hibernations
+            revivals = self._revivals
+        live = sum(
+            1
+            for session_id, session in sessions.items()
+            if session_id not in hibernated_ids and session.is_running()
+        )
+        return HibernationStats(
+            live_sessions=live,
+            hibernated_sessions=len(records),
+            hibernations=hibernations,
+            revivals=revivals,
+            spilled_chars=sum(r.spilled_chars for r in records),
+        )
+
+    def get_session_states(self) -> dict[str, str]:
+        """
+        プロンプト検出に対応したセッションの busy / idle 状態を取得する
+
+        Returns:
+            セッションIDと状態（"unknown" / "busy" / "idle"）の辞書
+        """
+        return {
+            session_id: session.prompt_detector.state
+            for session_id, session in self.get_sessions().items()
+            if session.prompt_detector is not None
+        }
 
     def list_sessions(self) -> list[str]:
         """
@@ -102,4 +922,134 @@ class SessionManager:
         Returns:
             セッションIDのリスト
         """
-        return list(self.sessions.keys())
+        with self._registry_lock:
+            return list(self.sessions.keys())
+
+    def _acquire(
+        self, session_id: str, blocking: bool = True
+    ) -> Optional[threading.RLock]:
+        """
+        セッションのロックを取得する
+
+        待っている間に削除・再作成された場合は、新しいセッションのロックを取り直す。
+        sessionsへ直接追加されたセッションのロックはここで作る。
+
+        Args:
+            session_id: セッション識別子
+            blocking: 他のスレッドが保持中の場合に待つか
+
+        Returns:
+            取得したロック（blocking=Falseで取得できなかった場合はNone）
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        while True:
+            with self._registry_lock:
+                if session_id not in self.sessions:
+                    raise KeyError(f"Session not found: {session_id}")
+                lock = self._session_locks.setdefault(session_id, threading.RLock())
+            if not lock.acquire(blocking=blocking):
+                return None
+            with self._registry_lock:
+                if (
+                    session_id in self.sessions
+                    and self._session_locks.get(session_id) is lock
+                ):
+                    return lock
+            lock.release()
+
+    @contextmanager
+    def _session_locked(self, session_id: str) -> Iterator[None]:
+        """
+        セッションのロックを保持する
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        lock = self._acquire(session_id)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def shutdown_all(self, deadline: Optional[float] = None) -> ShutdownReport:
+        """
+        全セッションを並行して停止し、マネージャーを閉じる
+
+        全セッションへ先に終了を要求してから共通の期限まで終了を待ち、
+        期限を過ぎても残っているセッションはプロセスツリーごと強制終了する。
+        そのため所要時間はセッション数によらず、ほぼ期限内に収まる。
+
+        Args:
+            deadline: 強制終了へ切り替えるまでの秒数（Noneの場合は設定値）
+
+        Returns:
+            停止結果（強制終了が必要だったセッションを含む）
+        """
+        if deadline is None:
+            deadline = self.config.shutdown_deadline
+        started = time.monotonic()
+        end = started + deadline
+        report = ShutdownReport()
+        # 停止したセッションを再起動しないよう先に監視を止める
+        self.watchdog.close()
+
+        with self._registry_lock:
+            sessions = dict(self.sessions)
+            records = dict(self._hibernated)
+            self.sessions.clear()
+            self._session_locks.clear()
+            self._hibernated.clear()
+            self._last_used.clear()
+            self._activity.clear()
+
+        # 休止中のセッションは停止済み（退避した出力を削除する）
+        for session_id, record in records.items():
+            self._spill.discard(record.spill_path)
+            report.stopped.append(session_id)
+            sessions.pop(session_id, None)
+        self._spill.close()
+
+        # 1. 全セッションに終了を要求する（待たない）
+        pending = {}
+        for session_id, session in sessions.items():
+            try:
+                session.request_stop()
+                pending[session_id] = session
+            except Exception as e:
+                report.errors[session_id] = str(e)
+
+        # 2. 共通の期限まで終了を待つ
+        while pending:
+            for session_id, session in list(pending.items()):
+                try:
+                    if session.wait_stopped(0):
+                        report.stopped.append(session_id)
+                        del pending[session_id]
+                except Exception as e:
+                    report.errors[session_id] = str(e)
+                    del pending[session_id]
+            if not pending or time.monotonic() >= end:
+                break
+            time.sleep(min(0.02, max(0.0, end - time.monotonic())))
+
+        # 3. 残ったセッションを強制終了する
+        for session_id, session in pending.items():
+            try:
+                session.force_stop()
+                report.hard_killed.append(session_id)
+            except Exception as e:
+                report.errors[session_id] = str(e)
+
+        if self.pool is not None:
+            self.pool.close()
+        if self.reactor is not None:
+            self.reactor.stop()
+        with self._broadcast_executor_lock:
+            if self._broadcast_executor is not None:
+                # 実行中のコマンドは停止したセッションで失敗して終わる
+                self._broadcast_executor.shutdown(wait=False)
+
+        report.elapsed = time.monotonic() - started
+        return report
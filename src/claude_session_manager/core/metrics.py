@@ -0,0 +1,707 @@
+"""メトリクス（計測値）のレジストリモジュール
+
+セッションごと・全体のカウンター、ゲージ、HDR形式のヒストグラムを保持し、
+スナップショットとPrometheusのテキスト形式で取り出す。
+
+出力の読み取りのようなホットパスに置いたままにできるよう、カウンターと
+ヒストグラムはスレッドごとのセルへロックなしで加算し、読み出し時に
+合算する（セルを書き換えるのは持ち主のスレッドだけ）。終了したスレッドの
+セルは次の読み出し・セル作成の時に合算済みの値へ畳み込んで手放すため、
+スレッドを使い捨てる処理があってもセルは増え続けない。ゲージは値を
+その場で代入するか、読み出し時に呼ぶ関数で与える。
+"""
+
+import abc
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Union
+
+# メトリクスの種類
+KIND_COUNTER = "counter"
+KIND_GAUGE = "gauge"
+KIND_HISTOGRAM = "histogram"
+
+# ヒストグラムの精度（仮数のビット数。相対誤差は 1 / 2**(bits-1) 以下）
+HISTOGRAM_PRECISION_BITS = 6
+# ヒストグラムは秒をマイクロ秒の整数で記録する
+HISTOGRAM_UNITS_PER_SECOND = 1_000_000
+# Prometheusへ出力するヒストグラムの分位点
+EXPORT_QUANTILES = (0.5, 0.9, 0.99)
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+def _bucket_index(value: int) -> int:
+    """値の入るバケット番号（仮数HISTOGRAM_PRECISION_BITSビットの対数線形バケット）"""
+    shift = value.bit_length() - HISTOGRAM_PRECISION_BITS
+    if shift <= 0:
+        return value
+    half = 1 << (HISTOGRAM_PRECISION_BITS - 1)
+    return shift * half + (value >> shift)
+
+
+def _bucket_upper(index: int) -> int:
+    """バケットに入る最大の値"""
+    full = 1 << HISTOGRAM_PRECISION_BITS
+    if index < full:
+        return index
+    half = full >> 1
+    shift = (index - half) // half
+    mantissa = index - shift * half
+    return ((mantissa + 1) << shift) - 1
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    """ヒストグラムの読み出し時点の値"""
+
+    count: int
+    sum: float  # 記録した値の合計（秒）
+    max: float  # 記録した最大値（秒）
+    buckets: tuple[tuple[float, int], ...]  # (バケットの上限（秒）, 件数)（上限の昇順）
+
+    def quantile(self, q: float) -> float:
+        """
+        分位点を取得する（バケットの上限で近似する）
+
+        Args:
+            q: 分位（0〜1）
+
+        Returns:
+            分位点の値（秒。記録がない場合は0.0）
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for upper, count in self.buckets:
+            seen += count
+            if seen >= rank:
+                return min(upper, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        """平均値（秒。記録がない場合は0.0）"""
+        return self.sum / self.count if self.count else 0.0
+
+
+@dataclass(frozen=True)
+class MetricSample:
+    """1系列の読み出し時点の値"""
+
+    name: str
+    kind: str  # "counter" / "gauge" / "histogram"
+    labels: LabelSet
+    value: float  # カウンター・ゲージの値（ヒストグラムは件数）
+    histogram: Optional[HistogramSnapshot] = None
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """全系列の読み出し時点の値"""
+
+    samples: tuple[MetricSample, ...]
+
+    def get(self, name: str, **labels: str) -> Optional[MetricSample]:
+        """
+        系列を取得する
+
+        Args:
+            name: メトリクス名
+            **labels: ラベル（全ラベルが一致する系列を返す）
+
+        Returns:
+            系列（存在しない場合はNone）
+        """
+        wanted = _label_set(labels)
+        for sample in self.samples:
+            if sample.name == name and sample.labels == wanted:
+                return sample
+        return None
+
+
+def _label_set(labels: dict[str, Any]) -> LabelSet:
+    """ラベルを比較できる形にする（値がNoneのラベルは除く）"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class _CellOwner:
+    """スレッドローカルに置き、スレッドの終了とともに破棄される目印"""
+
+    __slots__ = ("__weakref__",)
+
+
+class _ThreadCells(abc.ABC):
+    """スレッドごとのセルを管理する基底クラス
+
+    各スレッドのセルは、そのスレッドのthreading.localに置いた目印が破棄された時
+    （スレッドの終了時）に終了済みとして記録し、次にロックを取った時に
+    _retire_locked()で合算済みの値へ畳み込んで登録を外す。
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        # id(セル) -> セル（生きているスレッドのセル）
+        self._cells: dict[int, Any] = {}
+        # 終了したスレッドのセル（ファイナライザーから追加される）
+        self._dead: deque[Any] = deque()
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _make_cell(self) -> Any:
+        """空のセルを作る（サブクラスで実装する）"""
+
+    @abc.abstractmethod
+    def _retire_locked(self, cell: Any) -> None:
+        """終了したスレッドのセルを合算済みの値へ加える（ロック保持中に呼ぶ）"""
+
+    def _new_cell(self) -> Any:
+        """このスレッド用のセルを作って登録する"""
+        cell = self._make_cell()
+        owner = _CellOwner()
+        # ファイナライザーは任意のスレッドで呼ばれるため、ロックを取らずに積むだけにする
+        weakref.finalize(owner, self._dead.append, cell)
+        with self._lock:
+            self._collect_locked()
+            self._cells[id(cell)] = cell
+        self._local.owner = owner
+        self._local.cell = cell
+        return cell
+
+    def _collect_locked(self) -> None:
+        """終了したスレッドのセルを畳み込む（ロック保持中に呼ぶ）"""
+        while self._dead:
+            cell = self._dead.popleft()
+            if self._cells.pop(id(cell), None) is not None:
+                self._retire_locked(cell)
+
+
+class Counter(_ThreadCells):
+    """単調増加するカウンター（スレッドごとのセルへ加算し、読み出し時に合算する）"""
+
+    def __init__(self, function: Optional[Callable[[], Optional[float]]] = None):
+        """
+        Args:
+            function: 読み出し時に値を返す関数（既存の統計を公開する場合。
+                      Noneを返した場合は出力しない）
+        """
+        super().__init__()
+        self._function = function
+        # 終了したスレッドのセルの合計
+        self._retired: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        値を加算する（ロックを取らない）
+
+        Args:
+            amount: 加算する量
+        """
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[0] += amount
+
+    def _make_cell(self) -> list[float]:
+        """空のセルを作る"""
+        return [0]
+
+    def _retire_locked(self, cell: list[float]) -> None:
+        """終了したスレッドのセルを合計へ加える（ロック保持中に呼ぶ）"""
+        self._retired += cell[0]
+
+    @property
+    def value(self) -> Optional[float]:
+        """現在の値（全スレッドの合計）"""
+        if self._function is not None:
+            return self._function()
+        with self._lock:
+            self._collect_locked()
+            cells = list(self._cells.values())
+            retired = self._retired
+        return retired + sum(cell[0] for cell in cells)
+
+
+class Gauge:
+    """増減する値（代入した値、または読み出し時に関数が返す値）"""
+
+    def __init__(self, function: Optional[Callable[[], Optional[float]]] = None):
+        """
+        Args:
+            function: 読み出し時に値を返す関数（Noneを返した場合は出力しない）
+        """
+        self._function = function
+        self._value: float = 0
+
+    def set(self, value: float) -> None:
+        """
+        値を設定する
+
+        Args:
+            value: 新しい値
+        """
+        self._value = value
+
+    @property
+    def value(self) -> Optional[float]:
+        """現在の値"""
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+
+class Histogram(_ThreadCells):
+    """HDR形式（対数線形バケット）のヒストグラム（スレッドごとに記録し、読み出し時に合算する）
+
+    値はマイクロ秒単位の整数に丸めて記録し、相対誤差
+    1 / 2**(HISTOGRAM_PRECISION_BITS - 1) 以内のバケットに数える。
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        # 終了したスレッドのセルを合算したもの
+        self._retired: tuple[dict[int, int], list[int]] = self._make_cell()
+
+    def record(self, seconds: float) -> None:
+        """
+        値を記録する（ロックを取らない）
+
+        Args:
+            seconds: 記録する秒数（負の値は0として扱う）
+        """
+        value = int(seconds * HISTOGRAM_UNITS_PER_SECOND)
+        if value < 0:
+            value = 0
+        try:
+            counts, totals = self._local.cell
+        except AttributeError:
+            counts, totals = self._new_cell()
+        index = _bucket_index(value)
+        counts[index] = counts.get(index, 0) + 1
+        totals[0] += 1
+        totals[1] += value
+        if value > totals[2]:
+            totals[2] = value
+
+    def _make_cell(self) -> tuple[dict[int, int], list[int]]:
+        """空のセル（バケットごとの件数, [件数, 合計, 最大]）を作る"""
+        return ({}, [0, 0, 0])
+
+    def _retire_locked(self, cell: tuple[dict[int, int], list[int]]) -> None:
+        """終了したスレッドのセルを合算済みのセルへ加える（ロック保持中に呼ぶ）"""
+        counts, totals = cell
+        retired_counts, retired_totals = self._retired
+        for index, n in counts.items():
+            retired_counts[index] = retired_counts.get(index, 0) + n
+        retired_totals[0] += totals[0]
+        retired_totals[1] += totals[1]
+        retired_totals[2] = max(retired_totals[2], totals[2])
+
+    def snapshot(self) -> HistogramSnapshot:
+        """全スレッドの記録を合算した値"""
+        with self._lock:
+            self._collect_locked()
+            cells = list(self._cells.values())
+            retired_counts, retired_totals = self._retired
+            merged: dict[int, int] = dict(retired_counts)
+            count, total, maximum = retired_totals
+        for counts, totals in cells:
+            # 持ち主のスレッドが同時に書き換えるため、コピーしてから読む
+            for index, n in list(counts.items()):
+                merged[index] = merged.get(index, 0) + n
+            count += totals[0]
+            total += totals[1]
+            maximum = max(maximum, totals[2])
+        units = HISTOGRAM_UNITS_PER_SECOND
+        return HistogramSnapshot(
+            count=count,
+            sum=total / units,
+            max=maximum / units,
+            buckets=tuple(
+                (_bucket_upper(index) / units, merged[index]) for index in sorted(merged)
+            ),
+        )
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """メトリクスを名前とラベルで管理するクラス（スレッドセーフ）
+
+    同じ名前とラベルで取得すると同じオブジェクトを返すため、記録する側は
+    取得したオブジェクトを保持して使う（記録のたびに検索しない）。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # 名前ごとの種類と説明
+        self._families: dict[str, tuple[str, str]] = {}
+        self._metrics: dict[tuple[str, LabelSet], Metric] = {}
+
+    def counter(
+        self,
+        name: str,
+        help: str = "",
+        *,
+        function: Optional[Callable[[], Optional[float]]] = None,
+        **labels: Optional[str],
+    ) -> Counter:
+        """
+        カウンターを取得する（なければ作成する）
+
+        Args:
+            name: メトリクス名（Prometheusの命名規則に従い、末尾は_total）
+            help: 説明
+            function: 読み出し時に値を返す関数（作成時のみ有効）
+            **labels: ラベル（値がNoneのラベルは付けない）
+
+        Returns:
+            カウンター
+
+        Raises:
+            ValueError: 同じ名前が別の種類で登録済みの場合
+        """
+        return self._get(name, KIND_COUNTER, help, labels, lambda: Counter(function))
+
+    def gauge(
+        self,
+        name: str,
+        help: str = "",
+        *,
+        function: Optional[Callable[[], Optional[float]]] = None,
+        **labels: Optional[str],
+    ) -> Gauge:
+        """
+        ゲージを取得する（なければ作成する）
+
+        Args:
+            name: メトリクス名
+            help: 説明
+            function: 読み出し時に値を返す関数（作成時のみ有効）
+            **labels: ラベル（値がNoneのラベルは付けない）
+
+        Returns:
+            ゲージ
+
+        Raises:
+            ValueError: 同じ名前が別の種類で登録済みの場合
+        """
+        return self._get(name, KIND_GAUGE, help, labels, lambda: Gauge(function))
+
+    def histogram(self, name: str, help: str = "", **labels: Optional[str]) -> Histogram:
+        """
+        ヒストグラムを取得する（なければ作成する）
+
+        Args:
+            name: メトリクス名（単位は秒。末尾は_seconds）
+            help: 説明
+            **labels: ラベル（値がNoneのラベルは付けない）
+
+        Returns:
+            ヒストグラム
+
+        Raises:
+            ValueError: 同じ名前が別の種類で登録済みの場合
+        """
+        return self._get(name, KIND_HISTOGRAM, help, labels, Histogram)
+
+    def _get(
+        self,
+        name: str,
+        kind: str,
+        help: str,
+        labels: dict[str, Optional[str]],
+        factory: Callable[[], Metric],
+    ) -> Any:
+        """名前とラベルのメトリクスを取得または作成する"""
+        key = (name, _label_set(labels))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                self._families[name] = (kind, help)
+            elif family[0] != kind:
+                raise ValueError(f"Metric {name} is already registered as {family[0]}")
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = factory()
+            return metric
+
+    def remove(self, **labels: str) -> int:
+        """
+        ラベルが一致する系列を削除する（削除したセッションの系列など）
+
+        Args:
+            **labels: ラベル（全ラベルを含む系列を削除する）
+
+        Returns:
+            削除した系列数
+        """
+        wanted = set(_label_set(labels))
+        with self._lock:
+            keys = [key for key in self._metrics if wanted <= set(key[1])]
+            for key in keys:
+                del self._metrics[key]
+        return len(keys)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """
+        全系列の現在の値を取得する
+
+        Returns:
+            スナップショット（名前とラベルの順）
+        """
+        with self._lock:
+            items = sorted(self._metrics.items(), key=lambda item: item[0])
+            kinds = {name: kind for name, (kind, _) in self._families.items()}
+        samples = []
+        for (name, labels), metric in items:
+            kind = kinds[name]
+            if isinstance(metric, Histogram):
+                histogram = metric.snapshot()
+                samples.append(
+                    MetricSample(name, kind, labels, histogram.count, histogram)
+                )
+                continue
+            try:
+                value = metric.value
+            except Exception:
+                # 関数で与えるゲージは、対象が終了した後などに失敗しうる
+                value = None
+            if value is not None:
+                samples.append(MetricSample(name, kind, labels, value))
+        return MetricsSnapshot(tuple(samples))
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheusのテキスト形式（0.0.4）で出力する
+
+        ヒストグラムは分位点（EXPORT_QUANTILES）・合計・件数のsummaryとして出力する。
+
+        Returns:
+            テキスト
+        """
+        snapshot = self.snapshot()
+        with self._lock:
+            families = dict(self._families)
+        lines = []
+        current = None
+        for sample in snapshot.samples:
+            kind, help = families.get(sample.name, (sample.kind, ""))
+            if sample.name != current:
+                current = sample.name
+                if help:
+                    lines.append(f"# HELP {sample.name} {_escape_help(help)}")
+                prom_kind = "summary" if kind == KIND_HISTOGRAM else kind
+                lines.append(f"# TYPE {sample.name} {prom_kind}")
+            if sample.histogram is None:
+                lines.append(
+                    f"{sample.name}{_format_labels(sample.labels)} "
+                    f"{_format_value(sample.value)}"
+                )
+                continue
+            histogram = sample.histogram
+            for q in EXPORT_QUANTILES:
+                labels = sample.labels + (("quantile", str(q)),)
+                lines.append(
+                    f"{sample.name}{_format_labels(labels)} "
+                    f"{_format_value(histogram.quantile(q))}"
+                )
+            lines.append(
+                f"{sample.name}_sum{_format_labels(sample.labels)} "
+                f"{_format_value(histogram.sum)}"
+            )
+            lines.append(
+                f"{sample.name}_count{_format_labels(sample.labels)} {histogram.count}"
+            )
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Prometheusのテキスト形式でファイルへ書き出す（node_exporterのtextfile用）
+
+        一時ファイルへ書いてから置き換えるため、読み手が途中の内容を見ることはない。
+
+        Args:
+            path: 出力先のパス
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                f.write(self.to_prometheus())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+
+class SessionMetrics:
+    """1セッション分の計測値（セッションの出力・コマンド処理から記録する）"""
+
+    def __init__(self, registry: MetricsRegistry, session_id: str):
+        """
+        Args:
+            registry: 登録先のレジストリ
+            session_id: セッション識別子（sessionラベルの値）
+        """
+        self.output_bytes = registry.counter(
+            "claude_session_output_bytes_total",
+            "Bytes read from the shell",
+            session=session_id,
+        )
+        self.output_lines = registry.counter(
+            "claude_session_output_lines_total",
+            "Lines stored in the output buffer",
+            session=session_id,
+        )
+        self.commands_sent = registry.counter(
+            "claude_session_commands_sent_total",
+            "Commands written to the shell",
+            session=session_id,
+        )
+        self.command_duration = registry.histogram(
+            "claude_session_command_duration_seconds",
+            "run_command() duration from start marker to completion",
+            session=session_id,
+        )
+        self.time_to_first_byte = registry.histogram(
+            "claude_session_command_first_output_seconds",
+            "run_command() time from start marker to first output",
+            session=session_id,
+        )
+
+
+def _escape_help(text: str) -> str:
+    """HELP行の説明をエスケープする"""
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelSet) -> str:
+    """ラベルを {name="value",...} の形式にする"""
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    """値をPrometheusの数値表記にする"""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def process_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """
+    プロセスの常駐メモリ量（RSS）を取得する
+
+    Args:
+        pid: プロセスID（Noneの場合はこのプロセス）
+
+    Returns:
+        RSSのバイト数（取得できない場合はNone）
+    """
+    if pid is not None and (not isinstance(pid, int) or pid <= 0):
+        return None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if pid is not None:
+        return None
+    try:
+        import resource
+    except ImportError:
+        # Windowsでは取得しない
+        return None
+    # /procのない環境では最大RSSで代用する（macOSはバイト、Linuxはキロバイト）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """/metrics へのGETにPrometheusのテキスト形式を返すハンドラー"""
+
+    server: "_MetricsHTTPServer"
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # アクセスログは出力しない
+        pass
+
+
+class _MetricsHTTPServer(http.server.ThreadingHTTPServer):
+    """レジストリを持つHTTPサーバー"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], registry: MetricsRegistry):
+        self.registry = registry
+        super().__init__(address, _MetricsHandler)
+
+
+class MetricsServer:
+    """Prometheusのテキスト形式を /metrics で返すローカルHTTPサーバー"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            registry: 出力するメトリクスのレジストリ
+            host: 待ち受けるアドレス（既定はローカルのみ）
+            port: 待ち受けるポート（0の場合は空いているポート）
+
+        Raises:
+            OSError: ポートを開けない場合
+        """
+        self.registry = registry
+        self._server = _MetricsHTTPServer((host, port), registry)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """待ち受けているアドレスとポート"""
+        host, port = self._server.server_address[:2]
+        return host, port
+
+    def start(self) -> "MetricsServer":
+        """待ち受けを開始する（別スレッド）"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="metrics-server", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """待ち受けを停止する"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._server.server_close()
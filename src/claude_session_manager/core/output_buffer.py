@@ -0,0 +1,375 @@
+"""セッション出力バッファモジュール
+
+行数・文字数の上限を持つ固定容量のリングバッファ。
+出力には単調増加するオフセット（先頭からの累積文字数）が振られ、
+複数の読み手がそれぞれのカーソルから非破壊的に読み進められる。
+
+- get(): 既定の読み手（UIパネル）用。前回の続きから読み、カーソルを進める
+- read_since(cursor): 任意の読み手用。新しいデータと次のカーソルを返す
+
+上限に達した場合の振る舞い（オーバーフローポリシー）は既定の読み手を基準とする。
+既定の読み手が読み終えたデータは容量が必要になった時点で破棄され、
+保持範囲より遅れた読み手には gap（読み飛ばした文字数）が通知される。
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# オーバーフローポリシー
+POLICY_DROP_OLDEST = "drop_oldest"  # 未読でも古い出力を捨てて新しい出力を格納する
+POLICY_DROP_NEWEST = "drop_newest"  # 新しい出力を捨てる
+POLICY_BLOCK = "block"  # 既定の読み手が読むまで書き込み側を待たせる
+OVERFLOW_POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_BLOCK)
+
+
+@dataclass(frozen=True)
+class OutputBufferStats:
+    """出力バッファの統計情報"""
+
+    buffered_lines: int
+    buffered_chars: int
+    dropped_lines: int
+    dropped_chars: int
+
+
+@dataclass(frozen=True)
+class OutputRead:
+    """read_since()の結果"""
+
+    text: str  # 新しい出力
+    cursor: int  # 次回のread_since()に渡すカーソル
+    gap: int = 0  # 保持範囲外のため読み飛ばした文字数（0なら欠落なし）
+
+
+class OutputBuffer:
+    """容量制限付きの出力リングバッファ（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        max_lines: Optional[int] = 1000,
+        max_chars: Optional[int] = 1024 * 1024,
+        policy: str = POLICY_DROP_OLDEST,
+    ):
+        """
+        Args:
+            max_lines: 保持する最大行数（Noneの場合は無制限）
+            max_chars: 保持する最大文字数（Noneの場合は無制限）
+            policy: オーバーフローポリシー
+
+        Raises:
+            ValueError: 上限値が正でない場合、または未知のポリシーの場合
+        """
+        if max_lines is not None and max_lines <= 0:
+            raise ValueError("max_lines must be positive")
+        if max_chars is not None and max_chars <= 0:
+            raise ValueError("max_chars must be positive")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.policy = policy
+        # (開始オフセット, テキスト, 改行数) のチャンク列
+        self._chunks: deque[tuple[int, str, int]] = deque()
+        self._head = 0  # 保持している最古の出力のオフセット
+        self._tail = 0  # 次に格納される出力のオフセット
+        self._drain_cursor = 0  # 既定の読み手（get()）のカーソル
+        self._lines = 0
+        self._dropped_lines = 0
+        self._dropped_chars = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._space_listener: Optional[Callable[[], None]] = None
+
+    def put(self, text: str, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        出力を追加する
+
+        blockポリシーで空きがない場合、block=Trueなら空きができるまで待ち、
+        block=Falseなら格納せずにFalseを返す（呼び出し側で保留・再送する）。
+
+        Args:
+            text: 追加する出力
+            block: blockポリシー時に待機するか
+            timeout: 待機の最大秒数（Noneの場合は無制限）
+
+        Returns:
+            格納した場合True（破棄・未格納の場合False）
+        """
+        if not text:
+            return True
+
+        lines = text.count("\n")
+        with self._cond:
+            if self._closed:
+                return False
+
+            if self.policy == POLICY_DROP_OLDEST:
+                text, lines = self._truncate_to_capacity(text, lines)
+                self._evict(lines, len(text), unread=True)
+            else:
+                self._evict(lines, len(text), unread=False)
+                if self.policy == POLICY_DROP_NEWEST:
+                    if not self._fits(lines, len(text)):
+                        self._dropped_lines += lines
+                        self._dropped_chars += len(text)
+                        return False
+                elif not self._wait_for_space(lines, len(text), block, timeout):
+                    return False
+
+            self._chunks.append((self._tail, text, lines))
+            self._tail += len(text)
+            self._lines += lines
+            self._cond.notify_all()
+            return True
+
+    def get(self) -> str:
+        """
+        既定の読み手として未読の出力をすべて取り出す（非ブロッキング）
+
+        Returns:
+            前回のget()以降の出力（新しい出力がない場合は空文字列）
+        """
+        with self._cond:
+            if self._drain_cursor >= self._tail:
+                return ""
+            result = self._read_locked(self._drain_cursor)
+            self._drain_cursor = result.cursor
+            self._cond.notify_all()
+            listener = self._space_listener
+
+        if listener is not None:
+            listener()
+        return result.text
+
+    def read_since(self, cursor: int, timeout: Optional[float] = None) -> OutputRead:
+        """
+        カーソル以降の出力を読む（バッファは消費しない）
+
+        書き込み側を待たせることはない。カーソルが保持範囲より古い場合は
+        保持している最古の位置から読み、読み飛ばした文字数をgapで返す。
+
+        Args:
+            cursor: 前回のread_since()が返したカーソル（初回は0またはtail）
+            timeout: 新しい出力がない場合に待つ最大秒数（Noneの場合は待たない）
+
+        Returns:
+            新しい出力・次のカーソル・欠落量
+        """
+        with self._cond:
+            if timeout is not None and cursor >= self._tail:
+                self._cond.wait_for(
+                    lambda: self._tail > cursor or self._closed, timeout
+                )
+            return self._read_locked(cursor)
+
+    @property
+    def tail(self) -> int:
+        """次に格納される出力のオフセット（新規の読み手の開始位置）"""
+        with self._cond:
+            return self._tail
+
+    @property
+    def head(self) -> int:
+        """保持している最古の出力のオフセット"""
+        with self._cond:
+            return self._head
+
+    def clear(self) -> None:
+        """保持している出力を破棄する（カーソルとカウンターは保持する）"""
+        with self._cond:
+            self._chunks.clear()
+            self._head = self._tail
+            self._drain_cursor = self._tail
+            self._lines = 0
+            self._cond.notify_all()
+
+    def restore(self, text: str) -> bool:
+        """
+        clear()で破棄した末尾の出力を元のオフセットに戻す
+
+        オフセットを振り直さないため、カーソルで読む読み手が同じ出力を
+        二度受け取ることはない。既定の読み手は戻した出力の先頭から読む。
+
+        Args:
+            text: 破棄した時点のtailで終わる出力
+
+        Returns:
+            戻した場合True（バッファが空でない、またはtextが長すぎる場合False）
+        """
+        with self._cond:
+            if self._chunks or len(text) > self._tail:
+                return False
+            if not text:
+                return True
+            lines = text.count("\n")
+            start = self._tail - len(text)
+            self._chunks.append((start, text, lines))
+            self._head = start
+            self._drain_cursor = start
+            self._lines = lines
+            self._cond.notify_all()
+            return True
+
+    def close(self) -> None:
+        """バッファを閉じ、待機中の書き込み・読み取りを解放する"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        """閉じたバッファを再び書き込み可能にする"""
+        with self._cond:
+            self._closed = False
+
+    def set_space_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """
+        既定の読み手が読み進めた時に呼ばれるコールバックを設定する
+
+        blockポリシーでノンブロッキングput()を使う書き込み側が、
+        読み取りを再開するタイミングを知るために使う。
+
+        Args:
+            listener: コールバック（Noneで解除）
+        """
+        with self._cond:
+            self._space_listener = listener
+
+    @property
+    def stats(self) -> OutputBufferStats:
+        """現在の統計情報"""
+        with self._cond:
+            return OutputBufferStats(
+                buffered_lines=self._lines,
+                buffered_chars=self._tail - self._head,
+                dropped_lines=self._dropped_lines,
+                dropped_chars=self._dropped_chars,
+            )
+
+    def _read_locked(self, cursor: int) -> OutputRead:
+        """
+        カーソル以降の出力を組み立てる（ロック保持中に呼ぶ）
+
+        末尾から必要なチャンクだけを辿るため、コストは新しい出力量に比例する。
+        """
+        gap = 0
+        if cursor < self._head:
+            gap = self._head - cursor
+            cursor = self._head
+        if cursor >= self._tail:
+            return OutputRead(text="", cursor=self._tail, gap=gap)
+
+        parts = []
+        for start, text, _ in reversed(self._chunks):
+            if start >= cursor:
+                parts.append(text)
+                if start == cursor:
+                    break
+            else:
+                parts.append(text[cursor - start :])
+                break
+        parts.reverse()
+        return OutputRead(text="".join(parts), cursor=self._tail, gap=gap)
+
+    def _fits(self, lines: int, chars: int) -> bool:
+        """追加してもどちらの上限も超えないか判定する"""
+        if self.max_lines is not None and self._lines + lines > self.max_lines:
+            return False
+        if self.max_chars is not None and (
+            self._tail - self._head + chars > self.max_chars
+        ):
+            return False
+        return True
+
+    def _evict(self, lines: int, chars: int, unread: bool) -> None:
+        """
+        古いチャンクから順に捨てて空きを作る（ロック保持中に呼ぶ）
+
+        Args:
+            lines: 追加予定の行数
+            chars: 追加予定の文字数
+            unread: 既定の読み手が未読のチャンクも捨てるか
+        """
+        while self._chunks and not self._fits(lines, chars):
+            start, text, old_lines = self._chunks[0]
+            end = start + len(text)
+            if not unread and end > self._drain_cursor:
+                break
+            self._chunks.popleft()
+            self._head = end
+            self._lines -= old_lines
+            if end > self._drain_cursor:
+                # 既定の読み手が読む前に捨てた分を欠落として数える
+                unread_from = max(start, self._drain_cursor)
+                self._dropped_chars += end - unread_from
+                self._dropped_lines += text.count("\n", unread_from - start)
+                self._drain_cursor = end
+
+    def _wait_for_space(
+        self, lines: int, chars: int, block: bool, timeout: Optional[float]
+    ) -> bool:
+        """
+        既定の読み手が読み進めて空きができるまで待機する（ロック保持中に呼ぶ）
+
+        単独で上限を超えるチャンクは未読分がなくなった時点で受け入れ、
+        書き込み側が永久に待たないようにする。
+
+        Returns:
+            格納可能になった場合True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._fits(lines, chars) and self._drain_cursor < self._tail:
+            if not block or self._closed:
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._cond.wait(remaining)
+            self._evict(lines, chars, unread=False)
+        # 既読分は容量に関係なく捨てて、単独で大きいチャンクの分を空ける
+        self._evict(lines, chars, unread=False)
+        return not self._closed
+
+    def _truncate_to_capacity(self, text: str, lines: int) -> tuple[str, int]:
+        """単独で上限を超えるチャンクを末尾だけ残して切り詰める"""
+        original_chars = len(text)
+        original_lines = lines
+
+        if self.max_chars is not None and len(text) > self.max_chars:
+            text = text[-self.max_chars :]
+            lines = text.count("\n")
+        if self.max_lines is not None and lines > self.max_lines:
+            # 末尾からmax_lines個目の改行の直後以降だけを残す
+            cut = len(text)
+            for _ in range(self.max_lines + 1):
+                cut = text.rfind("\n", 0, cut)
+            text = text[cut + 1 :]
+            lines = self.max_lines
+
+        if len(text) < original_chars:
+            # 切り詰めた分は誰にも読まれないまま消えるため、
+            # オフセットを進めて遅れた読み手にgapとして伝える
+            skipped = original_chars - len(text)
+            self._evict_all_unread()
+            self._tail += skipped
+            self._head = self._tail
+            self._drain_cursor = self._tail
+            self._dropped_chars += skipped
+            self._dropped_lines += original_lines - lines
+        return text, lines
+
+    def _evict_all_unread(self) -> None:
+        """保持している全チャンクを捨てる（未読分は欠落として数える）"""
+        while self._chunks:
+            start, text, old_lines = self._chunks.popleft()
+            end = start + len(text)
+            self._lines -= old_lines
+            if end > self._drain_cursor:
+                unread_from = max(start, self._drain_cursor)
+                self._dropped_chars += end - unread_from
+                self._dropped_lines += text.count("\n", unread_from - start)
+        self._head = self._tail
+        self._drain_cursor = self._tail
@@ -0,0 +1,209 @@
+"""出力チャンクのまとめキューモジュール
+
+疑似端末の出力はバースト時に小さなチャンクが大量に届く。チャンクごとに
+キュー操作と文字列結合を行うとCPUを浪費するため、短い時間内に届いた
+チャンクは1つの要素にまとめて格納する。読み取り側は要素単位で取り出すため、
+キュー操作の回数は受信チャンク数ではなくまとめた要素数で決まる。
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+# この秒数以内に届いたチャンクは直前の要素にまとめる
+DEFAULT_COALESCE_WINDOW = 0.005
+
+# まとめる要素の最大文字数（読み取り側の1回の処理量を抑える）
+DEFAULT_MAX_COALESCED_CHARS = 1024 * 1024
+
+# チャンク数/秒を集計する区間（秒）
+RATE_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class OutputReadStats:
+    """出力読み取りの統計情報"""
+
+    chunks: int  # 受信したチャンク数
+    chars: int  # 受信した文字数
+    chunks_per_second: float  # 直近の集計区間のチャンク数/秒
+    average_chunk_size: float  # 平均チャンクサイズ（文字数）
+    queue_depth: int  # 未読の要素数（まとめた後）
+    queued_chars: int  # 未読の文字数
+    coalesced_chunks: int  # 直前の要素にまとめたチャンク数
+    read_size: int = 0  # 現在の読み取りサイズ（バイト）
+
+
+class _Entry:
+    """まとめたチャンク"""
+
+    __slots__ = ("parts", "chars", "created")
+
+    def __init__(self, text: str, created: float):
+        self.parts = [text]
+        self.chars = len(text)
+        self.created = created
+
+
+class CoalescingQueue:
+    """短時間に届いたチャンクをまとめるFIFOキュー（スレッドセーフ）
+
+    queue.Queueのput / get / get_nowait / empty / qsizeと同じ使い方ができる。
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_COALESCE_WINDOW,
+        max_chars: int = DEFAULT_MAX_COALESCED_CHARS,
+    ):
+        """
+        Args:
+            window: 直前の要素にまとめる時間（秒。0の場合はまとめない）
+            max_chars: まとめる要素の最大文字数
+
+        Raises:
+            ValueError: windowが負の場合、またはmax_charsが正でない場合
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+        if max_chars <= 0:
+            raise ValueError("max_chars must be positive")
+
+        self.window = window
+        self.max_chars = max_chars
+        self._entries: deque[_Entry] = deque()
+        self._queued_chars = 0
+        self._cond = threading.Condition()
+
+        # 統計
+        self._chunks = 0
+        self._chars = 0
+        self._coalesced = 0
+        self._rate_start = time.monotonic()
+        self._rate_chunks = 0
+        self._last_rate = 0.0
+
+    def put(self, text: str, now: Optional[float] = None) -> None:
+        """
+        チャンクを追加する
+
+        末尾の要素が未読で、window秒以内に作られ、max_charsに収まる場合はまとめる。
+
+        Args:
+            text: 出力チャンク
+            now: 現在時刻（テスト用。Noneの場合はtime.monotonic()）
+        """
+        if not text:
+            return
+        if now is None:
+            now = time.monotonic()
+
+        with self._cond:
+            self._count(len(text), now)
+            tail = self._entries[-1] if self._entries else None
+            if (
+                tail is not None
+                and now - tail.created <= self.window
+                and tail.chars + len(text) <= self.max_chars
+            ):
+                tail.parts.append(text)
+                tail.chars += len(text)
+                self._coalesced += 1
+            else:
+                self._entries.append(_Entry(text, now))
+            self._queued_chars += len(text)
+            self._cond.notify()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> str:
+        """
+        先頭の要素を取り出す
+
+        Args:
+            block: 空の場合に待機するか
+            timeout: 待機の最大秒数（Noneの場合は無制限）
+
+        Returns:
+            まとめたチャンクの文字列
+
+        Raises:
+            queue.Empty: 空のまま待機が終わった場合
+        """
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: self._entries, timeout)
+            if not self._entries:
+                raise queue.Empty
+            entry = self._entries.popleft()
+            self._queued_chars -= entry.chars
+        return entry.parts[0] if len(entry.parts) == 1 else "".join(entry.parts)
+
+    def get_nowait(self) -> str:
+        """
+        待機せずに先頭の要素を取り出す
+
+        Returns:
+            まとめたチャンクの文字列
+
+        Raises:
+            queue.Empty: 空の場合
+        """
+        return self.get(block=False)
+
+    def get_all(self) -> str:
+        """
+        未読の要素をすべて取り出して連結する（待機しない）
+
+        Returns:
+            未読の出力（空の場合は空文字列）
+        """
+        with self._cond:
+            entries, self._entries = self._entries, deque()
+            self._queued_chars = 0
+        return "".join(part for entry in entries for part in entry.parts)
+
+    def empty(self) -> bool:
+        """未読の要素がないか"""
+        with self._cond:
+            return not self._entries
+
+    def qsize(self) -> int:
+        """未読の要素数"""
+        with self._cond:
+            return len(self._entries)
+
+    @property
+    def stats(self) -> OutputReadStats:
+        """現在の統計情報"""
+        with self._cond:
+            now = time.monotonic()
+            elapsed = now - self._rate_start
+            if elapsed >= RATE_INTERVAL:
+                rate = self._rate_chunks / elapsed
+            elif self._last_rate or elapsed <= 0:
+                rate = self._last_rate
+            else:
+                # 最初の集計区間は経過分から求める
+                rate = self._rate_chunks / elapsed
+            return OutputReadStats(
+                chunks=self._chunks,
+                chars=self._chars,
+                chunks_per_second=rate,
+                average_chunk_size=self._chars / self._chunks if self._chunks else 0.0,
+                queue_depth=len(self._entries),
+                queued_chars=self._queued_chars,
+                coalesced_chunks=self._coalesced,
+            )
+
+    def _count(self, chars: int, now: float) -> None:
+        """受信チャンクを集計する（ロック保持中に呼ぶ）"""
+        self._chunks += 1
+        self._chars += chars
+        elapsed = now - self._rate_start
+        if elapsed >= RATE_INTERVAL:
+            self._last_rate = self._rate_chunks / elapsed
+            self._rate_start = now
+            self._rate_chunks = 0
+        self._rate_chunks += 1
@@ -0,0 +1,330 @@
+"""シェルのウォームプールモジュール
+
+起動済みでアイドル状態のシェルプロセスを事前に用意しておき、
+セッション起動時に即座に引き渡す（PowerShellのコールドスタートは0.5〜2秒かかる）。
+作業ディレクトリ専用の事前起動と、汎用プロセスの引き渡し後の
+ディレクトリ移動（cd）の両方に対応し、引き渡し後はバックグラウンドで補充する。
+待機プロセスの総数（全ディレクトリの合計）はsize個を超えない。
+"""
+
+import os
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from .command import is_powershell
+from .process_tree import PROCESS_GROUP_KWARGS
+
+
+def spawn_shell_process(shell_command: list[str], working_dir: str) -> subprocess.Popen:
+    """
+    バイナリパイプでシェルプロセスを起動する
+
+    Args:
+        shell_command: シェル起動コマンド
+        working_dir: 作業ディレクトリ
+
+    Returns:
+        起動したプロセス
+    """
+    return subprocess.Popen(
+        shell_command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=0,
+        cwd=working_dir,
+        **PROCESS_GROUP_KWARGS,
+    )
+
+
+def change_directory_command(path: str, powershell: bool) -> str:
+    """
+    作業ディレクトリを移動するコマンドを組み立てる
+
+    Args:
+        path: 移動先のパス
+        powershell: PowerShell構文で組み立てるか（Falseの場合はPOSIX sh構文）
+
+    Returns:
+        シェルへ送るコマンド（改行なし）
+    """
+    if powershell:
+        escaped = path.replace("'", "''")
+        return f"Set-Location -LiteralPath '{escaped}'"
+    escaped = path.replace("'", "'\\''")
+    return f"cd '{escaped}'"
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """ウォームプールの統計情報"""
+
+    idle: int  # 待機中のプロセス数
+    hits: int  # プールから引き渡せた回数
+    misses: int  # プールが空でコールドスタートした回数
+    spawn_failures: int  # 事前起動に失敗した回数
+    avg_hit_latency: Optional[float]  # プール利用時の平均起動時間（秒）
+    avg_miss_latency: Optional[float]  # コールドスタート時の平均起動時間（秒）
+
+
+class ShellPool:
+    """事前起動したシェルプロセスのプール（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        shell_command: list[str],
+        size: int = 2,
+        default_working_dir: str = ".",
+    ):
+        """
+        Args:
+            shell_command: シェル起動コマンド
+            size: 待機させるプロセス数の上限（全ディレクトリの合計）
+            default_working_dir: 汎用プロセスの作業ディレクトリ
+        """
+        self.shell_command = list(shell_command)
+        self.size = size
+        self.default_working_dir = os.path.abspath(default_working_dir)
+        self._powershell = is_powershell(self.shell_command)
+        # 作業ディレクトリ（絶対パス）ごとの待機プロセス
+        self._idle: dict[str, deque[subprocess.Popen]] = {}
+        # 作業ディレクトリ専用の事前起動要求
+        self._requests: deque[str] = deque()
+        self._spawning = 0  # 補充スレッドが起動中のプロセス数
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._hits = 0
+        self._misses = 0
+        self._spawn_failures = 0
+        self._hit_latency_total = 0.0
+        self._miss_latency_total = 0.0
+
+    def start(self) -> None:
+        """補充スレッドを起動して事前起動を始める（起動済みなら何もしない）"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._refill_loop, name="ShellPool", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        """補充を止め、待機中のプロセスをすべて終了する"""
+        with self._cond:
+            self._running = False
+            idle = [p for queue in self._idle.values() for p in queue]
+            self._idle.clear()
+            self._requests.clear()
+            self._cond.notify_all()
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+        for process in idle:
+            process.kill()
+            process.wait()
+
+    def is_running(self) -> bool:
+        """
+        プールが動作中（事前起動を受け付ける状態）かチェックする
+
+        Returns:
+            動作中ならTrue
+        """
+        with self._cond:
+            return self._running
+
+    def prewarm(self, working_dir: str) -> None:
+        """
+        指定した作業ディレクトリ専用のプロセスを1つ事前起動する
+
+        プールが動作していない場合、そのディレクトリのプロセスが待機中・
+        起動待ちの場合は何もしない。上限に達している場合は汎用プロセスを
+        1つ終了して入れ替える（汎用プロセスがなければ何もしない）。
+
+        Args:
+            working_dir: 作業ディレクトリパス
+        """
+        path = os.path.abspath(working_dir)
+        evicted = None
+        with self._cond:
+            if not self._running or path in self._requests or self._idle.get(path):
+                return
+            if self._reserved_locked() >= self.size:
+                evicted = self._pop_alive(self.default_working_dir)
+                if evicted is None:
+                    return
+            self._requests.append(path)
+            self._cond.notify_all()
+        if evicted is not None:
+            evicted.kill()
+            evicted.wait()
+
+    def retain(self, working_dirs: Iterable[str]) -> None:
+        """
+        使われていないディレクトリ専用の待機プロセスを終了する
+
+        汎用プロセスは残す。空いた分は汎用プロセスとして補充される。
+
+        Args:
+            working_dirs: セッションが使っている作業ディレクトリ
+        """
+        keep = {os.path.abspath(path) for path in working_dirs}
+        keep.add(self.default_working_dir)
+        with self._cond:
+            evicted = [
+                process
+                for path in [p for p in self._idle if p not in keep]
+                for process in self._idle.pop(path)
+            ]
+            self._requests = deque(p for p in self._requests if p in keep)
+            self._cond.notify_all()
+        for process in evicted:
+            process.kill()
+            process.wait()
+
+    def acquire(
+        self, working_dir: str, encoding: str = "utf-8"
+    ) -> Optional[subprocess.Popen]:
+        """
+        作業ディレクトリ用のプロセスを取り出す
+
+        同じディレクトリで起動したプロセスを優先し、なければ汎用プロセス
+        （それもなければ他のディレクトリのプロセス）をcdさせて返す。
+        いずれもなければNone（呼び出し側でコールドスタートする）。
+        引き渡した場合は、同じディレクトリ専用のプロセスを1つ補充する。
+
+        Args:
+            working_dir: 作業ディレクトリパス
+            encoding: cdコマンドを書き込む際の文字コード
+
+        Returns:
+            引き渡すプロセス、またはNone
+        """
+        path = os.path.abspath(working_dir)
+        with self._cond:
+            process = self._pop_alive(path)
+            if process is None:
+                others = sorted(
+                    (p for p in self._idle if p != path),
+                    key=lambda p: p != self.default_working_dir,
+                )
+                for other in others:
+                    process = self._pop_alive(other)
+                    if process is not None:
+                        break
+                if process is not None:
+                    command = change_directory_command(path, self._powershell)
+                    try:
+                        process.stdin.write((command + "\n").encode(encoding))
+                        process.stdin.flush()
+                    except OSError:
+                        process = None
+            if process is not None and self._running and path not in self._requests:
+                # 引き渡した分だけ補充する（再起動・再開で同じディレクトリを使う）
+                self._requests.append(path)
+            self._cond.notify_all()
+        return process
+
+    def record_start(self, hit: bool, latency: float) -> None:
+        """
+        セッション起動の結果を記録する
+
+        Args:
+            hit: プールから引き渡せた場合True
+            latency: 起動にかかった秒数
+        """
+        with self._cond:
+            if hit:
+                self._hits += 1
+                self._hit_latency_total += latency
+            else:
+                self._misses += 1
+                self._miss_latency_total += latency
+
+    @property
+    def stats(self) -> PoolStats:
+        """現在の統計情報"""
+        with self._cond:
+            return PoolStats(
+                idle=sum(len(q) for q in self._idle.values()),
+                hits=self._hits,
+                misses=self._misses,
+                spawn_failures=self._spawn_failures,
+                avg_hit_latency=(
+                    self._hit_latency_total / self._hits if self._hits else None
+                ),
+                avg_miss_latency=(
+                    self._miss_latency_total / self._misses if self._misses else None
+                ),
+            )
+
+    def _pop_alive(self, path: str) -> Optional[subprocess.Popen]:
+        """生きている待機プロセスを1つ取り出す（ロック保持中に呼ぶ）"""
+        queue = self._idle.get(path)
+        while queue:
+            process = queue.popleft()
+            if process.poll() is None:
+                return process
+        return None
+
+    def _reserved_locked(self) -> int:
+        """待機中・起動中・起動待ちのプロセス数（ロック保持中に呼ぶ）"""
+        return (
+            sum(len(q) for q in self._idle.values())
+            + self._spawning
+            + len(self._requests)
+        )
+
+    def _next_spawn_target(self) -> Optional[str]:
+        """次に事前起動すべき作業ディレクトリを決める（ロック保持中に呼ぶ）"""
+        # 待機中に終了したプロセスは数に含めない
+        for path, queue in list(self._idle.items()):
+            for process in [p for p in queue if p.poll() is not None]:
+                queue.remove(process)
+            if not queue:
+                del self._idle[path]
+        if self._requests:
+            return self._requests.popleft()
+        if self._reserved_locked() < self.size:
+            return self.default_working_dir
+        return None
+
+    def _refill_loop(self) -> None:
+        """不足分のプロセスを1つずつ起動するループ（補充スレッドで実行）"""
+        while True:
+            with self._cond:
+                target = None
+                while self._running:
+                    target = self._next_spawn_target()
+                    if target is not None:
+                        break
+                    self._cond.wait()
+                if not self._running:
+                    return
+                self._spawning += 1
+
+            try:
+                process = spawn_shell_process(self.shell_command, target)
+            except OSError:
+                # シェルが見つからない等。再試行で空回りしないよう補充を止める
+                with self._cond:
+                    self._spawning -= 1
+                    self._spawn_failures += 1
+                    self._running = False
+                return
+
+            with self._cond:
+                self._spawning -= 1
+                if not self._running:
+                    process.kill()
+                    process.wait()
+                    return
+                self._idle.setdefault(target, deque()).append(process)
@@ -0,0 +1,171 @@
+"""POSIX疑似端末モジュール
+
+os.openpty() で作成した疑似端末上でシェルを起動する。
+マスター側fdはノンブロッキングで共有リアクターに登録して読み取るため、
+セッションごとの読み取りスレッドは不要になる。
+pywinptyのPtyProcessと同じ操作（isalive / terminate / setwinsize）を提供する。
+"""
+
+import os
+import signal
+import struct
+import subprocess
+from typing import Optional
+
+# POSIX環境でのみ端末制御モジュールをインポート
+if os.name == "posix":
+    import fcntl
+    import termios
+
+    POSIX_PTY_AVAILABLE = hasattr(os, "openpty")
+else:
+    POSIX_PTY_AVAILABLE = False
+
+# 既定の端末サイズ（行, 列）
+DEFAULT_WINDOW_SIZE = (24, 80)
+
+
+def _set_winsize(fd: int, rows: int, cols: int) -> None:
+    """端末サイズを設定する（フォアグラウンドのプロセスにはSIGWINCHが届く）"""
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+
+
+def _make_controlling_tty() -> None:
+    """子プロセスで疑似端末を制御端末にする（setsid後にpreexec_fnとして実行）"""
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+class PosixPtyProcess:
+    """疑似端末上で動作するシェルプロセス"""
+
+    def __init__(self, popen: subprocess.Popen, fd: int):
+        """
+        Args:
+            popen: シェルのプロセス
+            fd: 疑似端末のマスター側fd
+        """
+        self.popen = popen
+        self.fd = fd
+        self.pid = popen.pid
+
+    @classmethod
+    def spawn(
+        cls,
+        argv: list[str],
+        cwd: Optional[str] = None,
+        env: Optional[dict[str, str]] = None,
+        dimensions: tuple[int, int] = DEFAULT_WINDOW_SIZE,
+    ) -> "PosixPtyProcess":
+        """
+        疑似端末を作成してシェルを起動する
+
+        シェルは新しいセッションのリーダーとして起動し、疑似端末を制御端末とする。
+
+        Args:
+            argv: シェル起動コマンド
+            cwd: 作業ディレクトリ
+            env: 環境変数（Noneの場合は親プロセスから継承）
+            dimensions: 端末サイズ（行, 列）
+
+        Returns:
+            起動したプロセス
+
+        Raises:
+            RuntimeError: POSIX疑似端末が利用できない場合
+            FileNotFoundError: シェルが見つからない場合
+        """
+        if not POSIX_PTY_AVAILABLE:
+            raise RuntimeError("POSIX pty is not available on this platform")
+
+        master, slave = os.openpty()
+        try:
+            _set_winsize(master, *dimensions)
+            popen = subprocess.Popen(
+                argv,
+                stdin=slave,
+                stdout=slave,
+                stderr=slave,
+                cwd=cwd,
+                env=env,
+                start_new_session=True,
+                preexec_fn=_make_controlling_tty,
+            )
+        except BaseException:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        return cls(popen, master)
+
+    def isalive(self) -> bool:
+        """
+        プロセスが実行中か確認
+
+        Returns:
+            実行中ならTrue
+        """
+        return self.popen.poll() is None
+
+    def terminate(self, force: bool = False) -> None:
+        """
+        プロセスグループに終了を要求する（終了を待たずに戻る）
+
+        対話シェルはSIGTERMを無視するため、端末切断（SIGHUP）も送る。
+
+        Args:
+            force: Trueの場合はSIGKILLで強制終了する
+        """
+        signals = (signal.SIGKILL,) if force else (signal.SIGHUP, signal.SIGTERM)
+        for sig in signals:
+            try:
+                os.killpg(self.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                break
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        プロセスの終了を待つ
+
+        Args:
+            timeout: 待機の最大秒数（Noneの場合は無制限）
+
+        Returns:
+            終了した場合True
+        """
+        try:
+            self.popen.wait(timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+
+    def setwinsize(self, rows: int, cols: int) -> None:
+        """
+        端末サイズを変更する
+
+        Args:
+            rows: 行数
+            cols: 列数
+        """
+        _set_winsize(self.fd, rows, cols)
+
+    def getwinsize(self) -> tuple[int, int]:
+        """
+        端末サイズを取得する
+
+        Returns:
+            (行数, 列数)
+        """
+        packed = fcntl.ioctl(self.fd, termios.TIOCGWINSZ, b"\0" * 8)
+        rows, cols, _, _ = struct.unpack("HHHH", packed)
+        return rows, cols
+
+    def close(self) -> None:
+        """マスター側fdを閉じる（シェルにはSIGHUPが届く）"""
+        if self.fd >= 0:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = -1
+        # 終了済みなら回収しておく（ゾンビを残さない）
+        self.wait(0)
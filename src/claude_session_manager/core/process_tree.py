@@ -0,0 +1,131 @@
+"""プロセスツリー終了モジュール
+
+シェルから起動された子プロセスも含めて終了させるための補助関数群。
+POSIXではシェルを新しいセッション（プロセスグループ）で起動し、
+グループ全体へシグナルを送る。Windowsでは taskkill /T でツリーごと終了を
+要求し、強制終了の段階だけ /F を付ける。どちらもtaskkillの完了は待たない
+（複数のセッションを停止するときに直列にならないようにする）。
+"""
+
+import os
+import signal
+import subprocess
+from typing import Any
+
+# シェル起動時にPopenへ渡す追加引数（POSIXではシェルをグループリーダーにする）
+PROCESS_GROUP_KWARGS: dict[str, Any] = (
+    {"start_new_session": True} if os.name == "posix" else {}
+)
+
+
+def _valid_pid(pid: Any) -> bool:
+    """シグナルを送ってよいpidか判定する（未起動や不正な値を除外する）"""
+    return isinstance(pid, int) and pid > 0
+
+
+def _taskkill(pid: int, force: bool) -> None:
+    """
+    taskkillでプロセスツリーの終了を要求する（Windows用。完了は待たない）
+
+    Args:
+        pid: ツリーの根のプロセスID
+        force: 強制終了する（/F）か
+    """
+    command = ["taskkill", "/T"] + (["/F"] if force else []) + ["/PID", str(pid)]
+    try:
+        subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass
+
+
+def _signal_group(pid: int, sig: int) -> bool:
+    """
+    pidをリーダーとするプロセスグループへシグナルを送る（POSIX用）
+
+    Returns:
+        グループが存在した場合True
+    """
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 権限のないプロセスが残っているがグループは存在する
+        return True
+    return True
+
+
+def terminate_process_tree(pid: Any) -> None:
+    """
+    プロセスツリーに終了を要求する
+
+    POSIXではグループ全体へSIGTERMを送る。Windowsでは /F なしのtaskkillで
+    ツリーに終了を要求する。どちらも終了を待たずに戻る。
+
+    Args:
+        pid: シェルのプロセスID
+    """
+    if not _valid_pid(pid):
+        return
+    if os.name == "posix":
+        _signal_group(pid, signal.SIGTERM)
+    else:
+        _taskkill(pid, force=False)
+
+
+def kill_process_tree(pid: Any) -> None:
+    """
+    プロセスツリーを強制終了する（終了は待たずに戻る）
+
+    Args:
+        pid: シェルのプロセスID
+    """
+    if not _valid_pid(pid):
+        return
+    if os.name == "posix":
+        _signal_group(pid, signal.SIGKILL)
+    else:
+        _taskkill(pid, force=True)
+
+
+def _proc_group_has_live_member(pgid: int) -> bool:
+    """
+    /procを走査してグループ内に終了していないプロセスがあるか調べる（Linux用）
+
+    孤児となった子プロセスはinitが回収するまでゾンビとして残り、
+    killpg(pgid, 0)では生存と区別できないため、状態を確認する。
+    """
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # "pid (comm) state ppid pgrp ..."（commは空白や括弧を含み得る）
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        if len(fields) >= 3 and int(fields[2]) == pgid and fields[0] != b"Z":
+            return True
+    return False
+
+
+def is_process_group_alive(pid: Any) -> bool:
+    """
+    シェルが終了した後も子プロセスが残っているか判定する
+
+    Windowsではグループを追跡できないため常にFalseを返す。
+
+    Args:
+        pid: シェルのプロセスID
+
+    Returns:
+        グループ内に実行中のプロセスが残っていればTrue
+    """
+    if os.name != "posix" or not _valid_pid(pid):
+        return False
+    if not _signal_group(pid, 0):
+        return False
+    if os.path.isdir("/proc"):
+        return _proc_group_has_live_member(pid)
+    return True
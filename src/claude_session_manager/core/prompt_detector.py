@@ -0,0 +1,258 @@
+"""プロンプト検出モジュール
+
+疑似端末の出力からシェル・REPLのプロンプトを検出し、
+セッションの busy / idle 状態の遷移を時刻付きで通知する。
+出力は末尾の一定文字数（ローリングバッファ）だけを保持して照合するため、
+出力全体を走査し直すことはない。ANSIエスケープシーケンスは
+チャンク境界で分割されていても逐次的に取り除く。
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Union
+
+# セッション状態
+STATE_UNKNOWN = "unknown"  # まだプロンプトを見ていない
+STATE_BUSY = "busy"  # コマンド実行中
+STATE_IDLE = "idle"  # プロンプト表示中（入力待ち）
+
+# 組み込みのプロンプトパターン（出力末尾に一致させる）
+PROMPT_PRESETS: dict[str, str] = {
+    "powershell": r"PS [^\n>]*> ?$",
+    "python": r"(?:^|\n)(?:>>>|\.\.\.) $",
+}
+
+# 照合に使う末尾の文字数
+DEFAULT_TAIL_SIZE = 256
+
+# CSI: ESC [ パラメーター 中間バイト 終端バイト
+_CSI_RE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
+# OSC: ESC ] ... (BEL | ESC \)
+_OSC_RE = re.compile(r"\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)")
+# その他の2バイトシーケンス（ESC = / ESC > / ESC ( B / ESC c など）
+_ESC_RE = re.compile(r"\x1b(?:[()][0-9A-Za-z]|[@-Z\\^_=>78c])")
+# 制御文字（改行とタブ以外。CRは事前にLFへ置き換える）
+_CTRL_RE = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+# 保留するシーケンスの最大長（終端のないOSCで保留が膨らまないようにする）
+_MAX_PARTIAL = 1024
+# 途中で途切れている可能性のあるエスケープシーケンス
+_PARTIAL_ESC_RE = re.compile(
+    r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()])?$"
+)
+
+
+class AnsiStripper:
+    """ANSIエスケープシーケンスを逐次的に取り除くクラス"""
+
+    def __init__(self) -> None:
+        self._partial = ""
+
+    def feed(self, text: str) -> str:
+        """
+        出力からエスケープシーケンスを取り除く
+
+        チャンク末尾で途切れたシーケンスは保留し、次のチャンクと繋げて処理する。
+
+        Args:
+            text: 疑似端末からの出力
+
+        Returns:
+            エスケープシーケンスと制御文字を除いた文字列
+        """
+        text = self._partial + text
+        self._partial = ""
+        if "\x1b" in text:
+            text = _OSC_RE.sub("", text)
+            text = _CSI_RE.sub("", text)
+            text = _ESC_RE.sub("", text)
+            partial = _PARTIAL_ESC_RE.search(text)
+            if partial:
+                if len(partial.group(0)) <= _MAX_PARTIAL:
+                    self._partial = partial.group(0)
+                text = text[: partial.start()]
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return _CTRL_RE.sub("", text)
+
+
+@dataclass(frozen=True)
+class StateTransition:
+    """busy / idle 状態の遷移"""
+
+    state: str  # 遷移後の状態
+    previous: str  # 遷移前の状態
+    timestamp: float  # 遷移時刻（time.monotonic()）
+    duration: Optional[float] = None  # 直前の状態の継続秒数（busy→idleならコマンド所要時間）
+    prompt: Optional[str] = None  # 一致したプロンプトのパターン名
+
+
+TransitionListener = Callable[[StateTransition], None]
+
+
+class PromptDetector:
+    """出力末尾からプロンプトを検出して busy / idle を判定するクラス（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        patterns: Union[Iterable[str], dict[str, str], None] = None,
+        tail_size: int = DEFAULT_TAIL_SIZE,
+    ):
+        """
+        Args:
+            patterns: 追加のプロンプト正規表現（名前付きの辞書も可）。
+                      組み込みのPROMPT_PRESETSより先に照合する
+            tail_size: 照合に使う出力末尾の文字数
+
+        Raises:
+            ValueError: tail_sizeが正でない場合、または正規表現が不正な場合
+        """
+        if tail_size <= 0:
+            raise ValueError("tail_size must be positive")
+
+        if patterns is None:
+            named: dict[str, str] = {}
+        elif isinstance(patterns, dict):
+            named = dict(patterns)
+        else:
+            named = {f"custom-{i}": p for i, p in enumerate(patterns, 1)}
+        named.update({k: v for k, v in PROMPT_PRESETS.items() if k not in named})
+
+        self._patterns: list[tuple[str, re.Pattern]] = []
+        for name, pattern in named.items():
+            try:
+                self._patterns.append((name, re.compile(pattern)))
+            except re.error as e:
+                raise ValueError(f"Invalid prompt pattern {name!r}: {e}")
+
+        self.tail_size = tail_size
+        self._stripper = AnsiStripper()
+        self._tail = ""
+        self._state = STATE_UNKNOWN
+        self._since = time.monotonic()
+        self._prompt: Optional[str] = None
+        self._listeners: list[TransitionListener] = []
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """現在の状態（STATE_UNKNOWN / STATE_BUSY / STATE_IDLE）"""
+        with self._lock:
+            return self._state
+
+    @property
+    def since(self) -> float:
+        """現在の状態になった時刻（time.monotonic()）"""
+        with self._lock:
+            return self._since
+
+    @property
+    def prompt(self) -> Optional[str]:
+        """直近に一致したプロンプトのパターン名"""
+        with self._lock:
+            return self._prompt
+
+    def add_listener(self, listener: TransitionListener) -> None:
+        """
+        状態遷移時に呼ばれるコールバックを登録する
+
+        コールバックは出力を読み取ったスレッドで呼ばれる。
+
+        Args:
+            listener: コールバック
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: TransitionListener) -> None:
+        """
+        登録したコールバックを解除する（未登録なら何もしない）
+
+        Args:
+            listener: add_listener()で登録したコールバック
+        """
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def feed(self, text: str, now: Optional[float] = None) -> Optional[StateTransition]:
+        """
+        出力を解析して状態を更新する
+
+        出力末尾がプロンプトに一致すればidle、プロンプト表示後に
+        プロンプト以外の出力が続けばbusyとする。
+
+        Args:
+            text: 疑似端末からの出力
+            now: 現在時刻（テスト用。Noneの場合はtime.monotonic()）
+
+        Returns:
+            状態が変化した場合はその遷移、変化しない場合はNone
+        """
+        clean = self._stripper.feed(text)
+        if not clean:
+            return None
+
+        with self._lock:
+            self._tail = (self._tail + clean)[-self.tail_size :]
+            name = self._match_prompt()
+            if name is not None:
+                self._prompt = name
+                transition = self._transition(STATE_IDLE, now, name)
+            elif clean.strip():
+                transition = self._transition(STATE_BUSY, now)
+            else:
+                transition = None
+        self._notify(transition)
+        return transition
+
+    def command_sent(self, now: Optional[float] = None) -> Optional[StateTransition]:
+        """
+        コマンドを送信したことを通知する（出力を待たずにbusyにする）
+
+        Args:
+            now: 現在時刻（テスト用。Noneの場合はtime.monotonic()）
+
+        Returns:
+            状態が変化した場合はその遷移、変化しない場合はNone
+        """
+        with self._lock:
+            # 送信したコマンドのエコーでプロンプトと誤判定しないよう末尾を捨てる
+            self._tail = ""
+            transition = self._transition(STATE_BUSY, now)
+        self._notify(transition)
+        return transition
+
+    def _match_prompt(self) -> Optional[str]:
+        """末尾に一致するプロンプトのパターン名を返す（ロック保持中に呼ぶ）"""
+        for name, regex in self._patterns:
+            if regex.search(self._tail):
+                return name
+        return None
+
+    def _transition(
+        self, state: str, now: Optional[float], prompt: Optional[str] = None
+    ) -> Optional[StateTransition]:
+        """状態を更新し、変化した場合は遷移を返す（ロック保持中に呼ぶ）"""
+        if state == self._state:
+            return None
+        if now is None:
+            now = time.monotonic()
+        previous = self._state
+        duration = None if previous == STATE_UNKNOWN else now - self._since
+        self._state = state
+        self._since = now
+        return StateTransition(state, previous, now, duration, prompt)
+
+    def _notify(self, transition: Optional[StateTransition]) -> None:
+        """登録されたコールバックへ遷移を通知する"""
+        if transition is None:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(transition)
+            except Exception:
+                # 1つのコールバックの例外で読み取りスレッドを止めない
+                pass
@@ -0,0 +1,404 @@
+"""共有I/Oリアクターモジュール
+
+1本のスレッドで複数セッションの出力fdを selectors（Linuxではepoll）で監視し、
+読み取ったバイト列を各セッションのコールバックへ渡す。
+入力fdの書き込み可能通知（書き込み待ちデータの送出）にも対応する。
+セッションごとに読み取りスレッドを立てる方式に比べ、スレッド数・
+コンテキストスイッチ・GIL競合を大幅に減らす。
+読み取りサイズはfdごとに負荷に応じて増減させる。
+"""
+
+import os
+import selectors
+import threading
+from typing import Callable, Optional
+
+# 1回のos.read()で読み取るバイト数の初期値
+DEFAULT_READ_SIZE = 64 * 1024
+
+# 適応的な読み取りサイズの下限・上限
+MIN_READ_SIZE = 4 * 1024
+MAX_READ_SIZE = 1024 * 1024
+
+# 読み取りサイズを縮小するまでに続けて観測する小さな読み取りの回数
+SHRINK_AFTER = 8
+
+# コールバック型: 受信データ（EOF時は空のbytes）を受け取る
+ReadCallback = Callable[[bytes], None]
+
+# コールバック型: 書き込み可能時に呼ばれ、まだ書き込み待ちがあればTrueを返す
+WriteCallback = Callable[[], bool]
+
+
+def is_reactor_supported() -> bool:
+    """
+    パイプをselectorsで監視できる環境か判定する
+
+    Windowsのselectはソケットのみ対応のため、POSIX環境でのみTrueを返す。
+
+    Returns:
+        リアクターが利用可能ならTrue
+    """
+    return os.name == "posix"
+
+
+class AdaptiveReadSize:
+    """読み取り結果に応じて次の読み取りサイズを増減させるクラス
+
+    要求したサイズいっぱいに読めた（まだデータが溜まっている）場合は倍にし、
+    4分の1未満しか読めない状態が続いた場合は半分にする。
+    """
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_READ_SIZE,
+        minimum: int = MIN_READ_SIZE,
+        maximum: int = MAX_READ_SIZE,
+    ):
+        """
+        Args:
+            initial: 初期の読み取りサイズ
+            minimum: 読み取りサイズの下限
+            maximum: 読み取りサイズの上限
+
+        Raises:
+            ValueError: minimum <= initial <= maximum を満たさない場合
+        """
+        if not 0 < minimum <= initial <= maximum:
+            raise ValueError("read sizes must satisfy 0 < minimum <= initial <= maximum")
+
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._small_reads = 0
+
+    def update(self, length: int) -> int:
+        """
+        読み取れた量を記録し、次の読み取りサイズを返す
+
+        Args:
+            length: 直前の読み取りで得たサイズ
+
+        Returns:
+            次の読み取りサイズ
+        """
+        if length >= self.size:
+            self.size = min(self.size * 2, self.maximum)
+            self._small_reads = 0
+        elif length < self.size // 4:
+            self._small_reads += 1
+            if self._small_reads >= SHRINK_AFTER:
+                self.size = max(self.size // 2, self.minimum)
+                self._small_reads = 0
+        else:
+            self._small_reads = 0
+        return self.size
+
+
+class OutputReactor:
+    """複数fdの読み取りを1スレッドで多重化するリアクター"""
+
+    def __init__(
+        self,
+        read_size: int = DEFAULT_READ_SIZE,
+        max_read_size: int = MAX_READ_SIZE,
+    ):
+        """
+        Args:
+            read_size: 1回の読み取りで要求するバイト数の初期値
+            max_read_size: 負荷が高い場合に読み取りサイズを増やす上限
+        """
+        self.read_size = read_size
+        self.max_read_size = max(read_size, max_read_size)
+        # fdごとの読み取りサイズ
+        self._read_sizes: dict[int, AdaptiveReadSize] = {}
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_flag = threading.Event()
+        # セレクターを起こすための自己パイプ
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        # 一時停止中のfdとそのコールバック
+        self._paused: dict[int, ReadCallback] = {}
+        self._pending: list[
+            tuple[str, int, Optional[Callable], Optional[threading.Event]]
+        ] = []
+
+    def start(self) -> None:
+        """リアクタースレッドを起動する（起動済みなら何もしない）"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_flag.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="OutputReactor", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """リアクタースレッドを停止する"""
+        self._stop_flag.set()
+        self._wakeup()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def close(self) -> None:
+        """リアクターを停止し、保持しているfdを解放する"""
+        self.stop()
+        self._selector.close()
+        for fd in (self._wakeup_r, self._wakeup_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def is_running(self) -> bool:
+        """
+        リアクタースレッドが動作中かチェックする
+
+        Returns:
+            動作中ならTrue
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def register(self, fd: int, callback: ReadCallback) -> None:
+        """
+        読み取り対象のfdを登録する
+
+        fdはノンブロッキングに設定される。EOFまたは読み取りエラー時は
+        callback(b"") を1回呼び出した後、自動的に登録解除される。
+
+        Args:
+            fd: 監視するファイルディスクリプタ
+            callback: データ受信時のコールバック
+        """
+        os.set_blocking(fd, False)
+        with self._lock:
+            self._pending.append(("register", fd, callback, None))
+        self.start()
+        self._wakeup()
+
+    def watch_writable(self, fd: int, callback: WriteCallback) -> None:
+        """
+        fdが書き込み可能になったらコールバックを呼ぶよう登録する
+
+        コールバックはリアクタースレッドで呼ばれ、Falseを返す（書き込み待ちが
+        なくなる）と自動的に登録解除される。fdはノンブロッキングに設定される。
+
+        Args:
+            fd: 書き込み先のファイルディスクリプタ
+            callback: 書き込み可能時のコールバック
+        """
+        os.set_blocking(fd, False)
+        if threading.current_thread() is self._thread:
+            self._apply("watch_write", fd, callback)
+            return
+        with self._lock:
+            self._pending.append(("watch_write", fd, callback, None))
+        self.start()
+        self._wakeup()
+
+    def unregister(self, fd: int) -> None:
+        """
+        fdの監視を解除する（未登録のfdは無視する）
+
+        解除が反映されるまで待機するため、戻った後はfdをクローズしてよい。
+
+        Args:
+            fd: 監視を解除するファイルディスクリプタ
+        """
+        if threading.current_thread() is self._thread:
+            self._unregister_now(fd)
+            return
+
+        done = threading.Event()
+        with self._lock:
+            self._pending.append(("unregister", fd, None, done))
+        if not self.is_running():
+            self._apply_pending()
+            return
+        self._wakeup()
+        done.wait(timeout=1)
+
+    def read_size_for(self, fd: int) -> int:
+        """
+        fdの現在の読み取りサイズを取得する
+
+        Args:
+            fd: 登録済みのファイルディスクリプタ
+
+        Returns:
+            次回の読み取りサイズ（未登録の場合は初期値）
+        """
+        sizer = self._read_sizes.get(fd)
+        return sizer.size if sizer is not None else self.read_size
+
+    def pause(self, fd: int) -> None:
+        """
+        fdの読み取りを一時停止する（背圧制御用）
+
+        読み取りを止めることでパイプが詰まり、子プロセス側の書き込みが待たされる。
+
+        Args:
+            fd: 一時停止するファイルディスクリプタ
+        """
+        self._request("pause", fd)
+
+    def resume(self, fd: int) -> None:
+        """
+        pause()で一時停止したfdの読み取りを再開する
+
+        Args:
+            fd: 再開するファイルディスクリプタ
+        """
+        self._request("resume", fd)
+
+    def _request(self, action: str, fd: int) -> None:
+        """登録状態の変更を要求する（リアクタースレッド上なら即時反映）"""
+        if threading.current_thread() is self._thread:
+            self._apply(action, fd, None)
+            return
+        with self._lock:
+            self._pending.append((action, fd, None, None))
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        """select待ちのリアクタースレッドを起こす"""
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except (BlockingIOError, OSError):
+            # パイプが満杯＝既に起床要求済み
+            pass
+
+    def _apply_pending(self) -> None:
+        """登録・解除要求をリアクタースレッド上で反映する"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for action, fd, callback, done in pending:
+            self._apply(action, fd, callback)
+            if done is not None:
+                done.set()
+
+    def _apply(self, action: str, fd: int, callback: Optional[Callable]) -> None:
+        """登録状態の変更を1件反映する（リアクタースレッドで実行）"""
+        if action == "watch_write":
+            try:
+                self._selector.register(fd, selectors.EVENT_WRITE, callback)
+            except KeyError:
+                # 既に監視中
+                pass
+            except (ValueError, OSError):
+                # 既にクローズされたfd
+                pass
+        elif action == "register":
+            try:
+                self._selector.register(fd, selectors.EVENT_READ, callback)
+            except (KeyError, ValueError, OSError):
+                # 登録済み、または既にクローズされたfd
+                if callback is not None:
+                    callback(b"")
+                return
+            if fd not in self._read_sizes:
+                self._read_sizes[fd] = AdaptiveReadSize(
+                    self.read_size,
+                    min(MIN_READ_SIZE, self.read_size),
+                    self.max_read_size,
+                )
+        elif action == "pause":
+            try:
+                key = self._selector.unregister(fd)
+            except (KeyError, ValueError, OSError):
+                return
+            self._paused[fd] = key.data
+        elif action == "resume":
+            paused = self._paused.pop(fd, None)
+            if paused is not None:
+                self._apply("register", fd, paused)
+        else:
+            self._unregister_now(fd)
+
+    def _unregister_now(self, fd: int) -> None:
+        """fdの監視を即時に解除する（一時停止中のものも含む）"""
+        self._paused.pop(fd, None)
+        self._read_sizes.pop(fd, None)
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError, OSError):
+            pass
+
+    def _drain_wakeup(self) -> None:
+        """自己パイプに溜まった起床バイトを読み捨てる"""
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self) -> None:
+        """イベントループ（リアクタースレッドで実行）"""
+        while not self._stop_flag.is_set():
+            self._apply_pending()
+            try:
+                events = self._selector.select()
+            except OSError:
+                break
+
+            for key, mask in events:
+                if key.fd == self._wakeup_r:
+                    self._drain_wakeup()
+                    continue
+                if mask & selectors.EVENT_WRITE:
+                    self._handle_writable(key.fd, key.data)
+                else:
+                    self._handle_readable(key.fd, key.data)
+
+    def _handle_writable(self, fd: int, callback: WriteCallback) -> None:
+        """
+        書き込み可能になったfdのコールバックを呼び、書き込み待ちがなければ解除する
+
+        Args:
+            fd: 書き込み可能なファイルディスクリプタ
+            callback: 登録時のコールバック
+        """
+        try:
+            more = callback()
+        except Exception:
+            more = False
+        if not more:
+            self._unregister_now(fd)
+
+    def _handle_readable(self, fd: int, callback: ReadCallback) -> None:
+        """
+        読み取り可能になったfdからデータを読み、コールバックへ渡す
+
+        Args:
+            fd: 読み取り可能なファイルディスクリプタ
+            callback: 登録時のコールバック
+        """
+        sizer = self._read_sizes.get(fd)
+        try:
+            data = os.read(fd, sizer.size if sizer is not None else self.read_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+
+        if not data:
+            self._read_sizes.pop(fd, None)
+            try:
+                self._selector.unregister(fd)
+            except (KeyError, ValueError, OSError):
+                pass
+        elif sizer is not None:
+            sizer.update(len(data))
+
+        try:
+            callback(data)
+        except Exception:
+            # 1セッションのコールバック例外でリアクター全体を止めない
+            pass
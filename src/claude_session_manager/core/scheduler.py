@@ -0,0 +1,324 @@
+"""コマンドジョブのスケジューラーモジュール
+
+コマンドをジョブとして投入すると、セッションマネージャーが管理する
+セッションのうちアイドルのものへ割り当てて実行し、結果をFutureで返す。
+空きがない間は優先度順にキューで待たせる。待ち時間と実行時間を集計し、
+セッション数の見積もりに使えるようにする。
+
+割り当ては投入・ジョブの完了・マネージャーのイベント（セッションの作成・
+起動、busy / idle の変化）を契機に行い、キューが空の間は何もしない。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from .command import CommandResult
+from .events import BusyStateChanged, SessionCreated, SessionEvent, SessionStarted
+from .hibernation import is_session_busy
+
+if TYPE_CHECKING:
+    from .manager import SessionManager
+
+# ジョブが割り当てを待っている間に、イベントによらずセッションを確認し直す間隔（秒）
+# （イベントを発行しないセッションを割り当て先にした場合の保険）
+DEFAULT_POLL_INTERVAL = 1.0
+
+# 割り当てられるセッションが増えた可能性のあるイベント
+_WAKE_EVENTS = (SessionCreated, SessionStarted, BusyStateChanged)
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+    """スケジューラーの統計情報"""
+
+    queue_depth: int  # 割り当てを待っているジョブ数
+    running: int  # 実行中のジョブ数
+    submitted: int  # 投入されたジョブ数（累計）
+    completed: int  # 結果を返したジョブ数（終了コードによらない）
+    failed: int  # 例外で終わったジョブ数（タイムアウトを含む）
+    cancelled: int  # 割り当て前に取り消されたジョブ数
+    average_wait: float  # 投入から割り当てまでの平均秒数
+    max_wait: float  # 投入から割り当てまでの最大秒数
+    average_service: float  # 割り当てから完了までの平均秒数
+    max_service: float  # 割り当てから完了までの最大秒数
+
+
+@dataclass
+class _Job:
+    """割り当てを待つジョブ"""
+
+    command: str
+    working_dir: Optional[str]  # 正規化済みの作業ディレクトリ（指定なしはNone）
+    priority: int
+    timeout: Optional[float]
+    seq: int
+    submitted_at: float
+    future: "Future[CommandResult]"
+
+
+def _normalize_dir(path: str) -> str:
+    """作業ディレクトリを比較用に正規化する"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class JobScheduler:
+    """アイドルのセッションへコマンドを割り当てるスケジューラー（スレッドセーフ）
+
+    割り当て先は、実行中・休止していない・処理中でない・このスケジューラーの
+    ジョブを実行していないセッションのうち、累計の実行時間が最も短いもの。
+    run_command()を持たないセッション（インタラクティブセッション）は対象外。
+    """
+
+    def __init__(
+        self,
+        manager: "SessionManager",
+        session_ids: Optional[list[str]] = None,
+        *,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        """
+        Args:
+            manager: セッションを管理するマネージャー
+            session_ids: 割り当て先にするセッションID（Noneの場合は、その時点で
+                         マネージャーにある全セッション）
+            poll_interval: ジョブが待っている間にセッションを確認し直す間隔（秒）
+
+        Raises:
+            ValueError: poll_intervalが正でない場合
+        """
+        if poll_interval <= 0:
+            raise ValueError("poll_interval must be positive")
+
+        self.manager = manager
+        self.session_ids = list(session_ids) if session_ids is not None else None
+        self.poll_interval = poll_interval
+
+        self._cond = threading.Condition()
+        self._queue: list[_Job] = []
+        self._seq = 0
+        self._assigned: set[str] = set()
+        # セッションごとの累計実行秒数（負荷の指標）
+        self._service_totals: dict[str, float] = {}
+        self._closed = False
+
+        # 統計
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._dispatched = 0
+        self._service_total = 0.0
+        self._service_max = 0.0
+        self._finished = 0
+
+        # 同時に実行するジョブ数はセッション数を超えない
+        self._executor = ThreadPoolExecutor(
+            max(1, manager.max_sessions), thread_name_prefix="job-scheduler"
+        )
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="job-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+        manager.events.subscribe(self._on_manager_event, _WAKE_EVENTS)
+
+    def submit(
+        self,
+        command: str,
+        *,
+        working_dir: Optional[str] = None,
+        priority: int = 0,
+        timeout: Optional[float] = None,
+    ) -> "Future[CommandResult]":
+        """
+        コマンドをジョブとして投入する
+
+        Args:
+            command: 実行するコマンド
+            working_dir: この作業ディレクトリのセッションでだけ実行する
+                         （該当するセッションができるまで待つ）
+            priority: 優先度（大きいほど先に割り当てる。同じ優先度は投入順）
+            timeout: 割り当て後に完了を待つ最大秒数（Noneの場合は無制限）
+
+        Returns:
+            run_command()の結果を返すFuture（タイムアウトなどは例外として返る）
+
+        Raises:
+            RuntimeError: スケジューラーを閉じた後の場合
+            ValueError: コマンドが空文字列の場合
+        """
+        if not command or command.strip() == "":
+            raise ValueError("Command cannot be empty")
+
+        future: "Future[CommandResult]" = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            self._seq += 1
+            self._queue.append(
+                _Job(
+                    command=command,
+                    working_dir=_normalize_dir(working_dir) if working_dir else None,
+                    priority=priority,
+                    timeout=timeout,
+                    seq=self._seq,
+                    submitted_at=time.monotonic(),
+                    future=future,
+                )
+            )
+            self._submitted += 1
+            self._cond.notify_all()
+        return future
+
+    @property
+    def stats(self) -> SchedulerStats:
+        """現在の統計情報"""
+        with self._cond:
+            return SchedulerStats(
+                queue_depth=len(self._queue),
+                running=len(self._assigned),
+                submitted=self._submitted,
+                completed=self._completed,
+                failed=self._failed,
+                cancelled=self._cancelled,
+                average_wait=self._wait_total / self._dispatched if self._dispatched else 0.0,
+                max_wait=self._wait_max,
+                average_service=(
+                    self._service_total / self._finished if self._finished else 0.0
+                ),
+                max_service=self._service_max,
+            )
+
+    def close(self, wait: bool = True) -> None:
+        """
+        スケジューラーを閉じる（割り当て前のジョブは取り消す）
+
+        Args:
+            wait: 実行中のジョブの完了を待つか
+        """
+        self.manager.events.unsubscribe(self._on_manager_event)
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            queued, self._queue = self._queue, []
+            self._cond.notify_all()
+        for job in queued:
+            if job.future.cancel():
+                with self._cond:
+                    self._cancelled += 1
+        self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "JobScheduler":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _on_manager_event(self, event: SessionEvent) -> None:
+        """割り当て先が増えた可能性があればディスパッチスレッドを起こす（発行したスレッド）"""
+        with self._cond:
+            if self._queue:
+                self._cond.notify_all()
+
+    def _dispatch_loop(self) -> None:
+        """キューのジョブをアイドルのセッションへ割り当て続ける（ディスパッチスレッド）"""
+        with self._cond:
+            while not self._closed:
+                self._dispatch_locked()
+                # キューが空なら投入・終了まで待つ（定期的には起きない）
+                self._cond.wait(self.poll_interval if self._queue else None)
+
+    def _dispatch_locked(self) -> None:
+        """割り当てられるジョブを優先度順に割り当てる（ロック保持中に呼ぶ）"""
+        if not self._queue:
+            return
+        free = self._free_sessions()
+        if not free:
+            return
+
+        for job in sorted(self._queue, key=lambda j: (-j.priority, j.seq)):
+            if job.future.cancelled():
+                self._queue.remove(job)
+                self._cancelled += 1
+                continue
+            candidates = [
+                session_id
+                for session_id, session in free.items()
+                if job.working_dir is None
+                or _normalize_dir(session.working_dir) == job.working_dir
+            ]
+            if not candidates:
+                # 他の作業ディレクトリのジョブは先に割り当ててよい
+                continue
+            session_id = min(
+                candidates, key=lambda sid: self._service_totals.get(sid, 0.0)
+            )
+            self._queue.remove(job)
+            if not job.future.set_running_or_notify_cancel():
+                self._cancelled += 1
+                continue
+
+            session = free.pop(session_id)
+            self._assigned.add(session_id)
+            dispatched_at = time.monotonic()
+            wait = dispatched_at - job.submitted_at
+            self._dispatched += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._executor.submit(self._run, job, session_id, session, dispatched_at)
+            if not free:
+                break
+
+    def _free_sessions(self) -> dict[str, Any]:
+        """割り当てられるセッション（ロック保持中に呼ぶ）"""
+        sessions = list(self.manager.get_sessions().items())
+        if self.session_ids is not None:
+            allowed = set(self.session_ids)
+            sessions = [(sid, s) for sid, s in sessions if sid in allowed]
+        return {
+            session_id: session
+            for session_id, session in sessions
+            if session_id not in self._assigned
+            and hasattr(session, "run_command")
+            and not self.manager.is_hibernated(session_id)
+            and session.is_running()
+            and not is_session_busy(session)
+        }
+
+    def _run(
+        self, job: _Job, session_id: str, session: Any, dispatched_at: float
+    ) -> None:
+        """ジョブを実行してFutureへ結果を渡す（ワーカースレッドで実行）"""
+        result: Optional[CommandResult] = None
+        error: Optional[BaseException] = None
+        try:
+            result = session.run_command(job.command, timeout=job.timeout)
+        except Exception as e:
+            error = e
+
+        service = time.monotonic() - dispatched_at
+        with self._cond:
+            self._assigned.discard(session_id)
+            self._service_totals[session_id] = (
+                self._service_totals.get(session_id, 0.0) + service
+            )
+            self._finished += 1
+            self._service_total += service
+            self._service_max = max(self._service_max, service)
+            if error is None:
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._cond.notify_all()
+
+        if error is None:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(error)
@@ -1,27 +1,138 @@
 """PowerShellセッション管理モジュール"""
 
-import queue
+import codecs
+import locale
+import os
 import subprocess
 import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
+
+from ..config import SessionManagerConfig
+from .command import (
+    CommandResult,
+    CommandTracker,
+    PendingCommand,
+    is_powershell,
+    wrap_command,
+)
+from .line_collapser import LineCollapser
+from .metrics import SessionMetrics
+from .output_buffer import POLICY_BLOCK, OutputBuffer, OutputBufferStats, OutputRead
+from .pool import ShellPool, spawn_shell_process
+from .process_tree import (
+    PROCESS_GROUP_KWARGS,
+    is_process_group_alive,
+    kill_process_tree,
+    terminate_process_tree,
+)
+from .reactor import OutputReactor
+from .stdin_writer import StdinWriter, StdinWriterStats
+
+# 既定のシェル起動コマンド
+DEFAULT_SHELL_COMMAND = ["powershell", "-NoLogo", "-NoProfile", "-NonInteractive"]
+
+# 出力読み取りモード
+READ_MODE_LINE = "line"  # readline()で1行ずつ読み取る
+READ_MODE_CHUNK = "chunk"  # os.read()でバイト列をまとめて読み取る
+READ_MODES = (READ_MODE_LINE, READ_MODE_CHUNK)
+
+# チャンクモードで1回に読み取る最大バイト数
+CHUNK_READ_SIZE = 64 * 1024
 
 
 class PowerShellSession:
     """PowerShellプロセスを管理するクラス"""
 
-    def __init__(self, session_id: str, working_dir: str):
+    # 行単位で読むため画面モデルとプロンプト検出は持たない（完了はrun_command()で追跡する）
+    prompt_detector = None
+    screen = None
+
+    def __init__(
+        self,
+        session_id: str,
+        working_dir: str,
+        *,
+        config: Optional[SessionManagerConfig] = None,
+        reactor: Optional[OutputReactor] = None,
+        pool: Optional[ShellPool] = None,
+        shell_command: Optional[list[str]] = None,
+        read_mode: Optional[str] = None,
+        encoding: Optional[str] = None,
+        metrics: Optional[SessionMetrics] = None,
+    ):
         """
         Args:
             session_id: セッション識別子
             working_dir: 作業ディレクトリパス
+            config: セッションマネージャー設定（個別引数が優先される）
+            reactor: 共有I/Oリアクター（Noneの場合はセッション専用の
+                     読み取りスレッドを使用する）
+            pool: 起動済みシェルのウォームプール（チャンク・リアクターモードで使用）
+            shell_command: シェル起動コマンド（Noneの場合はPowerShell）
+            read_mode: 読み取りスレッドのモード（"line" または "chunk"）
+            encoding: 出力の文字コード（例: "utf-8", "cp932"）
+            metrics: 出力量・コマンド数・実行時間の記録先（Noneの場合は記録しない）
+
+        Raises:
+            ValueError: 未知の読み取りモード、または文字コードの場合
         """
+        if read_mode is None:
+            read_mode = config.output_read_mode if config else READ_MODE_LINE
+        if read_mode not in READ_MODES:
+            raise ValueError(f"Unknown read mode: {read_mode}")
+        if encoding is None and config:
+            encoding = config.output_encoding
+        encoding = encoding or locale.getpreferredencoding(False)
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise ValueError(f"Unknown encoding: {encoding}")
+
         self.session_id = session_id
         self.working_dir = working_dir
+        self.reactor = reactor
+        self.pool = pool
+        self.shell_command = shell_command or list(DEFAULT_SHELL_COMMAND)
+        self.read_mode = read_mode
+        self.encoding = encoding
+        self.metrics = metrics
         self.process: Optional[subprocess.Popen] = None
-        self._output_queue: queue.Queue = queue.Queue()
+        # 休止中か（hibernate()で停止し、resume()で再開する）
+        self.hibernated = False
+
+        # 出力バッファ（設定の行数・文字数上限とオーバーフローポリシーに従う）
+        buffer_config = config or SessionManagerConfig()
+        self._output_buffer = OutputBuffer(
+            max_lines=buffer_config.output_buffer_size,
+            max_chars=buffer_config.output_buffer_max_chars,
+            policy=buffer_config.output_overflow_policy,
+        )
+        self._output_buffer.set_space_listener(self._on_buffer_space)
+        # 標準入力の書き込みキュー（start()で作成）
+        self._stdin_max_pending = buffer_config.stdin_queue_max_bytes
+        self._stdin_writer: Optional[StdinWriter] = None
+        # blockポリシーで格納できずに保留している出力（リアクターモード）
+        self._held_output: Optional[str] = None
+        self._held_lock = threading.Lock()
+        # run_command()のマーカー検出
+        self._commands = CommandTracker()
+        # 最後にsend_command()した時刻と、最後に出力を受け取った時刻（休止の判定用）
+        self._last_command_at: Optional[float] = None
+        self._last_output_at: Optional[float] = None
+        # \r による進捗表示の上書きを現在行にまとめる（チャンクモード）
+        # 行モードのテキストパイプは \r を改行に変換するため対象外
+        self._lines = LineCollapser()
         self._output_thread: Optional[threading.Thread] = None
         self._stop_flag = threading.Event()
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._stdout_fd: Optional[int] = None
+        # 出力がEOFに達したか（start()で解除）と、予期しない終了の通知先
+        self._output_ended = False
+        self._exit_listener: Optional[Callable[[], None]] = None
+        # 出力・コマンド・起動状態が変わった時の通知先
+        self._change_listener: Optional[Callable[[], None]] = None
 
     def start(self) -> None:
         """PowerShellプロセスを起動する"""
@@ -30,23 +141,81 @@ class PowerShellSession:
         if not working_path.exists():
             raise FileNotFoundError(f"Working directory not found: {self.working_dir}")
 
-        # PowerShellプロセスを起動
-        self.process = subprocess.Popen(
-            ["powershell", "-NoLogo", "-NoProfile", "-NonInteractive"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,  # 行バッファリング
-            cwd=self.working_dir,
+        self._stop_flag.clear()
+        self._output_ended = False
+        self._output_buffer.reopen()
+        self._lines = LineCollapser()
+
+        if self.reactor is None and self.read_mode == READ_MODE_LINE:
+            # 行モード: テキストパイプをreadline()で読み取る
+            self.process = subprocess.Popen(
+                self.shell_command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding=self.encoding,
+                errors="replace",
+                bufsize=1,  # 行バッファリング
+                cwd=self.working_dir,
+                **PROCESS_GROUP_KWARGS,
+            )
+            self._stdin_writer = StdinWriter(
+                self.process.stdin, max_pending=self._stdin_max_pending
+            )
+            self._output_thread = threading.Thread(
+                target=self._read_output_loop, daemon=True
+            )
+            self._output_thread.start()
+            self._notify_change()
+            return
+
+        # チャンクモード: バイナリパイプを読み、インクリメンタルにデコードする
+        self.process = self._acquire_process()
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(
+            errors="replace"
+        )
+        self._stdout_fd = self.process.stdout.fileno()
+        self._stdin_writer = StdinWriter(
+            self.process.stdin,
+            max_pending=self._stdin_max_pending,
+            reactor=self.reactor,
         )
 
+        if self.reactor is not None:
+            # 共有リアクターに読み取りを任せる
+            self.reactor.register(self._stdout_fd, self._on_output_bytes)
+            self._notify_change()
+            return
+
         # 出力読み取りスレッドを起動
-        self._stop_flag.clear()
         self._output_thread = threading.Thread(
-            target=self._read_output_loop, daemon=True
+            target=self._read_chunk_loop, daemon=True
         )
         self._output_thread.start()
+        self._notify_change()
+
+    def _acquire_process(self) -> subprocess.Popen:
+        """
+        バイナリパイプのシェルプロセスを用意する
+
+        ウォームプールがあれば起動済みのプロセスを引き取り、
+        なければコールドスタートする。
+
+        Returns:
+            シェルプロセス
+        """
+        pool = self.pool
+        if pool is None or pool.shell_command != self.shell_command:
+            return spawn_shell_process(self.shell_command, self.working_dir)
+
+        started = time.monotonic()
+        process = pool.acquire(self.working_dir, self.encoding)
+        hit = process is not None
+        if process is None:
+            process = spawn_shell_process(self.shell_command, self.working_dir)
+        pool.record_start(hit, time.monotonic() - started)
+        return process
 
     def send_command(self, command: str) -> None:
         """
@@ -56,7 +225,8 @@ class PowerShellSession:
             command: 実行するコマンド
 
         Raises:
-            RuntimeError: セッションが実行中でない場合
+            RuntimeError: セッションが実行中でない場合、
+                         または入力の書き込み待ちが上限に達している場合
             ValueError: コマンドが空文字列の場合
         """
         if not self.is_running():
@@ -65,47 +235,465 @@ class PowerShellSession:
         if not command or command.strip() == "":
             raise ValueError("Command cannot be empty")
 
-        if self.process and self.process.stdin:
-            # clsコマンドの場合は特別な制御シーケンスとしてマーク
-            if command.strip().lower() == "cls" or command.strip().lower() == "clear":
-                self._output_queue.put("[CLEAR_SCREEN]\n")
+        # clsコマンドの場合は特別な制御シーケンスとしてマーク
+        if command.strip().lower() == "cls" or command.strip().lower() == "clear":
+            self._output_buffer.put("[CLEAR_SCREEN]\n", block=False)
+
+        self._write_stdin(command + "\n")
+        self._last_command_at = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.commands_sent.inc()
+        self._notify_change()
+
+    def run_command(self, command: str, timeout: Optional[float] = None) -> CommandResult:
+        """
+        コマンドを実行し、完了まで待って結果を返す
+
+        コマンドを一意な開始・終了マーカーで囲んで送信し、出力から終了マーカーを
+        検出した時点で戻る。マーカーはパネルの出力からは取り除かれる。
+
+        Args:
+            command: 実行するコマンド
+            timeout: 完了を待つ最大秒数（Noneの場合は無制限）
+
+        Returns:
+            出力・終了コード・実行時間・最初の出力までの時間
+
+        Raises:
+            RuntimeError: セッションが実行中でない場合、完了前にシェルが終了した場合、
+                         または入力の書き込み待ちが上限に達している場合
+            ValueError: コマンドが空文字列の場合
+            TimeoutError: timeout秒以内に完了しなかった場合
+        """
+        if not self.is_running():
+            raise RuntimeError("Session is not running")
+
+        if not command or command.strip() == "":
+            raise ValueError("Command cannot be empty")
+
+        results = self.run_commands([command], timeout=timeout)
+        try:
+            return next(results)
+        finally:
+            results.close()
+
+    def send_commands(self, commands: list[str]) -> None:
+        """
+        複数のコマンドを1回の書き込みでまとめて送信する（完了は待たない）
+
+        Args:
+            commands: 実行するコマンドのリスト
+
+        Raises:
+            RuntimeError: セッションが実行中でない場合、
+                         または入力の書き込み待ちが上限に達している場合
+            ValueError: 空文字列のコマンドが含まれる場合
+        """
+        if not self.is_running():
+            raise RuntimeError("Session is not running")
+
+        if any(not command or command.strip() == "" for command in commands):
+            raise ValueError("Command cannot be empty")
+
+        if commands:
+            self._write_stdin("".join(command + "\n" for command in commands))
+            self._last_command_at = time.monotonic()
+            if self.metrics is not None:
+                self.metrics.commands_sent.inc(len(commands))
+            self._notify_change()
+
+    def run_commands(
+        self, commands: list[str], timeout: Optional[float] = None
+    ) -> Iterator[CommandResult]:
+        """
+        複数のコマンドをパイプライン送信し、完了した順に結果を返す
+
+        全コマンドをシーケンスマーカー付きで1回の書き込みで送るため、
+        コマンドごとの往復待ちがなく、スループットはシェルの処理速度で決まる。
+        イテレーターを途中で閉じた場合、残りのコマンドは実行されるが結果は捨てられる。
+
+        Args:
+            commands: 実行するコマンドのリスト
+            timeout: 1件ごとの完了を待つ最大秒数（Noneの場合は無制限）
+
+        Yields:
+            各コマンドの結果（送信順）
 
-            self.process.stdin.write(command + "\n")
-            self.process.stdin.flush()
+        Raises:
+            RuntimeError: セッションが実行中でない場合、完了前にシェルが終了した場合、
+                         または入力の書き込み待ちが上限に達している場合
+            ValueError: 空文字列のコマンドが含まれる場合
+            TimeoutError: timeout秒以内に次のコマンドが完了しなかった場合
+        """
+        if not self.is_running():
+            raise RuntimeError("Session is not running")
+
+        if any(not command or command.strip() == "" for command in commands):
+            raise ValueError("Command cannot be empty")
+
+        return self._iter_results(self._submit_commands(commands), timeout)
+
+    def _submit_commands(self, commands: list[str]) -> list[PendingCommand]:
+        """
+        コマンドをマーカーで囲んで登録し、まとめて書き込む
+
+        Args:
+            commands: 実行するコマンドのリスト
+
+        Returns:
+            登録したコマンド（送信順）
+        """
+        powershell = is_powershell(self.shell_command)
+        pendings = [self._commands.register(command) for command in commands]
+        script = "".join(
+            wrap_command(p.result.command, p.token, powershell) + "\n" for p in pendings
+        )
+        self._commands.mark_sent(*pendings)
+        try:
+            self._write_stdin(script)
+        except RuntimeError:
+            self._commands.unregister(*pendings)
+            raise
+        if self.metrics is not None:
+            self.metrics.commands_sent.inc(len(pendings))
+        self._notify_change()
+        return pendings
+
+    def _iter_results(
+        self, pendings: list[PendingCommand], timeout: Optional[float]
+    ) -> Iterator[CommandResult]:
+        """登録済みコマンドの完了を順に待って結果を返す"""
+        index = 0
+        try:
+            for index, pending in enumerate(pendings):
+                command = pending.result.command
+                if not pending.done.wait(timeout):
+                    raise TimeoutError(
+                        f"Command did not complete within {timeout}s: {command}"
+                    )
+                if pending.result.exit_code is None:
+                    raise RuntimeError(
+                        f"Session exited before command completed: {command}"
+                    )
+                self._record_result(pending.result)
+                yield pending.result
+            index = len(pendings)
+        finally:
+            # 途中で打ち切った場合も、残りのマーカーは出力から除去し続ける
+            for pending in pendings[index:]:
+                self._commands.discard(pending)
+
+    def _record_result(self, result: CommandResult) -> None:
+        """完了したコマンドの実行時間を記録する"""
+        if self.metrics is None:
+            return
+        if result.duration is not None:
+            self.metrics.command_duration.record(result.duration)
+        if result.time_to_first_byte is not None:
+            self.metrics.time_to_first_byte.record(result.time_to_first_byte)
+
+    def _write_stdin(self, data: str) -> None:
+        """
+        標準入力の書き込みキューへ積む（パイプが詰まっていてもブロックしない）
+
+        Args:
+            data: 書き込む文字列（改行を含む）
+
+        Raises:
+            RuntimeError: 書き込み待ちが上限に達している場合
+        """
+        writer = self._stdin_writer
+        if writer is None:
+            return
+        payload = data.encode(self.encoding) if self._decoder is not None else data
+        if not writer.write(payload):
+            raise RuntimeError("Input queue is full")
+
+    def wait_input_drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        送信したコマンドがすべてシェルの標準入力へ書き込まれるまで待つ
+
+        Args:
+            timeout: 待機の最大秒数（Noneの場合は無制限）
+
+        Returns:
+            すべて書き込まれた場合True
+        """
+        writer = self._stdin_writer
+        return writer is None or writer.wait_drained(timeout)
+
+    @property
+    def input_backpressured(self) -> bool:
+        """シェルが入力を読み取らず、書き込み待ちが残っているか"""
+        writer = self._stdin_writer
+        return writer is not None and writer.backpressured
+
+    @property
+    def input_stats(self) -> Optional[StdinWriterStats]:
+        """標準入力の書き込みキューの統計情報（未起動の場合はNone）"""
+        writer = self._stdin_writer
+        return writer.stats if writer is not None else None
 
     def get_output(self) -> str:
         """
         出力を取得する（非ブロッキング）
 
         Returns:
-            キューに溜まっている出力（複数行を結合）
+            バッファに溜まっている出力（複数行を結合）
+        """
+        return self._output_buffer.get()
+
+    def read_since(self, cursor: int, timeout: Optional[float] = None) -> OutputRead:
         """
-        output_lines = []
+        カーソル以降の出力を読む（get_output()と異なりバッファを消費しない）
+
+        ロガーや検索インデクサーなど、UIパネル以外の読み手が
+        それぞれのペースで出力を読むために使う。
+
+        Args:
+            cursor: 前回の戻り値のcursor（初回はoutput_cursorまたは0）
+            timeout: 新しい出力がない場合に待つ最大秒数（Noneの場合は待たない）
+
+        Returns:
+            新しい出力・次のカーソル・欠落量（gap）
+        """
+        return self._output_buffer.read_since(cursor, timeout)
+
+    @property
+    def output_cursor(self) -> int:
+        """現在の出力末尾のカーソル（これ以降の出力だけを読みたい場合に使う）"""
+        return self._output_buffer.tail
+
+    @property
+    def pending_line(self) -> Optional[str]:
+        """
+        \\r で上書き中の現在行（進捗表示など。上書き中でなければNone）
+
+        この行は改行で確定するまで出力バッファに入らないため、
+        UIは最終行としてこの内容を表示する。
+        """
+        return self._lines.pending_line
+
+    @property
+    def command_activity_at(self) -> Optional[float]:
+        """
+        send_command()の処理が最後に動いた時刻（time.monotonic()）
+
+        send_command()の時刻とその後の出力の時刻の新しい方。
+        send_command()を使っていない場合はNone。
+        """
+        sent = self._last_command_at
+        if sent is None:
+            return None
+        output = self._last_output_at
+        return sent if output is None else max(sent, output)
+
+    @property
+    def commands_in_flight(self) -> int:
+        """完了していないrun_command()の数"""
+        return self._commands.in_flight
+
+    @property
+    def output_stats(self) -> OutputBufferStats:
+        """出力バッファの統計情報（破棄した行数・文字数を含む）"""
+        return self._output_buffer.stats
+
+    def stop(self, timeout: float = 2.0) -> bool:
+        """
+        プロセスを停止する
+
+        Args:
+            timeout: 終了要求から強制終了へ切り替えるまでの秒数
+
+        Returns:
+            強制終了（kill）が必要だった場合True
+        """
+        self.request_stop()
+        if self.wait_stopped(timeout):
+            return False
+        self.force_stop()
+        return True
+
+    def hibernate(self, timeout: float = 2.0) -> str:
+        """
+        休止のためにプロセスを停止し、未読の出力を取り出す
+
+        Args:
+            timeout: 終了要求から強制終了へ切り替えるまでの秒数
+
+        Returns:
+            既定の読み手（UIパネル）がまだ読んでいない出力
+        """
+        self.stop(timeout)
+        text = self._output_buffer.get()
+        self._output_buffer.clear()
+        self.hibernated = True
+        self._notify_change()
+        return text
+
+    def resume(self, scrollback: str = "") -> None:
+        """
+        休止したセッションを再開する
+
+        退避していた出力を元のオフセットのままバッファへ戻す。カーソルで読む
+        読み手（read_since()・購読）には届け直さず、既定の読み手だけが
+        新しいシェルの出力より先に読む。
+
+        Args:
+            scrollback: hibernate()が返した出力
+
+        Raises:
+            FileNotFoundError: 作業ディレクトリが存在しない場合
+        """
+        if not Path(self.working_dir).exists():
+            raise FileNotFoundError(f"Working directory not found: {self.working_dir}")
+        if scrollback:
+            self._output_buffer.reopen()
+            self._output_buffer.restore(scrollback)
         try:
-            while True:
-                line = self._output_queue.get_nowait()
-                output_lines.append(line)
-        except queue.Empty:
-            pass
+            self.start()
+        except Exception:
+            # 再試行で同じ出力をもう一度戻せるよう空にしておく
+            self._output_buffer.clear()
+            raise
+        self.hibernated = False
+
+    def restart(self) -> None:
+        """
+        シェルを起動し直す（終了・停滞したシェルの復旧用）
 
-        return "".join(output_lines)
+        出力バッファは保持するため、未読の出力と読み手のカーソルは
+        再起動をまたいで続く。
+
+        Raises:
+            FileNotFoundError: 作業ディレクトリが存在しない場合
+        """
+        self.stop()
+        self.start()
+
+    @property
+    def stop_requested(self) -> bool:
+        """stop()などで終了を要求済みか（start()で解除される）"""
+        return self._stop_flag.is_set()
+
+    @property
+    def output_ended(self) -> bool:
+        """シェルの出力がEOFに達し、読み取りが終わったか（start()で解除される）"""
+        return self._output_ended
+
+    def set_exit_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """
+        シェルが予期せず終了した時（出力のEOF）に呼ばれるコールバックを設定する
+
+        読み取りスレッドまたはリアクタースレッドから呼ばれる。
+        stop()などで終了を要求した後のEOFでは呼ばれない。
+
+        Args:
+            listener: コールバック（Noneで解除）
+        """
+        self._exit_listener = listener
+
+    def set_change_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """
+        出力の格納・コマンドの送信・シェルの起動と終了の後に呼ばれるコールバックを設定する
+
+        変化を起こしたスレッド（読み取りスレッド・リアクタースレッド・
+        コマンドを送信したスレッド）から、内部のロックを保持せずに呼ばれる。
+        何が変わったかは渡さないため、呼ばれた側が状態を読み直す。
+
+        Args:
+            listener: コールバック（Noneで解除）
+        """
+        self._change_listener = listener
+
+    def _notify_change(self) -> None:
+        """状態が変わったことを通知する"""
+        listener = self._change_listener
+        if listener is not None:
+            listener()
+
+    def request_stop(self) -> None:
+        """
+        プロセスツリーに終了を要求する（終了を待たずに戻る）
+
+        標準入力を閉じてアイドル中のシェルを終了させ、実行中の子プロセスを
+        含むツリー全体にも終了を要求する。終了の確認はwait_stopped()で行う。
+        """
+        if self.reactor is not None and self._stdout_fd is not None:
+            self.reactor.unregister(self._stdout_fd)
+        self._stdout_fd = None
+
+        with self._held_lock:
+            self._held_output = None
+        # 完了待ちのrun_command()を打ち切る
+        self._commands.flush()
 
-    def stop(self) -> None:
-        """プロセスを停止する"""
         if self.process:
             self._stop_flag.set()
-            self.process.terminate()
+            # blockポリシーで待機中の読み取りスレッドを解放する
+            self._output_buffer.close()
+            if self._stdin_writer is not None:
+                self._stdin_writer.close()
+            try:
+                self.process.stdin.close()
+            except (AttributeError, OSError):
+                pass
+            terminate_process_tree(self.process.pid)
+            if os.name == "posix":
+                # Windowsのterminate()は強制終了になるため、force_stop()に任せる
+                self.process.terminate()
+            self._notify_change()
+
+    def wait_stopped(self, timeout: float = 0) -> bool:
+        """
+        request_stop()後にプロセスツリーの終了を待つ
+
+        終了を確認できた場合は読み取りスレッドの後始末も行う。
+
+        Args:
+            timeout: 待機の最大秒数（0の場合は確認のみ）
+
+        Returns:
+            シェルと子プロセスがすべて終了した場合True
+        """
+        if self.process is None:
+            return True
+
+        deadline = time.monotonic() + timeout
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        # シェルの終了後も出力パイプを握った子プロセスが残っていないか確認する
+        while is_process_group_alive(self.process.pid):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.02, remaining))
+
+        self._finish_stop()
+        return True
+
+    def force_stop(self) -> None:
+        """プロセスツリーを強制終了して後始末を行う"""
+        if self.process is not None:
+            kill_process_tree(self.process.pid)
+            self.process.kill()
             try:
-                self.process.wait(timeout=2)
+                self.process.wait(timeout=1)
             except subprocess.TimeoutExpired:
-                self.process.kill()
+                pass
+        self._finish_stop()
 
-            self.process = None
+    def _finish_stop(self) -> None:
+        """停止後の後始末（読み取りスレッドの終了待ち）"""
+        self.process = None
 
         # スレッドの終了を待つ
         if self._output_thread and self._output_thread.is_alive():
             self._output_thread.join(timeout=1)
             self._output_thread = None
+        self._notify_change()
 
     def is_running(self) -> bool:
         """
@@ -123,14 +711,133 @@ class PowerShellSession:
         if not self.process or not self.process.stdout:
             return
 
-        while not self._stop_flag.is_set() and self.is_running():
+        process = self.process
+        while not self._stop_flag.is_set():
             try:
-                line = self.process.stdout.readline()
+                line = process.stdout.readline()
                 if line:
-                    self._output_queue.put(line)
+                    if self.metrics is not None:
+                        # テキストパイプはデコード済みのため、シェルが書いたバイト数に戻して数える
+                        self.metrics.output_bytes.inc(
+                            len(line.encode(self.encoding, errors="replace"))
+                        )
+                    try:
+                        self._store_output(self._commands.feed(line))
+                    finally:
+                        self._commands.release()
+                    self._notify_change()
+                elif process.poll() is not None:
+                    # プロセス終了後のEOF（残りの出力は読み切った）
+                    self._store_output(self._commands.flush())
+                    break
                 else:
                     # 出力がない場合は少し待つ
                     self._stop_flag.wait(0.1)
             except Exception:
                 # エラー時はループを抜ける
                 break
+        self._on_output_end()
+
+    def _read_chunk_loop(self) -> None:
+        """チャンク単位の出力読み取りループ（別スレッドで実行）
+
+        改行を待たずに届いた分だけを返すos.read()を使うため、
+        改行のないプロンプトや進捗表示も即座にキューへ渡される。
+        """
+        fd = self._stdout_fd
+        if fd is None:
+            return
+
+        try:
+            while not self._stop_flag.is_set():
+                try:
+                    data = os.read(fd, CHUNK_READ_SIZE)
+                except OSError:
+                    data = b""
+                self._on_output_bytes(data)
+                if not data:
+                    # EOF
+                    break
+        finally:
+            # 格納・通知（リスナー）の例外で読み取りが止まる場合も終了を記録し、監視から見えるようにする
+            if not self._output_ended:
+                self._on_output_end()
+
+    def _on_output_bytes(self, data: bytes) -> None:
+        """
+        受け取ったバイト列をデコードしてバッファに格納する
+
+        リアクターまたはチャンク読み取りスレッドから呼ばれる。
+        リアクターモードでblockポリシーのバッファが満杯の場合は、
+        出力を保留してfdの読み取りを一時停止する（共有スレッドは止めない）。
+
+        Args:
+            data: 受信データ（EOF時は空のbytes）
+        """
+        if self._decoder is None:
+            return
+
+        if self.metrics is not None and data:
+            self.metrics.output_bytes.inc(len(data))
+        text = self._commands.feed(self._decoder.decode(data, final=not data))
+        if not data:
+            # EOF: 保留中の出力を吐き出し、完了待ちのコマンドを打ち切る
+            text += self._commands.flush()
+        text = self._lines.feed(text)
+        if not data:
+            text += self._lines.flush()
+        try:
+            try:
+                self._store_output(text)
+            finally:
+                # 出力を格納してからrun_command()の完了を通知する
+                self._commands.release()
+            if data:
+                self._notify_change()
+        finally:
+            if not data:
+                # EOF後はコールバックが呼ばれないため、格納に失敗しても終了は記録する
+                self._on_output_end()
+
+    def _on_output_end(self) -> None:
+        """読み取りの終了を記録し、予期しない終了なら通知する"""
+        self._output_ended = True
+        listener = self._exit_listener
+        if listener is not None and not self._stop_flag.is_set():
+            listener()
+        self._notify_change()
+
+    def _store_output(self, text: str) -> None:
+        """
+        デコード済みの出力をバッファに格納する
+
+        Args:
+            text: 格納する出力（空の場合は何もしない）
+        """
+        if not text:
+            return
+        self._last_output_at = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.output_lines.inc(text.count("\n"))
+
+        if self.reactor is None:
+            self._output_buffer.put(text)
+            return
+
+        with self._held_lock:
+            if self._output_buffer.put(text, block=False):
+                return
+            if self._output_buffer.policy == POLICY_BLOCK and self._stdout_fd is not None:
+                self._held_output = text
+                self.reactor.pause(self._stdout_fd)
+
+    def _on_buffer_space(self) -> None:
+        """バッファに空きができた時に保留中の出力を格納し、読み取りを再開する"""
+        with self._held_lock:
+            if self._held_output is None:
+                return
+            if not self._output_buffer.put(self._held_output, block=False):
+                return
+            self._held_output = None
+            if self.reactor is not None and self._stdout_fd is not None:
+                self.reactor.resume(self._stdout_fd)
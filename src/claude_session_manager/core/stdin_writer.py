@@ -0,0 +1,234 @@
+"""標準入力の非同期書き込みモジュール
+
+子プロセスが入力を読まずにパイプ（通常64KB）が詰まっても、
+呼び出し側（Tkスレッドなど）が書き込みで止まらないようにする。
+書き込みは容量制限付きのキューに積み、共有リアクターの書き込み可能通知、
+または専用の書き込みスレッドで順に送出する。
+"""
+
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Optional, Union
+
+from .reactor import OutputReactor
+
+# 書き込み待ちとして保持する既定の最大量
+DEFAULT_MAX_PENDING = 1024 * 1024
+
+Payload = Union[bytes, str]
+
+
+@dataclass(frozen=True)
+class StdinWriterStats:
+    """書き込みキューの統計情報"""
+
+    pending_bytes: int  # 書き込み待ちの量（テキストストリームでは文字数）
+    written_bytes: int  # 子プロセスへ書き込んだ量
+    rejected_writes: int  # キューが満杯で受け付けなかった回数
+    backpressured: bool  # 子プロセスが読み取らず書き込み待ちが残っているか
+
+
+class StdinWriter:
+    """子プロセスの標準入力へ非同期に書き込むキュー（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        stream: IO,
+        *,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        reactor: Optional[OutputReactor] = None,
+    ):
+        """
+        Args:
+            stream: 書き込み先のストリーム（process.stdin）
+            max_pending: 書き込み待ちとして保持する最大量
+            reactor: 共有リアクター（バイナリストリームのみ。Noneの場合は書き込みスレッド）
+
+        Raises:
+            ValueError: max_pendingが正でない場合
+        """
+        if max_pending <= 0:
+            raise ValueError("max_pending must be positive")
+
+        self.stream = stream
+        self.max_pending = max_pending
+        self.reactor = reactor
+        self._fd: Optional[int] = None
+        if reactor is not None:
+            # 呼び出し側スレッドでの直接書き込みもブロックしないようにする
+            self._fd = stream.fileno()
+            os.set_blocking(self._fd, False)
+        self._queue: deque[Payload] = deque()
+        self._pending = 0
+        # 先頭要素のうち書き込み済みの量（リアクターモードの部分書き込み）
+        self._offset = 0
+        self._written = 0
+        self._rejected = 0
+        self._armed = False  # リアクターに書き込み可能通知を依頼済みか
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, data: Payload) -> bool:
+        """
+        データを書き込みキューに積む（ブロックしない）
+
+        書き込み待ちが max_pending を超える場合は受け付けない。ただし
+        キューが空なら単独で上限を超えるデータ（大きな貼り付けなど）も受け付ける。
+
+        Args:
+            data: 書き込むデータ（ストリームに合わせてbytesまたはstr）
+
+        Returns:
+            受け付けた場合True（満杯・クローズ済みの場合False）
+        """
+        if not data:
+            return True
+
+        with self._cond:
+            if self._closed:
+                return False
+            if self._pending and self._pending + len(data) > self.max_pending:
+                self._rejected += 1
+                return False
+
+            self._queue.append(data)
+            self._pending += len(data)
+
+            if self._fd is None:
+                self._ensure_thread()
+                self._cond.notify_all()
+                return True
+
+            if not self._armed:
+                # パイプに空きがあればその場で書き込み、残りをリアクターに任せる
+                self._flush_nonblocking()
+                if self._queue:
+                    self._armed = True
+                    self.reactor.watch_writable(self._fd, self._on_writable)
+            return True
+
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        書き込み待ちがなくなるまで待つ
+
+        Args:
+            timeout: 待機の最大秒数（Noneの場合は無制限）
+
+        Returns:
+            すべて書き込まれた場合True（タイムアウト・クローズ時はFalse）
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending or self._closed, timeout)
+            return not self._pending and not self._closed
+
+    @property
+    def backpressured(self) -> bool:
+        """子プロセスが読み取らず書き込み待ちが残っているか"""
+        with self._cond:
+            return self._pending > 0
+
+    @property
+    def stats(self) -> StdinWriterStats:
+        """現在の統計情報"""
+        with self._cond:
+            return StdinWriterStats(
+                pending_bytes=self._pending,
+                written_bytes=self._written,
+                rejected_writes=self._rejected,
+                backpressured=self._pending > 0,
+            )
+
+    def close(self) -> None:
+        """
+        書き込み待ちを破棄して書き込みを止める
+
+        ストリーム自体はクローズしない（呼び出し側で行う）。書き込みスレッドが
+        詰まったパイプへの書き込みで止まっている場合も待たずに戻り、
+        スレッドは子プロセスの終了で書き込みが失敗した時点で終了する。
+        """
+        with self._cond:
+            self._discard_locked()
+            armed, self._armed = self._armed, False
+
+        if armed and self.reactor is not None:
+            self.reactor.unregister(self._fd)
+
+    def _ensure_thread(self) -> None:
+        """書き込みスレッドを起動する（ロック保持中に呼ぶ）"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._write_loop, name="StdinWriter", daemon=True
+            )
+            self._thread.start()
+
+    def _write_loop(self) -> None:
+        """キューの内容をまとめて書き込むループ（書き込みスレッドで実行）"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if self._closed:
+                    return
+                # 溜まった分を1回の書き込みにまとめる（書き込み完了まではpendingに残る）
+                data = self._queue[0][:0].join(self._queue)
+                self._queue.clear()
+
+            try:
+                self.stream.write(data)
+                self.stream.flush()
+            except (OSError, ValueError):
+                # 子プロセスが終了してパイプが閉じられた
+                self._abort()
+                return
+
+            with self._cond:
+                if self._closed:
+                    return
+                self._pending -= len(data)
+                self._written += len(data)
+                self._cond.notify_all()
+
+    def _on_writable(self) -> bool:
+        """リアクターからの書き込み可能通知（リアクタースレッドで実行）"""
+        with self._cond:
+            if self._closed:
+                return False
+            self._flush_nonblocking()
+            self._armed = bool(self._queue)
+            return self._armed
+
+    def _flush_nonblocking(self) -> None:
+        """パイプに入るだけ書き込む（ロック保持中に呼ぶ）"""
+        while self._queue:
+            chunk = self._queue[0]
+            try:
+                n = os.write(self._fd, memoryview(chunk)[self._offset :])
+            except BlockingIOError:
+                return
+            except OSError:
+                # 子プロセスが終了してパイプが閉じられた
+                self._discard_locked()
+                return
+
+            self._offset += n
+            self._pending -= n
+            self._written += n
+            if self._offset >= len(chunk):
+                self._queue.popleft()
+                self._offset = 0
+        self._cond.notify_all()
+
+    def _abort(self) -> None:
+        """書き込みエラー時に書き込み待ちを破棄する"""
+        with self._cond:
+            self._discard_locked()
+
+    def _discard_locked(self) -> None:
+        """書き込み待ちを破棄してクローズ状態にする（ロック保持中に呼ぶ）"""
+        self._closed = True
+        self._queue.clear()
+        self._pending = 0
+        self._offset = 0
+        self._cond.notify_all()
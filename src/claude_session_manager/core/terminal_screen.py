@@ -0,0 +1,624 @@
+"""仮想端末画面モジュール
+
+疑似端末の出力（VT100 / xterm のエスケープシーケンスを含む）を逐次的に
+解釈し、行×列の画面バッファに反映する。前回の描画以降に変化した行
+（ダメージ）を記録するため、UIは変化した行だけを再描画すればよい。
+メモリ使用量は画面サイズと上限付きのスクロールバックで決まり、
+受信したバイト数には比例しない。
+全角文字（CJKなど）は端末と同じく2列を占め、右半分のセルは空文字列にする。
+"""
+
+import re
+import threading
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+# 既定のスクロールバック行数
+DEFAULT_SCROLLBACK_LINES = 1000
+
+# タブストップの間隔
+TAB_WIDTH = 8
+
+# パーサーの状態
+_GROUND = 0  # 通常の文字
+_ESCAPE = 1  # ESC の直後
+_CSI = 2  # ESC [ ... のパラメーター読み取り中
+_STRING = 3  # OSC / DCS など終端（BEL または ESC \）まで読み捨てる
+_CHARSET = 4  # ESC ( などの文字集合指定（1文字読み捨てる）
+
+# 制御文字とESCを含まない表示文字の連続
+_TEXT_RUN = re.compile(r"[^\x00-\x1f\x7f]+")
+# CSIのパラメーター・中間バイト
+_CSI_BODY = re.compile(r"[0-?]*[ -/]*")
+# 文字列シーケンスの終端候補
+_STRING_END = re.compile(r"[\x07\x1b]")
+# 保持するCSIパラメーターの最大長（不正なシーケンスで膨らまないようにする）
+_MAX_CSI_LENGTH = 64
+# 代替画面への切り替えに使うDECSETの番号
+_ALT_SCREEN_MODES = {"47", "1047", "1049"}
+# 2列を占める文字の東アジアの文字幅の分類（Wide / Fullwidth）
+_WIDE_WIDTHS = ("W", "F")
+# 全角文字の右半分のセル（行を文字列にすると消える）
+_WIDE_TAIL = ""
+
+
+@dataclass(frozen=True)
+class ScreenUpdate:
+    """前回のtake_update()以降の画面の変化"""
+
+    rows: dict[int, str]  # 変化した行（行番号 → 行末の空白を除いた内容）
+    scrolled: tuple[str, ...] = ()  # 画面上端からスクロールバックへ送られた行
+    scrolled_count: int = 0  # スクロールバックへ送られた総行数（scrolledは上限まで）
+    full: bool = False  # 画面全体の再描画が必要か（rowsは全行を含む）
+    scrollback: tuple[str, ...] = ()  # full時のスクロールバック全体
+    height: int = 0  # 画面の行数
+
+
+@dataclass
+class _Buffer:
+    """画面バッファ（通常画面と代替画面の切り替え用）"""
+
+    lines: list[list[str]]
+    cursor: tuple[int, int] = (0, 0)
+    saved_cursor: tuple[int, int] = (0, 0)
+
+
+class TerminalScreen:
+    """VT100 / xterm 互換の画面バッファ（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        rows: int = 24,
+        cols: int = 80,
+        scrollback_lines: int = DEFAULT_SCROLLBACK_LINES,
+    ):
+        """
+        Args:
+            rows: 画面の行数
+            cols: 画面の列数
+            scrollback_lines: スクロールバックとして保持する最大行数
+
+        Raises:
+            ValueError: 行数・列数が正でない場合、またはscrollback_linesが負の場合
+        """
+        if rows <= 0 or cols <= 0:
+            raise ValueError("rows and cols must be positive")
+        if scrollback_lines < 0:
+            raise ValueError("scrollback_lines must not be negative")
+
+        self.rows = rows
+        self.cols = cols
+        self.scrollback_lines = scrollback_lines
+        self.scrollback: deque[str] = deque(maxlen=scrollback_lines)
+        self._lines = [self._blank_line() for _ in range(rows)]
+        self._row = 0
+        self._col = 0
+        # 最終列に書いた直後（次の文字で折り返す）
+        self._wrap_pending = False
+        self._saved_cursor = (0, 0)
+        # スクロール領域（DECSTBM）
+        self._top = 0
+        self._bottom = rows - 1
+        # 代替画面の使用中に退避している通常画面
+        self._main: Optional[_Buffer] = None
+
+        # パーサーの状態
+        self._state = _GROUND
+        self._csi = ""
+
+        # ダメージ
+        self._damaged: set[int] = set(range(rows))
+        self._full = True
+        self._scrolled: deque[str] = deque(maxlen=scrollback_lines)
+        self._scrolled_count = 0
+
+        self._lock = threading.RLock()
+
+    @property
+    def cursor(self) -> tuple[int, int]:
+        """カーソル位置（行, 列）"""
+        with self._lock:
+            return self._row, self._col
+
+    @property
+    def alternate_screen(self) -> bool:
+        """代替画面（vim、lessなど）を表示中か"""
+        with self._lock:
+            return self._main is not None
+
+    def display(self) -> list[str]:
+        """
+        画面の内容を取得する
+
+        Returns:
+            各行の内容（行末の空白を除く）
+        """
+        with self._lock:
+            return [self._render(r) for r in range(self.rows)]
+
+    def feed(self, text: str) -> None:
+        """
+        出力を画面に反映する
+
+        エスケープシーケンスはチャンク境界で分割されていてもよい。
+
+        Args:
+            text: 疑似端末からの出力（デコード済み）
+        """
+        with self._lock:
+            i = 0
+            n = len(text)
+            while i < n:
+                state = self._state
+                if state == _GROUND:
+                    match = _TEXT_RUN.match(text, i)
+                    if match:
+                        self._write_text(match.group())
+                        i = match.end()
+                    else:
+                        self._control(text[i])
+                        i += 1
+                elif state == _CSI:
+                    match = _CSI_BODY.match(text, i)
+                    self._csi += match.group()
+                    i = match.end()
+                    if len(self._csi) > _MAX_CSI_LENGTH:
+                        self._state = _GROUND
+                    elif i < n:
+                        self._csi_final(text[i])
+                        i += 1
+                elif state == _STRING:
+                    match = _STRING_END.search(text, i)
+                    if match is None:
+                        i = n
+                    else:
+                        # ESC \ の ESC は通常のエスケープとして処理する
+                        self._state = _GROUND if match.group() == "\x07" else _ESCAPE
+                        i = match.end()
+                elif state == _CHARSET:
+                    self._state = _GROUND
+                    i += 1
+                else:
+                    self._escape(text[i])
+                    i += 1
+
+    def resize(self, rows: int, cols: int) -> None:
+        """
+        画面サイズを変更する
+
+        行数を減らす場合はカーソルより下の行から削り、
+        足りない分は画面上端の行をスクロールバックへ送る。
+
+        Args:
+            rows: 行数
+            cols: 列数
+
+        Raises:
+            ValueError: 行数・列数が正でない場合
+        """
+        if rows <= 0 or cols <= 0:
+            raise ValueError("rows and cols must be positive")
+
+        with self._lock:
+            for line in self._lines:
+                if len(line) > cols:
+                    del line[cols:]
+                else:
+                    line.extend(" " * (cols - len(line)))
+            self.cols = cols
+
+            excess = len(self._lines) - rows
+            if excess > 0:
+                below = min(excess, len(self._lines) - 1 - self._row)
+                del self._lines[len(self._lines) - below :]
+                if self._main is None:
+                    for line in self._lines[: excess - below]:
+                        self._push_scrollback(line)
+                del self._lines[: excess - below]
+                self._row -= excess - below
+            else:
+                self._lines.extend(self._blank_line() for _ in range(-excess))
+
+            self.rows = rows
+            self._top = 0
+            self._bottom = rows - 1
+            self._row = min(self._row, rows - 1)
+            self._col = min(self._col, cols - 1)
+            self._wrap_pending = False
+            self._saved_cursor = (
+                min(self._saved_cursor[0], rows - 1),
+                min(self._saved_cursor[1], cols - 1),
+            )
+            if self._main is not None:
+                # 代替画面を抜けたときに通常画面を描き直すため大きさを揃える
+                main = self._main
+                main.lines = [
+                    (line + [" "] * cols)[:cols] for line in main.lines[-rows:]
+                ]
+                main.lines[:0] = [
+                    self._blank_line() for _ in range(rows - len(main.lines))
+                ]
+                main.cursor = (
+                    min(main.cursor[0], rows - 1),
+                    min(main.cursor[1], cols - 1),
+                )
+            self._mark_full()
+
+    def invalidate(self) -> None:
+        """次のtake_update()で画面全体とスクロールバックを返すようにする"""
+        with self._lock:
+            self._mark_full()
+
+    def take_update(self) -> Optional[ScreenUpdate]:
+        """
+        前回の呼び出し以降の変化を取り出す
+
+        Returns:
+            画面の変化（変化がない場合はNone）
+        """
+        with self._lock:
+            if not self._full and not self._damaged and not self._scrolled_count:
+                return None
+
+            if self._full:
+                update = ScreenUpdate(
+                    rows={r: self._render(r) for r in range(self.rows)},
+                    full=True,
+                    scrollback=tuple(self.scrollback),
+                    height=self.rows,
+                )
+            else:
+                update = ScreenUpdate(
+                    rows={r: self._render(r) for r in sorted(self._damaged)},
+                    scrolled=tuple(self._scrolled),
+                    scrolled_count=self._scrolled_count,
+                    height=self.rows,
+                )
+            self._damaged = set()
+            self._full = False
+            self._scrolled.clear()
+            self._scrolled_count = 0
+            return update
+
+    # ---- 文字・制御文字 ----
+
+    def _blank_line(self) -> list[str]:
+        """空白で埋めた1行を作る"""
+        return [" "] * self.cols
+
+    def _render(self, row: int) -> str:
+        """1行を文字列にする（行末の空白を除く）"""
+        return "".join(self._lines[row]).rstrip()
+
+    def _write_text(self, text: str) -> None:
+        """カーソル位置に文字を書き、行末で折り返す（全角文字は2列を占める）"""
+        if text.isascii():
+            self._write_narrow(text)
+            return
+        # 半角文字の連続はまとめて書き、全角文字だけを1文字ずつ書く
+        start = 0
+        for index, char in enumerate(text):
+            if unicodedata.east_asian_width(char) in _WIDE_WIDTHS:
+                if start < index:
+                    self._write_narrow(text[start:index])
+                self._write_wide(char)
+                start = index + 1
+        if start < len(text):
+            self._write_narrow(text[start:])
+
+    def _write_narrow(self, text: str) -> None:
+        """1列の文字を書く"""
+        cols = self.cols
+        while text:
+            if self._wrap_pending:
+                self._wrap_pending = False
+                self._col = 0
+                self._linefeed()
+            chunk = text[: cols - self._col]
+            text = text[len(chunk) :]
+            line = self._lines[self._row]
+            self._split_wide(line, self._col, self._col + len(chunk))
+            line[self._col : self._col + len(chunk)] = chunk
+            self._damaged.add(self._row)
+            self._col += len(chunk)
+            if self._col >= cols:
+                self._col = cols - 1
+                self._wrap_pending = True
+
+    def _write_wide(self, char: str) -> None:
+        """2列を占める文字を書く（最終列に収まらない場合は次の行へ折り返す）"""
+        cols = self.cols
+        if cols < 2:
+            self._write_narrow(char)
+            return
+        if self._wrap_pending or self._col == cols - 1:
+            self._wrap_pending = False
+            self._col = 0
+            self._linefeed()
+        line = self._lines[self._row]
+        self._split_wide(line, self._col, self._col + 2)
+        line[self._col] = char
+        line[self._col + 1] = _WIDE_TAIL
+        self._damaged.add(self._row)
+        self._col += 2
+        if self._col >= cols:
+            self._col = cols - 1
+            self._wrap_pending = True
+
+    @staticmethod
+    def _split_wide(line: list[str], start: int, end: int) -> None:
+        """[start, end)を上書きする前に、範囲の境界にまたがる全角文字の残り半分を空白にする"""
+        if line[start] == _WIDE_TAIL and start > 0:
+            line[start - 1] = " "
+        if end < len(line) and line[end] == _WIDE_TAIL:
+            line[end] = " "
+
+    def _control(self, char: str) -> None:
+        """制御文字を処理する"""
+        if char == "\x1b":
+            self._state = _ESCAPE
+        elif char == "\r":
+            self._col = 0
+            self._wrap_pending = False
+        elif char in "\n\x0b\x0c":
+            self._linefeed()
+        elif char == "\b":
+            self._col = max(0, self._col - 1)
+            self._wrap_pending = False
+        elif char == "\t":
+            self._col = min(self.cols - 1, (self._col // TAB_WIDTH + 1) * TAB_WIDTH)
+        # BELなどその他の制御文字は無視する
+
+    def _linefeed(self) -> None:
+        """カーソルを1行下げる（スクロール領域の下端ではスクロールする）"""
+        self._wrap_pending = False
+        if self._row == self._bottom:
+            self._scroll_up(1, self._top, self._bottom)
+        elif self._row < self.rows - 1:
+            self._row += 1
+
+    def _reverse_index(self) -> None:
+        """カーソルを1行上げる（スクロール領域の上端では逆スクロールする）"""
+        self._wrap_pending = False
+        if self._row == self._top:
+            self._scroll_down(1, self._top, self._bottom)
+        elif self._row > 0:
+            self._row -= 1
+
+    # ---- エスケープシーケンス ----
+
+    def _escape(self, char: str) -> None:
+        """ESC に続く1文字を処理する"""
+        self._state = _GROUND
+        if char == "[":
+            self._state = _CSI
+            self._csi = ""
+        elif char in "]P^_X":
+            self._state = _STRING
+        elif char in "()*+":
+            self._state = _CHARSET
+        elif char == "7":
+            self._saved_cursor = (self._row, self._col)
+        elif char == "8":
+            self._restore_cursor()
+        elif char == "D":
+            self._linefeed()
+        elif char == "E":
+            self._col = 0
+            self._linefeed()
+        elif char == "M":
+            self._reverse_index()
+        elif char == "c":
+            self._reset()
+        elif char == "\x1b":
+            self._state = _ESCAPE
+
+    def _csi_final(self, final: str) -> None:
+        """CSIシーケンスの終端文字を処理する"""
+        if not "@" <= final <= "~":
+            # パラメーター中の制御文字は実行してからシーケンスを続ける
+            if final == "\x1b":
+                self._state = _ESCAPE
+            else:
+                self._control(final)
+            return
+
+        self._state = _GROUND
+        body = self._csi
+        if final == "m" and body[:1] != "?":
+            # 文字属性（色など）は保持しない（最も多いシーケンスなので先に判定する）
+            return
+        private = body[:1] in ("?", ">", "<", "=")
+        if private:
+            body = body[1:]
+        body = body.rstrip(" !\"#$%&'()*+,-./")
+        params = [int(p) if p.isdigit() else 0 for p in body.split(";")] if body else []
+
+        if private:
+            if final in "hl":
+                self._set_private_mode(body.split(";"), final == "h")
+            return
+
+        def arg(index: int = 0, default: int = 1) -> int:
+            value = params[index] if index < len(params) else 0
+            return value or default
+
+        row, col = self._row, self._col
+        if final == "A":
+            # スクロール領域内では上端で止まる
+            top = self._top if row >= self._top else 0
+            self._move(max(top, row - arg()), col)
+        elif final in "Be":
+            bottom = self._bottom if row <= self._bottom else self.rows - 1
+            self._move(min(bottom, row + arg()), col)
+        elif final in "Ca":
+            self._move(row, col + arg())
+        elif final == "D":
+            self._move(row, col - arg())
+        elif final == "E":
+            self._move(row + arg(), 0)
+        elif final == "F":
+            self._move(row - arg(), 0)
+        elif final in "G`":
+            self._move(row, arg() - 1)
+        elif final in "Hf":
+            self._move(arg(0) - 1, arg(1) - 1)
+        elif final == "d":
+            self._move(arg() - 1, col)
+        elif final == "J":
+            self._erase_display(arg(default=0))
+        elif final == "K":
+            self._erase_line(arg(default=0))
+        elif final == "L":
+            if self._top <= row <= self._bottom:
+                self._scroll_down(arg(), row, self._bottom)
+        elif final == "M":
+            if self._top <= row <= self._bottom:
+                self._scroll_up(arg(), row, self._bottom)
+        elif final == "P":
+            line = self._lines[row]
+            n = min(arg(), self.cols - col)
+            del line[col : col + n]
+            line.extend(" " * n)
+            self._damaged.add(row)
+        elif final == "@":
+            line = self._lines[row]
+            n = min(arg(), self.cols - col)
+            line[col:col] = " " * n
+            del line[self.cols :]
+            self._damaged.add(row)
+        elif final == "X":
+            line = self._lines[row]
+            n = min(arg(), self.cols - col)
+            line[col : col + n] = " " * n
+            self._damaged.add(row)
+        elif final == "S":
+            self._scroll_up(arg(), self._top, self._bottom)
+        elif final == "T":
+            self._scroll_down(arg(), self._top, self._bottom)
+        elif final == "r":
+            top = arg(0) - 1
+            bottom = min(arg(1, self.rows) - 1, self.rows - 1)
+            if top < bottom:
+                self._top, self._bottom = top, bottom
+                self._move(0, 0)
+        elif final == "s":
+            self._saved_cursor = (row, col)
+        elif final == "u":
+            self._restore_cursor()
+        # その他（デバイス問い合わせなど）は無視する
+
+    def _set_private_mode(self, modes: list[str], enable: bool) -> None:
+        """DECSET / DECRST（代替画面の切り替えのみ扱う）"""
+        if not _ALT_SCREEN_MODES.intersection(modes):
+            return
+        if enable and self._main is None:
+            self._main = _Buffer(
+                lines=self._lines,
+                cursor=(self._row, self._col),
+                saved_cursor=self._saved_cursor,
+            )
+            self._lines = [self._blank_line() for _ in range(self.rows)]
+            self._mark_full()
+        elif not enable and self._main is not None:
+            main, self._main = self._main, None
+            self._lines = main.lines
+            self._row, self._col = main.cursor
+            self._saved_cursor = main.saved_cursor
+            self._mark_full()
+        self._wrap_pending = False
+
+    def _move(self, row: int, col: int) -> None:
+        """カーソルを画面内の位置へ移動する"""
+        self._row = min(max(row, 0), self.rows - 1)
+        self._col = min(max(col, 0), self.cols - 1)
+        self._wrap_pending = False
+
+    def _restore_cursor(self) -> None:
+        """保存したカーソル位置へ戻す"""
+        self._move(*self._saved_cursor)
+
+    def _erase_display(self, mode: int) -> None:
+        """画面を消去する（ED）"""
+        if mode == 0:
+            self._erase_line(0)
+            rows = range(self._row + 1, self.rows)
+        elif mode == 1:
+            self._erase_line(1)
+            rows = range(0, self._row)
+        else:
+            rows = range(self.rows)
+            if mode == 3:
+                self.scrollback.clear()
+                self._mark_full()
+        for r in rows:
+            self._lines[r] = self._blank_line()
+            self._damaged.add(r)
+
+    def _erase_line(self, mode: int) -> None:
+        """行を消去する（EL）"""
+        line = self._lines[self._row]
+        if mode == 0:
+            line[self._col :] = " " * (self.cols - self._col)
+        elif mode == 1:
+            line[: self._col + 1] = " " * (self._col + 1)
+        else:
+            line[:] = " " * self.cols
+        self._damaged.add(self._row)
+
+    def _reset(self) -> None:
+        """端末をリセットする（ESC c）"""
+        self._main = None
+        self._lines = [self._blank_line() for _ in range(self.rows)]
+        self._row = self._col = 0
+        self._wrap_pending = False
+        self._saved_cursor = (0, 0)
+        self._top, self._bottom = 0, self.rows - 1
+        self._mark_full()
+
+    # ---- スクロール ----
+
+    def _scroll_up(self, n: int, top: int, bottom: int) -> None:
+        """top〜bottom行をn行上へスクロールする"""
+        n = min(n, bottom - top + 1)
+        # 画面全体のスクロールで押し出された行だけをスクロールバックへ送る
+        to_scrollback = (
+            top == 0 and bottom == self.rows - 1 and self._main is None
+        )
+        for _ in range(n):
+            line = self._lines.pop(top)
+            self._lines.insert(bottom, self._blank_line())
+            if to_scrollback:
+                self._push_scrollback(line)
+
+        if to_scrollback:
+            # 残った行は内容ごと上へずれるだけなので、ダメージも一緒にずらす
+            if len(self._damaged) < self.rows:
+                self._damaged = {r - n for r in self._damaged if r >= n}
+                self._damaged.update(range(self.rows - n, self.rows))
+        else:
+            self._damaged.update(range(top, bottom + 1))
+
+    def _scroll_down(self, n: int, top: int, bottom: int) -> None:
+        """top〜bottom行をn行下へスクロールする"""
+        n = min(n, bottom - top + 1)
+        for _ in range(n):
+            del self._lines[bottom]
+            self._lines.insert(top, self._blank_line())
+        self._damaged.update(range(top, bottom + 1))
+
+    def _push_scrollback(self, line: list[str]) -> None:
+        """画面から押し出された行をスクロールバックへ送る"""
+        text = "".join(line).rstrip()
+        self.scrollback.append(text)
+        self._scrolled.append(text)
+        self._scrolled_count += 1
+
+    def _mark_full(self) -> None:
+        """画面全体を再描画対象にする"""
+        self._full = True
+        self._damaged = set(range(self.rows))
+        self._scrolled.clear()
+        self._scrolled_count = 0
@@ -0,0 +1,344 @@
+"""セッションのヘルスウォッチドッグモジュール
+
+シェルが終了すると読み取りループは黙って終わり、パネルの更新が止まる
+だけになる。ウォッチドッグは全セッションのプロセスの生存・出力の読み取り・
+処理中の出力の停滞を1つのスレッドで監視し、セッションを
+healthy / stalled / dead に分類する。
+
+終了はセッションからの通知（出力のEOF）で即座に検出する。停滞と、通知の
+届かない終了（子プロセスが出力パイプを握ったまま残った場合など）は一定
+間隔の確認で検出する。終了したセッションは指数バックオフで自動的に
+再起動できる（出力バッファと画面は再起動をまたいで保持される）。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from .hibernation import activity_marker, is_session_busy
+
+if TYPE_CHECKING:
+    from .manager import SessionManager
+
+# セッションの状態
+HEALTH_HEALTHY = "healthy"
+HEALTH_STALLED = "stalled"  # 処理中のまま出力が止まっている
+HEALTH_DEAD = "dead"  # シェルが終了した、または出力を読めなくなった
+
+# 停滞と通知の届かない終了を確認する間隔（秒）
+DEFAULT_CHECK_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class SessionHealth:
+    """セッションの健全性"""
+
+    session_id: str
+    state: str  # "healthy" / "stalled" / "dead"
+    reason: str = ""  # stalled / dead の理由
+    restarts: int = 0  # 自動再起動した回数（累計）
+    next_restart_in: Optional[float] = None  # 次の自動再起動までの秒数（予定なしはNone）
+    last_error: Optional[str] = None  # 最後に失敗した再起動の理由
+
+
+@dataclass
+class _Tracked:
+    """監視中のセッションの記録"""
+
+    session: Any
+    last_activity: float  # 最後に出力が進んだ時刻
+    marker: Optional[int] = None
+    state: Optional[str] = None  # 監視の対象外の間はNone
+    reason: str = ""
+    failures: int = 0  # 連続した終了の回数（バックオフの指数）
+    restarts: int = 0
+    restart_at: Optional[float] = None
+    restarted_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+def classify_session(
+    session: Any, idle_for: float, stall_seconds: float
+) -> Optional[tuple[str, str]]:
+    """
+    セッションの状態を判定する
+
+    Args:
+        session: セッション
+        idle_for: 出力が最後に進んでからの秒数
+        stall_seconds: 処理中のまま出力がない場合に停滞とみなす秒数
+
+    Returns:
+        状態と理由（未起動・停止済み・休止中で監視の対象外の場合はNone）
+    """
+    if session.hibernated or session.process is None or session.stop_requested:
+        return None
+    if not session.is_running():
+        return HEALTH_DEAD, "process exited"
+    if session.output_ended:
+        return HEALTH_DEAD, "output reader stopped"
+    if idle_for >= stall_seconds and is_session_busy(session):
+        return HEALTH_STALLED, f"no output for {idle_for:.0f}s while busy"
+    return HEALTH_HEALTHY, ""
+
+
+class SessionWatchdog:
+    """全セッションの健全性を監視し、終了したセッションを再起動するクラス（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        manager: "SessionManager",
+        *,
+        interval: float = DEFAULT_CHECK_INTERVAL,
+        stall_seconds: float = 60.0,
+        auto_restart: bool = False,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 60.0,
+        stable_seconds: float = 30.0,
+        on_change: Optional[Callable[[SessionHealth], None]] = None,
+    ):
+        """
+        Args:
+            manager: セッションを管理するマネージャー
+            interval: 停滞と通知の届かない終了を確認する間隔（秒）
+            stall_seconds: 処理中のまま出力がない場合に停滞とみなす秒数
+            auto_restart: 終了したセッションを自動で再起動するか
+            backoff_initial: 終了から最初の再起動までの秒数（続けて終了するたびに倍にする）
+            backoff_max: 再起動までの秒数の上限
+            stable_seconds: 再起動後この秒数終了しなければ、待ち時間を初期値に戻す
+            on_change: 状態が変わるたびに呼ばれるコールバック（監視スレッドで呼ばれる）
+
+        Raises:
+            ValueError: 秒数が正でない、またはbackoff_maxがbackoff_initialより小さい場合
+        """
+        if interval <= 0 or stall_seconds <= 0 or backoff_initial <= 0:
+            raise ValueError("watchdog intervals must be positive")
+        if backoff_max < backoff_initial:
+            raise ValueError("backoff_max must not be less than backoff_initial")
+
+        self.manager = manager
+        self.interval = interval
+        self.stall_seconds = stall_seconds
+        self.auto_restart = auto_restart
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self.on_change = on_change
+
+        self._lock = threading.Lock()
+        self._tracked: dict[str, _Tracked] = {}
+        # 終了の通知または停止要求で監視スレッドを起こす
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, session_id: str, session: Any) -> None:
+        """
+        セッションの終了通知を受け取るよう登録する
+
+        check()は登録されていないセッションも監視するが、終了の即時検出には
+        登録が必要（マネージャーがセッション作成時に呼ぶ）。
+
+        Args:
+            session_id: セッション識別子
+            session: セッション
+        """
+        if hasattr(session, "set_exit_listener"):
+            session.set_exit_listener(lambda: self.notify(session_id))
+
+    def notify(self, session_id: str) -> None:
+        """
+        セッションの終了を知らせる（セッションの読み取りスレッドから呼ばれる）
+
+        Args:
+            session_id: 終了したセッションの識別子
+        """
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """監視スレッドを起動する（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._thread is not None or self._closed.is_set():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="session-watchdog", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        """監視スレッドを停止する（以後は再起動しない）"""
+        self._closed.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def health(self, now: Optional[float] = None) -> dict[str, SessionHealth]:
+        """
+        監視中のセッションの健全性を取得する（最後のcheck()の結果）
+
+        Args:
+            now: 現在時刻（time.monotonic()。テスト用）
+
+        Returns:
+            セッションIDと健全性の辞書（監視の対象外のセッションは含まない）
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return {
+                session_id: self._snapshot(session_id, tracked, now)
+                for session_id, tracked in self._tracked.items()
+                if tracked.state is not None
+            }
+
+    def check(self, now: Optional[float] = None) -> dict[str, SessionHealth]:
+        """
+        全セッションの状態を判定し、期限の来た再起動を行う
+
+        監視スレッドが通知と一定間隔で呼ぶ。テストでは直接呼んでよい。
+
+        Args:
+            now: 現在時刻（time.monotonic()。テスト用）
+
+        Returns:
+            監視中のセッションの健全性
+        """
+        if now is None:
+            now = time.monotonic()
+        changed = self._classify_all(now)
+        if self.auto_restart and not self._closed.is_set():
+            changed.extend(self._restart_due(now))
+        if self.on_change is not None:
+            for health in changed:
+                self.on_change(health)
+        return self.health(now)
+
+    def _classify_all(self, now: float) -> list[SessionHealth]:
+        """全セッションの状態を更新し、変わったものを返す"""
+        sessions = self.manager.get_sessions()
+        changed = []
+        with self._lock:
+            for session_id in set(self._tracked) - set(sessions):
+                del self._tracked[session_id]
+            for session_id, session in sessions.items():
+                tracked = self._tracked.get(session_id)
+                if tracked is None or tracked.session is not session:
+                    tracked = _Tracked(session=session, last_activity=now)
+                    self._tracked[session_id] = tracked
+                    # sessionsへ直接追加されたセッションも終了を通知させる
+                    self.watch(session_id, session)
+                marker = activity_marker(session)
+                if marker != tracked.marker:
+                    tracked.marker = marker
+                    tracked.last_activity = now
+
+                result = classify_session(
+                    session, now - tracked.last_activity, self.stall_seconds
+                )
+                if result is None:
+                    # 監視の対象外（停止された場合は予定していた再起動も取り消す）
+                    tracked.state = None
+                    tracked.restart_at = None
+                    continue
+                state, reason = result
+                if state == HEALTH_DEAD and tracked.state != HEALTH_DEAD:
+                    self._schedule_restart(tracked, now)
+                if (
+                    state == HEALTH_HEALTHY
+                    and tracked.restarted_at is not None
+                    and now - tracked.restarted_at >= self.stable_seconds
+                ):
+                    tracked.failures = 0
+                    tracked.restarted_at = None
+                if state != tracked.state or reason != tracked.reason:
+                    tracked.state = state
+                    tracked.reason = reason
+                    changed.append(self._snapshot(session_id, tracked, now))
+        return changed
+
+    def _schedule_restart(self, tracked: _Tracked, now: float) -> None:
+        """次の再起動の時刻を決める（ロック保持中に呼ぶ）"""
+        if not self.auto_restart:
+            return
+        delay = min(self.backoff_initial * (2**tracked.failures), self.backoff_max)
+        tracked.failures += 1
+        tracked.restart_at = now + delay
+
+    def _restart_due(self, now: float) -> list[SessionHealth]:
+        """期限の来たセッションを再起動する（ロックを保持せずに呼ぶ）"""
+        with self._lock:
+            due = [
+                session_id
+                for session_id, tracked in self._tracked.items()
+                if tracked.restart_at is not None and tracked.restart_at <= now
+            ]
+
+        changed = []
+        for session_id in due:
+            error: Optional[str] = None
+            try:
+                self.manager.restart_session(session_id)
+            except KeyError:
+                continue
+            except Exception as e:
+                error = str(e) or type(e).__name__
+
+            with self._lock:
+                tracked = self._tracked.get(session_id)
+                if tracked is None:
+                    continue
+                if error is None:
+                    tracked.restarts += 1
+                    tracked.restarted_at = now
+                    tracked.restart_at = None
+                    tracked.last_error = None
+                    tracked.state = HEALTH_HEALTHY
+                    tracked.reason = ""
+                    tracked.marker = activity_marker(tracked.session)
+                    tracked.last_activity = now
+                else:
+                    tracked.last_error = error
+                    self._schedule_restart(tracked, now)
+                changed.append(self._snapshot(session_id, tracked, now))
+        return changed
+
+    def _next_timeout(self) -> float:
+        """次に確認するまでの秒数（最も近い再起動の予定と確認間隔の短い方）"""
+        timeout = self.interval
+        now = time.monotonic()
+        with self._lock:
+            for tracked in self._tracked.values():
+                if tracked.restart_at is not None:
+                    timeout = min(timeout, max(0.0, tracked.restart_at - now))
+        return timeout
+
+    def _run(self) -> None:
+        """終了の通知・再起動の予定・確認間隔のいずれかで起きて確認する（監視スレッド）"""
+        while not self._closed.is_set():
+            self._wakeup.wait(self._next_timeout())
+            self._wakeup.clear()
+            if self._closed.is_set():
+                break
+            try:
+                self.check()
+            except Exception:
+                # 監視スレッドは止めない（次の確認でやり直す）
+                pass
+
+    @staticmethod
+    def _snapshot(session_id: str, tracked: _Tracked, now: float) -> SessionHealth:
+        """記録から健全性を作る（ロック保持中に呼ぶ）"""
+        return SessionHealth(
+            session_id=session_id,
+            state=tracked.state,
+            reason=tracked.reason,
+            restarts=tracked.restarts,
+            next_restart_in=(
+                max(0.0, tracked.restart_at - now)
+                if tracked.restart_at is not None
+                else None
+            ),
+            last_error=tracked.last_error,
+        )
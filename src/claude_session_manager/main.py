@@ -1,22 +1,108 @@
-"""メインエントリーポイント"""
+"""メインエントリーポイント
+
+使い方:
+    claude-session-manager                  # このプロセスでセッションを持つUI
+    claude-session-manager daemon [--socket PATH]
+                                            # セッションを持つヘッドレスのデーモン
+    claude-session-manager attach [--socket PATH]
+                                            # デーモンへ接続するUI（なければ起動する）
+"""
+
+import argparse
+import sys
+from typing import Optional
 
 from .config import SessionManagerConfig
 from .core.manager import SessionManager
+from .core.metrics import MetricsServer
 from .ui.main_window import MainWindow
 
 
-def main() -> None:
-    """メイン関数"""
+def _parse_socket(command: str, args: list[str]) -> Optional[str]:
+    """サブコマンドの引数からソケットのパスを取り出す"""
+    parser = argparse.ArgumentParser(prog=f"claude-session-manager {command}")
+    parser.add_argument("--socket", help="デーモンのソケットのパス")
+    return parser.parse_args(args).socket
+
+
+def run_daemon_command(args: list[str]) -> None:
+    """
+    daemonサブコマンド: ヘッドレスのデーモンを実行する
+
+    Args:
+        args: サブコマンド以降の引数
+    """
+    from .remote.daemon import run_daemon
+
+    socket_path = _parse_socket("daemon", args)
+    run_daemon(socket_path, SessionManagerConfig())
+
+
+def run_attach_command(args: list[str]) -> None:
+    """
+    attachサブコマンド: デーモンへ接続してUIを表示する（なければデーモンを起動する）
+
+    UIを閉じてもセッションはデーモンに残る。インタラクティブセッションの画面は
+    デーモンから送られないため、attachしたUIでは扱えない。
+
+    Args:
+        args: サブコマンド以降の引数
+    """
+    from .remote.attach import RemoteSessionManager
+    from .remote.daemon import is_daemon_running, spawn_daemon
+
+    config = SessionManagerConfig()
+    socket_path = _parse_socket("attach", args) or config.daemon_socket_path
+    if not is_daemon_running(socket_path):
+        spawn_daemon(socket_path)
+    manager = RemoteSessionManager(socket_path)
+
+    window = MainWindow(manager)
+    window.setup_ui()
+    try:
+        window.run()
+    finally:
+        manager.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """メイン関数
+
+    Args:
+        argv: コマンドライン引数（Noneの場合はsys.argv[1:]）
+    """
+    args = sys.argv[1:] if argv is None else argv
+    if args and args[0] == "daemon":
+        run_daemon_command(args[1:])
+        return
+    if args and args[0] == "attach":
+        run_attach_command(args[1:])
+        return
+
     # 設定を読み込み
     config = SessionManagerConfig()
 
     # セッションマネージャーを作成
-    manager = SessionManager(max_sessions=config.max_sessions)
+    manager = SessionManager(max_sessions=config.max_sessions, config=config)
+    # シェルの事前起動を開始（UI構築と並行して進む）
+    manager.warm_up()
+    # 終了したセッションの検出（設定で有効な場合は自動再起動）を開始
+    manager.start_watchdog()
+    # 計測値をPrometheusのテキスト形式で公開（設定でポートを指定した場合）
+    metrics_server = None
+    if config.metrics_port is not None:
+        metrics_server = MetricsServer(manager.metrics, port=config.metrics_port).start()
 
     # メインウィンドウを作成
     window = MainWindow(manager)
     window.setup_ui()
-    window.run()
+    try:
+        window.run()
+    finally:
+        # ウィンドウ以外の経路（Ctrl+Cなど）で終了した場合もシェルを残さない
+        manager.shutdown_all()
+        if metrics_server is not None:
+            metrics_server.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+"""Remote module - デーモンとソケット経由のセッション操作"""
+
+from .attach import RemoteSession, RemoteSessionManager
+from .client import OutputFrame, RpcConnection, SessionClient, Subscription
+from .daemon import run_daemon, spawn_daemon
+from .server import SessionServer
+
+__all__ = [
+    "SessionServer",
+    "RpcConnection",
+    "SessionClient",
+    "Subscription",
+    "OutputFrame",
+    "RemoteSessionManager",
+    "RemoteSession",
+    "run_daemon",
+    "spawn_daemon",
+]
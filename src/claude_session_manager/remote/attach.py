@@ -0,0 +1,560 @@
+"""デーモンのセッションを手元のセッションのように扱うモジュール
+
+RemoteSessionManagerはSessionManagerのうちUIが使う部分を、デーモンへの
+要求で実装する。接続時にattachして全セッションの状態と前回のカーソル以降の
+出力を受け取り、その後はデーモンから通知されるイベントを手元のEventBusへ流す。
+UIを再起動してもセッションはデーモンに残り、出力の差分だけを受け取る。
+
+UIのスレッドはデーモンへの要求を待たない。出力のイベントを受け取ると
+専用の読み取りスレッドが差分を読み、手元にためてからOutputAvailableを
+発行する（get_output()は手元の出力を返すだけ）。要求には応答を待つ
+上限（call_timeout）があり、接続が切れた場合はconnectedがFalseになって
+全セッションのSessionExitedを発行する。reconnect()で手元のカーソルから
+attachし直す。
+
+インタラクティブセッションの画面モデルとプロンプト検出はデーモン側にあり、
+ソケットでは送らない。そのためattachしたUIではインタラクティブセッションを
+作成・操作できず、既存のものはパネルに案内を表示するだけにする
+（操作はデーモンを使わないUIで行う）。
+"""
+
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+from ..core.events import (
+    BusyStateChanged,
+    EventBus,
+    OutputAvailable,
+    SessionCreated,
+    SessionDeleted,
+    SessionEvent,
+    SessionExited,
+    SessionStarted,
+)
+from ..core.manager import BroadcastReport, BroadcastResult, ShutdownReport
+from ..core.metrics import MetricsRegistry
+from ..core.output_buffer import OutputBufferStats
+from . import protocol
+from .client import RpcConnection
+
+# attachしたUIがインタラクティブセッションを扱えない理由
+INTERACTIVE_UNSUPPORTED = (
+    "Interactive sessions are not available over attach: "
+    "the terminal screen stays in the daemon"
+)
+
+# デーモンの応答を待つ最大秒数（超えるとTimeoutError）
+DEFAULT_CALL_TIMEOUT = 10.0
+
+
+class RemoteSession:
+    """デーモンのセッションの代理（UIのセッションパネルが使う部分を実装する）
+
+    出力はセッションごとのカーソルで読むため、デーモン側の出力は消費しない
+    （複数のUIが同じセッションへattachしてもそれぞれがすべての出力を受け取る）。
+    読むのはマネージャーの読み取りスレッドで、get_output()はデーモンへ要求しない。
+    インタラクティブセッションは画面を受け取れないため、出力の代わりに
+    案内を1度だけ返し、コマンドの送信は拒否する。
+    """
+
+    # 画面モデルとプロンプト検出はデーモン側にあるため持たない
+    prompt_detector = None
+    screen = None
+
+    def __init__(self, manager: "RemoteSessionManager", session_id: str):
+        """
+        Args:
+            manager: このセッションを持つマネージャー
+            session_id: セッション識別子
+        """
+        self.manager = manager
+        self.session_id = session_id
+        self._lock = threading.Lock()
+        self._info: dict[str, Any] = {}
+        # 次に読む位置（attach()とread()の応答で進める）
+        self._cursor = 0
+        # attach()・読み取りスレッドで受け取り、まだget_output()で返していない出力
+        self._unread: list[str] = []
+        # インタラクティブセッションの案内を返したか
+        self._notice_shown = False
+
+    @property
+    def working_dir(self) -> str:
+        """作業ディレクトリ"""
+        return self._info.get("working_dir", "")
+
+    @property
+    def interactive(self) -> bool:
+        """インタラクティブセッションか"""
+        return bool(self._info.get("interactive", False))
+
+    @property
+    def hibernated(self) -> bool:
+        """デーモン側で休止中か（最後に受け取った状態）"""
+        return bool(self._info.get("hibernated", False))
+
+    @property
+    def pending_line(self) -> Optional[str]:
+        """上書き中の現在行（最後に受け取った状態）"""
+        return self._info.get("pending_line")
+
+    @property
+    def output_cursor(self) -> int:
+        """次に読む出力のカーソル"""
+        with self._lock:
+            return self._cursor
+
+    @property
+    def output_stats(self) -> OutputBufferStats:
+        """デーモン側の出力バッファの統計情報（最後に受け取った状態）"""
+        info = self._info
+        return OutputBufferStats(
+            buffered_lines=info.get("buffered_lines", 0),
+            buffered_chars=info.get("buffered_chars", 0),
+            dropped_lines=info.get("dropped_lines", 0),
+            dropped_chars=info.get("dropped_chars", 0),
+        )
+
+    def is_running(self) -> bool:
+        """
+        セッションが実行中か（最後に受け取った状態）
+
+        Returns:
+            実行中の場合True
+        """
+        return bool(self._info.get("running", False))
+
+    def get_output(self) -> str:
+        """
+        前回以降に受け取った出力を取得する（デーモンへは要求しない）
+
+        Returns:
+            新しい出力（インタラクティブセッションは初回だけ案内、以降は空文字列）
+        """
+        with self._lock:
+            if self.interactive:
+                if self._notice_shown:
+                    return ""
+                self._notice_shown = True
+                return f"[{INTERACTIVE_UNSUPPORTED}]\n"
+            unread = self._unread
+            self._unread = []
+        return "".join(unread)
+
+    def start(self) -> None:
+        """
+        デーモン側でセッションを起動する（休止中の場合は再開する）
+
+        Raises:
+            RuntimeError: 起動できない場合
+        """
+        self._update(self.manager._call("start", session_id=self.session_id))
+
+    def stop(self) -> None:
+        """デーモン側でセッションを停止する"""
+        self._update(self.manager._call("stop", session_id=self.session_id))
+
+    def send_command(self, command: str) -> None:
+        """
+        コマンドを送信する
+
+        Args:
+            command: 実行するコマンド
+
+        Raises:
+            RuntimeError: インタラクティブセッションの場合
+        """
+        self.manager.send_command(self.session_id, command)
+
+    def _update(self, info: dict[str, Any]) -> None:
+        """デーモンから受け取った状態を反映する"""
+        self._info = {**self._info, **info}
+
+    def _apply_delta(self, result: dict[str, Any]) -> None:
+        """read / attachの応答を反映し、出力をget_output()で返すまでためておく"""
+        self._update(result)
+        with self._lock:
+            if "next_cursor" in result and result["next_cursor"] >= self._cursor:
+                self._cursor = result["next_cursor"]
+                if result.get("text"):
+                    self._unread.append(result["text"])
+
+    def _set_running(self, running: bool) -> None:
+        """イベントで実行状態を更新する"""
+        self._info = {**self._info, "running": running}
+
+
+class RemoteSessionManager:
+    """デーモンのSessionManagerの代理（UIが使う部分を実装する）
+
+    セッションはデーモンが持つため、shutdown_all()は切断するだけで
+    セッションを停止しない。休止の方針もデーモン側で適用する。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        connection_factory: Callable[..., RpcConnection] = RpcConnection,
+        call_timeout: Optional[float] = DEFAULT_CALL_TIMEOUT,
+    ):
+        """
+        接続してattachする（全セッションの状態と保持している出力を受け取る）
+
+        Args:
+            path: ソケットのパス（Noneの場合は既定のパス）
+            connection_factory: 接続を作成する関数（テスト用）
+            call_timeout: デーモンの応答を待つ最大秒数（Noneの場合は無制限）
+
+        Raises:
+            ConnectionError: デーモンに接続できない場合
+        """
+        self.path = path or protocol.default_socket_path()
+        self.call_timeout = call_timeout
+        self.events = EventBus()
+        # UIの描画時間などは手元で計測する（デーモンの計測値はデーモン側で公開する）
+        self.metrics = MetricsRegistry()
+        self._connection_factory = connection_factory
+        self._lock = threading.Lock()
+        self.sessions: dict[str, RemoteSession] = {}
+        # プロンプト検出によるbusy / idle（attach時と、BusyStateChangedを受けて
+        # 読み取りスレッドで読み直す）
+        self._states: dict[str, str] = {}
+        self._states_stale = False
+        # 出力のイベントを受け取り、まだ読んでいないセッション
+        self._dirty: set[str] = set()
+        self._dirty_cond = threading.Condition(self._lock)
+        self._closed = False
+        self._connection = self._connect()
+        self.attach()
+        self._reader = threading.Thread(
+            target=self._read_loop, name="remote-output-read", daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def connected(self) -> bool:
+        """デーモンに接続しているか（切れた場合はreconnect()でattachし直す）"""
+        return not self._connection.closed
+
+    def attach(self) -> None:
+        """
+        全セッションの状態と、前回読んだ位置以降の出力を受け取る
+
+        既に知っているセッションは手元のカーソル以降の差分だけを受け取る。
+        """
+        with self._lock:
+            cursors = {sid: s.output_cursor for sid, s in self.sessions.items()}
+        result = self._call("attach", cursors=cursors)
+        for info in result["sessions"]:
+            self._session(info["session_id"])._apply_delta(info)
+        states = self._call("session_states")
+        with self._lock:
+            self._states = dict(states)
+
+    def reconnect(self) -> None:
+        """
+        接続し直し、手元のカーソル以降の出力をattachで受け取る
+
+        Raises:
+            ConnectionError: デーモンに接続できない場合
+        """
+        self._connection.close()
+        self._connection = self._connect()
+        self.attach()
+        for session_id, session in self.get_sessions().items():
+            if session.is_running():
+                self.events.publish(SessionStarted(session_id))
+            self.events.publish(OutputAvailable(session_id, session.output_cursor))
+
+    def close(self) -> None:
+        """デーモンから切断する（セッションはデーモンに残る）"""
+        with self._lock:
+            self._closed = True
+            self._dirty_cond.notify_all()
+        self._connection.close()
+
+    def create_session(
+        self, session_id: str, working_dir: str, interactive: bool = False
+    ) -> RemoteSession:
+        """
+        デーモンに新規セッションを作成する
+
+        Args:
+            session_id: セッション識別子
+            working_dir: 作業ディレクトリパス（デーモンのカレントディレクトリ基準）
+            interactive: インタラクティブモードを使用するか（attachでは扱えないため
+                         Trueの場合はRuntimeError）
+
+        Returns:
+            作成されたセッションの代理
+
+        Raises:
+            RuntimeError: 最大セッション数を超える場合、
+                         またはインタラクティブモードを指定した場合
+            ValueError: 重複したセッションIDの場合
+        """
+        if interactive:
+            raise RuntimeError(INTERACTIVE_UNSUPPORTED)
+        info = self._call(
+            "create_session",
+            session_id=session_id,
+            working_dir=working_dir,
+            interactive=interactive,
+        )
+        session = self._session(session_id)
+        session._update(info)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[RemoteSession]:
+        """
+        セッションを取得する
+
+        Args:
+            session_id: セッション識別子
+
+        Returns:
+            セッションの代理、存在しない場合はNone
+        """
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def get_sessions(self) -> dict[str, RemoteSession]:
+        """
+        全セッションを取得する
+
+        Returns:
+            セッションIDとセッションの代理の辞書（呼び出し時点のコピー）
+        """
+        with self._lock:
+            return dict(self.sessions)
+
+    def list_sessions(self) -> list[str]:
+        """
+        セッション一覧を取得する
+
+        Returns:
+            セッションIDのリスト
+        """
+        with self._lock:
+            return list(self.sessions)
+
+    def delete_session(self, session_id: str) -> None:
+        """
+        デーモンのセッションを削除する
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        self._call("delete_session", session_id=session_id)
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def touch(self, session_id: str) -> RemoteSession:
+        """
+        セッションが使われたことを記録する（休止中の場合は再開する）
+
+        Raises:
+            KeyError: セッションが存在しない場合
+            RuntimeError: セッションを再開できない場合
+        """
+        info = self._call("touch", session_id=session_id)
+        session = self._session(session_id)
+        session._update(info)
+        return session
+
+    def is_hibernated(self, session_id: str) -> bool:
+        """セッションが休止中か（最後に受け取った状態）"""
+        session = self.get_session(session_id)
+        return session is not None and session.hibernated
+
+    def send_command(self, session_id: str, command: str) -> None:
+        """
+        指定セッションにコマンドを送信する
+
+        Raises:
+            KeyError: セッションが存在しない場合
+            RuntimeError: セッションが実行中でない場合、
+                         またはインタラクティブセッションの場合
+        """
+        session = self.get_session(session_id)
+        if session is not None and session.interactive:
+            raise RuntimeError(INTERACTIVE_UNSUPPORTED)
+        self._call("send_command", session_id=session_id, command=command)
+
+    def broadcast(
+        self,
+        command: str,
+        session_ids: Optional[list[str]] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        on_result: Optional[Callable[[BroadcastResult], None]] = None,
+    ) -> BroadcastReport:
+        """
+        同じコマンドをデーモン側の複数セッションで実行する
+
+        on_resultは完了した順に呼ばれるが、すべての完了後にまとめて呼ばれる。
+
+        Raises:
+            KeyError: 存在しないセッションIDを指定した場合
+            ValueError: コマンドが空の場合
+        """
+        result = self._call(
+            "broadcast",
+            command=command,
+            session_ids=session_ids,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+        )
+        report = BroadcastReport(
+            command=result["command"],
+            results=[BroadcastResult(**r) for r in result["results"]],
+            elapsed=result["elapsed"],
+        )
+        if on_result is not None:
+            for item in report.results:
+                on_result(item)
+        return report
+
+    def get_session_states(self) -> dict[str, str]:
+        """
+        プロンプト検出に対応したセッションの busy / idle 状態を取得する
+
+        デーモンへは要求せず、最後に受け取った状態を返す。
+
+        Returns:
+            セッションIDと状態（"unknown" / "busy" / "idle"）の辞書
+        """
+        with self._lock:
+            return dict(self._states)
+
+    def apply_hibernation_policy(self, now: Optional[float] = None) -> list[str]:
+        """休止の方針はデーモン側で適用するため何もしない"""
+        return []
+
+    def shutdown_all(self, deadline: Optional[float] = None) -> ShutdownReport:
+        """
+        デーモンから切断する（セッションは停止せずデーモンに残す）
+
+        Returns:
+            空の結果
+        """
+        self.close()
+        return ShutdownReport()
+
+    def _connect(self) -> RpcConnection:
+        """デーモンへ接続する（切断の通知を受け取る）"""
+        return self._connection_factory(
+            self.path, self._on_notification, on_disconnect=self._on_disconnect
+        )
+
+    def _call(self, method: str, **params: Any) -> Any:
+        """
+        デーモンへ要求を送って応答を待つ
+
+        Raises:
+            TimeoutError: call_timeout秒以内に応答がない場合
+            ConnectionError: 接続が切れている場合
+        """
+        future = self._connection.call_async(method, **params)
+        try:
+            return future.result(timeout=self.call_timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(
+                f"Daemon did not reply to {method} within {self.call_timeout}s"
+            ) from None
+
+    def _read_loop(self) -> None:
+        """出力のイベントを受け取ったセッションの差分を読む（読み取りスレッド）"""
+        while True:
+            with self._lock:
+                self._dirty_cond.wait_for(
+                    lambda: self._dirty or self._states_stale or self._closed
+                )
+                if self._closed:
+                    return
+                session_ids = list(self._dirty)
+                self._dirty.clear()
+                refresh_states = self._states_stale
+                self._states_stale = False
+            if refresh_states:
+                try:
+                    states = self._call("session_states")
+                except (TimeoutError, ConnectionError):
+                    states = None
+                if states is not None:
+                    with self._lock:
+                        self._states = dict(states)
+            for session_id in session_ids:
+                session = self.get_session(session_id)
+                if session is None or session.interactive:
+                    continue
+                try:
+                    result = self._call(
+                        "read", session_id=session_id, cursor=session.output_cursor
+                    )
+                except (KeyError, RuntimeError, TimeoutError, ConnectionError):
+                    # 削除・切断された場合。次のイベントで読み直す
+                    continue
+                session._apply_delta(result)
+                self.events.publish(OutputAvailable(session_id, session.output_cursor))
+
+    def _request_read(self, session_id: str) -> None:
+        """読み取りスレッドにセッションの差分を読ませる"""
+        with self._lock:
+            self._dirty.add(session_id)
+            self._dirty_cond.notify()
+
+    def _on_disconnect(self) -> None:
+        """接続が切れたことを全セッションのSessionExitedで知らせる（接続の読み取りスレッド）"""
+        with self._lock:
+            if self._closed:
+                return
+        for session_id, session in self.get_sessions().items():
+            session._set_running(False)
+            self.events.publish(SessionExited(session_id))
+
+    def _session(self, session_id: str) -> RemoteSession:
+        """セッションの代理を取得する（なければ作成する）"""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = RemoteSession(self, session_id)
+                self.sessions[session_id] = session
+            return session
+
+    def _on_notification(self, method: str, params: dict[str, Any]) -> None:
+        """デーモンの通知を手元のイベントにする（接続の読み取りスレッドで呼ばれる）"""
+        if method != "event":
+            return
+        event = protocol.event_from_params(params)
+        if event is None:
+            return
+        self._apply_event(event)
+        if isinstance(event, SessionDeleted):
+            self.events.publish(event)
+        else:
+            # 出力と状態（休止・上書き中の行など）は読み取りスレッドが読んでから知らせる
+            self._request_read(event.session_id)
+            if not isinstance(event, OutputAvailable):
+                self.events.publish(event)
+
+    def _apply_event(self, event: SessionEvent) -> None:
+        """イベントで分かる状態を手元の代理へ反映する"""
+        if isinstance(event, (SessionDeleted, BusyStateChanged)):
+            with self._lock:
+                self._states_stale = True
+                self._dirty_cond.notify()
+        if isinstance(event, SessionDeleted):
+            with self._lock:
+                self.sessions.pop(event.session_id, None)
+            return
+        session = self._session(event.session_id)
+        if isinstance(event, SessionCreated):
+            session._update({"interactive": event.interactive})
+        elif isinstance(event, SessionStarted):
+            session._set_running(True)
+        elif isinstance(event, SessionExited):
+            session._set_running(False)
@@ -0,0 +1,531 @@
+"""デーモンへ接続するクライアントモジュール
+
+スクリプトや他のエージェントからは、GUIなしでSessionClientを使う。
+
+    with SessionClient() as client:
+        client.create_session("s1", ".")
+        client.start("s1")
+        print(client.run_command("s1", "git status").output)
+        with client.subscribe("s1", from_cursor=0) as frames:
+            for frame in frames:
+                print(frame.text, end="")
+"""
+
+import itertools
+import queue
+import socket
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+from ..core.command import CommandResult
+from ..core.manager import BroadcastReport, BroadcastResult
+from . import protocol
+
+# 購読ごとに受信してためておく最大フレーム数（超えた分は捨て、gapのフレームで知らせる）
+SUBSCRIPTION_QUEUE_FRAMES = 256
+
+
+class RpcConnection:
+    """デーモンとの接続（スレッドセーフ）
+
+    要求は応答を待たずに続けて送れる（call_async()）。応答は読み取りスレッドが
+    idで対応するFutureへ渡し、通知（idのないメッセージ）はコールバックへ渡す。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        on_notification: Optional[Callable[[str, dict[str, Any]], None]] = None,
+        *,
+        timeout: Optional[float] = 5.0,
+        on_disconnect: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            path: ソケットのパス（Noneの場合は既定のパス）
+            on_notification: 通知のコールバック（method, params。読み取りスレッドで呼ばれる）
+            timeout: 接続を待つ最大秒数
+            on_disconnect: 接続が切れた（閉じた）ときのコールバック（読み取りスレッドで呼ばれる）
+
+        Raises:
+            ConnectionError: デーモンに接続できない場合
+        """
+        self.path = path or protocol.default_socket_path()
+        self.on_notification = on_notification
+        self.on_disconnect = on_disconnect
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.path)
+        except OSError as e:
+            self._sock.close()
+            raise ConnectionError(f"Cannot connect to daemon at {self.path}: {e}") from e
+        self._sock.settimeout(None)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: dict[int, Future] = {}
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._read_loop, name="rpc-connection-read", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        """接続が閉じているか"""
+        return self._closed
+
+    def call(self, method: str, **params: Any) -> Any:
+        """
+        要求を送って応答を待つ
+
+        Args:
+            method: メソッド名
+            **params: パラメーター
+
+        Returns:
+            応答のresult
+
+        Raises:
+            KeyError / ValueError / TimeoutError / RuntimeError: デーモンがエラーを返した場合
+            ConnectionError: 接続が切れた場合
+        """
+        return self.call_async(method, **params).result()
+
+    def call_async(self, method: str, **params: Any) -> Future:
+        """
+        要求を送り、応答を待たずにFutureを返す
+
+        Args:
+            method: メソッド名
+            **params: パラメーター
+
+        Returns:
+            応答のresultを結果とするFuture
+
+        Raises:
+            ConnectionError: 接続が切れている場合
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("Connection to daemon is closed")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        data = protocol.encode_message(protocol.request(request_id, method, params))
+        try:
+            with self._send_lock:
+                self._sock.sendall(data)
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise ConnectionError(f"Connection to daemon is lost: {e}") from e
+        return future
+
+    def close(self) -> None:
+        """接続を閉じる（応答待ちの要求はConnectionErrorになる）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._fail_pending()
+
+    def _read_loop(self) -> None:
+        """応答と通知を読む（読み取りスレッド）"""
+        try:
+            stream = self._sock.makefile("rb")
+            for line in stream:
+                message = protocol.decode_message(line)
+                if "id" in message and "method" not in message:
+                    self._resolve(message)
+                elif self.on_notification is not None:
+                    try:
+                        self.on_notification(message.get("method", ""), message.get("params", {}))
+                    except Exception:
+                        # コールバックの失敗で接続を止めない
+                        pass
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            self._closed = True
+        self._fail_pending()
+        if self.on_disconnect is not None:
+            self.on_disconnect()
+
+    def _resolve(self, message: dict[str, Any]) -> None:
+        """応答を対応するFutureへ渡す"""
+        with self._lock:
+            future = self._pending.pop(message.get("id"), None)
+        if future is None:
+            return
+        if "error" in message:
+            future.set_exception(protocol.error_to_exception(message["error"]))
+        else:
+            future.set_result(message.get("result"))
+
+    def _fail_pending(self) -> None:
+        """応答待ちの要求をすべて失敗させる"""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError("Connection to daemon is closed"))
+
+
+@dataclass(frozen=True)
+class OutputFrame:
+    """購読した出力の1フレーム"""
+
+    session_id: str
+    text: str  # 前回のフレーム以降の出力（複数行をまとめて含む）
+    cursor: int  # textの先頭の位置
+    next_cursor: int  # 次のフレームの先頭の位置（再購読するときのfrom_cursor）
+    gap: int = 0  # 追い付けずに読み飛ばした文字数（0なら欠落なし）
+
+
+class Subscription:
+    """セッションの出力の購読（イテレーターとしてフレームを返す）
+
+    セッションが削除されるか、close()するか、接続が切れると終わる。
+    受信したフレームが溜まりすぎると、接続のほかの応答を止めないよう
+    以降のフレームを捨てる。捨てた分は空のtextとgapを持つフレームで知らせるため、
+    必要ならcursor - gapの位置からread要求で読み直す。
+    """
+
+    def __init__(self, client: "SessionClient", subscription_id: int, session_id: str):
+        self.client = client
+        self.subscription_id = subscription_id
+        self.session_id = session_id
+        # 次に読む位置（subscribe()の応答と受け取ったフレームで進める）
+        self.cursor: Optional[int] = None
+        self._frames: queue.Queue = queue.Queue(SUBSCRIPTION_QUEUE_FRAMES)
+        self._lock = threading.Lock()
+        # 満杯で入れられなかった分（捨てたフレームをまとめたgapのフレームと終わりの印）
+        self._dropped: Optional[OutputFrame] = None
+        self._ending = False
+        self._closed = False
+
+    def __iter__(self) -> Iterator[OutputFrame]:
+        while True:
+            frame = self.next(timeout=None)
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def next(self, timeout: Optional[float] = None) -> Optional[OutputFrame]:
+        """
+        次のフレームを待つ
+
+        Args:
+            timeout: 待つ最大秒数（Noneの場合は無制限）
+
+        Returns:
+            フレーム（購読が終わった場合はNone）
+
+        Raises:
+            TimeoutError: timeout秒以内にフレームが届かなかった場合
+        """
+        try:
+            frame = self._frames.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No output frame within timeout") from None
+        with self._lock:
+            self._flush_locked()
+        if frame is None:
+            # 後でnext()を呼んでも終わりを返す
+            self._finish()
+            return None
+        self.cursor = frame.next_cursor
+        return frame
+
+    def close(self) -> None:
+        """購読を解除する（応答は待たない）"""
+        if self._closed:
+            return
+        self._finish()
+        if self.client._end_subscription(self.subscription_id) is None:
+            # デーモン側で既に終わっている
+            return
+        try:
+            self.client.connection.call_async("unsubscribe", subscription=self.subscription_id)
+        except ConnectionError:
+            pass
+
+    def _finish(self) -> None:
+        """購読を終える（待たずに戻る。まだ読んでいないフレームは捨てる）"""
+        with self._lock:
+            self._closed = True
+            self._dropped = None
+            self._ending = False
+            while True:
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    break
+            self._frames.put_nowait(None)
+
+    def _deliver(self, frame: Optional[OutputFrame]) -> None:
+        """
+        フレームを渡す（接続の読み取りスレッド。満杯でも待たない）
+
+        満杯の間に届いたフレームは捨て、1つのgapのフレームにまとめておく。
+        終わりの印（None）は捨てずに、空きができてから入れる。
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            if frame is None:
+                self._ending = True
+                self._flush_locked()
+                return
+            if self._dropped is None and not self._ending:
+                try:
+                    self._frames.put_nowait(frame)
+                    return
+                except queue.Full:
+                    pass
+            lost = len(frame.text) + frame.gap
+            if self._dropped is not None:
+                lost += self._dropped.gap
+            self._dropped = OutputFrame(
+                session_id=frame.session_id,
+                text="",
+                cursor=frame.next_cursor,
+                next_cursor=frame.next_cursor,
+                gap=lost,
+            )
+
+    def _flush_locked(self) -> None:
+        """満杯で入れられなかったgapのフレームと終わりの印を、空きがあれば入れる"""
+        if self._closed:
+            return
+        try:
+            if self._dropped is not None:
+                self._frames.put_nowait(self._dropped)
+                self._dropped = None
+            if self._ending:
+                self._frames.put_nowait(None)
+                self._ending = False
+        except queue.Full:
+            pass
+
+
+class SessionClient:
+    """デーモンを操作するクライアント（スレッドセーフ）
+
+    各メソッドは応答を待つが、複数のスレッドから同時に呼んでも
+    1つの接続で並行して処理される（パイプライン）。応答を待たずに
+    送る場合はconnection.call_async()を使う。
+    """
+
+    def __init__(self, path: Optional[str] = None, *, timeout: Optional[float] = 5.0):
+        """
+        Args:
+            path: ソケットのパス（Noneの場合は既定のパス）
+            timeout: 接続を待つ最大秒数
+
+        Raises:
+            ConnectionError: デーモンに接続できない場合
+        """
+        self._lock = threading.Lock()
+        self._subscriptions: dict[int, Subscription] = {}
+        self._subscription_ids = itertools.count(1)
+        self.connection = RpcConnection(
+            path, self._on_notification, timeout=timeout, on_disconnect=self._on_disconnect
+        )
+
+    def __enter__(self) -> "SessionClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """切断する（購読はすべて終わる。セッションはデーモンに残る）"""
+        self._on_disconnect()
+        self.connection.close()
+
+    def ping(self) -> dict[str, Any]:
+        """デーモンのプロトコルバージョンとプロセスIDを返す"""
+        return self.connection.call("ping")
+
+    def list_sessions(self) -> list[dict[str, Any]]:
+        """
+        全セッションの状態を取得する
+
+        Returns:
+            セッションごとの状態（session_id / running / hibernated / busy / cursor など）
+        """
+        return self.connection.call("list_sessions")
+
+    def create_session(
+        self, session_id: str, working_dir: Optional[str] = None, interactive: bool = False
+    ) -> dict[str, Any]:
+        """
+        セッションを作成する
+
+        Raises:
+            RuntimeError: 最大セッション数を超える場合など
+            ValueError: 重複したセッションIDの場合
+        """
+        return self.connection.call(
+            "create_session",
+            session_id=session_id,
+            working_dir=working_dir,
+            interactive=interactive,
+        )
+
+    def delete_session(self, session_id: str) -> None:
+        """
+        セッションを削除する
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        self.connection.call("delete_session", session_id=session_id)
+
+    def start(self, session_id: str) -> dict[str, Any]:
+        """セッションを起動する（休止中の場合は再開する）"""
+        return self.connection.call("start", session_id=session_id)
+
+    def stop(self, session_id: str) -> dict[str, Any]:
+        """セッションを停止する"""
+        return self.connection.call("stop", session_id=session_id)
+
+    def send_command(self, session_id: str, command: str) -> None:
+        """コマンドを送信する（完了は待たない）"""
+        self.connection.call("send_command", session_id=session_id, command=command)
+
+    def run_command(
+        self, session_id: str, command: str, timeout: Optional[float] = None
+    ) -> CommandResult:
+        """
+        コマンドを実行し、完了まで待って結果を返す
+
+        Raises:
+            KeyError: セッションが存在しない場合
+            RuntimeError: セッションが実行中でない場合など
+            TimeoutError: timeout秒以内に完了しなかった場合
+        """
+        result = self.connection.call(
+            "run_command", session_id=session_id, command=command, timeout=timeout
+        )
+        return CommandResult(**result)
+
+    def broadcast(
+        self,
+        command: str,
+        session_ids: Optional[list[str]] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> BroadcastReport:
+        """
+        同じコマンドを複数セッションで実行する
+
+        Raises:
+            KeyError: 存在しないセッションIDを指定した場合
+            ValueError: コマンドが空の場合
+        """
+        result = self.connection.call(
+            "broadcast",
+            command=command,
+            session_ids=session_ids,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+        )
+        return BroadcastReport(
+            command=result["command"],
+            results=[BroadcastResult(**r) for r in result["results"]],
+            elapsed=result["elapsed"],
+        )
+
+    def subscribe(self, session_id: str, from_cursor: Optional[int] = None) -> Subscription:
+        """
+        セッションの出力を購読する
+
+        Args:
+            session_id: セッション識別子
+            from_cursor: 最初に受け取る出力の位置（Noneの場合はこれ以降の出力、
+                0の場合は保持している出力すべて、再購読ではOutputFrame.next_cursor）
+
+        Returns:
+            フレームを返す購読
+
+        Raises:
+            KeyError: セッションが存在しない場合
+        """
+        subscription_id = next(self._subscription_ids)
+        subscription = Subscription(self, subscription_id, session_id)
+        # 応答より先にフレームが届いても受け取れるよう、送る前に登録する
+        with self._lock:
+            self._subscriptions[subscription_id] = subscription
+        try:
+            result = self.connection.call(
+                "subscribe",
+                session_id=session_id,
+                from_cursor=from_cursor,
+                subscription=subscription_id,
+            )
+        except BaseException:
+            self._end_subscription(subscription_id)
+            raise
+        if subscription.cursor is None:
+            subscription.cursor = result["cursor"]
+        return subscription
+
+    def _end_subscription(self, subscription_id: int) -> Optional[Subscription]:
+        """購読を登録から外す"""
+        with self._lock:
+            return self._subscriptions.pop(subscription_id, None)
+
+    def _on_disconnect(self) -> None:
+        """すべての購読を終える"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+            self._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription._finish()
+
+    def _on_notification(self, method: str, params: dict[str, Any]) -> None:
+        """出力のフレームを購読へ渡す（接続の読み取りスレッド）"""
+        if method != "output":
+            return
+        for frame in params.get("frames", []):
+            subscription_id = frame.get("subscription")
+            if frame.get("end"):
+                subscription = self._end_subscription(subscription_id)
+                if subscription is not None:
+                    # 受け取ったフレームを読み終えてから終わるよう、印を後ろに入れる
+                    subscription._deliver(None)
+                continue
+            with self._lock:
+                subscription = self._subscriptions.get(subscription_id)
+            if subscription is not None:
+                subscription._deliver(
+                    OutputFrame(
+                        session_id=frame["session_id"],
+                        text=frame["text"],
+                        cursor=frame["cursor"],
+                        next_cursor=frame["next_cursor"],
+                        gap=frame.get("gap", 0),
+                    )
+                )
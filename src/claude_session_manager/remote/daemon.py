@@ -0,0 +1,149 @@
+"""ヘッドレスのデーモンモジュール
+
+SessionManagerとシェルをUIとは別のプロセスで持ち、Unixドメインソケットで
+公開する。UIを閉じてもセッションと出力はデーモンに残り、次に起動した
+UIはattachして前回のカーソル以降の出力だけを受け取る。
+"""
+
+import dataclasses
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+from ..config import SessionManagerConfig
+from ..core.manager import SessionManager
+from ..core.metrics import MetricsServer
+from ..core.output_buffer import POLICY_BLOCK, POLICY_DROP_OLDEST
+from . import protocol
+from .client import RpcConnection
+from .server import SessionServer
+
+# 休止の方針を適用する間隔（秒）
+POLICY_INTERVAL = 1.0
+
+# 起動したデーモンのソケットを待つ最大秒数
+SPAWN_TIMEOUT = 10.0
+
+
+def daemon_config(config: SessionManagerConfig) -> SessionManagerConfig:
+    """
+    デーモンで使う設定にする
+
+    デーモンには既定の読み手（UIパネル）がいないため、既定の読み手を待つ
+    blockの方針では出力が止まる。blockはdrop_oldestに置き換える
+    （クライアントはカーソルで読み、欠落はgapで分かる）。
+
+    Args:
+        config: 元の設定
+
+    Returns:
+        デーモン用の設定
+    """
+    if config.output_overflow_policy == POLICY_BLOCK:
+        return dataclasses.replace(config, output_overflow_policy=POLICY_DROP_OLDEST)
+    return config
+
+
+def run_daemon(
+    socket_path: Optional[str] = None,
+    config: Optional[SessionManagerConfig] = None,
+    *,
+    stop_event: Optional[threading.Event] = None,
+) -> None:
+    """
+    デーモンを実行する（SIGTERM / SIGINT またはshutdown要求で終了する）
+
+    終了時はすべてのセッションを停止する。
+
+    Args:
+        socket_path: ソケットのパス（Noneの場合は設定または既定のパス）
+        config: 設定（Noneの場合は既定の設定）
+        stop_event: セットすると終了するイベント（テスト用）
+
+    Raises:
+        RuntimeError: 同じソケットで別のデーモンが動作している場合
+    """
+    config = daemon_config(config or SessionManagerConfig())
+    socket_path = socket_path or config.daemon_socket_path or protocol.default_socket_path()
+    stop_event = stop_event or threading.Event()
+
+    manager = SessionManager(max_sessions=config.max_sessions, config=config)
+    manager.warm_up()
+    manager.start_watchdog()
+    metrics_server = None
+    if config.metrics_port is not None:
+        metrics_server = MetricsServer(manager.metrics, port=config.metrics_port).start()
+    server = SessionServer(manager, socket_path, on_shutdown=stop_event.set)
+
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop_event.set())
+    try:
+        server.start()
+        # UIがいなくても休止の方針を適用する
+        while not stop_event.wait(POLICY_INTERVAL):
+            manager.apply_hibernation_policy()
+    finally:
+        server.close()
+        manager.shutdown_all()
+        if metrics_server is not None:
+            metrics_server.close()
+
+
+def is_daemon_running(socket_path: Optional[str] = None) -> bool:
+    """
+    デーモンが応答するか確認する
+
+    Args:
+        socket_path: ソケットのパス（Noneの場合は既定のパス）
+
+    Returns:
+        応答する場合True
+    """
+    try:
+        connection = RpcConnection(socket_path, timeout=1.0)
+    except ConnectionError:
+        return False
+    try:
+        connection.call("ping")
+        return True
+    except (ConnectionError, RuntimeError):
+        return False
+    finally:
+        connection.close()
+
+
+def spawn_daemon(socket_path: Optional[str] = None, timeout: float = SPAWN_TIMEOUT) -> None:
+    """
+    デーモンを別プロセスで起動し、接続できるまで待つ
+
+    デーモンは端末から切り離して起動するため、呼び出し元が終了しても残る。
+
+    Args:
+        socket_path: ソケットのパス（Noneの場合は既定のパス）
+        timeout: 接続できるまで待つ最大秒数
+
+    Raises:
+        RuntimeError: 期限内に接続できない場合
+    """
+    socket_path = socket_path or protocol.default_socket_path()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "claude_session_manager.main", "daemon", "--socket", socket_path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_daemon_running(socket_path):
+            return
+        if process.poll() is not None:
+            raise RuntimeError(f"Daemon exited with code {process.returncode}")
+        time.sleep(0.05)
+    raise RuntimeError(f"Daemon did not start within {timeout}s: {socket_path}")
@@ -0,0 +1,261 @@
+"""デーモンとクライアントの通信プロトコル
+
+Unixドメインソケット上で、1行に1つのJSONメッセージを送る（改行区切りのJSON）。
+メッセージの形はJSON-RPC 2.0に従う。
+
+- 要求:   {"jsonrpc": "2.0", "id": 1, "method": "read", "params": {...}}
+- 応答:   {"jsonrpc": "2.0", "id": 1, "result": ...}
+- エラー: {"jsonrpc": "2.0", "id": 1, "error": {"code": -32001, "message": "..."}}
+- 通知:   {"jsonrpc": "2.0", "method": "event", "params": {...}}（idなし、応答なし）
+
+要求は応答を待たずに続けて送ってよく（パイプライン）、応答は完了した順に
+返るため、クライアントはidで対応を取る。
+
+subscribe()した出力は"output"通知で送る。1つの通知に複数の購読のフレームが
+入り、1つのフレームには前回以降の出力がまとめて入る（1行ごとではない）。
+
+    {"jsonrpc": "2.0", "method": "output", "params": {"frames": [
+        {"subscription": 1, "session_id": "s1", "cursor": 0,
+         "next_cursor": 12, "text": "line1\nline2\n", "gap": 0},
+        {"subscription": 2, "session_id": "s2", "cursor": 40,
+         "next_cursor": 40, "text": "", "gap": 0, "end": true}]}}
+
+gapは追い付けずに読み飛ばした文字数、endはセッションが削除されて購読が
+終わったことを表す。
+"""
+
+import dataclasses
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+from ..core import events as _events
+
+# プロトコルのバージョン（互換性のない変更で上げる）
+PROTOCOL_VERSION = 1
+
+# 1メッセージの最大バイト数（超えた接続は切断する）
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+# JSON-RPCのエラーコード
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# アプリケーションのエラーコード
+SESSION_NOT_FOUND = -32001  # KeyError
+SESSION_ERROR = -32002  # RuntimeError / OSError（起動できない・実行中でないなど）
+TIMEOUT = -32003  # TimeoutError
+
+# 通知として送るイベントの型
+_EVENT_TYPES: dict[str, type] = {
+    cls.__name__: cls
+    for cls in (
+        _events.SessionCreated,
+        _events.SessionDeleted,
+        _events.SessionStarted,
+        _events.SessionExited,
+        _events.OutputAvailable,
+        _events.BusyStateChanged,
+        _events.OutputDropped,
+    )
+}
+
+
+def default_socket_path() -> str:
+    """
+    デーモンの既定のソケットパスを返す
+
+    $XDG_RUNTIME_DIR があればその下、なければ一時ディレクトリの下の
+    ユーザー専用ディレクトリ（パーミッション 0700）に置く。
+
+    Returns:
+        ソケットのパス
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "claude-session-manager.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return os.path.join(
+        tempfile.gettempdir(), f"claude-session-manager-{uid}", "daemon.sock"
+    )
+
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    """
+    メッセージを1行のJSONにする
+
+    Args:
+        message: 送るメッセージ
+
+    Returns:
+        改行で終わるUTF-8のバイト列
+    """
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_message(line: bytes) -> dict[str, Any]:
+    """
+    1行のJSONをメッセージに戻す
+
+    Args:
+        line: 受信した1行（末尾の改行は含んでもよい）
+
+    Returns:
+        メッセージ
+
+    Raises:
+        ValueError: JSONとして読めない、またはオブジェクトでない場合
+    """
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("message must be a JSON object")
+    return message
+
+
+def request(request_id: int, method: str, params: dict[str, Any]) -> dict[str, Any]:
+    """要求のメッセージを作る"""
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+def response(request_id: Any, result: Any) -> dict[str, Any]:
+    """応答のメッセージを作る"""
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def error_response(request_id: Any, code: int, message: str) -> dict[str, Any]:
+    """エラー応答のメッセージを作る"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+def notification(method: str, params: dict[str, Any]) -> dict[str, Any]:
+    """通知のメッセージを作る"""
+    return {"jsonrpc": "2.0", "method": method, "params": params}
+
+
+def output_frame(
+    subscription: int,
+    session_id: str,
+    cursor: int,
+    text: str,
+    next_cursor: int,
+    *,
+    gap: int = 0,
+    end: bool = False,
+) -> dict[str, Any]:
+    """
+    "output"通知のフレームを作る
+
+    Args:
+        subscription: 購読ID
+        session_id: セッション識別子
+        cursor: textの先頭の位置
+        text: 出力
+        next_cursor: 次のフレームの先頭の位置
+        gap: textの前に読み飛ばした文字数
+        end: 購読が終わった場合True
+
+    Returns:
+        フレーム
+    """
+    frame = {
+        "subscription": subscription,
+        "session_id": session_id,
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+        "text": text,
+        "gap": gap,
+    }
+    if end:
+        frame["end"] = True
+    return frame
+
+
+def error_code(exc: BaseException) -> int:
+    """
+    例外をエラーコードにする
+
+    Args:
+        exc: 要求の処理中に発生した例外
+
+    Returns:
+        エラーコード
+    """
+    if isinstance(exc, KeyError):
+        return SESSION_NOT_FOUND
+    if isinstance(exc, TimeoutError):
+        return TIMEOUT
+    if isinstance(exc, (ValueError, TypeError)):
+        return INVALID_PARAMS
+    if isinstance(exc, (RuntimeError, OSError)):
+        return SESSION_ERROR
+    return INTERNAL_ERROR
+
+
+def error_message(exc: BaseException) -> str:
+    """例外のメッセージ（KeyErrorは引用符を付けない）"""
+    if isinstance(exc, KeyError) and exc.args:
+        return str(exc.args[0])
+    return str(exc) or type(exc).__name__
+
+
+def error_to_exception(error: dict[str, Any]) -> Exception:
+    """
+    エラー応答を例外に戻す（サーバー側と同じ種類の例外にする）
+
+    Args:
+        error: エラー応答のerror
+
+    Returns:
+        例外（KeyError / ValueError / TimeoutError / RuntimeError）
+    """
+    code = error.get("code")
+    message = str(error.get("message", ""))
+    if code == SESSION_NOT_FOUND:
+        return KeyError(message)
+    if code in (INVALID_PARAMS, INVALID_REQUEST):
+        return ValueError(message)
+    if code == TIMEOUT:
+        return TimeoutError(message)
+    return RuntimeError(message)
+
+
+def event_to_params(event: _events.SessionEvent) -> dict[str, Any]:
+    """
+    イベントを通知のparamsにする
+
+    Args:
+        event: セッションイベント
+
+    Returns:
+        {"type": クラス名, ...フィールド}
+    """
+    params = dataclasses.asdict(event)
+    params["type"] = type(event).__name__
+    return params
+
+
+def event_from_params(params: dict[str, Any]) -> Optional[_events.SessionEvent]:
+    """
+    通知のparamsをイベントに戻す
+
+    Args:
+        params: event_to_params()の戻り値
+
+    Returns:
+        イベント（未知の型・フィールドの場合はNone。新しいデーモンとの互換のため無視する）
+    """
+    cls = _EVENT_TYPES.get(params.get("type", ""))
+    if cls is None:
+        return None
+    fields = {f.name for f in dataclasses.fields(cls)}
+    try:
+        return cls(**{k: v for k, v in params.items() if k in fields})
+    except TypeError:
+        return None
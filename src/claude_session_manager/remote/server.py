@@ -0,0 +1,775 @@
+"""デーモンのソケットサーバーモジュール
+
+SessionManagerをUnixドメインソケットで公開する。接続ごとに読み取りと
+書き込みのスレッドを持ち、要求はスレッドプールで並行して処理する
+（応答は完了した順）。attachした接続にはセッションイベントを通知する。
+run_command・broadcastのように完了まで戻らない要求は、共有のスレッドプール
+ではなく接続ごとのワーカーで処理し、他の接続の要求を待たせない。
+
+イベントは接続ごとにためて書き込みスレッドがまとめて送るため、
+読み取りスレッドやリアクタースレッドが遅いクライアントを待つことはない。
+出力のイベントはセッションごとに最新の1件へまとめる。
+
+subscribe()した出力も同じ書き込みスレッドが送る。出力のイベントでは
+印を付けるだけで、送る直前にカーソル以降をまとめて読むため、
+出力が速いほど1つのフレームに多くの行が入る。クライアントが遅い間は
+出力はセッションの出力バッファに残り、追い付けなかった分はgapで分かる。
+"""
+
+import dataclasses
+import os
+import socket
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from ..core.events import OutputAvailable, OutputDropped, SessionDeleted, SessionEvent
+from ..core.hibernation import is_session_busy
+from ..core.output_buffer import OutputBufferStats
+from . import protocol
+
+if TYPE_CHECKING:
+    from ..core.manager import SessionManager
+
+# read()で新しい出力を待つ最大秒数（ワーカーを長く占有しないよう制限する）
+MAX_READ_TIMEOUT = 30.0
+
+# 1つのフレームに入れる最大文字数（超えた分は次のフレームで送る）
+MAX_FRAME_CHARS = 256 * 1024
+
+# 後のイベントで置き換えてよいイベント
+_COALESCED_EVENTS = (OutputAvailable, OutputDropped)
+
+# コマンドの完了まで戻らない（接続ごとのワーカーで処理する）メソッド
+_BLOCKING_METHODS = frozenset({"run_command", "broadcast"})
+
+
+@dataclass(eq=False)
+class _Subscription:
+    """subscribe()で作成した出力の購読"""
+
+    subscription_id: int
+    session_id: str
+    session: Any
+    cursor: int  # 次に送る出力の位置（書き込みスレッドだけが進める）
+    active: bool = False  # subscribe()の応答を送った後に出力を送り始める
+    ended: bool = False  # セッションが削除された
+
+
+@dataclass
+class _Reply:
+    """応答を送った後に続けて処理する場合のハンドラーの戻り値"""
+
+    result: Any
+    after: Callable[[], None]
+
+
+def prepare_socket_path(path: str) -> None:
+    """
+    ソケットを作成できるようにする
+
+    親ディレクトリを作成し（作成する場合はパーミッション 0700）、
+    応答しない古いソケットファイルは削除する。
+
+    Args:
+        path: ソケットのパス
+
+    Raises:
+        RuntimeError: 同じパスで別のデーモンが応答する場合
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        # 前回のデーモンが残したソケット
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"Daemon is already running: {path}")
+    finally:
+        probe.close()
+
+
+class _Connection:
+    """クライアントとの接続（読み取りスレッドと書き込みスレッドを持つ）"""
+
+    def __init__(self, server: "SessionServer", sock: socket.socket):
+        self.server = server
+        self.sock = sock
+        # attach()後はセッションイベントを通知する
+        self.attached = False
+        self._cond = threading.Condition()
+        self._outbox: deque[bytes] = deque()
+        self._events: dict[object, SessionEvent] = {}
+        self._subscriptions: dict[int, _Subscription] = {}
+        # 送る出力があるかもしれない購読のID
+        self._dirty: set[int] = set()
+        self._writing = False
+        self._closed = False
+        # 完了まで戻らない要求を処理するワーカー（最初の要求で作成する）
+        self._blocking_executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        """読み取りと書き込みのスレッドを起動する"""
+        threading.Thread(
+            target=self._read_loop, name="session-server-read", daemon=True
+        ).start()
+        threading.Thread(
+            target=self._write_loop, name="session-server-write", daemon=True
+        ).start()
+
+    def send(self, message: dict[str, Any]) -> None:
+        """
+        メッセージを送る（書き込みスレッドに任せて待たずに戻る）
+
+        Args:
+            message: 送るメッセージ
+        """
+        data = protocol.encode_message(message)
+        with self._cond:
+            if self._closed:
+                return
+            self._outbox.append(data)
+            self._cond.notify()
+
+    def push_event(self, event: SessionEvent) -> None:
+        """
+        イベントの通知を予約する（発行したスレッドで呼ばれる）
+
+        Args:
+            event: セッションイベント
+        """
+        if isinstance(event, _COALESCED_EVENTS):
+            key: object = (type(event), event.session_id)
+        else:
+            key = object()
+        with self._cond:
+            if self._closed:
+                return
+            self._events[key] = event
+            self._cond.notify()
+
+    def submit_blocking(self, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        完了まで戻らない要求をこの接続のワーカーで処理する
+
+        同時に処理する数はサーバーのblocking_workersまでで、超えた分は
+        この接続の中で順番を待つ（他の接続と共有のスレッドプールは使わない）。
+
+        Args:
+            fn: 処理する関数
+            args: 関数の引数
+
+        Raises:
+            RuntimeError: 接続を閉じた後の場合
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection is closed")
+            if self._blocking_executor is None:
+                self._blocking_executor = ThreadPoolExecutor(
+                    self.server.blocking_workers,
+                    thread_name_prefix="session-server-blocking",
+                )
+            executor = self._blocking_executor
+        executor.submit(fn, *args)
+
+    def add_subscription(
+        self, session_id: str, session: Any, cursor: int, subscription_id: Optional[int]
+    ) -> _Subscription:
+        """
+        出力の購読を登録する（activate_subscription()までは出力を送らない）
+
+        Args:
+            session_id: セッション識別子
+            session: セッション
+            cursor: 最初に送る出力の位置
+            subscription_id: 購読ID（Noneの場合は空いているIDを割り当てる）
+
+        Returns:
+            登録した購読
+
+        Raises:
+            ValueError: 購読IDが使用中の場合
+        """
+        with self._cond:
+            if subscription_id is None:
+                subscription_id = 1
+                while subscription_id in self._subscriptions:
+                    subscription_id += 1
+            elif subscription_id in self._subscriptions:
+                raise ValueError(f"Subscription already exists: {subscription_id}")
+            subscription = _Subscription(subscription_id, session_id, session, cursor)
+            self._subscriptions[subscription_id] = subscription
+            return subscription
+
+    def activate_subscription(self, subscription_id: int) -> None:
+        """購読の出力を送り始める（購読より前の出力もすぐに送る）"""
+        with self._cond:
+            subscription = self._subscriptions.get(subscription_id)
+            if subscription is None:
+                return
+            subscription.active = True
+            self._dirty.add(subscription_id)
+            self._cond.notify()
+
+    def remove_subscription(self, subscription_id: int) -> bool:
+        """
+        購読を解除する
+
+        Returns:
+            解除した場合True（既に終わっていた場合False）
+        """
+        with self._cond:
+            self._dirty.discard(subscription_id)
+            return self._subscriptions.pop(subscription_id, None) is not None
+
+    def output_changed(self, session_id: str, ended: bool = False) -> None:
+        """
+        セッションの出力を購読している場合、書き込みスレッドに送らせる
+
+        Args:
+            session_id: 出力が増えたセッション
+            ended: セッションが削除された場合True（購読を終える）
+        """
+        with self._cond:
+            found = False
+            for subscription in self._subscriptions.values():
+                if subscription.session_id == session_id:
+                    subscription.ended = subscription.ended or ended
+                    self._dirty.add(subscription.subscription_id)
+                    found = True
+            if found:
+                self._cond.notify()
+
+    def close(self, flush_timeout: float = 0.0) -> None:
+        """
+        接続を閉じる
+
+        Args:
+            flush_timeout: 送信待ちのメッセージを送り終えるまで待つ最大秒数
+                （過ぎた場合は捨てる）
+        """
+        with self._cond:
+            if self._closed:
+                return
+            if flush_timeout > 0:
+                self._cond.wait_for(
+                    lambda: not (self._outbox or self._writing) or self._closed,
+                    flush_timeout,
+                )
+                if self._closed:
+                    return
+            self._closed = True
+            self._cond.notify_all()
+            executor = self._blocking_executor
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.server._remove(self)
+        if executor is not None:
+            # 実行中のコマンドは完了まで続く（応答は捨てる）
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _read_loop(self) -> None:
+        """要求を1行ずつ読んでサーバーへ渡す（読み取りスレッド）"""
+        try:
+            stream = self.sock.makefile("rb")
+            while True:
+                line = stream.readline(protocol.MAX_MESSAGE_BYTES + 1)
+                if not line:
+                    break
+                if len(line) > protocol.MAX_MESSAGE_BYTES:
+                    self.send(
+                        protocol.error_response(
+                            None, protocol.INVALID_REQUEST, "Message too large"
+                        )
+                    )
+                    break
+                if line.strip():
+                    self.server._dispatch(self, line)
+        except (OSError, ValueError):
+            pass
+        self.close()
+
+    def _write_loop(self) -> None:
+        """たまったメッセージとイベントをまとめて書き込む（書き込みスレッド）"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._outbox or self._events or self._dirty or self._closed
+                )
+                if self._closed:
+                    return
+                chunks = list(self._outbox)
+                self._outbox.clear()
+                events = list(self._events.values())
+                self._events.clear()
+                subscriptions = [
+                    self._subscriptions[i]
+                    for i in self._dirty
+                    if i in self._subscriptions and self._subscriptions[i].active
+                ]
+                self._dirty.difference_update(s.subscription_id for s in subscriptions)
+                self._writing = True
+            for event in events:
+                chunks.append(
+                    protocol.encode_message(
+                        protocol.notification("event", protocol.event_to_params(event))
+                    )
+                )
+            frames = self._read_frames(subscriptions)
+            if frames:
+                chunks.append(
+                    protocol.encode_message(
+                        protocol.notification("output", {"frames": frames})
+                    )
+                )
+            try:
+                self.sock.sendall(b"".join(chunks))
+            except OSError:
+                self.close()
+                return
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+    def _read_frames(self, subscriptions: list[_Subscription]) -> list[dict[str, Any]]:
+        """購読ごとにカーソル以降の出力を読んでフレームにする（書き込みスレッド）"""
+        frames = []
+        for subscription in subscriptions:
+            if subscription.ended:
+                self.remove_subscription(subscription.subscription_id)
+                frames.append(
+                    protocol.output_frame(
+                        subscription.subscription_id,
+                        subscription.session_id,
+                        subscription.cursor,
+                        "",
+                        subscription.cursor,
+                        end=True,
+                    )
+                )
+                continue
+            read = subscription.session.read_since(subscription.cursor)
+            text, next_cursor = read.text, read.cursor
+            if len(text) > MAX_FRAME_CHARS:
+                # 残りは次のフレームで送る
+                next_cursor -= len(text) - MAX_FRAME_CHARS
+                text = text[:MAX_FRAME_CHARS]
+                with self._cond:
+                    self._dirty.add(subscription.subscription_id)
+            if text or read.gap:
+                frames.append(
+                    protocol.output_frame(
+                        subscription.subscription_id,
+                        subscription.session_id,
+                        next_cursor - len(text),
+                        text,
+                        next_cursor,
+                        gap=read.gap,
+                    )
+                )
+            subscription.cursor = next_cursor
+        return frames
+
+
+class SessionServer:
+    """SessionManagerをUnixドメインソケットで公開するサーバー（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        manager: "SessionManager",
+        path: Optional[str] = None,
+        *,
+        max_workers: int = 8,
+        blocking_workers: int = 4,
+        on_shutdown: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            manager: 公開するセッションマネージャー
+            path: ソケットのパス（Noneの場合は既定のパス）
+            max_workers: 要求を並行して処理するスレッド数（全接続で共有）
+            blocking_workers: 接続ごとにrun_command・broadcastを並行して処理するスレッド数
+            on_shutdown: shutdown要求で呼ばれるコールバック（Noneの場合は要求を拒否する）
+
+        Raises:
+            RuntimeError: Unixドメインソケットを利用できない環境の場合
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("Unix domain sockets are not available on this platform")
+        self.manager = manager
+        self.path = path or protocol.default_socket_path()
+        self.on_shutdown = on_shutdown
+        self.blocking_workers = blocking_workers
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="session-server")
+        self._lock = threading.Lock()
+        self._connections: set[_Connection] = set()
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._methods: dict[str, Callable[..., Any]] = {
+            "ping": self._ping,
+            "attach": self._attach,
+            "list_sessions": self._list_sessions,
+            "create_session": self._create_session,
+            "delete_session": self._delete_session,
+            "start": self._start,
+            "stop": self._stop,
+            "touch": self._touch,
+            "send_command": self._send_command,
+            "read": self._read,
+            "run_command": self._run_command,
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe,
+            "broadcast": self._broadcast,
+            "session_states": self._session_states,
+            "shutdown": self._shutdown,
+        }
+
+    def start(self) -> "SessionServer":
+        """
+        ソケットを作成して接続の受け付けを始める
+
+        Returns:
+            このサーバー
+
+        Raises:
+            RuntimeError: 同じパスで別のデーモンが応答する場合
+        """
+        prepare_socket_path(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        # 他のユーザーからは接続させない
+        os.chmod(self.path, 0o600)
+        sock.listen()
+        self._sock = sock
+        self.manager.events.subscribe(self._on_event)
+        self._thread = threading.Thread(
+            target=self._accept_loop, name="session-server-accept", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """接続の受け付けをやめ、すべての接続を閉じる（セッションは停止しない）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            connections = list(self._connections)
+        self.manager.events.unsubscribe(self._on_event)
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        for connection in connections:
+            # shutdownの応答などを送り終えてから閉じる
+            connection.close(flush_timeout=1.0)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _accept_loop(self) -> None:
+        """接続を受け付ける（受け付けスレッド）"""
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            connection = _Connection(self, client)
+            with self._lock:
+                if self._closed:
+                    client.close()
+                    return
+                self._connections.add(connection)
+            connection.start()
+
+    def _remove(self, connection: _Connection) -> None:
+        """閉じた接続を外す"""
+        with self._lock:
+            self._connections.discard(connection)
+
+    def _on_event(self, event: SessionEvent) -> None:
+        """attachした接続へイベントを通知し、購読している出力を送らせる"""
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            if connection.attached:
+                connection.push_event(event)
+            if isinstance(event, OutputAvailable):
+                connection.output_changed(event.session_id)
+            elif isinstance(event, SessionDeleted):
+                connection.output_changed(event.session_id, ended=True)
+
+    def _dispatch(self, connection: _Connection, line: bytes) -> None:
+        """要求を検証し、スレッドプールで処理する（読み取りスレッドで呼ばれる）"""
+        try:
+            message = protocol.decode_message(line)
+        except ValueError:
+            connection.send(
+                protocol.error_response(None, protocol.PARSE_ERROR, "Parse error")
+            )
+            return
+        request_id = message.get("id")
+        method = message.get("method")
+        params = message.get("params", {})
+        if not isinstance(method, str) or not isinstance(params, dict):
+            connection.send(
+                protocol.error_response(
+                    request_id, protocol.INVALID_REQUEST, "Invalid request"
+                )
+            )
+            return
+        handler = self._methods.get(method)
+        if handler is None:
+            connection.send(
+                protocol.error_response(
+                    request_id, protocol.METHOD_NOT_FOUND, f"Method not found: {method}"
+                )
+            )
+            return
+        try:
+            if method in _BLOCKING_METHODS:
+                connection.submit_blocking(
+                    self._handle, connection, request_id, handler, params
+                )
+            else:
+                self._executor.submit(self._handle, connection, request_id, handler, params)
+        except RuntimeError:
+            # サーバー・接続を閉じた後
+            pass
+
+    def _handle(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        handler: Callable[..., Any],
+        params: dict[str, Any],
+    ) -> None:
+        """要求を処理して応答を送る（ワーカースレッド）"""
+        after = None
+        try:
+            result = handler(connection, **params)
+        except Exception as e:
+            message = protocol.error_response(
+                request_id, protocol.error_code(e), protocol.error_message(e)
+            )
+        else:
+            if isinstance(result, _Reply):
+                result, after = result.result, result.after
+            message = protocol.response(request_id, result)
+        if request_id is not None:
+            connection.send(message)
+        if after is not None:
+            after()
+
+    def _get(self, session_id: str) -> Any:
+        """セッションを取得する（存在しない場合はKeyError）"""
+        session = self.manager.get_session(session_id)
+        if session is None:
+            raise KeyError(f"Session not found: {session_id}")
+        return session
+
+    def _session_info(self, session_id: str, session: Any) -> dict[str, Any]:
+        """セッションの状態をクライアントへ返す形にする"""
+        stats = session.output_stats
+        if stats is None:
+            # インタラクティブセッションは行単位の出力バッファを持たない
+            stats = OutputBufferStats(0, 0, 0, 0)
+        return {
+            "session_id": session_id,
+            "working_dir": session.working_dir,
+            "interactive": not hasattr(session, "read_since"),
+            "running": session.is_running(),
+            "hibernated": self.manager.is_hibernated(session_id),
+            "busy": is_session_busy(session),
+            "cursor": session.output_cursor,
+            "pending_line": session.pending_line,
+            "buffered_lines": stats.buffered_lines,
+            "buffered_chars": stats.buffered_chars,
+            "dropped_lines": stats.dropped_lines,
+            "dropped_chars": stats.dropped_chars,
+        }
+
+    def _read_delta(self, session: Any, cursor: int, timeout: Optional[float] = None) -> dict[str, Any]:
+        """カーソル以降の出力を読む"""
+        if not hasattr(session, "read_since"):
+            raise RuntimeError("Session does not support cursor reads")
+        if timeout is not None:
+            timeout = min(max(0.0, timeout), MAX_READ_TIMEOUT)
+        result = session.read_since(cursor, timeout)
+        return {"text": result.text, "next_cursor": result.cursor, "gap": result.gap}
+
+    def _ping(self, connection: _Connection) -> dict[str, Any]:
+        return {"version": protocol.PROTOCOL_VERSION, "pid": os.getpid()}
+
+    def _attach(
+        self, connection: _Connection, cursors: Optional[dict[str, int]] = None
+    ) -> dict[str, Any]:
+        """
+        イベントの通知を始め、全セッションの状態とカーソル以降の出力を返す
+
+        Args:
+            cursors: セッションIDと前回までに読んだカーソル（ないセッションは先頭から）
+        """
+        cursors = cursors or {}
+        connection.attached = True
+        sessions = []
+        for session_id, session in self.manager.get_sessions().items():
+            info = self._session_info(session_id, session)
+            if hasattr(session, "read_since"):
+                info.update(self._read_delta(session, int(cursors.get(session_id, 0))))
+            sessions.append(info)
+        return {"version": protocol.PROTOCOL_VERSION, "sessions": sessions}
+
+    def _list_sessions(self, connection: _Connection) -> list[dict[str, Any]]:
+        return [
+            self._session_info(session_id, session)
+            for session_id, session in self.manager.get_sessions().items()
+        ]
+
+    def _create_session(
+        self,
+        connection: _Connection,
+        session_id: str,
+        working_dir: Optional[str] = None,
+        interactive: bool = False,
+    ) -> dict[str, Any]:
+        working_dir = working_dir or self.manager.config.default_working_dir
+        session = self.manager.create_session(session_id, working_dir, interactive)
+        return self._session_info(session_id, session)
+
+    def _delete_session(self, connection: _Connection, session_id: str) -> None:
+        self.manager.delete_session(session_id)
+
+    def _start(self, connection: _Connection, session_id: str) -> dict[str, Any]:
+        session = self._get(session_id)
+        if self.manager.is_hibernated(session_id):
+            self.manager.touch(session_id)
+        elif not session.is_running():
+            session.start()
+        return self._session_info(session_id, session)
+
+    def _stop(self, connection: _Connection, session_id: str) -> dict[str, Any]:
+        session = self._get(session_id)
+        if session.is_running():
+            session.stop()
+        return self._session_info(session_id, session)
+
+    def _touch(self, connection: _Connection, session_id: str) -> dict[str, Any]:
+        session = self.manager.touch(session_id)
+        return self._session_info(session_id, session)
+
+    def _send_command(self, connection: _Connection, session_id: str, command: str) -> None:
+        self.manager.send_command(session_id, command)
+
+    def _read(
+        self,
+        connection: _Connection,
+        session_id: str,
+        cursor: int = 0,
+        timeout: Optional[float] = None,
+    ) -> dict[str, Any]:
+        """
+        カーソル以降の出力とセッションの状態を返す
+
+        Args:
+            cursor: 前回の応答のnext_cursor（初回は0で保持している出力をすべて読む）
+            timeout: 新しい出力がない場合に待つ最大秒数（Noneの場合は待たない）
+        """
+        session = self._get(session_id)
+        result = self._session_info(session_id, session)
+        result.update(self._read_delta(session, int(cursor), timeout))
+        return result
+
+    def _run_command(
+        self,
+        connection: _Connection,
+        session_id: str,
+        command: str,
+        timeout: Optional[float] = None,
+    ) -> dict[str, Any]:
+        """
+        コマンドを実行し、完了まで待って結果を返す
+
+        接続ごとのワーカーで処理するため、完了を待つ間も他の接続の要求は待たせない。
+
+        Args:
+            timeout: 完了を待つ最大秒数（Noneの場合は無制限）
+        """
+        session = self._get(session_id)
+        if not hasattr(session, "run_command"):
+            raise RuntimeError("Session does not support run_command")
+        return dataclasses.asdict(session.run_command(command, timeout=timeout))
+
+    def _subscribe(
+        self,
+        connection: _Connection,
+        session_id: str,
+        from_cursor: Optional[int] = None,
+        subscription: Optional[int] = None,
+    ) -> _Reply:
+        """
+        セッションの出力を購読する
+
+        応答の後、"output"通知のフレームで出力を送る。
+
+        Args:
+            from_cursor: 最初に送る出力の位置（Noneの場合はこれ以降の出力、
+                0の場合は保持している出力すべて）
+            subscription: クライアントが決める購読ID（Noneの場合は割り当てる）
+
+        Returns:
+            {"subscription": 購読ID, "cursor": 最初に送る出力の位置}
+        """
+        session = self._get(session_id)
+        if not hasattr(session, "read_since"):
+            raise RuntimeError("Session does not support cursor reads")
+        cursor = session.output_cursor if from_cursor is None else int(from_cursor)
+        entry = connection.add_subscription(session_id, session, cursor, subscription)
+        return _Reply(
+            {"subscription": entry.subscription_id, "cursor": cursor},
+            # 応答より先にフレームが届かないよう、応答を送ってから始める
+            lambda: connection.activate_subscription(entry.subscription_id),
+        )
+
+    def _unsubscribe(self, connection: _Connection, subscription: int) -> bool:
+        return connection.remove_subscription(subscription)
+
+    def _broadcast(
+        self,
+        connection: _Connection,
+        command: str,
+        session_ids: Optional[list[str]] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> dict[str, Any]:
+        report = self.manager.broadcast(
+            command, session_ids, max_concurrency=max_concurrency, timeout=timeout
+        )
+        return dataclasses.asdict(report)
+
+    def _session_states(self, connection: _Connection) -> dict[str, str]:
+        return self.manager.get_session_states()
+
+    def _shutdown(self, connection: _Connection) -> _Reply:
+        if self.on_shutdown is None:
+            raise RuntimeError("Shutdown is not supported by this server")
+        # 応答を送ってから終了させる
+        return _Reply(True, self.on_shutdown)
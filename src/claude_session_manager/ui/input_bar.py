@@ -7,16 +7,27 @@ from typing import Callable, Optional
 class InputBar:
     """共通入力欄"""
 
-    def __init__(self, parent: tk.Widget, on_submit: Callable[[str], None]):
+    def __init__(
+        self,
+        parent: tk.Widget,
+        on_submit: Callable[[str], None],
+        on_broadcast: Optional[Callable[[str], None]] = None,
+    ):
         """
         Args:
             parent: 親ウィジェット
             on_submit: 送信時のコールバック（入力テキストを引数に取る）
+            on_broadcast: 全セッションへの送信時のコールバック
+                          （Noneの場合は切り替えを表示しない）
         """
         self.frame = tk.Frame(parent)
         self.on_submit = on_submit
+        self.on_broadcast = on_broadcast
         self.entry: Optional[tk.Entry] = None
         self.session_label: Optional[tk.Label] = None
+        self.status_label: Optional[tk.Label] = None
+        # 全セッションへ送るか（チェックボックスで切り替える）
+        self.broadcast_enabled = False
 
     def setup_ui(self) -> None:
         """入力欄UIを構築する"""
@@ -46,6 +57,17 @@ class InputBar:
         )
         send_button.pack(side=tk.LEFT, padx=4)
 
+        if self.on_broadcast is not None:
+            # 全セッションへ送る切り替えと、その結果の要約
+            broadcast_check = tk.Checkbutton(
+                self.frame,
+                text="All sessions",
+                command=self.toggle_broadcast,
+            )
+            broadcast_check.pack(side=tk.LEFT, padx=4)
+            self.status_label = tk.Label(self.frame, text="", anchor="w")
+            self.status_label.pack(side=tk.LEFT, padx=4)
+
     def set_active_session(self, session_id: str) -> None:
         """
         アクティブセッションを表示する
@@ -56,8 +78,22 @@ class InputBar:
         if self.session_label:
             self.session_label.config(text=f"Active: {session_id}")
 
+    def set_status(self, text: str) -> None:
+        """
+        全セッションへの送信結果などを表示する
+
+        Args:
+            text: 表示する文字列
+        """
+        if self.status_label:
+            self.status_label.config(text=text)
+
+    def toggle_broadcast(self) -> None:
+        """全セッションへ送るかを切り替える（チェックボックスのコールバック）"""
+        self.broadcast_enabled = not self.broadcast_enabled
+
     def submit(self) -> None:
-        """入力を送信する"""
+        """入力を送信する（切り替えがオンの場合は全セッションへ送る）"""
         if not self.entry:
             return
 
@@ -65,6 +101,9 @@ class InputBar:
 
         # 空文字列の場合はコールバックを呼ばない
         if text and text.strip():
-            self.on_submit(text)
+            if self.broadcast_enabled and self.on_broadcast is not None:
+                self.on_broadcast(text)
+            else:
+                self.on_submit(text)
             # 入力欄をクリア
             self.entry.delete(0, tk.END)
@@ -1,11 +1,23 @@
 """メインウィンドウモジュール"""
 
+import logging
+import queue
+import threading
+import time
 import tkinter as tk
-from typing import Optional
+from typing import Callable, Optional
 
+from ..core.events import SessionEvent
 from ..core.manager import SessionManager
+from ..core.prompt_detector import STATE_BUSY
 from .input_bar import InputBar
 from .session_panel import SessionPanel
+from .tk_events import TkEventAdapter
+
+# 休止ポリシーの適用と、処理中のパネルの経過時間の表示を更新する間隔（ミリ秒）
+HOUSEKEEPING_INTERVAL_MS = 1000
+
+logger = logging.getLogger(__name__)
 
 
 class MainWindow:
@@ -21,11 +33,32 @@ class MainWindow:
         self.session_panels: list[SessionPanel] = []
         self.input_bar: Optional[InputBar] = None
         self.active_session_id: Optional[str] = None
+        # 全セッションへの送信はUIを止めないよう別スレッドで実行し、
+        # 結果の要約はメインスレッドで表示する
+        self._broadcast_thread: Optional[threading.Thread] = None
+        self._broadcast_status: queue.Queue[str] = queue.Queue()
+        # 休止・再開（停止に最大2秒かかる）もメインスレッドを止めないよう
+        # 専用スレッドで順に行い、結果はイベントアダプター経由で受け取る
+        self._session_tasks: queue.Queue[Optional[Callable[[], None]]] = queue.Queue()
+        self._session_thread: Optional[threading.Thread] = None
+        self._touch_results: queue.Queue[tuple[str, Optional[str]]] = queue.Queue()
+        self._policy_pending = False
+        # イベントを受けてパネルの出力を描画するのにかかった時間
+        self._render_latency = session_manager.metrics.histogram(
+            "claude_session_manager_ui_render_seconds",
+            "Time to render pending output in the panels per event batch",
+        )
+        # 出力などのイベントが来た時だけパネルを更新する（定期的に確認しない）
+        self._events = TkEventAdapter(
+            self.root, session_manager.events, self._on_session_events
+        )
 
     def setup_ui(self) -> None:
         """UIを構築する"""
         self.root.title("Claude Code Session Manager")
         self.root.geometry("1200x800")
+        # ウィンドウを閉じたら全セッションを期限付きで停止する
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # メインフレーム
         main_frame = tk.Frame(self.root)
@@ -44,8 +77,8 @@ class MainWindow:
             session_id = f"session-{i+1}"
             try:
                 session = self.session_manager.create_session(session_id, ".")
-            except RuntimeError:
-                # セッション数上限の場合は既存のセッションを使用
+            except (RuntimeError, ValueError):
+                # セッション数上限・作成済み（デーモンにattachした場合）は既存のセッションを使用
                 session = self.session_manager.get_session(session_id)
 
             if session:
@@ -67,7 +100,9 @@ class MainWindow:
         grid_frame.grid_columnconfigure(1, weight=1)
 
         # 下部の共通入力欄
-        self.input_bar = InputBar(main_frame, self._on_input_submit)
+        self.input_bar = InputBar(
+            main_frame, self._on_input_submit, on_broadcast=self._on_broadcast_submit
+        )
         self.input_bar.setup_ui()
         self.input_bar.frame.pack(fill=tk.X, side=tk.BOTTOM, padx=8, pady=8)
 
@@ -75,8 +110,9 @@ class MainWindow:
         if self.session_panels:
             self.set_active_session("session-1")
 
-        # 定期的に出力を更新
+        # 出力はイベントで更新し、休止ポリシーなどは低頻度で確認する
         self._update_all_sessions()
+        self.root.after(HOUSEKEEPING_INTERVAL_MS, self._housekeeping)
 
     def set_active_session(self, session_id: str) -> None:
         """
@@ -86,13 +122,30 @@ class MainWindow:
             session_id: セッション識別子
         """
         self.active_session_id = session_id
+        # フォーカスしたセッションは休止中なら再開する（専用スレッドで行う）
+        self._submit_session_task(lambda: self._touch(session_id))
         if self.input_bar:
             self.input_bar.set_active_session(session_id)
 
     def run(self) -> None:
         """メインループを開始する"""
+        # 他のスレッドからのTkの呼び出しはメインループを待つため、ループの中で購読を始める
+        self.root.after_idle(self._start_events)
         self.root.mainloop()
 
+    def _start_events(self) -> None:
+        """イベントの購読を始め、それまでに届いた出力を表示する"""
+        self._events.start()
+        self._update_all_sessions()
+
+    def _on_close(self) -> None:
+        """ウィンドウを閉じる時のコールバック（全セッションを停止して終了する）"""
+        # 停止によるイベントは処理しない
+        self._events.close()
+        self._session_tasks.put(None)
+        self.session_manager.shutdown_all()
+        self.root.destroy()
+
     def _on_input_submit(self, text: str) -> None:
         """
         入力送信時のコールバック
@@ -100,20 +153,185 @@ class MainWindow:
         Args:
             text: 入力されたテキスト
         """
+        if not self.session_manager.connected:
+            # デーモンとの接続が切れている場合は送信せずにattachし直す
+            self._submit_session_task(self._reconnect)
+            return
         if not self.active_session_id:
             return
 
-        session = self.session_manager.get_session(self.active_session_id)
-        if session and session.is_running():
+        session_id = self.active_session_id
+        session = self.session_manager.get_session(session_id)
+        if session and (
+            session.is_running() or self.session_manager.is_hibernated(session_id)
+        ):
+            # 休止中のセッションは再開してから送信する（停止を待つことがあるため専用スレッドで行う）
+            self._submit_session_task(lambda: self._send_command(session_id, text))
+
+    def _on_broadcast_submit(self, text: str) -> None:
+        """
+        全セッションへの送信時のコールバック
+
+        Args:
+            text: 入力されたテキスト
+        """
+        if self._broadcast_thread is not None and self._broadcast_thread.is_alive():
+            if self.input_bar:
+                self.input_bar.set_status("Broadcast already running")
+            return
+
+        if self.input_bar:
+            self.input_bar.set_status(f"Broadcasting: {text}")
+        self._broadcast_thread = threading.Thread(
+            target=self._run_broadcast, args=(text,), daemon=True
+        )
+        self._broadcast_thread.start()
+
+    def _run_broadcast(self, text: str) -> None:
+        """全セッションでコマンドを実行し、要約を渡す（送信スレッドで実行）"""
+        try:
+            report = self.session_manager.broadcast(text)
+            self._broadcast_status.put(report.summary)
+        except (KeyError, ValueError) as e:
+            self._broadcast_status.put(f"Broadcast failed: {e}")
+        # 要約はメインスレッドで表示する
+        self._events.wake()
+
+    def _submit_session_task(self, task: Callable[[], None]) -> None:
+        """休止・再開の処理を専用スレッドへ渡す（初回に専用スレッドを起動する）"""
+        if self._session_thread is None:
+            self._session_thread = threading.Thread(
+                target=self._run_session_tasks, name="session-tasks", daemon=True
+            )
+            self._session_thread.start()
+        self._session_tasks.put(task)
+
+    def _run_session_tasks(self) -> None:
+        """渡された処理を順に実行する（専用スレッド、Noneで終了）"""
+        while True:
+            task = self._session_tasks.get()
             try:
-                session.send_command(text)
-            except (RuntimeError, ValueError):
-                pass  # エラーは無視（最小実装）
+                if task is None:
+                    return
+                task()
+            except Exception as e:
+                # 1つの処理の失敗で専用スレッドを止めない（後の再開・送信が実行されなくなる）
+                logger.exception("Session task failed")
+                self._touch_results.put(
+                    (self.active_session_id or "", f"Session task failed: {e}")
+                )
+                self._events.wake()
+            finally:
+                self._session_tasks.task_done()
+
+    def _touch(self, session_id: str) -> None:
+        """セッションの使用を記録し、結果を渡す（専用スレッドで実行）"""
+        try:
+            self.session_manager.touch(session_id)
+            error = None
+        except (KeyError, RuntimeError, OSError) as e:
+            error = f"Cannot resume {session_id}: {e}"
+        self._touch_results.put((session_id, error))
+        # 結果はメインスレッドで表示する
+        self._events.wake()
+
+    def _send_command(self, session_id: str, text: str) -> None:
+        """コマンドを送信し、失敗した場合は結果を渡す（専用スレッドで実行）"""
+        try:
+            self.session_manager.send_command(session_id, text)
+        except (KeyError, RuntimeError, ValueError, OSError) as e:
+            self._touch_results.put((session_id, f"Cannot send to {session_id}: {e}"))
+            self._events.wake()
+
+    def _reconnect(self) -> None:
+        """デーモンへattachし直し、結果を渡す（専用スレッドで実行）"""
+        session_id = self.active_session_id or ""
+        try:
+            self.session_manager.reconnect()
+            status = "Re-attached to daemon"
+        except (ConnectionError, TimeoutError, RuntimeError) as e:
+            status = f"Cannot re-attach: {e}"
+        self._touch_results.put((session_id, status))
+        self._events.wake()
+
+    def _apply_hibernation_policy(self) -> None:
+        """休止ポリシーを適用する（専用スレッドで実行）"""
+        try:
+            self.session_manager.apply_hibernation_policy()
+        finally:
+            self._policy_pending = False
+
+    def _on_session_events(self, events: list[SessionEvent]) -> None:
+        """
+        まとめて届いたイベントのセッションのパネルだけを更新する（メインスレッド）
+
+        Args:
+            events: 前回の呼び出し以降のイベント
+        """
+        self._show_broadcast_status()
+        session_ids = {event.session_id for event in events}
+        session_ids.update(self._show_touch_results())
+        self._show_connection_state()
+        self._render(
+            [p for p in self.session_panels if p.session.session_id in session_ids]
+        )
 
     def _update_all_sessions(self) -> None:
-        """全セッションの出力を更新する（定期実行）"""
-        for panel in self.session_panels:
-            panel.update_output()
+        """全セッションの出力を更新する"""
+        self._show_broadcast_status()
+        self._show_touch_results()
+        self._render(self.session_panels)
+
+    def _housekeeping(self) -> None:
+        """休止ポリシーを適用し、処理中のパネルの経過時間を更新する（低頻度の定期実行）"""
+        sending = self._broadcast_thread is not None and self._broadcast_thread.is_alive()
+        # 送信中は送信スレッドが休止・再開を行う。前回の適用が終わるまでは積まない
+        if not sending and not self._policy_pending:
+            self._policy_pending = True
+            self._submit_session_task(self._apply_hibernation_policy)
+        busy = {
+            session_id
+            for session_id, state in self.session_manager.get_session_states().items()
+            if state == STATE_BUSY
+        }
+        if busy:
+            self._render(
+                [p for p in self.session_panels if p.session.session_id in busy]
+            )
+        self.root.after(HOUSEKEEPING_INTERVAL_MS, self._housekeeping)
+
+    def _show_broadcast_status(self) -> None:
+        """送信スレッドから届いた要約を表示する"""
+        while not self._broadcast_status.empty():
+            status = self._broadcast_status.get_nowait()
+            if self.input_bar:
+                self.input_bar.set_status(status)
+
+    def _show_connection_state(self) -> None:
+        """デーモンとの接続が切れていれば、attachし直す方法を表示する"""
+        if not self.session_manager.connected and self.input_bar:
+            self.input_bar.set_status("Disconnected from daemon: press Send to re-attach")
+
+    def _show_touch_results(self) -> set[str]:
+        """
+        専用スレッドから届いた再開・再attachの結果を表示する
+
+        Returns:
+            結果が届いたセッションIDの集合（パネルを描画し直す対象）
+        """
+        session_ids = set()
+        while not self._touch_results.empty():
+            session_id, status = self._touch_results.get_nowait()
+            session_ids.add(session_id)
+            if status is not None and self.input_bar:
+                self.input_bar.set_status(status)
+        return session_ids
 
-        # 100ms後に再実行
-        self.root.after(100, self._update_all_sessions)
+    def _render(self, panels: list[SessionPanel]) -> None:
+        """パネルの出力を描画し、かかった時間を記録する"""
+        if not panels:
+            return
+        started = time.perf_counter()
+        for panel in panels:
+            panel.update_output()
+        self._render_latency.record(time.perf_counter() - started)
@@ -1,10 +1,13 @@
 """セッションパネルモジュール"""
 
+import time
 import tkinter as tk
 from tkinter import scrolledtext
 from typing import Callable, Optional
 
+from ..core.prompt_detector import STATE_BUSY, STATE_IDLE
 from ..core.session import PowerShellSession
+from ..core.terminal_screen import ScreenUpdate, TerminalScreen
 
 
 class SessionPanel:
@@ -26,6 +29,14 @@ class SessionPanel:
         self.session = session
         self.on_click = on_click
         self.output_text: Optional[scrolledtext.ScrolledText] = None
+        self.drop_label: Optional[tk.Label] = None
+        self.state_label: Optional[tk.Label] = None
+        # 画面モデルを描画済みの場合、その上に表示しているスクロールバック行数
+        # （Noneの場合は次の描画で全体を描き直す）
+        self._screen_scrollback: Optional[int] = None
+        # \r で上書き中の行の表示状態（表示中は元の最終行を退避している）
+        self._pending_shown: Optional[str] = None
+        self._hidden_line: Optional[str] = None
 
     def setup_ui(self) -> None:
         """パネルUIを構築する"""
@@ -51,6 +62,23 @@ class SessionPanel:
         )
         dir_label.pack(side=tk.LEFT, padx=8)
 
+        # 出力バッファあふれで破棄した量（発生時のみ表示）
+        self.drop_label = tk.Label(
+            info_frame,
+            text="",
+            font=("Arial", 8),
+            fg="red",
+        )
+        self.drop_label.pack(side=tk.RIGHT)
+
+        # プロンプト検出による busy / idle 表示（対応セッションのみ）
+        self.state_label = tk.Label(
+            info_frame,
+            text="",
+            font=("Arial", 8),
+        )
+        self.state_label.pack(side=tk.RIGHT, padx=8)
+
         # 中央: 出力テキスト（スクロール可能）
         self.output_text = scrolledtext.ScrolledText(
             self.frame,
@@ -86,9 +114,22 @@ class SessionPanel:
         """出力を更新する（定期的に呼び出し）"""
         if not self.output_text:
             return
+        if self.session.hibernated:
+            # 休止中は最後の表示を残す（画面モデルは再開時に作り直される）
+            return
+
+        screen = self.session.screen
+        if screen is not None:
+            self._render_screen(screen)
+            self._update_state_label()
+            return
 
         output = self.session.get_output()
+        pending = self.session.pending_line
+
         if output:
+            # 上書き中の行を元に戻してから確定した出力を追加する
+            self._hide_pending_line()
             # [CLEAR_SCREEN]マーカーを検出して画面をクリア
             if "[CLEAR_SCREEN]" in output:
                 self.output_text.delete("1.0", tk.END)
@@ -96,14 +137,134 @@ class SessionPanel:
                 output = output.replace("[CLEAR_SCREEN]\n", "")
 
             if output:  # マーカー除去後も出力がある場合のみ挿入
-                self.output_text.insert(tk.END, output)
+                self._insert_output(output)
                 self.output_text.see(tk.END)  # 最下部にスクロール
 
+        if pending is None:
+            self._hide_pending_line()
+        elif output or pending != self._pending_shown:
+            self._show_pending_line(pending)
+            self.output_text.see(tk.END)
+        self._pending_shown = pending
+
+        self._update_drop_label()
+        self._update_state_label()
+
+    def _insert_output(self, output: str) -> None:
+        """
+        出力を末尾に追加する
+
+        \r の後ろの内容は最終行を置き換える（進捗表示が確定した最終状態）。
+
+        Args:
+            output: 追加する出力
+        """
+        first, *rewrites = output.split("\r")
+        self.output_text.insert(tk.END, first)
+        for segment in rewrites:
+            self.output_text.delete("end-1c linestart", "end-1c")
+            self.output_text.insert(tk.END, segment)
+
+    def _show_pending_line(self, pending: str) -> None:
+        """上書き中の行を最終行として表示する（新しい行は追加しない）"""
+        if self._hidden_line is None:
+            self._hidden_line = self.output_text.get("end-1c linestart", "end-1c")
+        self.output_text.delete("end-1c linestart", "end-1c")
+        self.output_text.insert(tk.END, pending)
+
+    def _hide_pending_line(self) -> None:
+        """上書き中の行の表示を消し、退避していた最終行に戻す"""
+        if self._hidden_line is None:
+            return
+        self.output_text.delete("end-1c linestart", "end-1c")
+        self.output_text.insert(tk.END, self._hidden_line)
+        self._hidden_line = None
+        self._pending_shown = None
+
+    def _render_screen(self, screen: TerminalScreen) -> None:
+        """
+        画面モデルの変化した行だけを描き直す
+
+        テキストはスクロールバックの後ろに画面の各行を（改行付きで）並べる。
+        画面上端からスクロールアウトした行は画面領域の先頭から
+        スクロールバックへ移し、下端に空行を足すため、残りの行は書き直さない。
+
+        Args:
+            screen: セッションの画面モデル
+        """
+        if self._screen_scrollback is None:
+            screen.invalidate()
+        update = screen.take_update()
+        if update is None:
+            return
+
+        if update.full:
+            self._redraw_screen(update)
+        else:
+            if update.scrolled_count:
+                self._scroll_screen(update, screen.scrollback_lines)
+            for row, line in update.rows.items():
+                index = self._screen_scrollback + row + 1
+                self.output_text.delete(f"{index}.0", f"{index}.end")
+                self.output_text.insert(f"{index}.0", line)
+        self.output_text.see(tk.END)
+
+    def _redraw_screen(self, update: ScreenUpdate) -> None:
+        """スクロールバックと画面全体を描き直す"""
+        lines = list(update.scrollback)
+        lines.extend(update.rows[row] for row in range(update.height))
+        self.output_text.delete("1.0", tk.END)
+        self.output_text.insert("1.0", "".join(line + "\n" for line in lines))
+        self._screen_scrollback = len(update.scrollback)
+
+    def _scroll_screen(self, update: ScreenUpdate, limit: int) -> None:
+        """スクロールアウトした行を画面領域からスクロールバックへ移す"""
+        text = self.output_text
+        first = self._screen_scrollback + 1
+        shifted = min(update.scrolled_count, update.height)
+        text.insert(f"{first}.0", "".join(line + "\n" for line in update.scrolled))
+        start = first + len(update.scrolled)
+        text.delete(f"{start}.0", f"{start + shifted}.0")
+        # 各行が改行で終わるため、末尾の改行の手前に空行を足す
+        text.insert("end-1c", "\n" * shifted)
+        self._screen_scrollback += len(update.scrolled)
+
+        excess = self._screen_scrollback - limit
+        if excess > 0:
+            text.delete("1.0", f"{excess + 1}.0")
+            self._screen_scrollback = limit
+
+    def _update_state_label(self) -> None:
+        """busy / idle 状態と継続時間を表示する"""
+        detector = self.session.prompt_detector
+        if not self.state_label or detector is None:
+            return
+
+        state = detector.state
+        if state == STATE_BUSY:
+            elapsed = time.monotonic() - detector.since
+            self.state_label.config(text=f"● busy {elapsed:.1f}s", fg="orange")
+        elif state == STATE_IDLE:
+            self.state_label.config(text="○ idle", fg="green")
+
+    def _update_drop_label(self) -> None:
+        """破棄した出力の行数・文字数を表示する"""
+        stats = self.session.output_stats
+        if not self.drop_label or stats is None:
+            return
+
+        if stats.dropped_lines or stats.dropped_chars:
+            self.drop_label.config(
+                text=f"Dropped: {stats.dropped_lines} lines / "
+                f"{stats.dropped_chars} chars"
+            )
+
     def _on_start(self) -> None:
         """Startボタン押下時のハンドラー"""
         if not self.session.is_running():
             try:
                 self.session.start()
+                self._screen_scrollback = None
                 if self.output_text:
                     import os
                     cwd = os.path.abspath(self.session.working_dir)
@@ -122,6 +283,7 @@ class SessionPanel:
         """Stopボタン押下時のハンドラー"""
         if self.session.is_running():
             self.session.stop()
+            self._screen_scrollback = None
             if self.output_text:
                 # 出力エリアをクリア
                 self.output_text.delete("1.0", tk.END)
@@ -0,0 +1,139 @@
+"""セッションイベントをTkのメインループへ渡すモジュール
+
+イベントは読み取りスレッドやリアクタースレッドで発行されるため、
+Tkのウィジェットを直接操作できない。受け取ったイベントをためておき、
+メインループを1回だけ起こして（event_generate / after_idle）まとめて渡す。
+イベントが来なければメインループは何もしない。
+"""
+
+import threading
+import tkinter as tk
+from typing import Callable, Optional
+
+from ..core.events import EventBus, OutputAvailable, OutputDropped, SessionEvent
+
+# メインループを起こす仮想イベント
+VIRTUAL_EVENT = "<<SessionEvents>>"
+
+# メインループがまだ始まっていない場合に起こし直すまでの秒数
+_RETRY_INTERVAL = 0.05
+
+# 後のイベントで置き換えてよい（最新の1件だけ渡せば十分な）イベント
+_COALESCED_EVENTS = (OutputAvailable, OutputDropped)
+
+
+class TkEventAdapter:
+    """EventBusのイベントをまとめてTkのメインスレッドで処理するクラス
+
+    出力のイベントはセッションごとに最新の1件へまとめるため、出力が大量に
+    届いてもメインループの処理はまとめた回数にしかならない。
+
+    他のスレッドからのTkの呼び出しはメインスレッドの処理を待つため、
+    読み取りスレッドは起こす合図だけを出し、event_generate()は
+    専用のスレッドで行う（メインスレッドが読み取りスレッドを待っていても
+    デッドロックしない）。
+    """
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        bus: EventBus,
+        handler: Callable[[list[SessionEvent]], None],
+    ):
+        """
+        Args:
+            root: メインループを回すウィジェット（通常はTkのルート）
+            bus: 購読するイベントバス
+            handler: まとめたイベントを受け取るコールバック（メインスレッドで呼ばれる）
+        """
+        self.root = root
+        self.bus = bus
+        self.handler = handler
+        # Tkを作成したスレッド（このスレッドからはafter_idle()で直接予約する）
+        self._tk_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        # 渡していないイベント（まとめるイベントはキーが重複する）
+        self._pending: dict[object, SessionEvent] = {}
+        self._scheduled = False
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        イベントの購読を始める（メインループの中から呼ぶ）
+
+        購読前のイベントは受け取らないため、呼んだ側は最初に全体を描画すること。
+        """
+        if self._thread is not None:
+            return
+        self.root.bind(VIRTUAL_EVENT, lambda e: self._drain())
+        self._thread = threading.Thread(
+            target=self._run, name="tk-event-waker", daemon=True
+        )
+        self._thread.start()
+        self.bus.subscribe(self._on_event)
+
+    def close(self) -> None:
+        """購読をやめる（ためていたイベントは捨てる）"""
+        self.bus.unsubscribe(self._on_event)
+        self._closed.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+        with self._lock:
+            self._pending.clear()
+
+    def wake(self) -> None:
+        """イベントがなくてもハンドラーを呼ぶよう予約する（どのスレッドからでもよい）"""
+        self._schedule()
+
+    def _on_event(self, event: SessionEvent) -> None:
+        """イベントをためてメインループを起こす（発行したスレッドで呼ばれる）"""
+        if isinstance(event, _COALESCED_EVENTS):
+            key: object = (type(event), event.session_id)
+        else:
+            key = object()
+        with self._lock:
+            self._pending[key] = event
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """ハンドラーの呼び出しを1回だけ予約する"""
+        with self._lock:
+            if self._scheduled or self._closed.is_set():
+                return
+            self._scheduled = True
+        if threading.get_ident() == self._tk_thread:
+            self.root.after_idle(self._drain)
+        else:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        """合図を受けてメインループへ仮想イベントを送る（専用スレッド）"""
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed.is_set():
+                return
+            try:
+                self.root.event_generate(VIRTUAL_EVENT, when="tail")
+            except RuntimeError:
+                # メインループがまだ始まっていない
+                if self._closed.wait(_RETRY_INTERVAL):
+                    return
+                self._wakeup.set()
+            except tk.TclError:
+                # ウィンドウが破棄された
+                return
+
+    def _drain(self) -> None:
+        """ためていたイベントをハンドラーへ渡す（メインスレッド）"""
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+            self._scheduled = False
+        if self._closed.is_set():
+            return
+        self.handler(events)
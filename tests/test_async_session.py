@@ -0,0 +1,239 @@
+"""AsyncPowerShellSession / AsyncSessionManagerのテスト"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+from claude_session_manager.config import SessionManagerConfig
+from claude_session_manager.core.async_session import (
+    AsyncPowerShellSession,
+    AsyncSessionManager,
+)
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="uses cat as a stub shell")
+
+
+def _cat_session(session_id="test-session", config=None):
+    """入力をそのまま出力するスタブシェルのセッションを作成する"""
+    return AsyncPowerShellSession(
+        session_id, ".", config=config, shell_command=["cat"], encoding="utf-8"
+    )
+
+
+class TestAsyncPowerShellSession:
+    """AsyncPowerShellSessionクラスのテスト"""
+
+    def test_initialization(self):
+        """セッションが正しく初期化される"""
+        session = AsyncPowerShellSession("test-session", ".")
+
+        assert session.session_id == "test-session"
+        assert session.working_dir == "."
+        assert not session.is_running()
+
+    def test_start_with_invalid_directory(self):
+        """存在しないディレクトリでの起動がエラーになる"""
+        session = AsyncPowerShellSession("test-session", "/nonexistent/path")
+
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(session.start())
+
+    def test_send_to_stopped_session(self):
+        """未起動セッションへの送信がエラーになる"""
+        session = AsyncPowerShellSession("test-session", ".")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(session.send("echo test"))
+
+    @posix_only
+    def test_send_and_iterate_output(self):
+        """send()した結果を async for で受け取れる"""
+
+        async def scenario():
+            session = _cat_session()
+            await session.start()
+            try:
+                stream = session.output()
+                await session.send("hello async")
+                received = ""
+                async for chunk in stream:
+                    received += chunk.text
+                    if "hello async\n" in received:
+                        break
+                return received
+            finally:
+                await session.stop()
+
+        assert asyncio.run(asyncio.wait_for(scenario(), 5)) == "hello async\n"
+
+    @posix_only
+    def test_output_shared_with_get_output(self):
+        """output()で読んでもget_output()の出力は失われない"""
+
+        async def scenario():
+            session = _cat_session()
+            await session.start()
+            try:
+                await session.send("shared")
+                async for chunk in session.output(from_cursor=0):
+                    if "shared" in chunk.text:
+                        break
+                return session.get_output()
+            finally:
+                await session.stop()
+
+        assert asyncio.run(asyncio.wait_for(scenario(), 5)) == "shared\n"
+
+    @posix_only
+    def test_wait_idle_returns_after_quiet_period(self):
+        """出力が途絶えるとwait_idle()が戻る"""
+
+        async def scenario():
+            session = _cat_session()
+            await session.start()
+            try:
+                await session.send("burst")
+                return await session.wait_idle(idle_time=0.1, timeout=2)
+            finally:
+                await session.stop()
+
+        assert asyncio.run(scenario()) is True
+
+    @posix_only
+    def test_iteration_ends_on_process_exit(self):
+        """プロセス終了でoutput()の反復が終わる"""
+
+        async def scenario():
+            session = AsyncPowerShellSession(
+                "test-session",
+                ".",
+                shell_command=[sys.executable, "-c", "print('bye')"],
+                encoding="utf-8",
+            )
+            await session.start()
+            chunks = [chunk.text async for chunk in session.output(from_cursor=0)]
+            await session.stop()
+            return "".join(chunks)
+
+        assert asyncio.run(asyncio.wait_for(scenario(), 5)).strip() == "bye"
+
+
+    @posix_only
+    def test_stop_kills_process_tree(self):
+        """SIGTERMを無視する子プロセスもツリーごと停止する"""
+        from claude_session_manager.core.process_tree import is_process_group_alive
+
+        async def scenario():
+            session = AsyncPowerShellSession(
+                "test-session", ".", shell_command=["sh"], encoding="utf-8"
+            )
+            await session.start()
+            await session.send("sh -c 'trap \"\" TERM; while :; do sleep 0.05; done'")
+            await asyncio.sleep(0.3)
+            pid = session.process.pid
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await session.stop(timeout=0.3)
+            elapsed = loop.time() - start
+            # SIGKILLは非同期に届くため、グループが消えるまで少し待つ
+            end = loop.time() + 1
+            while is_process_group_alive(pid) and loop.time() < end:
+                await asyncio.sleep(0.01)
+            return elapsed, is_process_group_alive(pid)
+
+        elapsed, alive = asyncio.run(asyncio.wait_for(scenario(), 5))
+        assert elapsed < 1.5
+        assert not alive
+
+    @posix_only
+    def test_send_command_failure_is_logged(self, caplog):
+        """別スレッドからの送信の失敗はログに残る"""
+
+        async def failing_send(command):
+            raise OSError("broken pipe")
+
+        async def scenario():
+            session = _cat_session()
+            await session.start()
+            try:
+                session.send = failing_send
+                session.send_command("lost")
+                await asyncio.sleep(0.1)
+            finally:
+                await session.stop()
+
+        with caplog.at_level("ERROR", logger="claude_session_manager.core.async_session"):
+            asyncio.run(asyncio.wait_for(scenario(), 5))
+
+        assert "Failed to send command to test-session: broken pipe" in caplog.text
+
+
+class TestAsyncSessionManager:
+    """AsyncSessionManagerクラスのテスト"""
+
+    def test_create_session_exceeds_limit(self):
+        """最大セッション数を超える作成がエラーになる"""
+        manager = AsyncSessionManager(max_sessions=1)
+        manager.create_session("session-1", ".")
+
+        with pytest.raises(RuntimeError):
+            manager.create_session("session-2", ".")
+
+    def test_create_duplicate_session_id(self):
+        """重複IDでのセッション作成がエラーになる"""
+        manager = AsyncSessionManager()
+        manager.create_session("session-1", ".")
+
+        with pytest.raises(ValueError):
+            manager.create_session("session-1", ".")
+
+    def test_session_uses_manager_config(self):
+        """セッションにマネージャーの設定が渡される"""
+        config = SessionManagerConfig(output_buffer_size=7)
+        manager = AsyncSessionManager(config=config)
+        session = manager.create_session("session-1", ".")
+
+        assert session._output_buffer.max_lines == 7
+
+    @posix_only
+    def test_many_sessions_on_one_loop(self):
+        """1つのイベントループで多数のセッションを駆動できる"""
+
+        async def scenario():
+            manager = AsyncSessionManager(max_sessions=32)
+            for i in range(32):
+                session = manager.create_session(f"session-{i}", ".")
+                session.shell_command = ["cat"]
+                session.encoding = "utf-8"
+            await manager.start_all()
+            try:
+                await asyncio.gather(
+                    *(
+                        manager.get_session(f"session-{i}").send(f"from {i}")
+                        for i in range(32)
+                    )
+                )
+
+                async def first_line(session):
+                    async for chunk in session.output(from_cursor=0):
+                        if "\n" in chunk.text:
+                            return chunk.text
+
+                return await asyncio.gather(
+                    *(first_line(manager.get_session(f"session-{i}")) for i in range(32))
+                )
+            finally:
+                await manager.stop_all()
+
+        lines = asyncio.run(asyncio.wait_for(scenario(), 10))
+        assert lines == [f"from {i}\n" for i in range(32)]
+
+    def test_delete_nonexistent_session(self):
+        """存在しないセッションの削除がエラーになる"""
+        manager = AsyncSessionManager()
+
+        with pytest.raises(KeyError):
+            asyncio.run(manager.delete_session("nonexistent"))
@@ -0,0 +1,121 @@
+"""コマンド完了検出（CommandTracker）のテスト"""
+
+import os
+import subprocess
+
+import pytest
+
+from claude_session_manager.core.command import (
+    CommandTracker,
+    is_powershell,
+    wrap_command,
+)
+
+
+def _begin(token):
+    return f"__CSM_BEGIN_{token}__\n"
+
+
+def _end(token, ok=1, code=0):
+    return f"__CSM_END_{token}_{ok}_{code}__\n"
+
+
+class TestCommandTracker:
+    """CommandTrackerクラスのテスト"""
+
+    def test_passthrough_without_pending(self):
+        """完了待ちがない場合は出力をそのまま返す"""
+        tracker = CommandTracker()
+
+        assert tracker.feed("plain output\n") == "plain output\n"
+
+    def test_markers_stripped_and_result_recorded(self):
+        """マーカーが除去され、結果が記録される"""
+        tracker = CommandTracker()
+        pending = tracker.register("dir")
+        tracker.mark_sent(pending)
+        token = pending.token
+
+        shown = tracker.feed(_begin(token) + "file1\nfile2\n" + _end(token))
+
+        assert shown == "file1\nfile2\n"
+        # 完了の通知は出力をバッファへ格納した後（release()）
+        assert not pending.done.is_set()
+        tracker.release()
+        assert pending.done.is_set()
+        assert pending.result.output == "file1\nfile2\n"
+        assert pending.result.exit_code == 0
+        assert pending.result.success
+        assert pending.result.duration is not None
+        assert pending.result.time_to_first_byte is not None
+
+    def test_marker_split_across_chunks(self):
+        """チャンク境界で分割されたマーカーも検出できる"""
+        tracker = CommandTracker()
+        pending = tracker.register("cmd")
+        token = pending.token
+        stream = _begin(token) + "out\n" + _end(token, ok=0, code=3)
+
+        shown = "".join(tracker.feed(stream[i : i + 3]) for i in range(0, len(stream), 3))
+
+        assert shown == "out\n"
+        assert pending.result.exit_code == 3
+        assert not pending.result.success
+
+    def test_prompt_without_newline_not_held(self):
+        """マーカーでない改行なしの出力は保留されない"""
+        tracker = CommandTracker()
+        tracker.register("cmd")
+
+        assert tracker.feed("PS C:\\> ") == "PS C:\\> "
+
+    def test_false_marker_prefix_released(self):
+        """マーカーにならない接頭辞は行が終われば解放される"""
+        tracker = CommandTracker()
+        tracker.register("cmd")
+
+        shown = tracker.feed("value __CSM_")
+        shown += tracker.feed("not_a_marker\n")
+
+        assert shown == "value __CSM_not_a_marker\n"
+
+    def test_cmdlet_failure_reports_nonzero(self):
+        """$?がFalseで終了コード0の場合は1とする"""
+        tracker = CommandTracker()
+        pending = tracker.register("Get-Item missing")
+        tracker.feed(_begin(pending.token) + _end(pending.token, ok=0, code=0))
+
+        assert pending.result.exit_code == 1
+
+    def test_flush_aborts_pending(self):
+        """flush()で完了待ちが打ち切られる"""
+        tracker = CommandTracker()
+        pending = tracker.register("cmd")
+        tracker.feed(_begin(pending.token) + "partial")
+
+        tracker.flush()
+
+        assert pending.done.is_set()
+        assert pending.result.exit_code is None
+        assert tracker.in_flight == 0
+
+    def test_is_powershell(self):
+        """シェル起動コマンドからPowerShellを判定する"""
+        assert is_powershell(["powershell", "-NoLogo"])
+        assert is_powershell(["C:\\Program Files\\PowerShell\\7\\pwsh.exe"])
+        assert not is_powershell(["bash"])
+
+    @pytest.mark.skipif(os.name != "posix", reason="requires POSIX sh")
+    def test_sh_wrapper_produces_markers(self):
+        """sh用のラッパーがマーカーと終了コードを出力する"""
+        tracker = CommandTracker()
+        pending = tracker.register("echo hi; false")
+        script = wrap_command("echo hi; false", pending.token, powershell=False)
+
+        output = subprocess.run(
+            ["sh"], input=script + "\n", capture_output=True, text=True
+        ).stdout
+        shown = tracker.feed(output)
+
+        assert shown == "hi\n"
+        assert pending.result.exit_code == 1
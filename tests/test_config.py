@@ -19,6 +19,9 @@ class TestSessionManagerConfig:
         assert config.grid_spacing == 8
         assert config.button_min_size == (48, 48)
         assert config.font_size_min == 12
+        # 休止は既定で無効
+        assert config.max_live_sessions is None
+        assert config.hibernate_idle_seconds is None
 
     def test_config_custom_values(self):
         """カスタム値で初期化できる"""
@@ -0,0 +1,228 @@
+"""セッションイベントのテスト"""
+
+import time
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from claude_session_manager.core.events import (
+    BusyStateChanged,
+    EventBus,
+    OutputAvailable,
+    OutputDropped,
+    SessionCreated,
+    SessionDeleted,
+    SessionEventSource,
+    SessionExited,
+    SessionStarted,
+)
+
+
+class _FakeSession:
+    """set_change_listener()を持つセッションの代わり"""
+
+    def __init__(self):
+        self.process = None
+        self.stop_requested = False
+        self.output_ended = False
+        self.output_cursor = 0
+        self.pending_line = None
+        self.prompt_detector = None
+        self.commands_in_flight = 0
+        self.output_stats = SimpleNamespace(dropped_lines=0, dropped_chars=0)
+        self.listener = None
+
+    def set_change_listener(self, listener):
+        self.listener = listener
+
+    def change(self, **attrs):
+        """属性を変えて変化を通知する"""
+        for name, value in attrs.items():
+            setattr(self, name, value)
+        self.listener()
+
+
+class TestEventBus:
+    """EventBusのテスト"""
+
+    def test_subscribe_by_type(self):
+        """購読者は指定した型のイベントだけを受け取る"""
+        bus = EventBus()
+        everything, exits = [], []
+        bus.subscribe(everything.append)
+        bus.subscribe(exits.append, SessionExited)
+
+        bus.publish(SessionStarted("s1"))
+        bus.publish(SessionExited("s1"))
+
+        assert everything == [SessionStarted("s1"), SessionExited("s1")]
+        assert exits == [SessionExited("s1")]
+
+    def test_unsubscribe_and_failing_subscriber(self):
+        """例外を出す購読者があっても他の購読者へ配信し、解除後は配信しない"""
+        bus = EventBus()
+        received = []
+
+        def broken(event):
+            raise ValueError("boom")
+
+        bus.subscribe(broken)
+        bus.subscribe(received.append)
+        bus.publish(SessionStarted("s1"))
+        bus.unsubscribe(received.append)
+        bus.unsubscribe(broken)
+        bus.publish(SessionStarted("s2"))
+
+        assert received == [SessionStarted("s1")]
+        assert not bus.has_subscribers
+
+
+class TestSessionEventSource:
+    """SessionEventSourceのテスト"""
+
+    def test_changes_become_events(self):
+        """前回の状態から変わったものだけをイベントにする"""
+        bus = EventBus()
+        received = []
+        bus.subscribe(received.append)
+        source = SessionEventSource(bus)
+        session = _FakeSession()
+        source.watch("s1", session)
+
+        session.change(process=object())
+        session.change(commands_in_flight=1)
+        session.change(output_cursor=10)
+        session.change(output_cursor=10)  # 変化なし
+        session.change(pending_line="50%")
+        session.change(
+            output_cursor=20,
+            commands_in_flight=0,
+            output_stats=SimpleNamespace(dropped_lines=3, dropped_chars=30),
+        )
+        session.change(stop_requested=True)
+
+        assert received == [
+            SessionStarted("s1"),
+            BusyStateChanged("s1", busy=True),
+            OutputAvailable("s1", 10),
+            OutputAvailable("s1", 10),
+            OutputAvailable("s1", 20),
+            OutputDropped("s1", 3, 30),
+            BusyStateChanged("s1", busy=False),
+            SessionExited("s1", requested=True),
+        ]
+
+    def test_no_work_without_subscribers_and_forget(self):
+        """購読者がいない間は発行せず、解除したセッションの通知は受け取らない"""
+        bus = EventBus()
+        source = SessionEventSource(bus)
+        session = _FakeSession()
+        source.watch("s1", session)
+        session.change(process=object())
+
+        received = []
+        bus.subscribe(received.append)
+        source.forget("s1")
+
+        assert session.listener is None
+        source.update("s1", session)
+        assert received == []
+
+
+    def test_late_subscriber_sees_only_new_changes(self):
+        """購読者がいない間の変化も状態に反映し、後の購読者に古い差分を送らない"""
+        bus = EventBus()
+        source = SessionEventSource(bus)
+        session = _FakeSession()
+        source.watch("s1", session)
+        session.change(process=object(), output_cursor=10)
+
+        received = []
+        bus.subscribe(received.append)
+        session.change(pending_line="50%")
+
+        assert received == [OutputAvailable("s1", 10)]
+
+
+posix_only = pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+
+
+@posix_only
+class TestManagerEvents:
+    """マネージャーが発行するイベントのテスト"""
+
+    def _manager(self, **config):
+        """create_session()でshのセッションを作成するマネージャー"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        return SessionManager(
+            max_sessions=4,
+            config=SessionManagerConfig(
+                warm_pool_size=0, output_encoding="utf-8", **config
+            ),
+        )
+
+    def _create(self, manager, session_id):
+        """shのセッションを作成する"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            partial(PowerShellSession, shell_command=["sh"]),
+        ):
+            return manager.create_session(session_id, ".")
+
+    def _wait(self, predicate, timeout=5):
+        """条件が成り立つまで待つ"""
+        end = time.time() + timeout
+        while not predicate() and time.time() < end:
+            time.sleep(0.01)
+        assert predicate()
+
+    @pytest.mark.parametrize("use_io_reactor", [True, False])
+    def test_session_lifecycle(self, use_io_reactor):
+        """作成・起動・出力・busy / idle・終了・削除をイベントで通知する"""
+        manager = self._manager(use_io_reactor=use_io_reactor)
+        received = []
+        manager.events.subscribe(received.append)
+        try:
+            session = self._create(manager, "session-1")
+            session.start()
+            session.run_command("echo hello", timeout=5)
+            session.send_command("exit 3")
+            self._wait(lambda: SessionExited("session-1") in received)
+            session.start()
+            manager.delete_session("session-1")
+
+            types = [type(event) for event in received]
+            assert types[:2] == [SessionCreated, SessionStarted]
+            assert BusyStateChanged("session-1", busy=True) in received
+            assert BusyStateChanged("session-1", busy=False) in received
+            assert any(isinstance(e, OutputAvailable) for e in received)
+            # 予期しない終了の後に再び起動し、削除では終了のイベントを出さない
+            assert types.count(SessionStarted) == 2
+            assert types.count(SessionExited) == 1
+            assert received[-1] == SessionDeleted("session-1")
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_quiet_sessions_publish_nothing(self):
+        """出力のないセッションはイベントを発行しない（UIを起こさない）"""
+        manager = self._manager()
+        received = []
+        try:
+            sessions = [self._create(manager, f"session-{i}") for i in range(4)]
+            for session in sessions:
+                session.start()
+            manager.events.subscribe(received.append)
+
+            time.sleep(0.5)
+
+            assert received == []
+        finally:
+            manager.shutdown_all(deadline=1)
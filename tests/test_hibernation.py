@@ -0,0 +1,160 @@
+"""休止（ハイバネーション）モジュールのテスト"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from claude_session_manager.core.hibernation import (
+    ScrollbackSpill,
+    activity_marker,
+    is_session_busy,
+    process_cwd,
+    shell_cwd,
+)
+from claude_session_manager.core.prompt_detector import PromptDetector
+
+
+def _idle_session(**attrs):
+    """is_session_busy()用のセッションの代わり（既定は処理中でない状態）"""
+    values = {
+        "prompt_detector": None,
+        "commands_in_flight": 0,
+        "input_backpressured": False,
+        "command_activity_at": None,
+    }
+    values.update(attrs)
+    return SimpleNamespace(**values)
+
+
+class TestScrollbackSpill:
+    """ScrollbackSpillのテスト"""
+
+    def test_write_and_read_round_trip(self, tmp_path):
+        """書き出した出力を読み戻すとファイルは削除される"""
+        spill = ScrollbackSpill(str(tmp_path))
+        text = "line 1\r\n日本語\n" * 100
+
+        path = spill.write("session/1", text)
+
+        assert os.path.dirname(path) == str(tmp_path)
+        assert "/" not in os.path.basename(path)
+        assert spill.read(path) == text
+        assert not os.path.exists(path)
+
+    def test_empty_output_is_not_written(self, tmp_path):
+        """空の出力はファイルを作らない"""
+        spill = ScrollbackSpill(str(tmp_path))
+
+        assert spill.write("session-1", "") is None
+        assert spill.read(None) == ""
+        assert os.listdir(tmp_path) == []
+
+    def test_close_removes_own_directory(self):
+        """自分で作成した一時ディレクトリはclose()で削除する"""
+        spill = ScrollbackSpill()
+        spill.write("session-1", "output")
+        directory = spill.directory
+
+        spill.close()
+
+        assert not os.path.exists(directory)
+
+    def test_close_keeps_given_directory(self, tmp_path):
+        """指定されたディレクトリは削除しない"""
+        spill = ScrollbackSpill(str(tmp_path))
+        path = spill.write("session-1", "output")
+
+        spill.close()
+
+        assert os.path.exists(path)
+
+
+class TestHibernationHelpers:
+    """補助関数のテスト"""
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="requires /proc")
+    def test_process_cwd(self):
+        """/procからカレントディレクトリを取得する"""
+        assert process_cwd(os.getpid()) == os.getcwd()
+
+    def test_process_cwd_invalid_pid(self):
+        """不正なpidはNone"""
+        assert process_cwd(None) is None
+        assert process_cwd(-1) is None
+
+    def test_busy_prompt_detector(self):
+        """プロンプト検出がbusyのセッションは処理中"""
+        detector = PromptDetector()
+        session = _idle_session(prompt_detector=detector)
+        detector.feed("PS C:\\> ")
+        assert not is_session_busy(session)
+
+        detector.feed("Get-ChildItem\r\n")
+        assert is_session_busy(session)
+
+    def test_busy_commands_in_flight(self):
+        """完了待ちのrun_command()があるセッションは処理中"""
+        assert is_session_busy(_idle_session(commands_in_flight=1))
+        assert not is_session_busy(_idle_session(commands_in_flight=0))
+
+    def test_busy_recent_send_command(self):
+        """quiet_seconds指定時はsend_command()の後に出力が続くセッションも処理中"""
+        session = _idle_session(command_activity_at=100.0)
+        assert not is_session_busy(session, now=105.0)
+        assert is_session_busy(session, quiet_seconds=30, now=105.0)
+        assert not is_session_busy(session, quiet_seconds=30, now=131.0)
+        assert not is_session_busy(
+            _idle_session(command_activity_at=None), quiet_seconds=30
+        )
+
+    def test_busy_input_backpressured(self):
+        """quiet_seconds指定時は入力が書き込み待ちのセッションも処理中"""
+        session = _idle_session(input_backpressured=True)
+        assert not is_session_busy(session)
+        assert is_session_busy(session, quiet_seconds=30)
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="requires /proc")
+    def test_shell_cwd_skips_powershell(self):
+        """PowerShellはカレントディレクトリが追従しないため取得しない"""
+        process = SimpleNamespace(pid=os.getpid())
+        assert shell_cwd(SimpleNamespace(shell_command=["sh"], process=process)) == (
+            os.getcwd()
+        )
+        assert shell_cwd(SimpleNamespace(shell_command=["pwsh"], process=process)) is None
+
+    def test_shell_cwd_asks_the_shell(self):
+        """run_command()で問い合わせ、PowerShellではGet-Locationを使う"""
+        from claude_session_manager.core.command import CommandResult
+
+        queries = []
+
+        def run_command(command, timeout=None):
+            queries.append(command)
+            return CommandResult(command, output="C:\\work\\src\r\n", exit_code=0, success=True)
+
+        session = SimpleNamespace(shell_command=["pwsh"], process=None, run_command=run_command)
+
+        assert shell_cwd(session) == "C:\\work\\src"
+        assert queries == ["(Get-Location).Path"]
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="requires /proc")
+    def test_shell_cwd_falls_back_to_proc(self):
+        """シェルが応答しない場合だけ/procを使う（PowerShellでは使わない）"""
+
+        def run_command(command, timeout=None):
+            raise TimeoutError("busy")
+
+        process = SimpleNamespace(pid=os.getpid())
+        sh = SimpleNamespace(shell_command=["sh"], process=process, run_command=run_command)
+        pwsh = SimpleNamespace(shell_command=["pwsh"], process=process, run_command=run_command)
+
+        assert shell_cwd(sh, timeout=0.1) == os.getcwd()
+        assert shell_cwd(pwsh, timeout=0.1) is None
+
+    def test_activity_marker(self):
+        """出力カーソルまたは受信文字数を使う"""
+        assert activity_marker(SimpleNamespace(output_cursor=10)) == 10
+        # インタラクティブセッションはカーソルを持たない
+        session = SimpleNamespace(output_cursor=None, read_stats=SimpleNamespace(chars=5))
+        assert activity_marker(session) == 5
@@ -1,5 +1,7 @@
 """InteractivePowerShellSessionのテスト"""
 
+import itertools
+import os
 import platform
 import queue
 import pytest
@@ -24,13 +26,14 @@ integration = pytest.mark.integration
 class TestInteractivePowerShellSession:
     """InteractivePowerShellSessionのテスト"""
 
-    def test_non_windows_raises_error(self):
-        """Windows以外のOSでエラーが発生することを確認"""
-        if platform.system() == "Windows":
-            pytest.skip("This test is for non-Windows platforms")
+    def test_unsupported_platform_raises_error(self):
+        """疑似端末を利用できないOSでエラーが発生することを確認"""
+        from claude_session_manager.core import interactive_session
 
-        with pytest.raises(RuntimeError, match="only supported on Windows"):
-            InteractivePowerShellSession("test-session", ".")
+        with patch.object(interactive_session.platform, "system", return_value="Plan9"), \
+                patch.object(interactive_session, "POSIX_PTY_AVAILABLE", False):
+            with pytest.raises(RuntimeError, match="not supported on this platform"):
+                InteractivePowerShellSession("test-session", ".")
 
     @windows_only
     def test_pywinpty_unavailable_raises_error(self):
@@ -186,3 +189,311 @@ class TestInteractivePowerShellSession:
         assert len(output) > 0
 
         session.stop()
+
+
+@pytest.fixture
+def fake_session():
+    """OSとpywinptyの判定を差し替え、出力キューへ直接書き込めるセッション"""
+    from claude_session_manager.core import interactive_session
+
+    with patch.object(interactive_session.platform, "system", return_value="Windows"), \
+            patch.object(interactive_session, "PYWINPTY_AVAILABLE", True):
+        session = InteractivePowerShellSession("test-session", ".")
+    session.process = MagicMock()
+    session.process.isalive.return_value = True
+    return session
+
+
+def _feed_later(session, chunks, delay=0.05):
+    """別スレッドから一定間隔で出力を届ける"""
+    import threading
+    import time
+
+    def feed():
+        for chunk in chunks:
+            time.sleep(delay)
+            session._output_queue.put(chunk)
+
+    thread = threading.Thread(target=feed, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestReadUntil:
+    """read_until()のテスト"""
+
+    def test_returns_as_soon_as_prompt_arrives(self, fake_session):
+        """プロンプトが届いた時点でtimeoutを待たずに返る"""
+        from claude_session_manager.core.interactive_session import READ_UNTIL_MATCHED
+
+        _feed_later(fake_session, ["dir\r\n", "file.txt\r\n", "PS C:\\work> "])
+
+        result = fake_session.read_until(timeout=5)
+
+        assert result.reason == READ_UNTIL_MATCHED
+        assert result.output == "dir\r\nfile.txt\r\nPS C:\\work> "
+        assert result.elapsed < 1
+
+    def test_pattern_split_across_chunks(self, fake_session):
+        """チャンク境界で分割されたパターンにも一致する"""
+        from claude_session_manager.core.interactive_session import READ_UNTIL_MATCHED
+
+        # チャンクをまとめずに別々の要素として届ける
+        fake_session._output_queue.window = 0
+        for chunk in ["abc DO", "NE 1", "23"]:
+            fake_session._output_queue.put(chunk)
+
+        result = fake_session.read_until(r"DONE \d+", timeout=1)
+
+        assert result.reason == READ_UNTIL_MATCHED
+        assert result.match.group(0) == "DONE 1"
+
+    def test_rest_after_match_is_kept(self, fake_session):
+        """一致部分より後ろの出力は次の読み取りで得られる"""
+        fake_session._output_queue.put("first> second")
+
+        first = fake_session.read_until(">", timeout=1)
+        second = fake_session.read_until("second", timeout=1)
+
+        assert first.output == "first>"
+        assert second.output == " second"
+
+    def test_idle_timeout(self, fake_session):
+        """出力が途絶えるとidleで返る"""
+        from claude_session_manager.core.interactive_session import READ_UNTIL_IDLE
+
+        fake_session._output_queue.put("partial output")
+
+        result = fake_session.read_until("never", timeout=5, idle_timeout=0.2)
+
+        assert result.reason == READ_UNTIL_IDLE
+        assert result.output == "partial output"
+        assert result.elapsed < 1
+
+    def test_timeout(self, fake_session):
+        """出力が続いていてもtimeoutで返る"""
+        from claude_session_manager.core.interactive_session import READ_UNTIL_TIMEOUT
+
+        _feed_later(fake_session, ["."] * 20)
+
+        result = fake_session.read_until("never", timeout=0.3, idle_timeout=0.2)
+
+        assert result.reason == READ_UNTIL_TIMEOUT
+        assert result.match is None
+
+    def test_process_exit(self, fake_session):
+        """プロセスが終了すると残りの出力を返す"""
+        from claude_session_manager.core.interactive_session import READ_UNTIL_EXITED
+
+        fake_session._output_queue.put("bye\r\n")
+        # 最初の実行中チェックだけTrue、以降は終了済み
+        fake_session.process.isalive.side_effect = itertools.chain(
+            [True], itertools.repeat(False)
+        )
+
+        result = fake_session.read_until("never", timeout=5)
+
+        assert result.reason == READ_UNTIL_EXITED
+        assert result.output == "bye\r\n"
+
+    def test_not_running_raises_error(self, fake_session):
+        """実行中でない場合はエラー"""
+        fake_session.process.isalive.return_value = False
+
+        with pytest.raises(RuntimeError, match="Session is not running"):
+            fake_session.read_until(timeout=1)
+
+
+class TestPromptState:
+    """プロンプト検出によるbusy / idle判定のテスト"""
+
+    def test_send_command_marks_busy_and_prompt_marks_idle(self, fake_session):
+        """送信でbusy、プロンプトの受信でidleになる"""
+        fake_session.send_command("dir")
+        assert fake_session.state == "busy"
+
+        fake_session.prompt_detector.feed("file.txt\r\n")
+        fake_session.prompt_detector.feed("PS C:\\work> ")
+
+        assert fake_session.state == "idle"
+        fake_session.process.write.assert_called_once_with("dir\n")
+
+    def test_custom_prompt_pattern(self):
+        """追加のプロンプト正規表現で判定できる"""
+        from claude_session_manager.core import interactive_session
+
+        with patch.object(interactive_session.platform, "system", return_value="Windows"), \
+                patch.object(interactive_session, "PYWINPTY_AVAILABLE", True):
+            session = InteractivePowerShellSession(
+                "test-session", ".", prompt_patterns=[r"claude> $"]
+            )
+
+        session.prompt_detector.feed("claude> ")
+        assert session.state == "idle"
+        assert session.prompt_detector.prompt == "custom-1"
+
+
+posix_only = pytest.mark.skipif(
+    platform.system() == "Windows", reason="uses the POSIX pty backend"
+)
+
+
+@pytest.fixture
+def posix_session(tmp_path):
+    """shを疑似端末上で起動したセッション（プロンプトは"ready$ "）"""
+    session = InteractivePowerShellSession(
+        "test-session",
+        str(tmp_path),
+        shell_command=["sh"],
+        prompt_patterns=[r"ready\$ $"],
+        dimensions=(30, 100),
+    )
+    session.env["PS1"] = "ready$ "
+    session.start()
+    yield session
+    session.stop()
+
+
+@posix_only
+class TestPosixPtySession:
+    """POSIX疑似端末バックエンドのテスト"""
+
+    @pytest.mark.timeout(10)
+    def test_command_round_trip(self, posix_session):
+        """コマンドの出力とプロンプトを読み取れる"""
+        from claude_session_manager.core.interactive_session import READ_UNTIL_MATCHED
+
+        assert posix_session.read_until(r"ready\$ $", timeout=5).reason == READ_UNTIL_MATCHED
+
+        posix_session.send_command("echo hello-$((1+2))")
+        result = posix_session.read_until(r"ready\$ $", timeout=5)
+
+        assert result.reason == READ_UNTIL_MATCHED
+        assert "hello-3" in result.output
+        assert posix_session.state == "idle"
+
+    @pytest.mark.timeout(10)
+    def test_screen_follows_output(self, posix_session):
+        """画面モデルに端末の表示内容が反映される"""
+        posix_session.read_until(r"ready\$ $", timeout=5)
+        posix_session.send_command("printf 'spin 1\\rspin 2\\n'")
+        posix_session.read_until(r"ready\$ $", timeout=5)
+
+        display = posix_session.screen.display()
+        assert "spin 2" in display
+        assert display[posix_session.screen.cursor[0]] == "ready$"
+
+    @pytest.mark.timeout(10)
+    def test_read_stats(self, posix_session):
+        """読み取ったチャンク数と読み取りサイズを集計する"""
+        posix_session.read_until(r"ready\$ $", timeout=5)
+        posix_session.send_command("echo stats")
+        posix_session.read_until(r"ready\$ $", timeout=5)
+
+        stats = posix_session.read_stats
+        assert stats.chunks > 0
+        assert stats.average_chunk_size > 0
+        assert stats.queue_depth == 0
+        assert stats.read_size > 0
+
+    @pytest.mark.timeout(10)
+    def test_no_reader_thread(self, posix_session):
+        """出力はリアクターで読み取り、セッション専用の読み取りスレッドを持たない"""
+        assert posix_session._output_thread is None
+        assert posix_session.reactor.is_running()
+
+    @pytest.mark.timeout(10)
+    def test_window_size(self, posix_session):
+        """起動時と変更後の端末サイズがシェルから見える"""
+        posix_session.read_until(r"ready\$ $", timeout=5)
+        posix_session.send_command("stty size")
+        assert "30 100" in posix_session.read_until(r"ready\$ $", timeout=5).output
+
+        posix_session.set_window_size(40, 120)
+        posix_session.send_command("stty size")
+        assert "40 120" in posix_session.read_until(r"ready\$ $", timeout=5).output
+
+    def test_window_size_must_be_positive(self, posix_session):
+        """0以下の端末サイズはValueError"""
+        with pytest.raises(ValueError):
+            posix_session.set_window_size(0, 80)
+
+    @pytest.mark.timeout(10)
+    def test_stop_releases_pty(self, posix_session):
+        """停止するとシェルが終了し、専用リアクターとfdが解放される"""
+        posix_session.read_until(r"ready\$ $", timeout=5)
+        fd = posix_session.process.fd
+
+        hard_killed = posix_session.stop()
+
+        assert hard_killed is False
+        assert not posix_session.is_running()
+        assert posix_session.reactor is None
+        with pytest.raises(OSError):
+            os.fstat(fd)
+
+    @pytest.mark.timeout(10)
+    def test_hibernate_and_resume_keep_screen(self, posix_session):
+        """休止で画面の内容を取り出し、再開時に画面モデルへ戻す"""
+        posix_session.read_until(r"ready\$ $", timeout=5)
+        posix_session.send_command("echo before-hibernate")
+        posix_session.read_until(r"ready\$ $", timeout=5)
+
+        scrollback = posix_session.hibernate()
+
+        assert "before-hibernate" in scrollback
+        assert not posix_session.is_running()
+        assert posix_session.hibernated
+        assert posix_session.screen.display() == [""] * 30
+
+        posix_session.resume(scrollback)
+        posix_session.read_until(r"ready\$ $", timeout=5)
+
+        assert posix_session.is_running()
+        assert not posix_session.hibernated
+        assert "before-hibernate" in posix_session.screen.display()
+
+    @pytest.mark.timeout(10)
+    def test_restart_after_exit_keeps_screen(self, posix_session):
+        """シェルの終了を通知し、再起動しても画面の内容を残す"""
+        import threading
+
+        exited = threading.Event()
+        posix_session.set_exit_listener(exited.set)
+        posix_session.read_until(r"ready\$ $", timeout=5)
+        posix_session.send_command("echo before-exit; exit")
+
+        assert exited.wait(5)
+        assert posix_session.output_ended
+
+        posix_session.restart()
+        posix_session.read_until(r"ready\$ $", timeout=5)
+
+        assert posix_session.is_running()
+        assert not posix_session.output_ended
+        lines = list(posix_session.screen.scrollback) + posix_session.screen.display()
+        assert any("before-exit" in line for line in lines)
+
+    def test_shared_reactor_is_kept(self, tmp_path):
+        """共有リアクターを渡した場合は停止後も閉じない"""
+        from claude_session_manager.core.reactor import OutputReactor
+
+        reactor = OutputReactor()
+        session = InteractivePowerShellSession(
+            "test-session", str(tmp_path), shell_command=["sh"], reactor=reactor
+        )
+        session.start()
+        try:
+            assert session.reactor is reactor
+        finally:
+            session.stop()
+            assert session.reactor is reactor
+            reactor.close()
+
+    def test_missing_shell_raises_error(self, tmp_path):
+        """シェルが見つからない場合はRuntimeError"""
+        session = InteractivePowerShellSession(
+            "test-session", str(tmp_path), shell_command=["/nonexistent/shell"]
+        )
+        with pytest.raises(RuntimeError, match="Shell not found"):
+            session.start()
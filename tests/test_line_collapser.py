@@ -0,0 +1,85 @@
+"""LineCollapserのテスト"""
+
+from claude_session_manager.core.line_collapser import LineCollapser
+
+
+class TestLineCollapser:
+    """\\r による上書きのまとめのテスト"""
+
+    def test_plain_text_passes_through(self):
+        """\\r を含まない出力はそのまま通る"""
+        collapser = LineCollapser()
+
+        assert collapser.feed("hello\nwor") == "hello\nwor"
+        assert collapser.feed("ld\n") == "ld\n"
+        assert collapser.pending_line is None
+        assert collapser.collapsed_updates == 0
+
+    def test_progress_updates_are_collapsed(self):
+        """上書きは改行で確定するまで出力されず、最終状態だけが残る"""
+        collapser = LineCollapser()
+
+        output = "".join(collapser.feed(f"\r{i}%") for i in range(101))
+        assert output == ""
+        assert collapser.pending_line == "100%"
+
+        assert collapser.feed("\n") == "100%\n"
+        assert collapser.pending_line is None
+        assert collapser.collapsed_updates == 101
+
+    def test_shorter_overwrite_keeps_tail(self):
+        """短い内容で上書きすると、行末には前の内容が残る（端末と同じ）"""
+        collapser = LineCollapser()
+
+        assert collapser.feed("abcdef\r12\n") == "12cdef\n"
+
+    def test_crlf_is_normalized(self):
+        """CRLFは上書きではなく改行として扱う（チャンク境界で分割されても同じ）"""
+        collapser = LineCollapser()
+
+        assert collapser.feed("one\r") == "one"
+        assert collapser.feed("\ntwo\r\n") == "\ntwo\n"
+        assert collapser.collapsed_updates == 0
+
+    def test_emitted_prefix_is_replaced(self):
+        """出力済みの部分行が上書きされた場合は \\r + 行全体 を出力する"""
+        collapser = LineCollapser()
+
+        assert collapser.feed("Downloading ") == "Downloading "
+        assert collapser.feed("10%") == "10%"
+        assert collapser.feed("\rDownloading 50%") == ""
+        assert collapser.pending_line == "Downloading 50%"
+        assert collapser.feed("\n") == "\rDownloading 50%\n"
+
+    def test_unchanged_line_is_not_repeated(self):
+        """上書きしても内容が変わらなければ出し直さない"""
+        collapser = LineCollapser()
+
+        assert collapser.feed("spinner") == "spinner"
+        assert collapser.feed("\rspinner\n") == "\n"
+
+    def test_flush_emits_pending_line(self):
+        """flush()で上書き中の行を確定する"""
+        collapser = LineCollapser()
+        collapser.feed("a\r50%\r99%")
+
+        assert collapser.flush() == "99%"
+        assert collapser.pending_line is None
+        assert collapser.flush() == ""
+
+    def test_long_line_without_newline_is_not_kept(self):
+        """改行のない長い出力は末尾だけ覚え、上書きされたら \\r + 新しい内容 を出力する"""
+        from claude_session_manager.core.line_collapser import MAX_EMITTED_CHARS
+
+        collapser = LineCollapser()
+        chunk = "x" * 50_000
+
+        for _ in range(200):
+            assert collapser.feed(chunk) == chunk
+        assert len(collapser._emitted) <= MAX_EMITTED_CHARS
+
+        assert collapser.feed("\rdone") == ""
+        assert collapser.pending_line == "done"
+        assert collapser.feed("\nnext") == "\rdone\nnext"
+        # 確定した後の行は再び先頭から覚える
+        assert collapser.feed("\rNEXT\n") == "\rNEXT\n"
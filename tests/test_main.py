@@ -43,6 +43,7 @@ class TestMain:
         # モック設定
         mock_config = MagicMock()
         mock_config.max_sessions = 4
+        mock_config.metrics_port = None
         mock_config_class.return_value = mock_config
 
         mock_manager = MagicMock()
@@ -56,4 +57,47 @@ class TestMain:
         # 設定が読み込まれた
         mock_config_class.assert_called_once()
         # SessionManagerに設定が渡された
-        mock_manager_class.assert_called_once_with(max_sessions=mock_config.max_sessions)
+        mock_manager_class.assert_called_once_with(
+            max_sessions=mock_config.max_sessions, config=mock_config
+        )
+
+    @patch("claude_session_manager.main.MainWindow")
+    @patch("claude_session_manager.main.SessionManager")
+    def test_main_shuts_down_sessions_on_exit(
+        self, mock_manager_class, mock_window_class
+    ):
+        """メインループが例外で終了してもセッションを停止する"""
+        from claude_session_manager.main import main
+
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_window = MagicMock()
+        mock_window.run.side_effect = KeyboardInterrupt
+        mock_window_class.return_value = mock_window
+
+        with pytest.raises(KeyboardInterrupt):
+            main()
+
+        mock_manager.shutdown_all.assert_called_once()
+
+    @patch("claude_session_manager.main.MetricsServer")
+    @patch("claude_session_manager.main.SessionManagerConfig")
+    @patch("claude_session_manager.main.MainWindow")
+    @patch("claude_session_manager.main.SessionManager")
+    def test_main_serves_metrics_when_port_configured(
+        self, mock_manager_class, mock_window_class, mock_config_class, mock_server_class
+    ):
+        """metrics_portを設定した場合は /metrics を公開し、終了時に閉じる"""
+        from claude_session_manager.main import main
+
+        mock_config = MagicMock()
+        mock_config.metrics_port = 9400
+        mock_config_class.return_value = mock_config
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_server = mock_server_class.return_value.start.return_value
+
+        main()
+
+        mock_server_class.assert_called_once_with(mock_manager.metrics, port=9400)
+        mock_server.close.assert_called_once()
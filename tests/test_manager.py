@@ -1,11 +1,38 @@
 """SessionManagerクラスのテスト"""
 
-import platform
-from unittest.mock import MagicMock, patch
+import os
+import time
+from unittest.mock import ANY, MagicMock, create_autospec, patch
 
 import pytest
 
 
+def _mock_session(session_class=None, **attrs):
+    """セッションクラスの属性・メソッドだけを持つモック（未起動のセッションの状態）"""
+    from claude_session_manager.core.session import PowerShellSession
+
+    session = create_autospec(session_class or PowerShellSession, instance=True)
+    values = {
+        "working_dir": ".",
+        "process": None,
+        "hibernated": False,
+        "stop_requested": False,
+        "output_ended": False,
+        "output_cursor": 0,
+        "output_stats": None,
+        "pending_line": None,
+        "prompt_detector": None,
+        "screen": None,
+        "commands_in_flight": 0,
+        "command_activity_at": None,
+        "input_backpressured": False,
+        "input_stats": None,
+    }
+    values.update(attrs)
+    session.configure_mock(**values)
+    return session
+
+
 class TestSessionManager:
     """SessionManagerクラスのテスト"""
 
@@ -23,7 +50,7 @@ class TestSessionManager:
         from claude_session_manager.core.manager import SessionManager
 
         # モックセッションを設定
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
@@ -32,14 +59,21 @@ class TestSessionManager:
         assert session is not None
         assert "session-1" in manager.sessions
         assert manager.sessions["session-1"] == session
-        mock_session_class.assert_called_once_with("session-1", ".")
+        mock_session_class.assert_called_once_with(
+            "session-1",
+            ".",
+            config=manager.config,
+            reactor=manager.reactor,
+            pool=manager.pool,
+            metrics=ANY,
+        )
 
     @patch("claude_session_manager.core.manager.PowerShellSession")
     def test_get_session_success(self, mock_session_class):
         """セッション取得が成功する"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
@@ -62,7 +96,7 @@ class TestSessionManager:
         """セッション削除が成功する"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
@@ -86,7 +120,7 @@ class TestSessionManager:
         """セッション一覧が正しく取得できる"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
@@ -103,7 +137,7 @@ class TestSessionManager:
         """最大セッション数を超える作成がエラーになる"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=2)
@@ -118,7 +152,7 @@ class TestSessionManager:
         """重複IDでのセッション作成がエラーになる"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
@@ -132,7 +166,7 @@ class TestSessionManager:
         """最大セッション数ちょうどの作成が成功する"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=2)
@@ -146,7 +180,7 @@ class TestSessionManager:
         """全セッション削除後の状態が正しい"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
@@ -164,34 +198,58 @@ class TestSessionManager:
         """interactive未指定時は非インタラクティブセッションが作成される"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
         session = manager.create_session("session-1", ".")
 
         # PowerShellSessionが呼ばれていることを確認
-        mock_session_class.assert_called_once_with("session-1", ".")
+        mock_session_class.assert_called_once_with(
+            "session-1",
+            ".",
+            config=manager.config,
+            reactor=manager.reactor,
+            pool=manager.pool,
+            metrics=ANY,
+        )
         assert session == mock_session
+        # セッションの計測値はsessionラベル付きで登録される
+        from claude_session_manager.core.metrics import SessionMetrics
+
+        metrics = mock_session_class.call_args.kwargs["metrics"]
+        assert isinstance(metrics, SessionMetrics)
+        metrics.commands_sent.inc()
+        sample = manager.metrics.snapshot().get(
+            "claude_session_commands_sent_total", session="session-1"
+        )
+        assert sample.value == 1
 
-    @pytest.mark.skipif(
-        platform.system() != "Windows",
-        reason="InteractivePowerShellSession is Windows-only",
-    )
     @patch("claude_session_manager.core.manager.InteractivePowerShellSession")
-    @patch("claude_session_manager.core.manager.PYWINPTY_AVAILABLE", True)
+    @patch("claude_session_manager.core.manager.INTERACTIVE_AVAILABLE", True)
     def test_create_session_interactive_true(self, mock_interactive_class):
         """interactive=Trueでインタラクティブセッションが作成される"""
+        from claude_session_manager.core.interactive_session import (
+            InteractivePowerShellSession,
+        )
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session(InteractivePowerShellSession)
         mock_interactive_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
         session = manager.create_session("session-1", ".", interactive=True)
 
         # InteractivePowerShellSessionが呼ばれていることを確認
-        mock_interactive_class.assert_called_once_with("session-1", ".")
+        mock_interactive_class.assert_called_once_with(
+            "session-1",
+            ".",
+            prompt_patterns=manager.config.prompt_patterns,
+            shell_command=None,
+            reactor=manager.reactor,
+            scrollback_lines=manager.config.terminal_scrollback_lines,
+            metrics=ANY,
+        )
         assert session == mock_session
 
     @patch("claude_session_manager.core.manager.PowerShellSession")
@@ -199,19 +257,26 @@ class TestSessionManager:
         """interactive=Falseで明示的に非インタラクティブセッションが作成される"""
         from claude_session_manager.core.manager import SessionManager
 
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session_class.return_value = mock_session
 
         manager = SessionManager(max_sessions=4)
         session = manager.create_session("session-1", ".", interactive=False)
 
         # PowerShellSessionが呼ばれていることを確認
-        mock_session_class.assert_called_once_with("session-1", ".")
+        mock_session_class.assert_called_once_with(
+            "session-1",
+            ".",
+            config=manager.config,
+            reactor=manager.reactor,
+            pool=manager.pool,
+            metrics=ANY,
+        )
         assert session == mock_session
 
-    @patch("claude_session_manager.core.manager.PYWINPTY_AVAILABLE", False)
+    @patch("claude_session_manager.core.manager.INTERACTIVE_AVAILABLE", False)
     def test_create_session_interactive_unavailable(self):
-        """pywinpty利用不可時にinteractive=Trueでエラー"""
+        """疑似端末利用不可時にinteractive=Trueでエラー"""
         from claude_session_manager.core.manager import SessionManager
 
         manager = SessionManager(max_sessions=4)
@@ -220,3 +285,782 @@ class TestSessionManager:
             RuntimeError, match="Interactive mode is not available"
         ):
             manager.create_session("session-1", ".", interactive=True)
+
+    def test_warm_up_starts_pool(self):
+        """warm_up()でウォームプールの事前起動が始まる"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = SessionManager(
+            max_sessions=4, config=SessionManagerConfig(warm_pool_size=2)
+        )
+        manager.pool = MagicMock()
+        manager.warm_up()
+
+        manager.pool.start.assert_called_once()
+
+    def test_warm_pool_disabled(self):
+        """warm_pool_size=0ではプールを作らない"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = SessionManager(
+            max_sessions=4, config=SessionManagerConfig(warm_pool_size=0)
+        )
+        manager.warm_up()
+
+        assert manager.pool is None
+        assert manager.pool_stats is None
+
+    @patch("claude_session_manager.core.manager.PowerShellSession")
+    def test_create_session_does_not_prewarm(self, mock_session_class):
+        """セッション作成だけではシェルを追加で事前起動しない"""
+        from claude_session_manager.core.manager import SessionManager
+
+        mock_session_class.return_value = _mock_session()
+        manager = SessionManager(max_sessions=4)
+        manager.pool = MagicMock()
+        manager.create_session("session-1", "/work")
+
+        manager.pool.prewarm.assert_not_called()
+
+    @patch("claude_session_manager.core.manager.PowerShellSession")
+    def test_delete_session_evicts_unused_directories(self, mock_session_class):
+        """削除時に残ったセッションの作業ディレクトリだけをプールに残す"""
+        from claude_session_manager.core.manager import SessionManager
+
+        mock_session_class.side_effect = lambda session_id, working_dir, **kwargs: (
+            _mock_session(working_dir=working_dir)
+        )
+        manager = SessionManager(max_sessions=4)
+        manager.pool = MagicMock()
+        manager.create_session("session-1", "/work")
+        manager.create_session("session-2", "/other")
+        manager.delete_session("session-1")
+
+        (directories,), _ = manager.pool.retain.call_args
+        assert list(directories) == ["/other"]
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestSessionManagerShutdown:
+    """shutdown_all()のテスト"""
+
+    def _create_sh_sessions(self, manager, count):
+        """shを使うセッションを起動する"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        for i in range(count):
+            session = PowerShellSession(
+                f"session-{i + 1}",
+                ".",
+                config=manager.config,
+                reactor=manager.reactor,
+                shell_command=["sh"],
+                encoding="utf-8",
+            )
+            session.start()
+            manager.sessions[session.session_id] = session
+
+    def test_idle_sessions_stop_gracefully(self):
+        """アイドルのセッションは強制終了なしで停止する"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = SessionManager(
+            max_sessions=4, config=SessionManagerConfig(warm_pool_size=0)
+        )
+        self._create_sh_sessions(manager, 3)
+
+        report = manager.shutdown_all(deadline=2)
+
+        assert sorted(report.stopped) == ["session-1", "session-2", "session-3"]
+        assert report.hard_killed == []
+        assert manager.sessions == {}
+
+    def test_stuck_sessions_hard_killed_within_deadline(self):
+        """SIGTERMを無視する子プロセスはツリーごと並行して強制終了される"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = SessionManager(
+            max_sessions=8, config=SessionManagerConfig(warm_pool_size=0)
+        )
+        self._create_sh_sessions(manager, 6)
+        stuck = ["session-1", "session-2", "session-3", "session-4"]
+        for session_id in stuck:
+            manager.sessions[session_id].send_command(
+                "sh -c 'trap \"\" TERM; while :; do sleep 0.05; done'"
+            )
+        time.sleep(0.3)
+
+        report = manager.shutdown_all(deadline=0.5)
+
+        assert sorted(report.hard_killed) == stuck
+        assert sorted(report.stopped) == ["session-5", "session-6"]
+        # 直列に待つ場合（4 x 0.5秒）より十分短い
+        assert report.elapsed < 1.5
+
+    def test_windows_taskkill_does_not_serialize_shutdown(self):
+        """Windowsではtaskkillの完了を待たず、/F は期限後の強制終了だけで使う"""
+        from claude_session_manager.core import process_tree
+        from claude_session_manager.core.manager import SessionManager
+
+        class _Session:
+            """終了要求に応じないWindowsのシェルの代わり"""
+
+            def __init__(self, pid):
+                self.pid = pid
+
+            def request_stop(self):
+                process_tree.terminate_process_tree(self.pid)
+
+            def wait_stopped(self, timeout=0):
+                return False
+
+            def force_stop(self):
+                process_tree.kill_process_tree(self.pid)
+
+        def slow_taskkill(*args, **kwargs):
+            time.sleep(1)
+
+        commands = []
+        fake_os = MagicMock()
+        fake_os.name = "nt"
+        fake_subprocess = MagicMock()
+        fake_subprocess.run.side_effect = slow_taskkill
+        fake_subprocess.Popen.side_effect = lambda command, **kwargs: commands.append(command)
+        manager = SessionManager(max_sessions=4)
+        for pid in range(101, 105):
+            manager.sessions[f"session-{pid}"] = _Session(pid)
+
+        with patch.object(process_tree, "os", fake_os), patch.object(
+            process_tree, "subprocess", fake_subprocess
+        ):
+            report = manager.shutdown_all(deadline=0.3)
+
+        assert report.elapsed < 1
+        assert len(report.hard_killed) == 4
+        assert commands[:4] == [["taskkill", "/T", "/PID", str(pid)] for pid in range(101, 105)]
+        assert commands[4:] == [
+            ["taskkill", "/T", "/F", "/PID", str(pid)] for pid in range(101, 105)
+        ]
+
+    def test_shutdown_closes_pool(self):
+        """ウォームプールも閉じる"""
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = SessionManager(max_sessions=4)
+        manager.pool = MagicMock()
+
+        manager.shutdown_all(deadline=0)
+
+        manager.pool.close.assert_called_once()
+
+
+class TestSessionManagerStates:
+    """get_session_states()のテスト"""
+
+    def test_get_session_states(self):
+        """プロンプト検出に対応したセッションの状態だけを返す"""
+        from claude_session_manager.core.manager import SessionManager
+        from claude_session_manager.core.prompt_detector import PromptDetector
+
+        manager = SessionManager(max_sessions=4)
+        interactive = _mock_session(prompt_detector=PromptDetector())
+        interactive.prompt_detector.feed("PS C:\\> ")
+        plain = _mock_session()
+        manager.sessions = {"session-1": interactive, "session-2": plain}
+
+        assert manager.get_session_states() == {"session-1": "idle"}
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestSessionManagerHibernation:
+    """休止（ハイバネーション）のテスト"""
+
+    def _manager(self, tmp_path, **config):
+        """shを使うセッションを作成できるマネージャー"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        config.setdefault("hibernation_dir", str(tmp_path / "spill"))
+        return SessionManager(
+            max_sessions=50,
+            config=SessionManagerConfig(
+                warm_pool_size=0, output_encoding="utf-8", **config
+            ),
+        )
+
+    def _start(self, manager, session_id, working_dir="."):
+        """shを使うセッションを起動して登録する"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession(
+            session_id,
+            working_dir,
+            config=manager.config,
+            reactor=manager.reactor,
+            shell_command=["sh"],
+        )
+        session.start()
+        manager.sessions[session_id] = session
+        manager.touch(session_id)
+        return session
+
+    def _wait_output(self, session, text, timeout=5):
+        """出力にtextが現れるまで読み取る"""
+        output = ""
+        end = time.time() + timeout
+        while text not in output and time.time() < end:
+            output += session.get_output()
+            time.sleep(0.01)
+        return output
+
+    def test_invalid_live_budget_raises_error(self, tmp_path):
+        """実行中セッション数の上限が正でない場合はValueError"""
+        with pytest.raises(ValueError):
+            self._manager(tmp_path, max_live_sessions=0)
+
+    def test_hibernate_spills_output_and_revives(self, tmp_path):
+        """休止で未読の出力を退避してプロセスを止め、再開時に戻す"""
+        manager = self._manager(tmp_path)
+        session = self._start(manager, "session-1")
+        try:
+            session.send_command("echo unread-output")
+            session.wait_input_drained(5)
+            time.sleep(0.3)
+
+            assert manager.hibernate("session-1")
+            record = manager.get_hibernation_record("session-1")
+            assert not session.is_running()
+            assert manager.is_hibernated("session-1")
+            assert record.spilled_chars > 0
+            assert os.path.exists(record.spill_path)
+
+            manager.send_command("session-1", "echo after-revive")
+
+            assert session.is_running()
+            assert not manager.is_hibernated("session-1")
+            assert not os.path.exists(record.spill_path)
+            output = self._wait_output(session, "after-revive")
+            assert output.index("unread-output") < output.index("after-revive")
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_cursor_reader_does_not_receive_spilled_output_twice(self, tmp_path):
+        """休止・再開をまたいだカーソルの読み手に退避した出力を再送しない"""
+        manager = self._manager(tmp_path)
+        session = self._start(manager, "session-1")
+        try:
+            session.send_command("echo spilled-once")
+            session.wait_input_drained(5)
+            time.sleep(0.3)
+            cursor = session.read_since(0).cursor
+
+            manager.hibernate("session-1")
+            manager.send_command("session-1", "echo after-revive")
+            output = self._wait_output(session, "after-revive")
+
+            assert "spilled-once" in output
+            text = ""
+            end = time.time() + 5
+            while "after-revive" not in text and time.time() < end:
+                result = session.read_since(cursor)
+                text += result.text
+                cursor = result.cursor
+                time.sleep(0.01)
+            assert "after-revive" in text
+            assert "spilled-once" not in text
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_revive_restores_working_directory(self, tmp_path):
+        """休止時のシェルのカレントディレクトリ（シェルに問い合わせる）で再開する"""
+        subdir = tmp_path / "work"
+        subdir.mkdir()
+        manager = self._manager(tmp_path)
+        session = self._start(manager, "session-1")
+        try:
+            session.send_command(f"cd '{subdir}'")
+            session.wait_input_drained(5)
+            time.sleep(0.3)
+            manager.hibernate("session-1")
+
+            assert manager.get_hibernation_record("session-1").working_dir == str(subdir)
+
+            manager.send_command("session-1", "pwd")
+            assert str(subdir) in self._wait_output(session, str(subdir))
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_live_budget_hibernates_least_recently_used(self, tmp_path):
+        """実行中セッション数の上限を超えると最も長く使われていないものを休止する"""
+        manager = self._manager(tmp_path, max_live_sessions=2)
+        try:
+            for i in range(1, 4):
+                self._start(manager, f"session-{i}")
+
+            assert manager.is_hibernated("session-1")
+            assert manager.hibernation_stats.live_sessions == 2
+
+            manager.touch("session-2")
+            manager.touch("session-1")
+
+            assert manager.sessions["session-1"].is_running()
+            assert manager.is_hibernated("session-3")
+            stats = manager.hibernation_stats
+            assert (stats.live_sessions, stats.hibernated_sessions) == (2, 1)
+            assert (stats.hibernations, stats.revivals) == (2, 1)
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_idle_sessions_are_hibernated(self, tmp_path):
+        """設定の秒数以上使われていないセッションだけを休止する"""
+        manager = self._manager(tmp_path, hibernate_idle_seconds=60)
+        try:
+            self._start(manager, "session-1")
+            self._start(manager, "session-2")
+            manager.apply_hibernation_policy()
+
+            manager._last_used["session-2"] += 120
+            hibernated = manager.apply_hibernation_policy(now=time.monotonic() + 90)
+
+            assert hibernated == ["session-1"]
+            assert manager.sessions["session-2"].is_running()
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_busy_session_is_not_hibernated(self, tmp_path):
+        """処理中のセッションは上限を超えても休止しない"""
+        manager = self._manager(tmp_path, max_live_sessions=1)
+        try:
+            busy = self._start(manager, "session-1")
+            manager._last_used["session-1"] = 0.0
+            with patch(
+                "claude_session_manager.core.manager.is_session_busy",
+                side_effect=lambda session, *args: session is busy,
+            ):
+                self._start(manager, "session-2")
+
+                assert not manager.is_hibernated("session-1")
+                assert manager.hibernation_stats.live_sessions == 2
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_session_running_send_command_is_not_hibernated(self, tmp_path):
+        """send_command()の出力が続いている間は上限を超えても休止しない"""
+        manager = self._manager(tmp_path, max_live_sessions=1)
+        try:
+            building = self._start(manager, "session-1")
+            building.send_command("echo building")
+            building.wait_input_drained(5)
+            manager._last_used["session-1"] = 0.0
+            self._start(manager, "session-2")
+
+            assert not manager.is_hibernated("session-1")
+            assert manager.hibernation_stats.live_sessions == 2
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_delete_and_shutdown_discard_spill(self, tmp_path):
+        """削除・終了時に退避したファイルを削除する"""
+        manager = self._manager(tmp_path, hibernation_dir=None)
+        try:
+            for i in range(1, 3):
+                session = self._start(manager, f"session-{i}")
+                session.send_command("echo spill")
+                session.wait_input_drained(5)
+            time.sleep(0.3)
+            manager.hibernate("session-1")
+            manager.hibernate("session-2")
+            path = manager.get_hibernation_record("session-1").spill_path
+            directory = os.path.dirname(path)
+
+            manager.delete_session("session-1")
+            assert not os.path.exists(path)
+
+            report = manager.shutdown_all(deadline=1)
+            assert report.stopped == ["session-2"]
+            assert not os.path.exists(directory)
+        finally:
+            manager.shutdown_all(deadline=1)
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestSessionManagerBroadcast:
+    """broadcast()のテスト"""
+
+    def _manager(self, count, **config):
+        """shを使うセッションをcount個起動したマネージャー"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+        from claude_session_manager.core.session import PowerShellSession
+
+        manager = SessionManager(
+            max_sessions=16,
+            config=SessionManagerConfig(
+                warm_pool_size=0, output_encoding="utf-8", **config
+            ),
+        )
+        for i in range(count):
+            session = PowerShellSession(
+                f"session-{i + 1}",
+                ".",
+                config=manager.config,
+                reactor=manager.reactor,
+                shell_command=["sh"],
+            )
+            session.start()
+            manager.sessions[session.session_id] = session
+        return manager
+
+    def test_results_are_aggregated(self):
+        """全セッションの出力・終了コード・時間を集計する"""
+        manager = self._manager(3)
+        try:
+            manager.sessions["session-2"].send_command("cd /")
+
+            report = manager.broadcast('echo "$PWD"; [ "$PWD" != / ]')
+
+            assert sorted(r.session_id for r in report.results) == [
+                "session-1",
+                "session-2",
+                "session-3",
+            ]
+            by_id = {r.session_id: r for r in report.results}
+            assert by_id["session-2"].output == "/\n"
+            assert by_id["session-2"].exit_code == 1
+            assert by_id["session-1"].exit_code == 0
+            assert all(r.duration is not None for r in report.results)
+            assert sorted(report.succeeded) == ["session-1", "session-3"]
+            assert report.failed == ["session-2"]
+            assert report.summary.endswith(
+                f"2 ok, 1 failed, 0 timed out in {report.elapsed:.1f}s"
+            )
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_results_arrive_in_completion_order(self):
+        """結果は完了した順にコールバックと集計へ渡される"""
+        manager = self._manager(2)
+        try:
+            manager.sessions["session-1"].send_command("sleep 0.5")
+            received = []
+
+            report = manager.broadcast("true", on_result=received.append)
+
+            assert [r.session_id for r in received] == ["session-2", "session-1"]
+            assert report.results == received
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_broadcast_reuses_worker_threads(self):
+        """broadcast()を繰り返してもワーカーのスレッドは増え続けない"""
+        import threading
+
+        manager = self._manager(2)
+        try:
+            manager.broadcast("true")
+            workers = {t for t in threading.enumerate() if t.name.startswith("broadcast")}
+            for _ in range(5):
+                manager.broadcast("true")
+
+            assert workers
+            assert {
+                t for t in threading.enumerate() if t.name.startswith("broadcast")
+            } == workers
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_concurrency_limit(self):
+        """同時に実行するセッション数はmax_concurrencyを超えない"""
+        import threading
+
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = self._manager(5)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        original = SessionManager._run_broadcast_command
+
+        def counting(*args):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            try:
+                time.sleep(0.05)
+                return original(*args)
+            finally:
+                with lock:
+                    active -= 1
+
+        try:
+            with patch.object(
+                SessionManager, "_run_broadcast_command", side_effect=counting
+            ):
+                report = manager.broadcast("true", max_concurrency=2)
+
+            assert len(report.succeeded) == 5
+            assert peak == 2
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_per_session_timeout(self):
+        """完了しないセッションはタイムアウトとして集計する"""
+        manager = self._manager(2)
+        try:
+            manager.sessions["session-1"].send_command("sleep 2")
+
+            report = manager.broadcast("true", timeout=0.3)
+
+            assert report.timed_out == ["session-1"]
+            assert report.succeeded == ["session-2"]
+            assert report.elapsed < 1.5
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_stopped_session_is_reported(self):
+        """実行中でないセッションは失敗として集計する"""
+        manager = self._manager(2)
+        try:
+            manager.sessions["session-2"].stop()
+
+            report = manager.broadcast("true", ["session-1", "session-2"])
+
+            assert report.succeeded == ["session-1"]
+            assert report.failed == ["session-2"]
+            assert report.results[0].error == "Session is not running"
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_hibernated_session_is_revived(self, tmp_path):
+        """休止中のセッションは再開してから実行する"""
+        manager = self._manager(1, hibernation_dir=str(tmp_path))
+        try:
+            manager.hibernate("session-1")
+
+            report = manager.broadcast("echo revived")
+
+            assert report.results[0].output == "revived\n"
+            assert not manager.is_hibernated("session-1")
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_invalid_arguments(self):
+        """存在しないセッションはKeyError、空のコマンドと0以下の同時実行数はValueError"""
+        manager = self._manager(0)
+        with pytest.raises(KeyError):
+            manager.broadcast("true", ["missing"])
+        with pytest.raises(ValueError):
+            manager.broadcast(" ")
+        with pytest.raises(ValueError):
+            manager.broadcast("true", max_concurrency=0)
+        assert manager.broadcast("true").results == []
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestSessionManagerConcurrency:
+    """複数スレッドからの同時利用のテスト"""
+
+    def _manager(self, max_sessions, **config):
+        """create_session()でshのセッションを作成するマネージャー"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        return SessionManager(
+            max_sessions=max_sessions,
+            config=SessionManagerConfig(
+                warm_pool_size=0, output_encoding="utf-8", **config
+            ),
+        )
+
+    def _sh_session_class(self):
+        """shで起動するPowerShellSession（create_session()の差し替え用）"""
+        from functools import partial
+
+        from claude_session_manager.core.session import PowerShellSession
+
+        return partial(PowerShellSession, shell_command=["sh"])
+
+    def _run_threads(self, targets, timeout=60):
+        """スレッドを同時に実行し、デッドロックせずに終わることを確認する"""
+        import threading
+
+        errors = []
+
+        def guard(target):
+            try:
+                target()
+            except BaseException as e:  # noqa: BLE001 - テストで全例外を集める
+                errors.append(e)
+
+        threads = [threading.Thread(target=guard, args=(t,), daemon=True) for t in targets]
+        for thread in threads:
+            thread.start()
+        end = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, end - time.monotonic()))
+        assert not any(thread.is_alive() for thread in threads), "deadlock"
+        assert errors == []
+
+    def test_concurrent_create_respects_limit(self):
+        """同時に作成しても最大セッション数を超えず、同じIDは1つだけ作成される"""
+        import threading
+
+        manager = self._manager(4)
+        barrier = threading.Barrier(16)
+        created = []
+        rejected = []
+
+        def create(session_id):
+            def run():
+                barrier.wait()
+                try:
+                    manager.create_session(session_id, ".")
+                    created.append(session_id)
+                except (RuntimeError, ValueError) as e:
+                    rejected.append(e)
+
+            return run
+
+        self._run_threads([create(f"session-{i}") for i in range(16)])
+        assert len(created) == 4
+        assert sorted(manager.list_sessions()) == sorted(created)
+
+        manager = self._manager(4)
+        barrier = threading.Barrier(16)
+        created.clear()
+        self._run_threads([create("same") for _ in range(16)])
+        assert created == ["same"]
+        assert manager.list_sessions() == ["same"]
+
+    def test_stress_create_delete_broadcast(self):
+        """出力が流れる中で作成・削除・ブロードキャストを繰り返してもセッションを失わない"""
+        import threading
+
+        manager = self._manager(32)
+        stop = threading.Event()
+        stable = [f"stable-{i}" for i in range(4)]
+        churned = []
+        reports = []
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            self._sh_session_class(),
+        ):
+            for session_id in stable:
+                manager.create_session(session_id, ".").start()
+            try:
+
+                def churn(worker):
+                    def run():
+                        for i in range(15):
+                            session_id = f"churn-{worker}-{i}"
+                            session = manager.create_session(session_id, ".")
+                            session.start()
+                            session.send_command("seq 200")
+                            churned.append(session)
+                            manager.delete_session(session_id)
+
+                    return run
+
+                def broadcast():
+                    for i in range(5):
+                        reports.append(
+                            manager.broadcast(f"seq 50; echo done-{i}", stable, timeout=20)
+                        )
+
+                def flood():
+                    # 待たずにコマンドを送り続けて出力を流す
+                    while not stop.is_set():
+                        for session_id in stable:
+                            manager.send_command(session_id, "seq 500")
+                            manager.get_session(session_id).get_output()
+                        time.sleep(0.005)
+
+                def observe():
+                    while not stop.is_set():
+                        assert len(manager.list_sessions()) <= manager.max_sessions
+                        manager.get_session_states()
+                        manager.hibernation_stats
+                        time.sleep(0.001)
+
+                flood_thread = threading.Thread(target=flood, daemon=True)
+                observe_thread = threading.Thread(target=observe, daemon=True)
+                flood_thread.start()
+                observe_thread.start()
+                try:
+                    self._run_threads(
+                        [churn(w) for w in range(4)] + [broadcast, broadcast]
+                    )
+                finally:
+                    stop.set()
+                    flood_thread.join(10)
+                    observe_thread.join(10)
+                assert not flood_thread.is_alive() and not observe_thread.is_alive()
+
+                assert sorted(manager.list_sessions()) == stable
+                assert len(churned) == 60
+                assert not any(session.is_running() for session in churned)
+                assert len(reports) == 10
+                for report in reports:
+                    assert sorted(r.session_id for r in report.results) == stable
+                    assert report.succeeded and sorted(report.succeeded) == stable
+                    marker = report.command.split()[-1]
+                    assert all(r.output.endswith(f"{marker}\n") for r in report.results)
+            finally:
+                manager.shutdown_all(deadline=2)
+
+    def test_concurrent_touch_under_live_budget(self, tmp_path):
+        """上限付きで同時に再開・休止しても、全セッションが実行中か休止中のどちらかにある"""
+        import random
+        import threading
+
+        manager = self._manager(
+            16, max_live_sessions=3, hibernation_dir=str(tmp_path)
+        )
+        session_ids = [f"session-{i}" for i in range(8)]
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            self._sh_session_class(),
+        ):
+            for session_id in session_ids:
+                manager.create_session(session_id, ".").start()
+            try:
+
+                def touch(seed):
+                    def run():
+                        rng = random.Random(seed)
+                        for _ in range(20):
+                            manager.touch(rng.choice(session_ids))
+
+                    return run
+
+                def policy():
+                    for _ in range(20):
+                        manager.apply_hibernation_policy()
+                        time.sleep(0.005)
+
+                self._run_threads([touch(seed) for seed in range(4)] + [policy])
+
+                manager.apply_hibernation_policy()
+                stats = manager.hibernation_stats
+                assert sorted(manager.list_sessions()) == sorted(session_ids)
+                assert stats.live_sessions <= 3
+                assert stats.live_sessions + stats.hibernated_sessions == len(session_ids)
+                for session_id in session_ids:
+                    assert manager.is_hibernated(session_id) != (
+                        manager.get_session(session_id).is_running()
+                    )
+            finally:
+                manager.shutdown_all(deadline=2)
@@ -0,0 +1,299 @@
+"""メトリクスレジストリのテスト"""
+
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from claude_session_manager.core.metrics import (
+    HISTOGRAM_PRECISION_BITS,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    MetricsServer,
+    _ThreadCells,
+    _bucket_index,
+    _bucket_upper,
+    process_rss_bytes,
+)
+
+
+def _run_threads(count, target):
+    """同じ処理を複数スレッドで同時に実行する"""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestCounter:
+    """Counterのテスト"""
+
+    def test_per_thread_cells_are_merged(self):
+        """各スレッドの加算は読み出し時に合算される"""
+        counter = Counter()
+
+        def work():
+            for _ in range(10000):
+                counter.inc()
+
+        _run_threads(8, work)
+        counter.inc(5)
+
+        assert counter.value == 80005
+
+    def test_finished_thread_cells_are_retired(self):
+        """終了したスレッドのセルは合計へ畳み込んで手放す"""
+        counter = Counter()
+        for _ in range(50):
+            _run_threads(1, lambda: counter.inc(2))
+
+        assert counter.value == 100
+        assert len(counter._cells) == 0
+
+    def test_cells_require_subclass_methods(self):
+        """セルの作成・畳み込みを実装しないクラスはインスタンス化できない"""
+
+        class Incomplete(_ThreadCells):
+            def _make_cell(self):
+                return [0]
+
+        with pytest.raises(TypeError):
+            _ThreadCells()
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_function_counter(self):
+        """関数で与えたカウンターは読み出し時の値を返す"""
+        stats = {"dropped": 3}
+        counter = Counter(lambda: stats["dropped"])
+        stats["dropped"] = 7
+
+        assert counter.value == 7
+
+
+class TestHistogram:
+    """Histogramのテスト"""
+
+    def test_bucket_error_is_bounded(self):
+        """バケットの上限は値以上で、相対誤差は精度の範囲内"""
+        max_error = 1 / 2 ** (HISTOGRAM_PRECISION_BITS - 1)
+        previous = -1
+        for value in list(range(0, 5000)) + [10**6, 123456789, 2**40 + 12345]:
+            index = _bucket_index(value)
+            upper = _bucket_upper(index)
+            assert index >= previous
+            previous = index
+            assert value <= upper <= value + max(1, value * max_error)
+
+    def test_quantiles_and_totals(self):
+        """分位点・合計・最大値を記録から求める"""
+        histogram = Histogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot.count == 100
+        assert snapshot.sum == pytest.approx(5.05)
+        assert snapshot.max == pytest.approx(0.1)
+        assert snapshot.quantile(0.5) == pytest.approx(0.050, rel=0.04)
+        assert snapshot.quantile(0.99) == pytest.approx(0.099, rel=0.04)
+        assert snapshot.quantile(1.0) == pytest.approx(0.1)
+        assert Histogram().snapshot().quantile(0.5) == 0.0
+
+    def test_records_from_many_threads(self):
+        """複数スレッドの記録を失わない"""
+        histogram = Histogram()
+
+        def work():
+            for i in range(2000):
+                histogram.record(i / 1e6)
+
+        _run_threads(4, work)
+
+        assert histogram.snapshot().count == 8000
+
+    def test_finished_thread_cells_are_retired(self):
+        """終了したスレッドの記録は合算済みの値に残り、セルは手放す"""
+        histogram = Histogram()
+        for ms in range(1, 51):
+            _run_threads(1, lambda ms=ms: histogram.record(ms / 1000))
+        histogram.record(0.2)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot.count == 51
+        assert snapshot.max == pytest.approx(0.2)
+        assert snapshot.sum == pytest.approx(1.475)
+        assert len(histogram._cells) == 1
+
+
+class TestMetricsRegistry:
+    """MetricsRegistryのテスト"""
+
+    def test_same_name_and_labels_return_same_metric(self):
+        """同じ名前とラベルでは同じオブジェクトを返し、別の種類ならValueError"""
+        registry = MetricsRegistry()
+
+        counter = registry.counter("requests_total", session="a")
+
+        assert registry.counter("requests_total", session="a") is counter
+        assert registry.counter("requests_total", session="b") is not counter
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total")
+
+    def test_snapshot_and_remove(self):
+        """スナップショットで系列を取得し、ラベルで削除できる"""
+        registry = MetricsRegistry()
+        registry.counter("bytes_total", session="a").inc(10)
+        registry.counter("bytes_total", session="b").inc(20)
+        registry.gauge("depth", session="a").set(3)
+        registry.gauge("rss", function=lambda: None)
+        registry.gauge("broken", function=lambda: 1 / 0)
+
+        snapshot = registry.snapshot()
+
+        assert snapshot.get("bytes_total", session="a").value == 10
+        assert snapshot.get("depth", session="a").value == 3
+        assert snapshot.get("rss") is None
+        assert snapshot.get("broken") is None
+
+        assert registry.remove(session="a") == 2
+        snapshot = registry.snapshot()
+        assert snapshot.get("bytes_total", session="a") is None
+        assert snapshot.get("bytes_total", session="b").value == 20
+
+    def test_prometheus_text_format(self):
+        """Prometheusのテキスト形式で出力する（ヒストグラムはsummary）"""
+        registry = MetricsRegistry()
+        registry.counter("out_bytes_total", "Bytes read", session='we"ird\\id').inc(42)
+        registry.gauge("ratio").set(0.5)
+        latency = registry.histogram("latency_seconds", "Command latency", session="s1")
+        for _ in range(10):
+            latency.record(0.002)
+
+        text = registry.to_prometheus()
+
+        assert "# HELP out_bytes_total Bytes read\n" in text
+        assert "# TYPE out_bytes_total counter\n" in text
+        assert 'out_bytes_total{session="we\\"ird\\\\id"} 42\n' in text
+        assert "ratio 0.5\n" in text
+        assert "# TYPE latency_seconds summary\n" in text
+        assert 'latency_seconds{session="s1",quantile="0.5"} 0.002' in text
+        assert 'latency_seconds_count{session="s1"} 10\n' in text
+        assert 'latency_seconds_sum{session="s1"} 0.02\n' in text
+
+    def test_write_prometheus(self, tmp_path):
+        """ファイルへ書き出す（一時ファイルを残さない）"""
+        registry = MetricsRegistry()
+        registry.counter("events_total").inc()
+        path = tmp_path / "session_manager.prom"
+
+        registry.write_prometheus(str(path))
+
+        assert path.read_text(encoding="utf-8") == "# TYPE events_total counter\nevents_total 1\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["session_manager.prom"]
+
+    def test_metrics_server(self):
+        """ローカルのHTTPサーバーが /metrics を返す"""
+        registry = MetricsRegistry()
+        registry.counter("events_total").inc(3)
+        server = MetricsServer(registry).start()
+        try:
+            host, port = server.address
+            with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+
+            assert "events_total 3" in body
+            assert content_type.startswith("text/plain; version=0.0.4")
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://{host}:{port}/other", timeout=5)
+        finally:
+            server.close()
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestSessionMetrics:
+    """セッションとマネージャーの計測値のテスト"""
+
+    def test_process_rss_bytes(self):
+        """このプロセスのRSSを取得でき、存在しないプロセスはNone"""
+        assert process_rss_bytes() > 0
+        assert process_rss_bytes(-1) is None
+
+    def test_session_records_output_and_commands(self):
+        """出力量・コマンド数・実行時間を記録する"""
+        from claude_session_manager.core.metrics import SessionMetrics
+        from claude_session_manager.core.session import PowerShellSession
+
+        registry = MetricsRegistry()
+        session = PowerShellSession(
+            "s1",
+            ".",
+            shell_command=["sh"],
+            read_mode="chunk",
+            encoding="utf-8",
+            metrics=SessionMetrics(registry, "s1"),
+        )
+        session.start()
+        try:
+            result = session.run_command("printf 'a\\nb\\n'", timeout=5)
+            session.send_command("true")
+        finally:
+            session.stop()
+
+        snapshot = registry.snapshot()
+        assert result.output == "a\nb\n"
+        assert snapshot.get("claude_session_commands_sent_total", session="s1").value == 2
+        assert snapshot.get("claude_session_output_lines_total", session="s1").value >= 2
+        assert snapshot.get("claude_session_output_bytes_total", session="s1").value >= 4
+        duration = snapshot.get("claude_session_command_duration_seconds", session="s1")
+        assert duration.histogram.count == 1
+        assert duration.histogram.max == pytest.approx(result.duration, abs=1e-5)
+
+    def test_manager_exports_session_series(self):
+        """マネージャーはセッションごとの系列を登録し、削除時に外す"""
+        from functools import partial
+        from unittest.mock import patch
+
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+        from claude_session_manager.core.session import PowerShellSession
+
+        manager = SessionManager(
+            max_sessions=2,
+            config=SessionManagerConfig(warm_pool_size=0, output_encoding="utf-8"),
+        )
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            partial(PowerShellSession, shell_command=["sh"]),
+        ):
+            session = manager.create_session("s1", ".")
+        try:
+            session.start()
+            session.send_command("echo hello")
+            end = time.time() + 5
+            while session.output_stats.buffered_chars == 0 and time.time() < end:
+                time.sleep(0.01)
+            manager.restart_session("s1")
+
+            text = manager.metrics.to_prometheus()
+
+            assert "claude_session_manager_sessions 1\n" in text
+            assert 'claude_session_up{session="s1"} 1\n' in text
+            assert 'claude_session_output_buffered_chars{session="s1"} 6\n' in text
+            assert 'claude_session_restarts_total{session="s1"} 1\n' in text
+            assert "claude_session_manager_restarts_total 1\n" in text
+            assert 'claude_session_rss_bytes{session="s1"}' in text
+
+            manager.delete_session("s1")
+            assert 'session="s1"' not in manager.metrics.to_prometheus()
+        finally:
+            manager.shutdown_all(deadline=1)
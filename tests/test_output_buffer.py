@@ -0,0 +1,269 @@
+"""OutputBufferクラスのテスト"""
+
+import threading
+import time
+
+import pytest
+
+from claude_session_manager.core.output_buffer import (
+    POLICY_BLOCK,
+    POLICY_DROP_NEWEST,
+    POLICY_DROP_OLDEST,
+    OutputBuffer,
+)
+
+
+class TestOutputBuffer:
+    """OutputBufferクラスのテスト"""
+
+    def test_put_and_get(self):
+        """格納した出力をまとめて取り出せる"""
+        buffer = OutputBuffer()
+        buffer.put("line1\n")
+        buffer.put("line2\n")
+
+        assert buffer.get() == "line1\nline2\n"
+        assert buffer.get() == ""
+
+    def test_invalid_policy_raises_error(self):
+        """未知のポリシーはエラーになる"""
+        with pytest.raises(ValueError, match="Unknown overflow policy"):
+            OutputBuffer(policy="explode")
+
+    def test_invalid_limit_raises_error(self):
+        """正でない上限値はエラーになる"""
+        with pytest.raises(ValueError):
+            OutputBuffer(max_lines=0)
+
+    def test_drop_oldest_by_lines(self):
+        """drop_oldestでは古い行が捨てられる"""
+        buffer = OutputBuffer(max_lines=3, max_chars=None, policy=POLICY_DROP_OLDEST)
+        for i in range(5):
+            buffer.put(f"line{i}\n")
+
+        assert buffer.get() == "line2\nline3\nline4\n"
+        stats = buffer.stats
+        assert stats.dropped_lines == 2
+        assert stats.dropped_chars == len("line0\nline1\n")
+
+    def test_drop_oldest_truncates_oversized_chunk(self):
+        """上限を超える単一チャンクは末尾だけ残る"""
+        buffer = OutputBuffer(max_lines=None, max_chars=10)
+        buffer.put("x" * 25)
+
+        assert buffer.get() == "x" * 10
+        assert buffer.stats.dropped_chars == 15
+
+    def test_drop_oldest_truncates_lines_in_chunk(self):
+        """行数上限を超える単一チャンクは末尾の行だけ残る"""
+        buffer = OutputBuffer(max_lines=2, max_chars=None)
+        buffer.put("a\nb\nc\nd\n")
+
+        assert buffer.get() == "c\nd\n"
+        assert buffer.stats.dropped_lines == 2
+
+    def test_drop_newest(self):
+        """drop_newestでは新しい出力が捨てられる"""
+        buffer = OutputBuffer(max_lines=2, max_chars=None, policy=POLICY_DROP_NEWEST)
+        assert buffer.put("a\n")
+        assert buffer.put("b\n")
+        assert not buffer.put("c\n")
+
+        assert buffer.get() == "a\nb\n"
+        assert buffer.stats.dropped_lines == 1
+
+    def test_block_waits_for_consumer(self):
+        """blockポリシーでは読み出しまで書き込みが待たされる"""
+        buffer = OutputBuffer(max_lines=1, max_chars=None, policy=POLICY_BLOCK)
+        buffer.put("first\n")
+        done = threading.Event()
+
+        def producer():
+            buffer.put("second\n")
+            done.set()
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        assert not done.wait(0.1)
+
+        assert buffer.get() == "first\n"
+        assert done.wait(1)
+        assert buffer.get() == "second\n"
+        assert buffer.stats.dropped_lines == 0
+        thread.join()
+
+    def test_block_non_blocking_put_returns_false(self):
+        """blockポリシーでもblock=Falseなら即座にFalseを返す"""
+        buffer = OutputBuffer(max_lines=1, max_chars=None, policy=POLICY_BLOCK)
+        buffer.put("first\n")
+
+        assert not buffer.put("second\n", block=False)
+        assert buffer.stats.dropped_lines == 0
+
+    def test_close_releases_blocked_producer(self):
+        """close()で待機中の書き込みが解放される"""
+        buffer = OutputBuffer(max_lines=1, max_chars=None, policy=POLICY_BLOCK)
+        buffer.put("first\n")
+        result = []
+        thread = threading.Thread(target=lambda: result.append(buffer.put("x\n")))
+        thread.start()
+        time.sleep(0.05)
+
+        buffer.close()
+        thread.join(timeout=1)
+        assert result == [False]
+
+    def test_space_listener_called_on_get(self):
+        """読み出し時に空き通知コールバックが呼ばれる"""
+        buffer = OutputBuffer()
+        calls = []
+        buffer.set_space_listener(lambda: calls.append(True))
+        buffer.put("data")
+        buffer.get()
+
+        assert calls == [True]
+
+    def test_memory_flat_under_flood(self):
+        """大量出力でも保持量が上限を超えない"""
+        buffer = OutputBuffer(max_lines=1000, max_chars=64 * 1024)
+        chunk = ("y" * 99 + "\n") * 640  # 64KB
+
+        for _ in range(800):  # 約50MB
+            buffer.put(chunk)
+            stats = buffer.stats
+            assert stats.buffered_chars <= 64 * 1024
+            assert stats.buffered_lines <= 1000
+
+        assert buffer.stats.dropped_chars > 0
+
+
+class TestOutputBufferCursor:
+    """カーソルによる非破壊読み取りのテスト"""
+
+    def test_read_since_does_not_consume(self):
+        """read_since()はget()の読み取り内容に影響しない"""
+        buffer = OutputBuffer()
+        buffer.put("hello ")
+        buffer.put("world")
+
+        result = buffer.read_since(0)
+        assert result.text == "hello world"
+        assert result.cursor == 11
+        assert result.gap == 0
+        assert buffer.get() == "hello world"
+
+    def test_multiple_consumers_independent(self):
+        """複数の読み手がそれぞれのペースで読める"""
+        buffer = OutputBuffer()
+        fast = slow = 0
+
+        buffer.put("a\n")
+        fast_read = buffer.read_since(fast)
+        fast = fast_read.cursor
+        buffer.put("b\n")
+        fast_read2 = buffer.read_since(fast)
+        slow_read = buffer.read_since(slow)
+
+        assert fast_read.text == "a\n"
+        assert fast_read2.text == "b\n"
+        assert slow_read.text == "a\nb\n"
+        assert buffer.get() == "a\nb\n"
+
+    def test_read_since_partial_chunk(self):
+        """チャンク途中のカーソルから読める"""
+        buffer = OutputBuffer()
+        buffer.put("abcdef")
+
+        assert buffer.read_since(3).text == "def"
+
+    def test_read_since_up_to_date_returns_empty(self):
+        """新しい出力がない場合は空文字列と同じカーソルを返す"""
+        buffer = OutputBuffer()
+        buffer.put("abc")
+
+        result = buffer.read_since(3)
+        assert result.text == ""
+        assert result.cursor == 3
+
+    def test_slow_consumer_gets_gap(self):
+        """保持範囲から外れた読み手にはgapが通知される"""
+        buffer = OutputBuffer(max_lines=2, max_chars=None)
+        for i in range(5):
+            buffer.put(f"{i}\n")
+
+        result = buffer.read_since(0)
+        assert result.gap == 6
+        assert result.text == "3\n4\n"
+        assert result.cursor == buffer.tail
+
+    def test_read_data_retained_for_other_consumers(self):
+        """get()済みのデータも容量内なら他の読み手に残る"""
+        buffer = OutputBuffer(max_lines=10, max_chars=None, policy=POLICY_DROP_NEWEST)
+        buffer.put("a\n")
+        buffer.get()
+
+        assert buffer.read_since(0).text == "a\n"
+
+    def test_consumed_data_evicted_before_dropping(self):
+        """drop_newestでもget()済みのデータは空きのために捨てられる"""
+        buffer = OutputBuffer(max_lines=2, max_chars=None, policy=POLICY_DROP_NEWEST)
+        buffer.put("a\n")
+        buffer.put("b\n")
+        buffer.get()
+
+        assert buffer.put("c\n")
+        assert buffer.stats.dropped_lines == 0
+        assert buffer.read_since(0).gap == 2
+
+    def test_slow_consumer_never_blocks_producer(self):
+        """遅い読み手がいても書き込みは待たされない"""
+        buffer = OutputBuffer(max_lines=1, max_chars=None, policy=POLICY_BLOCK)
+        slow_cursor = buffer.tail
+        for i in range(10):
+            buffer.put(f"{i}\n", block=False)
+            buffer.get()
+
+        result = buffer.read_since(slow_cursor)
+        assert result.gap > 0
+        assert result.text == "9\n"
+
+    def test_read_since_waits_for_data(self):
+        """timeout指定時は新しい出力を待つ"""
+        buffer = OutputBuffer()
+        timer = threading.Timer(0.05, lambda: buffer.put("late"))
+        timer.start()
+
+        result = buffer.read_since(0, timeout=1)
+        assert result.text == "late"
+        timer.join()
+
+    def test_truncated_chunk_reports_gap(self):
+        """上限を超えて切り詰めたチャンクはgapとして通知される"""
+        buffer = OutputBuffer(max_lines=None, max_chars=4)
+        buffer.put("abcdefgh")
+
+        result = buffer.read_since(0)
+        assert result.text == "efgh"
+        assert result.gap == 4
+
+    def test_restore_keeps_original_offsets(self):
+        """clear()後に戻した出力はカーソルの読み手に再び届かない"""
+        buffer = OutputBuffer()
+        buffer.put("old\n")
+        cursor = buffer.read_since(0).cursor
+        text = buffer.get()
+        buffer.clear()
+
+        assert buffer.restore(text)
+        assert buffer.read_since(cursor).text == ""
+        assert buffer.get() == "old\n"
+        buffer.put("new\n")
+        assert buffer.read_since(cursor).text == "new\n"
+
+    def test_restore_into_non_empty_buffer_fails(self):
+        """出力が残っているバッファには戻さない"""
+        buffer = OutputBuffer()
+        buffer.put("kept\n")
+
+        assert not buffer.restore("kept\n")
+        assert buffer.get() == "kept\n"
@@ -0,0 +1,96 @@
+"""CoalescingQueueのテスト"""
+
+import queue
+import threading
+
+import pytest
+
+from claude_session_manager.core.output_queue import CoalescingQueue
+
+
+class TestCoalescingQueue:
+    """CoalescingQueueクラスのテスト"""
+
+    def test_chunks_within_window_are_coalesced(self):
+        """window秒以内に届いたチャンクは1つの要素にまとまる"""
+        q = CoalescingQueue(window=0.01)
+        for i, now in enumerate([0.0, 0.002, 0.009]):
+            q.put(f"c{i}", now=now)
+
+        assert q.qsize() == 1
+        assert q.get_nowait() == "c0c1c2"
+        assert q.stats.coalesced_chunks == 2
+
+    def test_chunks_after_window_start_new_entry(self):
+        """windowを過ぎたチャンクは新しい要素になる"""
+        q = CoalescingQueue(window=0.01)
+        q.put("a", now=0.0)
+        q.put("b", now=0.02)
+
+        assert q.qsize() == 2
+        assert q.get_nowait() == "a"
+        assert q.get_nowait() == "b"
+
+    def test_consumed_entry_is_not_extended(self):
+        """取り出し済みの要素にはまとめない"""
+        q = CoalescingQueue(window=1.0)
+        q.put("a", now=0.0)
+        assert q.get_nowait() == "a"
+
+        q.put("b", now=0.001)
+        assert q.get_nowait() == "b"
+
+    def test_max_chars_limits_coalescing(self):
+        """max_charsを超える場合は新しい要素にする"""
+        q = CoalescingQueue(window=1.0, max_chars=4)
+        for chunk in ["ab", "cd", "ef"]:
+            q.put(chunk, now=0.0)
+
+        assert [q.get_nowait(), q.get_nowait()] == ["abcd", "ef"]
+
+    def test_get_all_joins_everything(self):
+        """get_all()で未読をすべて連結して取り出す"""
+        q = CoalescingQueue(window=0.01)
+        q.put("a", now=0.0)
+        q.put("b", now=1.0)
+
+        assert q.get_all() == "ab"
+        assert q.empty()
+        assert q.get_all() == ""
+
+    def test_get_timeout_raises_empty(self):
+        """空のままタイムアウトするとqueue.Empty"""
+        q = CoalescingQueue()
+        with pytest.raises(queue.Empty):
+            q.get(timeout=0.01)
+        with pytest.raises(queue.Empty):
+            q.get_nowait()
+
+    def test_get_waits_for_put(self):
+        """別スレッドからのputで待機中のgetが戻る"""
+        q = CoalescingQueue()
+        threading.Timer(0.05, q.put, args=("late",)).start()
+
+        assert q.get(timeout=2) == "late"
+
+    def test_stats(self):
+        """チャンク数、平均サイズ、キューの深さを集計する"""
+        q = CoalescingQueue(window=0)
+        for chunk in ["ab", "cdef", "gh"]:
+            q.put(chunk)
+        q.get_nowait()
+
+        stats = q.stats
+        assert stats.chunks == 3
+        assert stats.chars == 8
+        assert stats.average_chunk_size == pytest.approx(8 / 3)
+        assert stats.queue_depth == 2
+        assert stats.queued_chars == 6
+        assert stats.chunks_per_second > 0
+
+    def test_invalid_arguments_raise_error(self):
+        """負のwindowや0以下のmax_charsはValueError"""
+        with pytest.raises(ValueError):
+            CoalescingQueue(window=-1)
+        with pytest.raises(ValueError):
+            CoalescingQueue(max_chars=0)
@@ -0,0 +1,277 @@
+"""ShellPoolのテスト"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from claude_session_manager.core.pool import ShellPool, change_directory_command
+from claude_session_manager.core.session import PowerShellSession
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="uses sh as a stub shell")
+
+
+def _wait_for(predicate, timeout=3.0):
+    """条件が満たされるまで待機する"""
+    end = time.time() + timeout
+    while time.time() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def _idle_dirs(pool):
+    """待機プロセスがあるディレクトリの一覧"""
+    with pool._cond:
+        return sorted(path for path, queue in pool._idle.items() if queue)
+
+
+class TestChangeDirectoryCommand:
+    """change_directory_command関数のテスト"""
+
+    def test_powershell_quotes_path(self):
+        """PowerShellではシングルクォートを二重化する"""
+        command = change_directory_command("C:\\it's here", powershell=True)
+        assert command == "Set-Location -LiteralPath 'C:\\it''s here'"
+
+    def test_sh_quotes_path(self):
+        """shではシングルクォートを閉じてエスケープする"""
+        command = change_directory_command("/tmp/it's", powershell=False)
+        assert command == "cd '/tmp/it'\\''s'"
+
+
+@posix_only
+class TestShellPool:
+    """ShellPoolクラスのテスト"""
+
+    def test_start_prespawns_generic_processes(self, tmp_path):
+        """起動すると汎用プロセスがsize個用意される"""
+        pool = ShellPool(["sh"], size=2, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 2)
+        finally:
+            pool.close()
+
+    def test_acquire_returns_none_when_not_started(self, tmp_path):
+        """起動前は空のためNoneを返す"""
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        assert pool.acquire(str(tmp_path)) is None
+
+    def test_acquire_generic_changes_directory(self, tmp_path):
+        """汎用プロセスは要求されたディレクトリへ移動してから引き渡される"""
+        target = tmp_path / "work"
+        target.mkdir()
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            process = pool.acquire(str(target))
+            assert process is not None
+
+            process.stdin.write(b"pwd\nexit\n")
+            process.stdin.flush()
+            output = process.stdout.read().decode()
+            process.wait()
+            assert output.strip() == os.path.realpath(target)
+        finally:
+            pool.close()
+
+    def test_acquire_refills_pool(self, tmp_path):
+        """引き渡した分はバックグラウンドで補充される"""
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            process = pool.acquire(str(tmp_path))
+            assert process is not None
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            process.kill()
+            process.wait()
+        finally:
+            pool.close()
+
+    def test_prewarm_replaces_generic_process(self, tmp_path):
+        """prewarm()は上限内で汎用プロセスを作業ディレクトリ専用のものに入れ替える"""
+        target = tmp_path / "work"
+        target.mkdir()
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            pool.prewarm(str(target))
+            assert _wait_for(lambda: _idle_dirs(pool) == [str(target)])
+            assert pool.stats.idle == 1
+        finally:
+            pool.close()
+
+    def test_idle_total_capped_across_directories(self, tmp_path):
+        """引き渡しと補充を繰り返しても待機プロセスの総数は上限を超えない"""
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        processes = []
+        try:
+            for i in range(3):
+                target = tmp_path / f"work-{i}"
+                target.mkdir()
+                assert _wait_for(lambda: pool.stats.idle == 1)
+                processes.append(pool.acquire(str(target)))
+                pool.prewarm(str(target))
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            time.sleep(0.2)
+            assert pool.stats.idle == 1
+            assert _idle_dirs(pool) == [str(tmp_path / "work-2")]
+        finally:
+            pool.close()
+            for process in processes:
+                process.kill()
+                process.wait()
+
+    def test_retain_evicts_unused_directories(self, tmp_path):
+        """使われていないディレクトリ専用のプロセスは終了して汎用プロセスを補充する"""
+        target = tmp_path / "work"
+        target.mkdir()
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            pool.prewarm(str(target))
+            assert _wait_for(lambda: _idle_dirs(pool) == [str(target)])
+            with pool._cond:
+                evicted = pool._idle[str(target)][0]
+
+            pool.retain([])
+
+            assert evicted.poll() is not None
+            assert _wait_for(lambda: _idle_dirs(pool) == [str(tmp_path)])
+        finally:
+            pool.close()
+
+    def test_prewarm_ignored_when_not_running(self, tmp_path):
+        """停止中のprewarm()は何もしない"""
+        pool = ShellPool(["sh"], size=0, default_working_dir=str(tmp_path))
+        pool.prewarm(str(tmp_path))
+        pool.start()
+        try:
+            time.sleep(0.1)
+            assert pool.stats.idle == 0
+        finally:
+            pool.close()
+
+    def test_acquire_skips_dead_process(self, tmp_path):
+        """待機中に終了したプロセスは引き渡さない"""
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            with pool._cond:
+                dead = pool._idle[pool.default_working_dir][0]
+            dead.kill()
+            dead.wait()
+            process = pool.acquire(str(tmp_path))
+            assert process is not dead
+            if process is not None:
+                process.kill()
+                process.wait()
+        finally:
+            pool.close()
+
+    def test_spawn_failure_stops_refill(self, tmp_path):
+        """シェルを起動できない場合は補充を止めて失敗を記録する"""
+        pool = ShellPool(
+            ["/nonexistent/shell"], size=2, default_working_dir=str(tmp_path)
+        )
+        pool.start()
+        try:
+            assert _wait_for(lambda: not pool.is_running())
+            assert pool.stats.spawn_failures == 1
+            assert pool.stats.idle == 0
+        finally:
+            pool.close()
+
+    def test_close_kills_idle_processes(self, tmp_path):
+        """close()で待機中のプロセスが終了する"""
+        pool = ShellPool(["sh"], size=2, default_working_dir=str(tmp_path))
+        pool.start()
+        assert _wait_for(lambda: pool.stats.idle == 2)
+        with pool._cond:
+            processes = list(pool._idle[pool.default_working_dir])
+        pool.close()
+
+        assert all(p.poll() is not None for p in processes)
+        assert pool.stats.idle == 0
+
+
+@posix_only
+class TestPowerShellSessionWithPool:
+    """ウォームプールを使うPowerShellSessionのテスト"""
+
+    def test_start_uses_pooled_process(self, tmp_path):
+        """起動時にプールのプロセスを引き取り、ヒットとして記録する"""
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.stats.idle == 1)
+            session = PowerShellSession(
+                "test-session",
+                str(tmp_path),
+                pool=pool,
+                shell_command=["sh"],
+                read_mode="chunk",
+                encoding="utf-8",
+            )
+            with patch("claude_session_manager.core.session.spawn_shell_process") as spawn:
+                session.start()
+                spawn.assert_not_called()
+
+            result = session.run_command("echo pooled", timeout=5)
+            assert result.output.strip() == "pooled"
+            session.stop()
+
+            stats = pool.stats
+            assert stats.hits == 1
+            assert stats.misses == 0
+        finally:
+            pool.close()
+
+    def test_start_falls_back_to_cold_start(self, tmp_path):
+        """プールが空ならコールドスタートし、ミスとして記録する"""
+        pool = ShellPool(["sh"], size=1, default_working_dir=str(tmp_path))
+        session = PowerShellSession(
+            "test-session",
+            str(tmp_path),
+            pool=pool,
+            shell_command=["sh"],
+            read_mode="chunk",
+            encoding="utf-8",
+        )
+        session.start()
+        try:
+            assert session.is_running()
+        finally:
+            session.stop()
+
+        stats = pool.stats
+        assert stats.hits == 0
+        assert stats.misses == 1
+
+    def test_pool_with_other_shell_is_not_used(self, tmp_path):
+        """シェル起動コマンドが異なるプールは使わない"""
+        pool = ShellPool(["bash"], size=1, default_working_dir=str(tmp_path))
+        session = PowerShellSession(
+            "test-session",
+            str(tmp_path),
+            pool=pool,
+            shell_command=["sh"],
+            read_mode="chunk",
+            encoding="utf-8",
+        )
+        session.start()
+        try:
+            assert session.is_running()
+        finally:
+            session.stop()
+
+        assert pool.stats.misses == 0
@@ -0,0 +1,151 @@
+"""PromptDetector / AnsiStripperのテスト"""
+
+import pytest
+
+from claude_session_manager.core.prompt_detector import (
+    STATE_BUSY,
+    STATE_IDLE,
+    STATE_UNKNOWN,
+    AnsiStripper,
+    PromptDetector,
+)
+
+
+class TestAnsiStripper:
+    """AnsiStripperクラスのテスト"""
+
+    def test_strips_csi_and_osc(self):
+        """色指定・カーソル制御・タイトル設定を取り除く"""
+        stripper = AnsiStripper()
+        text = "\x1b]0;title\x07\x1b[32mgreen\x1b[0m \x1b[?25hdone"
+
+        assert stripper.feed(text) == "green done"
+
+    def test_sequence_split_across_chunks(self):
+        """チャンク境界で分割されたシーケンスも取り除く"""
+        stripper = AnsiStripper()
+
+        assert stripper.feed("a\x1b[3") == "a"
+        assert stripper.feed("1mb\x1b") == "b"
+        assert stripper.feed("[0mc") == "c"
+
+    def test_normalizes_carriage_returns(self):
+        """CRLFとCRを改行に揃える"""
+        stripper = AnsiStripper()
+
+        assert stripper.feed("a\r\nb\rc") == "a\nb\nc"
+
+
+class TestPromptDetector:
+    """PromptDetectorクラスのテスト"""
+
+    def test_initial_state_unknown(self):
+        """初期状態はunknown"""
+        assert PromptDetector().state == STATE_UNKNOWN
+
+    def test_powershell_prompt_is_idle(self):
+        """PowerShellのプロンプトでidleになる"""
+        detector = PromptDetector()
+
+        transition = detector.feed("Windows PowerShell\r\nPS C:\\Users\\me> ", now=1.0)
+
+        assert transition.state == STATE_IDLE
+        assert transition.prompt == "powershell"
+        assert transition.duration is None
+
+    def test_prompt_with_trailing_escape_sequences(self):
+        """プロンプトの後に制御シーケンスが続いてもidleになる"""
+        detector = PromptDetector()
+
+        detector.feed("PS C:\\> \x1b[?25h\x1b[K")
+
+        assert detector.state == STATE_IDLE
+
+    def test_command_duration(self):
+        """busy→idleの遷移でコマンドの所要時間が得られる"""
+        detector = PromptDetector()
+        detector.feed("PS C:\\> ", now=1.0)
+
+        busy = detector.command_sent(now=2.0)
+        assert detector.feed("output\r\n", now=2.5) is None
+        idle = detector.feed("PS C:\\> ", now=4.0)
+
+        assert busy.state == STATE_BUSY
+        assert busy.duration == 1.0
+        assert idle.state == STATE_IDLE
+        assert idle.duration == 2.0
+
+    def test_output_after_prompt_is_busy(self):
+        """プロンプト表示後にプロンプト以外の出力が続くとbusyになる"""
+        detector = PromptDetector()
+        detector.feed("PS C:\\> ")
+
+        detector.feed("running...\r\n")
+
+        assert detector.state == STATE_BUSY
+
+    def test_prompt_split_across_chunks(self):
+        """分割されて届いたプロンプトも検出する"""
+        detector = PromptDetector()
+        detector.command_sent()
+
+        detector.feed("P")
+        detector.feed("S C:\\wo")
+        detector.feed("rk> ")
+
+        assert detector.state == STATE_IDLE
+
+    def test_tail_is_bounded(self):
+        """照合に使う末尾はtail_size文字までに保たれる"""
+        detector = PromptDetector(tail_size=32)
+
+        detector.feed("x" * 10000)
+
+        assert len(detector._tail) == 32
+
+    def test_python_repl_prompt(self):
+        """Python REPLのプロンプトも組み込みで検出する"""
+        detector = PromptDetector()
+
+        detector.feed("Python 3.11\n>>> ")
+
+        assert detector.state == STATE_IDLE
+        assert detector.prompt == "python"
+
+    def test_custom_named_patterns(self):
+        """名前付きの追加パターンが組み込みより先に照合される"""
+        detector = PromptDetector({"claude": r"\n> $"})
+
+        detector.feed("Welcome\n> ")
+
+        assert detector.prompt == "claude"
+
+    def test_invalid_pattern_raises_error(self):
+        """不正な正規表現はValueError"""
+        with pytest.raises(ValueError, match="Invalid prompt pattern"):
+            PromptDetector(["(unclosed"])
+
+    def test_listener_receives_transitions(self):
+        """登録したコールバックに遷移が通知される"""
+        detector = PromptDetector()
+        received = []
+        detector.add_listener(received.append)
+
+        detector.feed("PS C:\\> ")
+        detector.command_sent()
+        detector.remove_listener(received.append)
+        detector.feed("PS C:\\> ")
+
+        assert [t.state for t in received] == [STATE_IDLE, STATE_BUSY]
+
+    def test_listener_exception_is_ignored(self):
+        """コールバックの例外は呼び出し側へ伝播しない"""
+        detector = PromptDetector()
+
+        def broken(transition):
+            raise RuntimeError("boom")
+
+        detector.add_listener(broken)
+        detector.feed("PS C:\\> ")
+
+        assert detector.state == STATE_IDLE
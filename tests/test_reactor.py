@@ -0,0 +1,209 @@
+"""OutputReactorのテスト"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from claude_session_manager.core.reactor import (
+    AdaptiveReadSize,
+    OutputReactor,
+    is_reactor_supported,
+)
+
+posix_only = pytest.mark.skipif(
+    not is_reactor_supported(),
+    reason="OutputReactor requires POSIX pipes",
+)
+
+
+def _wait_for(predicate, timeout=2.0):
+    """条件が満たされるまで待機する"""
+    end = time.time() + timeout
+    while time.time() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestAdaptiveReadSize:
+    """AdaptiveReadSizeクラスのテスト"""
+
+    def test_grows_when_reads_fill_buffer(self):
+        """要求サイズいっぱいに読めると倍になり、上限で止まる"""
+        sizer = AdaptiveReadSize(initial=1024, minimum=1024, maximum=4096)
+
+        assert sizer.update(1024) == 2048
+        assert sizer.update(2048) == 4096
+        assert sizer.update(4096) == 4096
+
+    def test_shrinks_after_repeated_small_reads(self):
+        """小さな読み取りが続くと半分になり、下限で止まる"""
+        from claude_session_manager.core.reactor import SHRINK_AFTER
+
+        sizer = AdaptiveReadSize(initial=4096, minimum=2048, maximum=4096)
+        for _ in range(SHRINK_AFTER - 1):
+            assert sizer.update(10) == 4096
+        assert sizer.update(10) == 2048
+
+        for _ in range(SHRINK_AFTER * 2):
+            sizer.update(10)
+        assert sizer.size == 2048
+
+    def test_medium_read_resets_shrink_count(self):
+        """中程度の読み取りを挟むと縮小しない"""
+        from claude_session_manager.core.reactor import SHRINK_AFTER
+
+        sizer = AdaptiveReadSize(initial=4096, minimum=1024, maximum=4096)
+        for _ in range(SHRINK_AFTER - 1):
+            sizer.update(10)
+        sizer.update(2000)
+        sizer.update(10)
+
+        assert sizer.size == 4096
+
+    def test_invalid_sizes_raise_error(self):
+        """minimum <= initial <= maximum でなければValueError"""
+        with pytest.raises(ValueError):
+            AdaptiveReadSize(initial=1024, minimum=2048, maximum=4096)
+
+
+@posix_only
+class TestOutputReactor:
+    """OutputReactorクラスのテスト"""
+
+    def test_register_delivers_data(self):
+        """登録したfdのデータがコールバックに渡される"""
+        reactor = OutputReactor()
+        r, w = os.pipe()
+        received = []
+        reactor.register(r, received.append)
+
+        os.write(w, b"hello")
+        assert _wait_for(lambda: b"".join(received) == b"hello")
+
+        os.close(w)
+        reactor.close()
+        os.close(r)
+
+    def test_read_size_grows_under_load(self):
+        """パイプにデータが溜まっていると読み取りサイズが増える"""
+        reactor = OutputReactor(read_size=4096, max_read_size=64 * 1024)
+        r, w = os.pipe()
+        received = []
+        reactor.register(r, received.append)
+        reactor.pause(r)
+        # 読み取りを止めた状態でパイプを満たしてから再開する
+        assert _wait_for(lambda: r in reactor._paused)
+        os.set_blocking(w, False)
+        written = 0
+        try:
+            while True:
+                written += os.write(w, b"x" * 4096)
+        except BlockingIOError:
+            pass
+        reactor.resume(r)
+
+        assert _wait_for(lambda: sum(map(len, received)) == written)
+        assert max(map(len, received)) > 4096
+        assert reactor.read_size_for(r) > 4096
+
+        os.close(w)
+        reactor.close()
+        os.close(r)
+
+    def test_eof_calls_callback_with_empty_bytes(self):
+        """EOF時に空のbytesでコールバックされる"""
+        reactor = OutputReactor()
+        r, w = os.pipe()
+        received = []
+        reactor.register(r, received.append)
+
+        os.write(w, b"data")
+        os.close(w)
+        assert _wait_for(lambda: received and received[-1] == b"")
+
+        reactor.close()
+        os.close(r)
+
+    def test_single_thread_for_many_fds(self):
+        """複数fdを1スレッドで処理する"""
+        reactor = OutputReactor()
+        pipes = [os.pipe() for _ in range(8)]
+        received: dict[int, list[bytes]] = {i: [] for i in range(8)}
+        before = threading.active_count()
+
+        for i, (r, _) in enumerate(pipes):
+            reactor.register(r, received[i].append)
+        for i, (_, w) in enumerate(pipes):
+            os.write(w, f"session-{i}".encode())
+
+        assert _wait_for(
+            lambda: all(
+                b"".join(received[i]) == f"session-{i}".encode() for i in range(8)
+            )
+        )
+        assert threading.active_count() <= before + 1
+
+        reactor.close()
+        for r, w in pipes:
+            os.close(r)
+            os.close(w)
+
+    def test_unregister_stops_delivery(self):
+        """登録解除後はコールバックされない"""
+        reactor = OutputReactor()
+        r, w = os.pipe()
+        received = []
+        reactor.register(r, received.append)
+        os.write(w, b"first")
+        assert _wait_for(lambda: received)
+
+        reactor.unregister(r)
+        os.write(w, b"second")
+        time.sleep(0.1)
+        assert b"second" not in b"".join(received)
+
+        reactor.close()
+        os.close(r)
+        os.close(w)
+
+
+@posix_only
+class TestPowerShellSessionReactorMode:
+    """リアクターモードのPowerShellSessionのテスト"""
+
+    def test_session_output_via_reactor(self):
+        """リアクター経由でセッション出力が取得できる"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        reactor = OutputReactor()
+        session = PowerShellSession(
+            "test-session", ".", reactor=reactor, shell_command=["cat"]
+        )
+        session.start()
+        try:
+            session.send_command("echo reactor")
+            collected = []
+            assert _wait_for(
+                lambda: collected.append(session.get_output())
+                or "echo reactor" in "".join(collected)
+            )
+            # セッション専用の読み取りスレッドは起動しない
+            assert session._output_thread is None
+        finally:
+            session.stop()
+            reactor.close()
+
+    def test_manager_owns_shared_reactor(self):
+        """SessionManagerが共有リアクターを保持する"""
+        from claude_session_manager.core.manager import SessionManager
+
+        manager = SessionManager(max_sessions=4)
+        assert isinstance(manager.reactor, OutputReactor)
+
+        session = manager.create_session("session-1", ".")
+        assert session.reactor is manager.reactor
@@ -0,0 +1,592 @@
+"""デーモンとソケット経由のセッション操作のテスト"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from claude_session_manager.core.events import (
+    OutputAvailable,
+    SessionCreated,
+    SessionExited,
+    SessionStarted,
+)
+from claude_session_manager.remote import protocol
+
+posix_only = pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+
+
+class TestProtocol:
+    """メッセージの形式のテスト"""
+
+    def test_message_round_trip(self):
+        """1行のJSONにして戻すと同じメッセージになる"""
+        message = protocol.request(1, "read", {"session_id": "s1", "text": "改行\nを含む"})
+        line = protocol.encode_message(message)
+
+        assert line.endswith(b"\n") and line.count(b"\n") == 1
+        assert protocol.decode_message(line) == message
+        with pytest.raises(ValueError):
+            protocol.decode_message(b"[1, 2]")
+
+    @pytest.mark.parametrize(
+        "exc",
+        [KeyError("Session not found: s1"), ValueError("bad"), TimeoutError("slow"), RuntimeError("dead")],
+    )
+    def test_errors_keep_exception_type(self, exc):
+        """サーバー側の例外はクライアント側で同じ種類の例外になる"""
+        error = {"code": protocol.error_code(exc), "message": protocol.error_message(exc)}
+        restored = protocol.error_to_exception(error)
+
+        assert type(restored) is type(exc)
+        assert protocol.error_message(restored) == protocol.error_message(exc)
+
+    def test_event_round_trip(self):
+        """イベントは通知のparamsにして戻せ、未知の型は無視する"""
+        for event in (SessionCreated("s1", interactive=True), OutputAvailable("s1", 42)):
+            assert protocol.event_from_params(protocol.event_to_params(event)) == event
+        assert protocol.event_from_params({"type": "Unknown", "session_id": "s1"}) is None
+
+    def test_output_frame(self):
+        """フレームは終わりの場合だけendを持つ"""
+        frame = protocol.output_frame(1, "s1", 0, "a\nb\n", 4, gap=2)
+
+        assert frame == {
+            "subscription": 1,
+            "session_id": "s1",
+            "cursor": 0,
+            "next_cursor": 4,
+            "text": "a\nb\n",
+            "gap": 2,
+        }
+        assert protocol.output_frame(1, "s1", 4, "", 4, end=True)["end"] is True
+
+
+class _FakeConnection:
+    """attachの応答を返し、要求を記録する接続の代わり
+
+    repliesにないメソッドは空の応答を返し、hangのメソッドには応答しない。
+    """
+
+    def __init__(
+        self, path, on_notification, on_disconnect=None, sessions=(), replies=None, hang=()
+    ):
+        self.on_notification = on_notification
+        self.on_disconnect = on_disconnect
+        self.calls = []
+        self.params = []
+        self.closed = False
+        self._replies = {"attach": {"sessions": list(sessions)}, **(replies or {})}
+        self._hang = set(hang)
+
+    def call_async(self, method, **params):
+        self.calls.append(method)
+        self.params.append(params)
+        future = Future()
+        if method not in self._hang:
+            future.set_result(self._replies.get(method, {}))
+        return future
+
+    def disconnect(self):
+        """デーモン側から切断されたことにする"""
+        self.closed = True
+        self.on_disconnect()
+
+    def close(self):
+        self.closed = True
+
+
+class TestRemoteInteractiveSession:
+    """attachしたUIでのインタラクティブセッションのテスト"""
+
+    def _manager(self, *sessions):
+        """attachでsessionsを受け取るマネージャー"""
+        from claude_session_manager.remote.attach import RemoteSessionManager
+
+        return RemoteSessionManager(
+            "unused.sock",
+            connection_factory=partial(_FakeConnection, sessions=sessions),
+        )
+
+    def test_existing_interactive_session_shows_notice(self):
+        """既存のインタラクティブセッションは案内を1度だけ表示し、送信は拒否する"""
+        from claude_session_manager.remote.attach import INTERACTIVE_UNSUPPORTED
+
+        manager = self._manager(
+            {"session_id": "s1", "interactive": True, "running": True, "next_cursor": 0}
+        )
+        session = manager.get_session("s1")
+
+        assert INTERACTIVE_UNSUPPORTED in session.get_output()
+        assert session.get_output() == ""
+        with pytest.raises(RuntimeError, match="not available over attach"):
+            manager.send_command("s1", "dir")
+        assert "send_command" not in manager._connection.calls
+        manager.close()
+
+    def test_create_interactive_session_is_rejected(self):
+        """インタラクティブセッションの作成はデーモンへ送らずに拒否する"""
+        manager = self._manager()
+
+        with pytest.raises(RuntimeError, match="not available over attach"):
+            manager.create_session("s1", ".", interactive=True)
+        assert "create_session" not in manager._connection.calls
+        manager.close()
+
+
+class TestRemoteSessionManager:
+    """attachしたUIがデーモンの応答を待たないことのテスト"""
+
+    def _manager(self, call_timeout=5.0, **kwargs):
+        """s1の出力"one"をattachで受け取るマネージャー"""
+        from claude_session_manager.remote.attach import RemoteSessionManager
+
+        session = {"session_id": "s1", "running": True, "text": "one\n", "next_cursor": 4}
+        return RemoteSessionManager(
+            "unused.sock",
+            connection_factory=partial(_FakeConnection, sessions=[session], **kwargs),
+            call_timeout=call_timeout,
+        )
+
+    def _wait(self, predicate, timeout=5):
+        end = time.time() + timeout
+        while not predicate() and time.time() < end:
+            time.sleep(0.01)
+        assert predicate()
+
+    def test_output_is_read_off_the_caller_thread(self):
+        """get_output()は要求を送らず、出力のイベントは読み取りスレッドが読んでから知らせる"""
+        manager = self._manager(
+            replies={"read": {"text": "two\n", "next_cursor": 8, "pending_line": "50%"}}
+        )
+        received = []
+        manager.events.subscribe(received.append)
+        session = manager.get_session("s1")
+        try:
+            assert session.get_output() == "one\n"
+            assert "read" not in manager._connection.calls
+
+            manager._on_notification(
+                "event", protocol.event_to_params(OutputAvailable("s1", 8))
+            )
+            self._wait(lambda: OutputAvailable("s1", 8) in received)
+            assert session.get_output() == "two\n"
+            assert session.pending_line == "50%"
+            assert manager._connection.params[-1] == {"session_id": "s1", "cursor": 4}
+        finally:
+            manager.close()
+
+    def test_unanswered_request_times_out(self):
+        """応答のない要求はcall_timeout秒でTimeoutErrorになる"""
+        manager = self._manager(call_timeout=0.1, hang={"touch"})
+        try:
+            started = time.monotonic()
+            with pytest.raises(TimeoutError, match="touch"):
+                manager.touch("s1")
+            assert time.monotonic() - started < 2
+        finally:
+            manager.close()
+
+    def test_disconnect_and_reattach_from_cursor(self):
+        """切断はSessionExitedで知らせ、reconnect()は手元のカーソルからattachし直す"""
+        manager = self._manager()
+        received = []
+        manager.events.subscribe(received.append)
+        try:
+            first = manager._connection
+            first.disconnect()
+
+            assert not manager.connected
+            assert SessionExited("s1") in received
+            assert not manager.get_session("s1").is_running()
+
+            manager.reconnect()
+            assert manager.connected and manager._connection is not first
+            assert manager._connection.params[0] == {"cursors": {"s1": 4}}
+            assert SessionStarted("s1") in received[-2:]
+        finally:
+            manager.close()
+
+
+@pytest.fixture
+def socket_path():
+    """短いパスのソケット（Unixドメインソケットのパス長制限のため/tmp直下に作る）"""
+    directory = tempfile.mkdtemp(prefix="csm-")
+    yield os.path.join(directory, "daemon.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@posix_only
+class TestSessionServer:
+    """SessionServerとクライアントのテスト"""
+
+    def _manager(self):
+        """create_session()でshのセッションを作成するマネージャー"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        return SessionManager(
+            max_sessions=4,
+            config=SessionManagerConfig(warm_pool_size=0, output_encoding="utf-8"),
+        )
+
+    @pytest.fixture
+    def server(self, socket_path):
+        """shのセッションを作成するサーバー"""
+        from claude_session_manager.core.session import PowerShellSession
+        from claude_session_manager.remote.server import SessionServer
+
+        manager = self._manager()
+        server = SessionServer(manager, socket_path).start()
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            partial(PowerShellSession, shell_command=["sh"]),
+        ):
+            yield server
+        server.close()
+        manager.shutdown_all(deadline=1)
+
+    def _wait(self, predicate, timeout=5):
+        """条件が成り立つまで待つ"""
+        end = time.time() + timeout
+        while not predicate() and time.time() < end:
+            time.sleep(0.01)
+        assert predicate()
+
+    def test_pipelined_requests_and_errors(self, server):
+        """応答を待たずに送った要求がidで対応し、エラーは例外の種類を保つ"""
+        from claude_session_manager.remote.client import RpcConnection
+
+        connection = RpcConnection(server.path)
+        try:
+            connection.call("create_session", session_id="s1", working_dir=".")
+            # 待つreadの後に送ったpingが先に完了する（応答は完了した順）
+            slow = connection.call_async("read", session_id="s1", cursor=10**9, timeout=0.5)
+            fast = connection.call_async("ping")
+            assert fast.result(timeout=2)["version"] == protocol.PROTOCOL_VERSION
+            assert not slow.done()
+            assert slow.result(timeout=2)["text"] == ""
+
+            with pytest.raises(KeyError):
+                connection.call("send_command", session_id="missing", command="echo")
+            with pytest.raises(ValueError):
+                connection.call("create_session", session_id="s1", working_dir=".")
+            with pytest.raises(RuntimeError, match="Method not found"):
+                connection.call("no_such_method")
+        finally:
+            connection.close()
+
+    def test_socket_permissions_and_second_daemon(self, server):
+        """ソケットは所有者だけが使え、同じパスで2つ目のサーバーは起動しない"""
+        from claude_session_manager.remote.server import SessionServer
+
+        assert os.stat(server.path).st_mode & 0o777 == 0o600
+        with pytest.raises(RuntimeError, match="already running"):
+            SessionServer(server.manager, server.path).start()
+
+    def test_attach_receives_delta_and_events(self, server):
+        """再接続したUIは前回のカーソル以降の出力だけを受け取り、イベントも届く"""
+        from claude_session_manager.remote.attach import RemoteSessionManager
+
+        first = RemoteSessionManager(server.path)
+        session = first.create_session("s1", ".")
+        session.start()
+        first.send_command("s1", "echo one")
+        output = ""
+        end = time.time() + 5
+        while "one" not in output and time.time() < end:
+            output += session.get_output()
+            time.sleep(0.02)
+        assert "one" in output
+        cursor = session.output_cursor
+        # UIを閉じてもセッションはデーモンに残る
+        assert first.shutdown_all().stopped == []
+        assert server.manager.get_session("s1").is_running()
+
+        server.manager.send_command("s1", "echo two")
+        self._wait(lambda: "two" in server.manager.get_session("s1").read_since(cursor).text)
+
+        second = RemoteSessionManager(server.path)
+        received = []
+        second.events.subscribe(received.append)
+        try:
+            remote = second.get_session("s1")
+            assert remote.is_running() and remote.working_dir == "."
+            # 新しいUIは保持している出力をすべて受け取る
+            assert "one" in remote.get_output()
+
+            # 手元のカーソルで再attachすると差分だけを受け取る
+            second.sessions["s1"]._cursor = cursor
+            second.attach()
+            delta = remote.get_output()
+            assert "two" in delta and "one" not in delta
+
+            second.send_command("s1", "echo three")
+            self._wait(lambda: any(isinstance(e, OutputAvailable) for e in received))
+            server.manager.get_session("s1").stop()
+            self._wait(lambda: SessionExited("s1", requested=True) in received)
+            assert not remote.is_running()
+            remote.start()
+            assert remote.is_running()
+            self._wait(lambda: SessionStarted("s1") in received)
+        finally:
+            second.close()
+
+    def test_broadcast_and_session_states(self, server):
+        """broadcastの結果を手元のBroadcastReportとして受け取る"""
+        from claude_session_manager.remote.attach import RemoteSessionManager
+
+        manager = RemoteSessionManager(server.path)
+        try:
+            for session_id in ("s1", "s2"):
+                manager.create_session(session_id, ".").start()
+            seen = []
+            report = manager.broadcast("echo hi", timeout=5, on_result=seen.append)
+
+            assert sorted(report.succeeded) == ["s1", "s2"]
+            assert all("hi" in r.output for r in report.results)
+            assert [r.session_id for r in seen] == [r.session_id for r in report.results]
+            assert manager.get_session_states() == {}
+            with pytest.raises(KeyError):
+                manager.broadcast("echo hi", ["missing"])
+        finally:
+            manager.close()
+
+
+@posix_only
+class TestSessionClient:
+    """SessionClientと出力の購読のテスト"""
+
+    @pytest.fixture
+    def server(self, socket_path):
+        """shのセッションを作成するサーバー（出力バッファは大きめ）"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+        from claude_session_manager.core.session import PowerShellSession
+        from claude_session_manager.remote.server import SessionServer
+
+        manager = SessionManager(
+            max_sessions=4,
+            config=SessionManagerConfig(
+                warm_pool_size=0, output_encoding="utf-8", output_buffer_size=100_000
+            ),
+        )
+        server = SessionServer(manager, socket_path).start()
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            partial(PowerShellSession, shell_command=["sh"]),
+        ):
+            yield server
+        server.close()
+        manager.shutdown_all(deadline=1)
+
+    @pytest.fixture
+    def client(self, server):
+        """起動済みのセッションs1を持つクライアント"""
+        from claude_session_manager.remote.client import SessionClient
+
+        client = SessionClient(server.path)
+        client.create_session("s1", ".")
+        client.start("s1")
+        yield client
+        client.close()
+
+    def test_run_command_and_list(self, client):
+        """run_commandは完了まで待ってCommandResultを返す"""
+        from claude_session_manager.core.command import CommandResult
+
+        result = client.run_command("s1", "echo hello; false", timeout=5)
+
+        assert isinstance(result, CommandResult)
+        assert result.output == "hello\n" and result.exit_code == 1
+        assert [s["session_id"] for s in client.list_sessions()] == ["s1"]
+        with pytest.raises(KeyError):
+            client.run_command("missing", "echo")
+
+    def test_blocking_requests_do_not_starve_other_connections(self, client, server):
+        """完了待ちのrun_commandが多数あっても他の接続の要求はすぐに処理される"""
+        from claude_session_manager.remote.client import RpcConnection
+
+        busy = RpcConnection(server.path)
+        other = RpcConnection(server.path)
+        try:
+            pending = [
+                busy.call_async("run_command", session_id="s1", command="sleep 0.2")
+                for _ in range(12)
+            ]
+            time.sleep(0.1)
+            started = time.monotonic()
+            other.call("ping")
+            assert time.monotonic() - started < 0.5
+            assert not pending[-1].done()
+        finally:
+            busy.close()
+            other.close()
+
+    def test_subscribe_batches_lines_into_frames(self, client):
+        """大量の行は少数のフレームにまとまり、カーソルは途切れずにつながる"""
+        subscription = client.subscribe("s1")
+        start = subscription.cursor
+        client.send_command("s1", "seq 1 20000")
+
+        text, frames, cursor = "", 0, start
+        while not text.endswith("\n20000\n"):
+            frame = subscription.next(timeout=5)
+            assert frame.cursor == cursor and frame.gap == 0
+            cursor = frame.next_cursor
+            text += frame.text
+            frames += 1
+        subscription.close()
+
+        assert text.split() == [str(i) for i in range(1, 20001)]
+        assert frames < 20000 // 10
+        assert subscription.cursor == cursor == start + len(text)
+        assert subscription.next(timeout=1) is None
+
+    def test_full_subscription_does_not_block_replies(self, client):
+        """読まれない購読が満杯になっても応答は届き、捨てたフレームはgapで分かる"""
+        with patch("claude_session_manager.remote.client.SUBSCRIPTION_QUEUE_FRAMES", 2):
+            subscription = client.subscribe("s1")
+        start = subscription.cursor
+
+        result = client.connection.call_async(
+            "run_command",
+            session_id="s1",
+            command="for i in $(seq 1 30); do echo line$i; sleep 0.01; done",
+            timeout=10,
+        ).result(timeout=10)
+        assert result["output"].split()[-1] == "line30"
+
+        frames = []
+        cursor = start
+        while True:
+            try:
+                frame = subscription.next(timeout=0.5)
+            except TimeoutError:
+                break
+            # 捨てた分を含めてカーソルは途切れずにつながる
+            assert frame.cursor - frame.gap == cursor
+            cursor = frame.next_cursor
+            frames.append(frame)
+        subscription.close()
+
+        assert len(frames) == 3
+        assert frames[-1].text == "" and frames[-1].gap > 0
+
+    def test_subscribe_from_cursor_replays_output(self, client):
+        """from_cursorを指定すると、購読より前の保持している出力から受け取る"""
+        client.run_command("s1", "echo before", timeout=5)
+        with client.subscribe("s1", from_cursor=0) as subscription:
+            assert "before" in subscription.next(timeout=5).text
+
+    def test_subscription_ends_on_delete_and_disconnect(self, client, server):
+        """セッションの削除と切断で購読のイテレーションが終わる"""
+        first = client.subscribe("s1")
+        client.delete_session("s1")
+        assert list(first) == []
+
+        client.create_session("s2", ".")
+        client.start("s2")
+        second = client.subscribe("s2")
+        client.close()
+        assert second.next(timeout=1) is None
+
+    def test_response_precedes_frames(self, client, server):
+        """購読IDを指定しなくても、フレームはsubscribeの応答より後に届く"""
+        from claude_session_manager.remote.client import RpcConnection
+
+        client.run_command("s1", "seq 1 100", timeout=5)
+        received = []
+        # 通知を受け取った時点で応答を受け取っていたか（応答待ちが残っていないか）を
+        # 読み取りスレッドで記録する
+        connection = RpcConnection(
+            server.path, lambda method, params: received.append((method, not connection._pending))
+        )
+        try:
+            future = connection.call_async("subscribe", session_id="s1", from_cursor=0)
+            result = future.result(timeout=5)
+            end = time.time() + 5
+            while not received and time.time() < end:
+                time.sleep(0.01)
+            assert received == [("output", True)]
+            assert connection.call("unsubscribe", subscription=result["subscription"])
+            assert not connection.call("unsubscribe", subscription=result["subscription"])
+        finally:
+            connection.close()
+
+
+@posix_only
+class TestDaemon:
+    """デーモンのテスト"""
+
+    def test_run_daemon_until_shutdown(self, socket_path):
+        """shutdown要求でデーモンが終了し、ソケットを片付ける"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.remote.client import RpcConnection
+        from claude_session_manager.remote.daemon import is_daemon_running, run_daemon
+
+        config = SessionManagerConfig(warm_pool_size=0, output_overflow_policy="block")
+        thread = threading.Thread(target=run_daemon, args=(socket_path, config))
+        thread.start()
+        try:
+            end = time.time() + 5
+            while not is_daemon_running(socket_path) and time.time() < end:
+                time.sleep(0.02)
+            connection = RpcConnection(socket_path)
+            connection.call("shutdown")
+            connection.close()
+        finally:
+            thread.join(timeout=10)
+
+        assert not thread.is_alive()
+        assert not os.path.exists(socket_path)
+        assert not is_daemon_running(socket_path)
+
+    def test_daemon_config_replaces_block_policy(self):
+        """既定の読み手がいないデーモンではblockの方針を使わない"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.remote.daemon import daemon_config
+
+        config = daemon_config(SessionManagerConfig(output_overflow_policy="block"))
+
+        assert config.output_overflow_policy == "drop_oldest"
+
+
+class TestMainCommands:
+    """サブコマンドの振り分けのテスト"""
+
+    def test_daemon_subcommand(self):
+        """daemonサブコマンドはUIを作らずにデーモンを実行する"""
+        from claude_session_manager.main import main
+
+        with patch("claude_session_manager.remote.daemon.run_daemon") as run_daemon, patch(
+            "claude_session_manager.main.MainWindow"
+        ) as window:
+            main(["daemon", "--socket", "/tmp/x.sock"])
+
+        assert run_daemon.call_args.args[0] == "/tmp/x.sock"
+        window.assert_not_called()
+
+    def test_attach_spawns_daemon_when_missing(self):
+        """attachサブコマンドはデーモンがなければ起動してから接続する"""
+        from claude_session_manager.main import main
+
+        with patch(
+            "claude_session_manager.remote.daemon.is_daemon_running", return_value=False
+        ), patch("claude_session_manager.remote.daemon.spawn_daemon") as spawn, patch(
+            "claude_session_manager.remote.attach.RemoteSessionManager"
+        ) as remote, patch("claude_session_manager.main.MainWindow") as window:
+            main(["attach", "--socket", "/tmp/x.sock"])
+
+        spawn.assert_called_once_with("/tmp/x.sock")
+        window.assert_called_once_with(remote.return_value)
+        window.return_value.run.assert_called_once()
+        remote.return_value.close.assert_called_once()
@@ -0,0 +1,250 @@
+"""JobSchedulerのテスト"""
+
+import os
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="uses sh as a stub shell")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """shを使うセッションを登録できるマネージャー"""
+    from claude_session_manager.config import SessionManagerConfig
+    from claude_session_manager.core.manager import SessionManager
+
+    manager = SessionManager(
+        max_sessions=8,
+        config=SessionManagerConfig(
+            warm_pool_size=0,
+            output_encoding="utf-8",
+            hibernation_dir=str(tmp_path / "spill"),
+        ),
+    )
+    yield manager
+    manager.shutdown_all(deadline=1)
+
+
+def _start(manager, session_id, working_dir="."):
+    """shを使うセッションを起動して登録する"""
+    from claude_session_manager.core.session import PowerShellSession
+
+    session = PowerShellSession(
+        session_id,
+        str(working_dir),
+        config=manager.config,
+        reactor=manager.reactor,
+        shell_command=["sh"],
+    )
+    session.start()
+    manager.sessions[session_id] = session
+    return session
+
+
+class TestJobScheduler:
+    """ジョブの割り当てと結果のテスト"""
+
+    def test_future_returns_command_result(self, manager):
+        """Futureはrun_command()の結果を返す"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        _start(manager, "session-1")
+        with JobScheduler(manager) as scheduler:
+            result = scheduler.submit("echo job; (exit 3)").result(timeout=5)
+
+        assert result.output == "job\n"
+        assert result.exit_code == 3
+
+    def test_jobs_spread_across_idle_sessions(self, manager):
+        """アイドルのセッションへ並行して割り当てる"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        for i in range(1, 4):
+            _start(manager, f"session-{i}")
+        with JobScheduler(manager) as scheduler:
+            start = time.monotonic()
+            futures = [scheduler.submit("sleep 0.3; echo $$") for _ in range(6)]
+            wait(futures, timeout=10)
+            elapsed = time.monotonic() - start
+
+        pids = [f.result().output for f in futures]
+        assert len(set(pids)) == 3
+        # 3セッションで2巡（直列なら1.8秒）
+        assert elapsed < 1.2
+
+    def test_priority_order(self, manager):
+        """空きを待つジョブは優先度の高い順、同じ優先度は投入順に割り当てる"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        _start(manager, "session-1")
+        order = []
+        lock = threading.Lock()
+
+        def record(name):
+            def callback(future):
+                with lock:
+                    order.append(name)
+
+            return callback
+
+        with JobScheduler(manager) as scheduler:
+            blocker = scheduler.submit("sleep 0.3")
+            time.sleep(0.1)
+            for name, priority in [("low", 0), ("high", 5), ("low-2", 0), ("mid", 1)]:
+                scheduler.submit("true", priority=priority).add_done_callback(
+                    record(name)
+                )
+            blocker.result(timeout=5)
+            while len(order) < 4:
+                time.sleep(0.01)
+
+        assert order == ["high", "mid", "low", "low-2"]
+
+    def test_working_dir_affinity(self, manager, tmp_path):
+        """作業ディレクトリを指定したジョブはそのディレクトリのセッションで実行する"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            _start(manager, f"session-{name}", tmp_path / name)
+
+        with JobScheduler(manager) as scheduler:
+            futures = [
+                scheduler.submit("pwd", working_dir=str(tmp_path / "b")) for _ in range(3)
+            ]
+            outputs = {f.result(timeout=5).output for f in futures}
+
+        assert outputs == {f"{tmp_path / 'b'}\n"}
+
+    def test_busy_and_hibernated_sessions_are_skipped(self, manager):
+        """処理中・休止中のセッションには割り当てない"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        busy = _start(manager, "session-1")
+        _start(manager, "session-2")
+        idle = _start(manager, "session-3")
+        manager.hibernate("session-2")
+        runner = threading.Thread(target=busy.run_command, args=("sleep 0.5",))
+        runner.start()
+        time.sleep(0.1)
+
+        with JobScheduler(manager) as scheduler:
+            result = scheduler.submit("echo $$").result(timeout=5)
+        runner.join()
+
+        assert result.output.strip() == str(idle.process.pid)
+
+    def test_session_ids_limit_the_pool(self, manager):
+        """session_idsを指定した場合はそのセッションだけを使う"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        _start(manager, "session-1")
+        target = _start(manager, "session-2")
+
+        with JobScheduler(manager, ["session-2"]) as scheduler:
+            outputs = {
+                scheduler.submit("echo $$").result(timeout=5).output for _ in range(3)
+            }
+
+        assert outputs == {f"{target.process.pid}\n"}
+
+    def test_timeout_is_returned_as_exception(self, manager):
+        """完了しないジョブはTimeoutErrorとしてFutureに返る"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        _start(manager, "session-1")
+        with JobScheduler(manager) as scheduler:
+            future = scheduler.submit("sleep 2", timeout=0.2)
+            with pytest.raises(TimeoutError):
+                future.result(timeout=5)
+            assert scheduler.stats.failed == 1
+
+
+class TestJobSchedulerLifecycle:
+    """取り消し・終了・統計のテスト"""
+
+    def test_cancel_queued_job(self, manager):
+        """割り当て前のジョブは取り消せる"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        _start(manager, "session-1")
+        with JobScheduler(manager) as scheduler:
+            blocker = scheduler.submit("sleep 0.3")
+            queued = scheduler.submit("echo never")
+            assert queued.cancel()
+            blocker.result(timeout=5)
+            time.sleep(0.2)
+
+            assert scheduler.stats.cancelled == 1
+            assert scheduler.stats.queue_depth == 0
+
+    def test_close_cancels_pending_jobs(self, manager):
+        """閉じると割り当て前のジョブを取り消し、以後の投入はRuntimeError"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        scheduler = JobScheduler(manager)
+        future = scheduler.submit("true")
+
+        scheduler.close()
+
+        assert future.cancelled()
+        with pytest.raises(RuntimeError):
+            scheduler.submit("true")
+
+    def test_stats(self, manager):
+        """キューの深さ・待ち時間・実行時間を集計する"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        _start(manager, "session-1")
+        with JobScheduler(manager) as scheduler:
+            futures = [scheduler.submit("sleep 0.1") for _ in range(3)]
+            time.sleep(0.05)
+            assert scheduler.stats.queue_depth == 2
+            assert scheduler.stats.running == 1
+            wait(futures, timeout=5)
+            stats = scheduler.stats
+
+        assert (stats.submitted, stats.completed, stats.failed) == (3, 3, 0)
+        assert stats.max_service >= 0.1
+        assert stats.average_service >= 0.1
+        # 最後のジョブは前の2件の完了を待った
+        assert stats.max_wait >= 0.2
+        assert stats.average_wait < stats.max_wait
+
+    def test_idle_dispatcher_does_not_poll(self, manager):
+        """キューが空の間はディスパッチスレッドが起きない"""
+        from unittest.mock import patch
+
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        with JobScheduler(manager, poll_interval=0.01) as scheduler:
+            time.sleep(0.05)
+            with patch.object(scheduler, "_dispatch_locked") as dispatch:
+                time.sleep(0.2)
+                assert dispatch.call_count == 0
+
+    def test_manager_event_wakes_dispatcher(self, manager):
+        """セッションの起動イベントで待っているジョブを割り当てる"""
+        from claude_session_manager.core.events import SessionStarted
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        with JobScheduler(manager, poll_interval=60) as scheduler:
+            future = scheduler.submit("echo woke")
+            time.sleep(0.05)
+            _start(manager, "session-1")
+            manager.events.publish(SessionStarted("session-1"))
+
+            assert future.result(timeout=5).output == "woke\n"
+
+    def test_invalid_arguments(self, manager):
+        """空のコマンドと0以下の確認間隔はValueError"""
+        from claude_session_manager.core.scheduler import JobScheduler
+
+        with pytest.raises(ValueError):
+            JobScheduler(manager, poll_interval=0)
+        with JobScheduler(manager) as scheduler:
+            with pytest.raises(ValueError):
+                scheduler.submit(" ")
@@ -55,6 +55,8 @@ class TestPowerShellSession:
         session = PowerShellSession("test-session", ".")
         session.start()
         session.send_command("echo 'Hello'")
+        # 書き込みは書き込みスレッドで非同期に行われる
+        assert session.wait_input_drained(timeout=1)
 
         # stdinにコマンドが書き込まれたか確認
         mock_process.stdin.write.assert_called()
@@ -193,3 +195,527 @@ class TestPowerShellSession:
         # プロセスが停止したことをシミュレート
         mock_process.poll.return_value = 0
         assert not session.is_running()
+
+
+class TestPowerShellSessionChunkMode:
+    """チャンク読み取りモードのテスト"""
+
+    def test_unknown_read_mode_raises_error(self):
+        """未知の読み取りモードはエラーになる"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        with pytest.raises(ValueError, match="Unknown read mode"):
+            PowerShellSession("test-session", ".", read_mode="word")
+
+    def test_unknown_encoding_raises_error(self):
+        """未知の文字コードはエラーになる"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        with pytest.raises(ValueError, match="Unknown encoding"):
+            PowerShellSession("test-session", ".", encoding="no-such-codec")
+
+    def test_read_mode_from_config(self):
+        """設定から読み取りモードと文字コードを引き継ぐ"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.session import PowerShellSession
+
+        config = SessionManagerConfig(output_read_mode="chunk", output_encoding="cp932")
+        session = PowerShellSession("test-session", ".", config=config)
+
+        assert session.read_mode == "chunk"
+        assert session.encoding == "cp932"
+
+    @pytest.mark.parametrize("encoding", ["utf-8", "cp932"])
+    def test_multibyte_split_across_chunks(self, encoding):
+        """チャンク境界で分割されたマルチバイト文字を正しくデコードする"""
+        import codecs
+
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession("test-session", ".", encoding=encoding)
+        session._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+        data = "日本語の出力".encode(encoding)
+        for i in range(len(data)):
+            session._on_output_bytes(data[i : i + 1])
+        session._on_output_bytes(b"")
+
+        assert session.get_output() == "日本語の出力"
+
+    def test_prompt_without_newline_is_delivered(self):
+        """改行のないプロンプトも読み取られる"""
+        import sys
+
+        from claude_session_manager.core.session import PowerShellSession
+
+        script = "import sys, time; sys.stdout.write('PS> '); sys.stdout.flush(); time.sleep(5)"
+        session = PowerShellSession(
+            "test-session",
+            ".",
+            read_mode="chunk",
+            encoding="utf-8",
+            shell_command=[sys.executable, "-c", script],
+        )
+        session.start()
+        try:
+            output = ""
+            end = time.time() + 3
+            while "PS> " not in output and time.time() < end:
+                output += session.get_output()
+                time.sleep(0.01)
+            assert output == "PS> "
+        finally:
+            session.stop()
+
+    def test_carriage_return_updates_are_collapsed(self):
+        """\\r による上書きは確定した最終状態だけが出力される"""
+        import codecs
+
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession("test-session", ".", read_mode="chunk", encoding="utf-8")
+        session._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        session._on_output_bytes(b"Downloading 1%")
+        for percent in range(2, 101):
+            session._on_output_bytes(f"\rDownloading {percent}%".encode())
+            assert session.pending_line == f"Downloading {percent}%"
+        assert session.pending_line == "Downloading 100%"
+        session._on_output_bytes(b"\r\ndone\r\n")
+
+        assert session.get_output() == "Downloading 1%\rDownloading 100%\ndone\n"
+        assert session.pending_line is None
+
+
+class TestPowerShellSessionOutputBuffer:
+    """出力バッファ設定のテスト"""
+
+    def test_buffer_honors_config(self):
+        """output_buffer_sizeが出力バッファの行数上限になる"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.session import PowerShellSession
+
+        config = SessionManagerConfig(output_buffer_size=2)
+        session = PowerShellSession("test-session", ".", config=config)
+        for i in range(5):
+            session._output_buffer.put(f"line{i}\n")
+
+        assert session.get_output() == "line3\nline4\n"
+        assert session.output_stats.dropped_lines == 3
+
+    def test_read_since_does_not_steal_panel_output(self):
+        """read_since()で読んでもget_output()の出力は失われない"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession("test-session", ".")
+        cursor = session.output_cursor
+        session._output_buffer.put("shared\n")
+
+        logged = session.read_since(cursor)
+        assert logged.text == "shared\n"
+        assert session.get_output() == "shared\n"
+        assert session.read_since(logged.cursor).text == ""
+
+    def test_reactor_block_policy_pauses_reading(self):
+        """リアクターモードのblockポリシーは読み取りを一時停止して再開する"""
+        import sys
+
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.reactor import OutputReactor, is_reactor_supported
+        from claude_session_manager.core.session import PowerShellSession
+
+        if not is_reactor_supported():
+            pytest.skip("OutputReactor requires POSIX pipes")
+
+        config = SessionManagerConfig(
+            output_buffer_size=100,
+            output_buffer_max_chars=4096,
+            output_overflow_policy="block",
+            output_encoding="utf-8",
+        )
+        script = "import sys\nfor i in range(2000): print(i)"
+        reactor = OutputReactor()
+        session = PowerShellSession(
+            "test-session",
+            ".",
+            config=config,
+            reactor=reactor,
+            shell_command=[sys.executable, "-c", script],
+        )
+        session.start()
+        try:
+            output = ""
+            end = time.time() + 5
+            while not output.endswith("1999\n") and time.time() < end:
+                output += session.get_output()
+                time.sleep(0.005)
+            # 取りこぼしなく全行が届く
+            assert output.split() == [str(i) for i in range(2000)]
+            assert session.output_stats.dropped_lines == 0
+        finally:
+            session.stop()
+            reactor.close()
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestPowerShellSessionRunCommand:
+    """run_command()のテスト"""
+
+    @pytest.mark.parametrize("read_mode", ["line", "chunk"])
+    def test_run_command_returns_result(self, read_mode):
+        """出力・終了コード・時間を返し、マーカーはパネルに出ない"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession(
+            "test-session",
+            ".",
+            shell_command=["sh"],
+            read_mode=read_mode,
+            encoding="utf-8",
+        )
+        session.start()
+        try:
+            result = session.run_command("echo hello; (exit 4)", timeout=5)
+
+            assert result.output == "hello\n"
+            assert result.exit_code == 4
+            assert not result.success
+            assert result.duration > 0
+            assert result.time_to_first_byte <= result.duration
+            assert session.get_output() == "hello\n"
+        finally:
+            session.stop()
+
+    def test_line_mode_records_output_activity(self):
+        """行モードでも出力の時刻を記録し、出力量をバイト数で数える"""
+        from claude_session_manager.core.metrics import MetricsRegistry, SessionMetrics
+        from claude_session_manager.core.session import PowerShellSession
+
+        registry = MetricsRegistry()
+        session = PowerShellSession(
+            "test-session",
+            ".",
+            shell_command=["sh"],
+            read_mode="line",
+            encoding="utf-8",
+            metrics=SessionMetrics(registry, "test-session"),
+        )
+        session.start()
+        try:
+            session.send_command("sleep 0.2; printf '\\343\\201\\202\\n'")
+            sent_at = session.command_activity_at
+            deadline = time.monotonic() + 5
+            while session.command_activity_at == sent_at and time.monotonic() < deadline:
+                time.sleep(0.01)
+            activity_at = session.command_activity_at
+        finally:
+            session.stop()
+
+        assert activity_at > sent_at
+        assert session.get_output() == "\u3042\n"
+        snapshot = registry.snapshot()
+        # 「あ」はUTF-8で3バイト＋改行
+        bytes_total = snapshot.get("claude_session_output_bytes_total", session="test-session")
+        assert bytes_total.value == 4
+
+    def test_run_command_timeout(self):
+        """完了しない場合はTimeoutErrorになる"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession("test-session", ".", shell_command=["sh"])
+        session.start()
+        try:
+            with pytest.raises(TimeoutError):
+                session.run_command("sleep 2", timeout=0.1)
+        finally:
+            session.stop()
+
+    def test_run_command_when_not_running(self):
+        """未起動セッションではエラーになる"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession("test-session", ".")
+        with pytest.raises(RuntimeError):
+            session.run_command("echo test")
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestPowerShellSessionBatchCommands:
+    """send_commands() / run_commands()のテスト"""
+
+    def _start_sh(self):
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession(
+            "test-session", ".", shell_command=["sh"], read_mode="chunk", encoding="utf-8"
+        )
+        session.start()
+        return session
+
+    def test_send_commands_single_write(self):
+        """バッチ全体が1回の書き込みで送信される"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        with patch("subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.poll.return_value = None
+            mock_process.stdout.readline.return_value = ""
+            mock_popen.return_value = mock_process
+
+            session = PowerShellSession("test-session", ".")
+            session.start()
+            session.send_commands(["echo 1", "echo 2", "echo 3"])
+            assert session.wait_input_drained(timeout=1)
+
+            mock_process.stdin.write.assert_called_once_with("echo 1\necho 2\necho 3\n")
+            mock_process.stdin.flush.assert_called_once()
+            session.stop()
+
+    def test_run_commands_demultiplexes_results(self):
+        """コマンドごとに出力と終了コードが分離される"""
+        session = self._start_sh()
+        try:
+            results = list(
+                session.run_commands(["echo a", "echo b; (exit 2)", "echo c"], timeout=5)
+            )
+
+            assert [r.output for r in results] == ["a\n", "b\n", "c\n"]
+            assert [r.exit_code for r in results] == [0, 2, 0]
+            assert all(r.duration is not None and r.queue_time is not None for r in results)
+            assert session.get_output() == "a\nb\nc\n"
+        finally:
+            session.stop()
+
+    def test_run_commands_iterates_as_completed(self):
+        """完了したコマンドから順に結果が得られる"""
+        session = self._start_sh()
+        try:
+            results = session.run_commands(["echo first", "sleep 1; echo second"], timeout=5)
+            start = time.time()
+            first = next(results)
+            assert first.output == "first\n"
+            assert time.time() - start < 0.9
+            assert next(results).output == "second\n"
+        finally:
+            session.stop()
+
+    def test_many_tiny_commands(self):
+        """多数の小さなコマンドをまとめて実行できる"""
+        session = self._start_sh()
+        try:
+            commands = [f"echo {i}" for i in range(200)]
+            outputs = [r.output for r in session.run_commands(commands, timeout=5)]
+            assert outputs == [f"{i}\n" for i in range(200)]
+        finally:
+            session.stop()
+
+    def test_run_commands_rejects_empty(self):
+        """空のコマンドを含むバッチはエラーになる"""
+        session = self._start_sh()
+        try:
+            with pytest.raises(ValueError):
+                session.run_commands(["echo ok", " "])
+        finally:
+            session.stop()
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestPowerShellSessionStop:
+    """段階的な停止処理のテスト"""
+
+    def _start_sh(self):
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession(
+            "test-session", ".", shell_command=["sh"], read_mode="chunk", encoding="utf-8"
+        )
+        session.start()
+        return session
+
+    def test_idle_session_stops_without_kill(self):
+        """アイドルのシェルは標準入力を閉じるだけで終了する"""
+        session = self._start_sh()
+
+        assert session.stop(timeout=2) is False
+        assert not session.is_running()
+
+    def test_stuck_child_is_killed_with_tree(self):
+        """SIGTERMを無視する子プロセスはツリーごと強制終了される"""
+        from claude_session_manager.core.process_tree import is_process_group_alive
+
+        session = self._start_sh()
+        session.send_command("sh -c 'trap \"\" TERM; while :; do sleep 0.05; done'")
+        time.sleep(0.3)
+        pid = session.process.pid
+
+        start = time.time()
+        assert session.stop(timeout=0.3) is True
+        assert time.time() - start < 1.5
+        # SIGKILLは非同期に届くため、グループが消えるまで少し待つ
+        end = time.time() + 1
+        while is_process_group_alive(pid) and time.time() < end:
+            time.sleep(0.01)
+        assert not is_process_group_alive(pid)
+
+    def test_wait_stopped_before_request_returns_false(self):
+        """終了要求前のwait_stopped(0)は実行中ならFalseを返す"""
+        session = self._start_sh()
+        try:
+            assert session.wait_stopped(0) is False
+        finally:
+            session.stop()
+
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_listener_error_marks_output_ended(self):
+        """リスナーの例外で読み取りスレッドが止まった場合も読み取りの終了を記録する"""
+        from claude_session_manager.core.session import PowerShellSession
+        from claude_session_manager.core.watchdog import HEALTH_DEAD, classify_session
+
+        session = PowerShellSession(
+            "test-session", ".", shell_command=["sh"], read_mode="chunk", encoding="utf-8"
+        )
+        failed = []
+
+        def failing_listener():
+            # 読み取りスレッドからの最初の通知だけ失敗させる
+            if threading.current_thread() is not threading.main_thread() and not failed:
+                failed.append(None)
+                raise RuntimeError("listener failed")
+
+        session.start()
+        try:
+            session.set_change_listener(failing_listener)
+            session.send_command("echo hi")
+            deadline = time.monotonic() + 5
+            while not session.output_ended and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert session.output_ended
+            assert session.is_running()
+            assert classify_session(session, 0.0, 60.0) == (
+                HEALTH_DEAD,
+                "output reader stopped",
+            )
+        finally:
+            session.stop()
+
+    @pytest.mark.parametrize("read_mode", ["line", "chunk"])
+    def test_exit_listener_called_on_unexpected_exit(self, read_mode):
+        """シェルが自分で終了した場合だけ終了を通知する（stop()では通知しない）"""
+        import threading
+
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession(
+            "test-session", ".", shell_command=["sh"], read_mode=read_mode, encoding="utf-8"
+        )
+        exited = threading.Event()
+        session.set_exit_listener(exited.set)
+        session.start()
+        session.send_command("exit 3")
+
+        assert exited.wait(5)
+        assert session.output_ended
+        assert not session.stop_requested
+
+        exited.clear()
+        session.stop()
+        session.start()
+        assert not session.output_ended
+        session.stop()
+        assert session.stop_requested
+        time.sleep(0.1)
+        assert not exited.is_set()
+
+    def test_restart_keeps_unread_output(self):
+        """restart()は未読の出力を残したまま新しいシェルを起動する"""
+        session = self._start_sh()
+        try:
+            session.send_command("echo before; exit")
+            end = time.time() + 5
+            while not session.output_ended and time.time() < end:
+                time.sleep(0.01)
+
+            session.restart()
+            session.send_command("echo after")
+            output = ""
+            while "after" not in output and time.time() < end:
+                output += session.get_output()
+                time.sleep(0.01)
+
+            assert session.is_running()
+            assert output.index("before") < output.index("after")
+        finally:
+            session.stop()
+
+
+@pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+class TestPowerShellSessionInputQueue:
+    """標準入力の非同期書き込みのテスト"""
+
+    @pytest.mark.parametrize("use_reactor", [False, True])
+    def test_large_paste_does_not_block(self, use_reactor):
+        """シェルが入力を読んでいない間も大きな貼り付けで止まらない"""
+        from claude_session_manager.core.reactor import OutputReactor
+        from claude_session_manager.core.session import PowerShellSession
+
+        reactor = OutputReactor() if use_reactor else None
+        session = PowerShellSession(
+            "test-session",
+            ".",
+            reactor=reactor,
+            shell_command=["sh"],
+            read_mode="chunk",
+            encoding="utf-8",
+        )
+        session.start()
+        try:
+            session.send_command("sleep 0.5")
+            script = "".join(f"# {'x' * 60} {i}\n" for i in range(8000))
+
+            start = time.time()
+            session.send_command(script + "echo pasted")
+            assert time.time() - start < 0.2
+            assert session.input_backpressured
+
+            assert session.wait_input_drained(timeout=10)
+            assert session.input_stats.pending_bytes == 0
+        finally:
+            session.stop()
+            if reactor is not None:
+                reactor.close()
+
+    def test_send_rejected_when_queue_full(self):
+        """書き込み待ちが上限に達すると送信はRuntimeErrorになる"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.session import PowerShellSession
+
+        session = PowerShellSession(
+            "test-session",
+            ".",
+            config=SessionManagerConfig(stdin_queue_max_bytes=1024),
+            shell_command=["sh"],
+            read_mode="chunk",
+            encoding="utf-8",
+        )
+        session.start()
+        try:
+            session.send_command("sleep 1")
+            assert session.wait_input_drained(timeout=1)
+            session.send_command("#" + "x" * (256 * 1024))
+
+            with pytest.raises(RuntimeError, match="Input queue is full"):
+                session.send_command("echo rejected")
+            with pytest.raises(RuntimeError, match="Input queue is full"):
+                session.run_command("echo rejected", timeout=1)
+            assert session.input_stats.rejected_writes == 2
+            assert session._commands.in_flight == 0
+        finally:
+            session.stop()
@@ -0,0 +1,133 @@
+"""StdinWriterのテスト"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from claude_session_manager.core.reactor import OutputReactor, is_reactor_supported
+from claude_session_manager.core.stdin_writer import StdinWriter
+
+posix_only = pytest.mark.skipif(
+    not is_reactor_supported(),
+    reason="uses POSIX pipes",
+)
+
+
+def _read_all(fd, size):
+    """fdからsizeバイト読み切る"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        data = os.read(fd, remaining)
+        if not data:
+            break
+        chunks.append(data)
+        remaining -= len(data)
+    return b"".join(chunks)
+
+
+@pytest.fixture(params=["thread", "reactor"])
+def pipe_writer(request):
+    """書き込みスレッド・リアクターの両方式でStdinWriterを作成する"""
+    r, w = os.pipe()
+    stream = os.fdopen(w, "wb", buffering=0)
+    reactor = OutputReactor() if request.param == "reactor" else None
+
+    def make(**kwargs):
+        return StdinWriter(stream, reactor=reactor, **kwargs)
+
+    yield make, r
+    if reactor is not None:
+        reactor.close()
+    stream.close()
+    os.close(r)
+
+
+@posix_only
+class TestStdinWriter:
+    """StdinWriterクラスのテスト"""
+
+    def test_write_delivers_data(self, pipe_writer):
+        """書き込んだデータが順に届く"""
+        make, r = pipe_writer
+        writer = make()
+
+        assert writer.write(b"echo 1\n")
+        assert writer.write(b"echo 2\n")
+        assert writer.wait_drained(timeout=2)
+
+        assert _read_all(r, 14) == b"echo 1\necho 2\n"
+        assert writer.stats.written_bytes == 14
+        writer.close()
+
+    def test_write_does_not_block_on_full_pipe(self, pipe_writer):
+        """読み手がいなくてもパイプ容量を超える書き込みで止まらない"""
+        make, r = pipe_writer
+        writer = make(max_pending=4 * 1024 * 1024)
+        data = b"x" * (1024 * 1024)
+
+        start = time.time()
+        assert writer.write(data)
+        assert time.time() - start < 0.5
+        assert writer.backpressured
+
+        received = []
+        reader = threading.Thread(target=lambda: received.append(_read_all(r, len(data))))
+        reader.start()
+        assert writer.wait_drained(timeout=5)
+        reader.join(timeout=5)
+
+        assert received == [data]
+        assert not writer.backpressured
+        writer.close()
+
+    def test_rejects_when_queue_full(self, pipe_writer):
+        """書き込み待ちが上限を超える書き込みは受け付けない"""
+        make, r = pipe_writer
+        writer = make(max_pending=1024)
+
+        # キューが空なら上限を超える貼り付けも受け付ける
+        assert writer.write(b"x" * (256 * 1024))
+        assert writer.write(b"y") is False
+
+        stats = writer.stats
+        assert stats.rejected_writes == 1
+        assert stats.backpressured
+        writer.close()
+
+    def test_close_discards_pending(self, pipe_writer):
+        """close()で書き込み待ちを破棄し、以降の書き込みは受け付けない"""
+        make, r = pipe_writer
+        writer = make()
+        writer.write(b"x" * (256 * 1024))
+
+        writer.close()
+
+        assert writer.stats.pending_bytes == 0
+        assert writer.write(b"y") is False
+
+    def test_max_pending_must_be_positive(self, pipe_writer):
+        """max_pendingが正でない場合はエラー"""
+        make, r = pipe_writer
+        with pytest.raises(ValueError):
+            make(max_pending=0)
+
+
+@posix_only
+class TestStdinWriterBrokenPipe:
+    """子プロセス終了時のテスト"""
+
+    def test_reader_closed_stops_writer(self):
+        """読み手が閉じられると書き込み待ちを破棄して停止する"""
+        r, w = os.pipe()
+        stream = os.fdopen(w, "wb", buffering=0)
+        writer = StdinWriter(stream)
+        os.close(r)
+
+        writer.write(b"data\n")
+        assert writer.wait_drained(timeout=2) is False
+
+        assert writer.write(b"more\n") is False
+        stream.close()
@@ -0,0 +1,232 @@
+"""TerminalScreenのテスト"""
+
+import pytest
+
+from claude_session_manager.core.terminal_screen import TerminalScreen
+
+
+def _screen(rows=3, cols=10, scrollback_lines=5):
+    """初回の全体描画を取り出し済みの画面"""
+    screen = TerminalScreen(rows, cols, scrollback_lines=scrollback_lines)
+    screen.take_update()
+    return screen
+
+
+class TestTerminalScreenText:
+    """文字の書き込みと制御文字のテスト"""
+
+    def test_write_and_newline(self):
+        """CR LFで次の行の先頭へ移る"""
+        screen = _screen()
+        screen.feed("hello\r\nworld")
+
+        assert screen.display() == ["hello", "world", ""]
+        assert screen.cursor == (1, 5)
+
+    def test_carriage_return_overwrites(self):
+        """CRで行頭に戻って上書きする"""
+        screen = _screen()
+        screen.feed("10%\r55%\r100%")
+
+        assert screen.display()[0] == "100%"
+
+    def test_autowrap(self):
+        """最終列を超えると次の行へ折り返す"""
+        screen = _screen(cols=4)
+        screen.feed("abcdef")
+
+        assert screen.display()[:2] == ["abcd", "ef"]
+
+    def test_backspace_and_tab(self):
+        """BSで1文字戻り、TABで次のタブストップへ進む"""
+        screen = _screen(cols=20)
+        screen.feed("ab\bX\tY")
+
+        assert screen.display()[0] == "aX      Y"
+
+    def test_wide_characters_take_two_columns(self):
+        """全角文字は2列を占め、最終列に収まらない場合は次の行へ折り返す"""
+        screen = _screen(cols=10)
+        screen.feed("日本語abc")
+
+        assert screen.display()[0] == "日本語abc"
+        assert screen.cursor == (0, 9)
+
+        screen = _screen(cols=5)
+        screen.feed("ab日本")
+
+        assert screen.display()[:2] == ["ab日", "本"]
+        assert screen.cursor == (1, 2)
+
+    def test_overwriting_half_of_wide_character(self):
+        """全角文字の片側を上書きすると残りの半分は空白になる"""
+        screen = _screen(cols=10)
+        screen.feed("日本語\rx\x1b[4Gy")
+
+        assert screen.display()[0] == "x  y語"
+        assert screen.cursor == (0, 4)
+
+    def test_invalid_size_raises_error(self):
+        """0以下のサイズはValueError"""
+        with pytest.raises(ValueError):
+            TerminalScreen(0, 80)
+        with pytest.raises(ValueError):
+            TerminalScreen(24, 80, scrollback_lines=-1)
+
+
+class TestTerminalScreenEscapes:
+    """エスケープシーケンスのテスト"""
+
+    def test_cursor_position_and_erase(self):
+        """CUPで移動し、EL / EDで消去する"""
+        screen = _screen()
+        screen.feed("aaaa\r\nbbbb\r\ncccc")
+        screen.feed("\x1b[2;3H\x1b[K")
+        assert screen.display() == ["aaaa", "bb", "cccc"]
+
+        screen.feed("\x1b[J")
+        assert screen.display() == ["aaaa", "bb", ""]
+
+        screen.feed("\x1b[2J")
+        assert screen.display() == ["", "", ""]
+
+    def test_sgr_and_osc_are_ignored(self):
+        """色指定とタイトル設定は画面に現れない"""
+        screen = _screen()
+        screen.feed("\x1b]0;title\x07\x1b[1;31mred\x1b[0m\x1b]2;t\x1b\\!")
+
+        assert screen.display()[0] == "red!"
+
+    def test_sequence_split_across_chunks(self):
+        """チャンク境界で分割されたシーケンスも解釈する"""
+        screen = _screen()
+        for chunk in ["ab", "\x1b", "[", "1", ";", "5H", "x", "\x1b]0;ti", "tle\x07y"]:
+            screen.feed(chunk)
+
+        assert screen.display()[0] == "ab  xy"
+        assert screen.cursor == (0, 6)
+
+    def test_insert_and_delete_characters(self):
+        """ICH / DCH / ECHで行内の文字を操作する"""
+        screen = _screen()
+        screen.feed("abcdef\x1b[1;2H\x1b[2P")
+        assert screen.display()[0] == "adef"
+
+        screen.feed("\x1b[1@")
+        assert screen.display()[0] == "a def"
+
+        screen.feed("\x1b[3X")
+        assert screen.display()[0] == "a   f"
+
+    def test_scroll_region(self):
+        """スクロール領域内のスクロールはスクロールバックへ送らない"""
+        screen = _screen()
+        screen.feed("top\r\nmid\r\nbottom")
+        screen.feed("\x1b[2;3r\x1b[3;1H\nnew")
+
+        assert screen.display() == ["top", "bottom", "new"]
+        assert list(screen.scrollback) == []
+
+    def test_alternate_screen_restores_main(self):
+        """代替画面を抜けると元の画面に戻る"""
+        screen = _screen()
+        screen.feed("prompt$ ")
+        screen.feed("\x1b[?1049h\x1b[Hvim\r\n\r\n\r\n\r\n")
+        assert screen.alternate_screen
+        assert list(screen.scrollback) == []
+
+        screen.feed("\x1b[?1049l")
+        assert not screen.alternate_screen
+        assert screen.display() == ["prompt$", "", ""]
+        assert screen.cursor == (0, 8)
+
+
+class TestTerminalScreenScrollback:
+    """スクロールバックのテスト"""
+
+    def test_scrolled_lines_go_to_scrollback(self):
+        """画面上端から押し出された行はスクロールバックへ送られる"""
+        screen = _screen()
+        screen.feed("1\r\n2\r\n3\r\n4\r\n5")
+
+        assert list(screen.scrollback) == ["1", "2"]
+        assert screen.display() == ["3", "4", "5"]
+
+    def test_scrollback_is_capped(self):
+        """スクロールバックは上限行数を超えて増えない"""
+        screen = _screen(scrollback_lines=5)
+        screen.feed("".join(f"line {i}\r\n" for i in range(10000)))
+
+        assert list(screen.scrollback) == [f"line {i}" for i in range(9993, 9998)]
+
+    def test_resize_pushes_rows_into_scrollback(self):
+        """行数を減らすと、カーソルより上の行がスクロールバックへ送られる"""
+        screen = _screen()
+        screen.feed("a\r\nb\r\nc")
+        screen.resize(2, 4)
+
+        assert screen.display() == ["b", "c"]
+        assert list(screen.scrollback) == ["a"]
+        assert screen.cursor == (1, 1)
+
+
+class TestTerminalScreenDamage:
+    """ダメージ記録のテスト"""
+
+    def test_initial_update_is_full(self):
+        """最初の更新は画面全体"""
+        screen = TerminalScreen(3, 10)
+        update = screen.take_update()
+
+        assert update.full
+        assert update.rows == {0: "", 1: "", 2: ""}
+
+    def test_no_change_returns_none(self):
+        """変化がなければNone"""
+        screen = _screen()
+        assert screen.take_update() is None
+
+    def test_only_changed_rows_are_reported(self):
+        """書き換えた行だけが報告される"""
+        screen = _screen(cols=20)
+        screen.feed("\x1b[2;1Hprogress 1")
+        for i in range(2, 100):
+            screen.feed(f"\rprogress {i}")
+
+        update = screen.take_update()
+        assert not update.full
+        assert update.rows == {1: "progress 99"}
+
+    def test_scroll_shifts_damage(self):
+        """スクロールで押し出された行と、ずれた行のダメージが報告される"""
+        screen = _screen()
+        screen.feed("a\r\nb\r\nc")
+        screen.take_update()
+
+        screen.feed("\r\nd")
+        update = screen.take_update()
+
+        assert update.scrolled == ("a",)
+        assert update.scrolled_count == 1
+        assert update.rows == {2: "d"}
+
+    def test_scrolled_lines_are_capped(self):
+        """1回の更新で報告するスクロール行はスクロールバック上限まで"""
+        screen = _screen(scrollback_lines=5)
+        screen.feed("".join(f"{i}\r\n" for i in range(100)))
+
+        update = screen.take_update()
+        assert update.scrolled_count == 98
+        assert len(update.scrolled) == 5
+        assert set(update.rows) == {0, 1, 2}
+
+    def test_invalidate_requests_full_update(self):
+        """invalidate()後はスクロールバックを含む全体が返る"""
+        screen = _screen()
+        screen.feed("1\r\n2\r\n3\r\n4")
+        screen.take_update()
+        screen.invalidate()
+
+        update = screen.take_update()
+        assert update.full
+        assert update.scrollback == ("1",)
@@ -1,11 +1,69 @@
 """UIコンポーネントのテスト"""
 
+import threading
+import time
 import tkinter as tk
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, Mock, create_autospec, patch
 
 import pytest
 
 
+class _FakeText:
+    """行・列インデックスで編集できるTextウィジェットの代用品"""
+
+    def __init__(self):
+        # Textウィジェットと同様に末尾は常に改行で終わる
+        self.content = "\n"
+
+    def _offset(self, index):
+        if index in (tk.END, "end-1c"):
+            return len(self.content) - 1
+        if index == "end-1c linestart":
+            return self.content[:-1].rfind("\n") + 1
+        line, col = index.split(".")
+        lines = self.content[:-1].split("\n")
+        if int(line) > len(lines):
+            return len(self.content) - 1
+        start = sum(len(text) + 1 for text in lines[: int(line) - 1])
+        length = len(lines[int(line) - 1])
+        return start + (length if col == "end" else min(int(col), length))
+
+    def insert(self, index, text):
+        offset = self._offset(index)
+        self.content = self.content[:offset] + text + self.content[offset:]
+
+    def delete(self, start, end):
+        self.content = self.content[: self._offset(start)] + self.content[self._offset(end) :]
+
+    def get(self, start, end):
+        return self.content[self._offset(start) : self._offset(end)]
+
+    def see(self, index):
+        pass
+
+    def lines(self):
+        return self.content[:-1].split("\n")
+
+
+def _mock_session(session_class=None, **attrs):
+    """セッションクラスの属性・メソッドだけを持つモック（休止していない行単位のセッションの状態）"""
+    from claude_session_manager.core.session import PowerShellSession
+
+    session = create_autospec(session_class or PowerShellSession, instance=True)
+    values = {
+        "session_id": "test-session",
+        "working_dir": ".",
+        "hibernated": False,
+        "screen": None,
+        "prompt_detector": None,
+        "pending_line": None,
+        "output_stats": None,
+    }
+    values.update(attrs)
+    session.configure_mock(**values)
+    return session
+
+
 class TestMainWindow:
     """MainWindowクラスのテスト"""
 
@@ -51,6 +109,156 @@ class TestMainWindow:
 
         assert window.active_session_id == "session-1"
 
+    @patch("tkinter.Tk")
+    def test_input_revives_hibernated_session(self, mock_tk):
+        """休止中のセッションへの入力はマネージャー経由で再開してから送る"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        manager = MagicMock()
+        manager.get_session.return_value.is_running.return_value = False
+        manager.is_hibernated.return_value = True
+        window = MainWindow(manager)
+        window.set_active_session("session-1")
+        window._session_tasks.join()
+
+        window._on_input_submit("dir")
+        window._session_tasks.join()
+
+        manager.touch.assert_called_with("session-1")
+        manager.send_command.assert_called_once_with("session-1", "dir")
+
+    @patch("tkinter.Tk")
+    def test_input_is_sent_off_main_thread(self, mock_tk):
+        """送信は専用スレッドで行い、失敗はイベント経由で表示する"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        threads = []
+
+        def send_command(session_id, text):
+            threads.append(threading.current_thread())
+            raise RuntimeError("Session is not running")
+
+        manager = MagicMock()
+        manager.send_command.side_effect = send_command
+        window = MainWindow(manager)
+        window.input_bar = MagicMock()
+        window.active_session_id = "session-1"
+
+        window._on_input_submit("dir")
+        window._session_tasks.join()
+        window._on_session_events([])
+
+        assert threads and threads[0] is not threading.current_thread()
+        window.input_bar.set_status.assert_called_with(
+            "Cannot send to session-1: Session is not running"
+        )
+
+    @patch("tkinter.Tk")
+    def test_broadcast_runs_in_background(self, mock_tk):
+        """全セッションへの送信は別スレッドで行い、要約を更新ループで表示する"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        manager = MagicMock()
+        manager.broadcast.return_value.summary = "git pull: 4 ok"
+        window = MainWindow(manager)
+        window.input_bar = MagicMock()
+
+        window._on_broadcast_submit("git pull")
+        window._broadcast_thread.join(timeout=5)
+        window._update_all_sessions()
+
+        manager.broadcast.assert_called_once_with("git pull")
+        window.input_bar.set_status.assert_called_with("git pull: 4 ok")
+
+    @patch("tkinter.Tk")
+    def test_touch_runs_off_main_thread(self, mock_tk):
+        """フォーカス時の再開は専用スレッドで行い、結果をイベント経由で表示する"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        threads = []
+
+        def touch(session_id):
+            threads.append(threading.current_thread())
+            raise RuntimeError("spawn failed")
+
+        manager = MagicMock()
+        manager.touch.side_effect = touch
+        window = MainWindow(manager)
+        window.input_bar = MagicMock()
+        panel = MagicMock()
+        panel.session.session_id = "session-1"
+        window.session_panels = [panel]
+
+        with patch.object(window._events, "wake") as wake:
+            window.set_active_session("session-1")
+            window._session_tasks.join()
+        window._on_session_events([])
+
+        assert threads and threads[0] is not threading.current_thread()
+        wake.assert_called_once()
+        window.input_bar.set_status.assert_called_with(
+            "Cannot resume session-1: spawn failed"
+        )
+        panel.update_output.assert_called_once()
+
+    @patch("tkinter.Tk")
+    def test_failed_task_does_not_stop_later_tasks(self, mock_tk):
+        """処理が想定外の例外で失敗しても、専用スレッドは後の処理を続ける"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        manager = MagicMock()
+        manager.apply_hibernation_policy.side_effect = OSError("disk full")
+        window = MainWindow(manager)
+        window.input_bar = MagicMock()
+
+        window._policy_pending = True
+        window._submit_session_task(window._apply_hibernation_policy)
+        window._session_tasks.join()
+        window._on_session_events([])
+        window.input_bar.set_status.assert_called_with("Session task failed: disk full")
+        assert window._policy_pending is False
+
+        window.set_active_session("session-1")
+        window._session_tasks.join()
+        assert window._session_thread.is_alive()
+        manager.touch.assert_called_once_with("session-1")
+
+    @patch("tkinter.Tk")
+    def test_disconnected_input_reattaches(self, mock_tk):
+        """デーモンとの接続が切れたら案内を表示し、送信でattachし直す"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        manager = MagicMock()
+        manager.connected = False
+        window = MainWindow(manager)
+        window.input_bar = MagicMock()
+
+        window._on_session_events([])
+        window.input_bar.set_status.assert_called_with(
+            "Disconnected from daemon: press Send to re-attach"
+        )
+
+        window._on_input_submit("dir")
+        window._session_tasks.join()
+        manager.connected = True
+        window._on_session_events([])
+
+        manager.reconnect.assert_called_once()
+        manager.send_command.assert_not_called()
+        window.input_bar.set_status.assert_called_with("Re-attached to daemon")
+
+    @patch("tkinter.Tk")
+    def test_close_shuts_down_sessions(self, mock_tk):
+        """ウィンドウを閉じると全セッションを停止してから破棄する"""
+        from claude_session_manager.ui.main_window import MainWindow
+
+        manager = MagicMock()
+        window = MainWindow(manager)
+        window._on_close()
+
+        manager.shutdown_all.assert_called_once()
+        window.root.destroy.assert_called_once()
+
 
 class TestSessionPanel:
     """SessionPanelクラスのテスト"""
@@ -61,7 +269,7 @@ class TestSessionPanel:
         from claude_session_manager.ui.session_panel import SessionPanel
 
         mock_parent = MagicMock()
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session.session_id = "test-session"
         mock_session.working_dir = "."
 
@@ -82,7 +290,7 @@ class TestSessionPanel:
         from claude_session_manager.ui.session_panel import SessionPanel
 
         mock_parent = MagicMock()
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session.session_id = "test-session"
         mock_session.working_dir = "."
 
@@ -98,7 +306,7 @@ class TestSessionPanel:
         from claude_session_manager.ui.session_panel import SessionPanel
 
         mock_parent = MagicMock()
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session.session_id = "test-session"
         mock_session.working_dir = "."
         mock_session.get_output.return_value = "Test output"
@@ -111,13 +319,156 @@ class TestSessionPanel:
         # get_output()が呼ばれたか確認
         mock_session.get_output.assert_called()
 
+    @patch("tkinter.Frame")
+    def test_update_output_shows_busy_state(self, mock_frame):
+        """プロンプト検出に対応したセッションはbusy / idleを表示する"""
+        from claude_session_manager.core.interactive_session import (
+            InteractivePowerShellSession,
+        )
+        from claude_session_manager.core.prompt_detector import PromptDetector
+        from claude_session_manager.core.interactive_session import (
+            InteractivePowerShellSession,
+        )
+        from claude_session_manager.core.terminal_screen import TerminalScreen
+        from claude_session_manager.ui.session_panel import SessionPanel
+
+        mock_session = _mock_session(
+            InteractivePowerShellSession,
+            screen=TerminalScreen(3, 10),
+            prompt_detector=PromptDetector(),
+        )
+        mock_session.prompt_detector.command_sent()
+
+        panel = SessionPanel(MagicMock(), mock_session, on_click=lambda: None)
+        panel.output_text = _FakeText()
+        panel.state_label = MagicMock()
+
+        panel.update_output()
+        assert "busy" in panel.state_label.config.call_args.kwargs["text"]
+
+        mock_session.prompt_detector.feed("PS C:\\> ")
+        panel.update_output()
+        assert "idle" in panel.state_label.config.call_args.kwargs["text"]
+
+    @patch("tkinter.Frame")
+    def test_update_output_skips_hibernated_session(self, mock_frame):
+        """休止中のセッションは最後の表示を残す"""
+        from claude_session_manager.ui.session_panel import SessionPanel
+
+        mock_session = _mock_session(hibernated=True)
+        panel = SessionPanel(MagicMock(), mock_session, on_click=lambda: None)
+        panel.output_text = MagicMock()
+
+        panel.update_output()
+
+        mock_session.get_output.assert_not_called()
+        panel.output_text.insert.assert_not_called()
+
+    @patch("tkinter.Frame")
+    def test_update_output_rewrites_progress_line(self, mock_frame):
+        """上書き中の行は最終行を置き換え、確定後は最終状態だけが残る"""
+        from claude_session_manager.core.line_collapser import LineCollapser
+        from claude_session_manager.ui.session_panel import SessionPanel
+
+        collapser = LineCollapser()
+        pending_output = []
+        mock_session = _mock_session()
+        mock_session.get_output.side_effect = lambda: "".join(pending_output)
+
+        panel = SessionPanel(MagicMock(), mock_session, on_click=lambda: None)
+        panel.output_text = _FakeText()
+
+        def feed(text):
+            pending_output.clear()
+            pending_output.append(collapser.feed(text))
+            mock_session.pending_line = collapser.pending_line
+            panel.update_output()
+            return panel.output_text.lines()
+
+        assert feed("Collecting pkg\r\nDownloading ") == ["Collecting pkg", "Downloading "]
+        for percent in (10, 50, 90):
+            lines = feed(f"\rDownloading {percent}%")
+            assert lines == ["Collecting pkg", f"Downloading {percent}%"]
+        assert feed("\rDownloading 100%\r\nInstalled\r\n") == [
+            "Collecting pkg",
+            "Downloading 100%",
+            "Installed",
+            "",
+        ]
+        assert feed("\r 1/3\r 2/3") == ["Collecting pkg", "Downloading 100%", "Installed", " 2/3"]
+        assert feed("\r 3/3\n$ ") == [
+            "Collecting pkg",
+            "Downloading 100%",
+            "Installed",
+            " 3/3",
+            "$ ",
+        ]
+
+    @patch("tkinter.Frame")
+    def test_update_output_renders_screen(self, mock_frame):
+        """画面モデルを持つセッションはスクロールバックと画面を描画する"""
+        from claude_session_manager.core.interactive_session import (
+            InteractivePowerShellSession,
+        )
+        from claude_session_manager.core.terminal_screen import TerminalScreen
+        from claude_session_manager.ui.session_panel import SessionPanel
+
+        screen = TerminalScreen(3, 10, scrollback_lines=4)
+        mock_session = _mock_session(InteractivePowerShellSession, screen=screen)
+        panel = SessionPanel(MagicMock(), mock_session, on_click=lambda: None)
+        panel.output_text = _FakeText()
+
+        def expected():
+            return list(screen.scrollback) + screen.display() + [""]
+
+        for chunk in [
+            "first\r\nsecond",
+            "".join(f"\r\nline {i}" for i in range(20)),
+            "\r\nnext\r\n",
+            "\r10%\r55%",
+            "\x1b[?1049hfull screen app",
+            "\x1b[?1049l\r\nback",
+            "\r\n\r\n\r\n\r\n",
+        ]:
+            screen.feed(chunk)
+            panel.update_output()
+            assert panel.output_text.lines() == expected()
+
+    @patch("tkinter.Frame")
+    def test_update_output_repaints_only_damaged_rows(self, mock_frame):
+        """変化した行だけを書き直す"""
+        from claude_session_manager.core.interactive_session import (
+            InteractivePowerShellSession,
+        )
+        from claude_session_manager.core.terminal_screen import TerminalScreen
+        from claude_session_manager.ui.session_panel import SessionPanel
+
+        screen = TerminalScreen(24, 80)
+        mock_session = _mock_session(InteractivePowerShellSession, screen=screen)
+        panel = SessionPanel(MagicMock(), mock_session, on_click=lambda: None)
+        panel.output_text = MagicMock(wraps=_FakeText())
+        screen.feed("Installing\r\n")
+        panel.update_output()
+
+        panel.output_text.reset_mock()
+        for percent in range(100):
+            screen.feed(f"\r[{percent}%]")
+        panel.update_output()
+
+        panel.output_text.delete.assert_called_once_with("2.0", "2.end")
+        panel.output_text.insert.assert_called_once_with("2.0", "[99%]")
+
+        panel.output_text.reset_mock()
+        panel.update_output()
+        panel.output_text.insert.assert_not_called()
+
     @patch("tkinter.Frame")
     def test_on_click_callback(self, mock_frame):
         """クリック時にコールバックが呼ばれる"""
         from claude_session_manager.ui.session_panel import SessionPanel
 
         mock_parent = MagicMock()
-        mock_session = MagicMock()
+        mock_session = _mock_session()
         mock_session.session_id = "test-session"
         mock_session.working_dir = "."
 
@@ -226,3 +577,153 @@ class TestInputBar:
         # 空文字列でもコールバックは呼ばれる（または呼ばれない設計も可）
         # ここでは呼ばれないことを期待
         assert not callback_called or submitted_text == ""
+
+    @patch("tkinter.Frame")
+    def test_broadcast_toggle_routes_submit(self, mock_frame):
+        """切り替えがオンの場合は全セッション向けのコールバックへ送る"""
+        from claude_session_manager.ui.input_bar import InputBar
+
+        on_submit = MagicMock()
+        on_broadcast = MagicMock()
+        input_bar = InputBar(MagicMock(), on_submit, on_broadcast=on_broadcast)
+        input_bar.entry = MagicMock()
+        input_bar.entry.get.return_value = "git pull"
+
+        input_bar.toggle_broadcast()
+        input_bar.submit()
+        input_bar.toggle_broadcast()
+        input_bar.submit()
+
+        on_broadcast.assert_called_once_with("git pull")
+        on_submit.assert_called_once_with("git pull")
+
+
+class _FakeRoot:
+    """bind / after_idle / event_generate を記録するTkルートの代用品"""
+
+    def __init__(self):
+        self.bindings = {}
+        self.idle = []
+        self.generated = []
+
+    def bind(self, sequence, callback):
+        self.bindings[sequence] = callback
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def event_generate(self, sequence, when=None):
+        # 実際のTkではメインループがバインドした処理を呼ぶ
+        self.generated.append((sequence, when))
+        self.bindings[sequence](None)
+
+
+class TestTkEventAdapter:
+    """TkEventAdapterのテスト"""
+
+    def _adapter(self):
+        from claude_session_manager.core.events import EventBus
+        from claude_session_manager.ui.tk_events import TkEventAdapter
+
+        bus = EventBus()
+        batches = []
+        adapter = TkEventAdapter(_FakeRoot(), bus, batches.append)
+        adapter.start()
+        return adapter, bus, batches
+
+    def test_events_from_tk_thread_are_batched(self):
+        """メインスレッドのイベントはafter_idle()で1回にまとめ、出力はセッションごとに最新だけ渡す"""
+        from claude_session_manager.core.events import (
+            OutputAvailable,
+            SessionExited,
+        )
+
+        adapter, bus, batches = self._adapter()
+        try:
+            bus.publish(OutputAvailable("s1", 1))
+            bus.publish(SessionExited("s2"))
+            bus.publish(OutputAvailable("s1", 5))
+            bus.publish(OutputAvailable("s2", 3))
+
+            assert len(adapter.root.idle) == 1
+            adapter.root.idle.pop()()
+
+            assert batches == [
+                [OutputAvailable("s1", 5), SessionExited("s2"), OutputAvailable("s2", 3)]
+            ]
+        finally:
+            adapter.close()
+
+    def test_events_from_other_threads_use_event_generate(self):
+        """他のスレッドのイベントは仮想イベントでメインループを起こす"""
+        from claude_session_manager.core.events import OutputAvailable
+        from claude_session_manager.ui.tk_events import VIRTUAL_EVENT
+
+        adapter, bus, batches = self._adapter()
+        try:
+            worker = threading.Thread(target=bus.publish, args=(OutputAvailable("s1", 1),))
+            worker.start()
+            worker.join()
+            end = time.time() + 5
+            while not batches and time.time() < end:
+                time.sleep(0.01)
+
+            assert adapter.root.generated == [(VIRTUAL_EVENT, "tail")]
+            assert batches == [[OutputAvailable("s1", 1)]]
+            assert adapter.root.idle == []
+        finally:
+            adapter.close()
+
+    def test_close_unsubscribes(self):
+        """閉じた後のイベントではメインループを起こさない"""
+        from claude_session_manager.core.events import SessionStarted
+
+        adapter, bus, batches = self._adapter()
+        adapter.close()
+        bus.publish(SessionStarted("s1"))
+
+        assert not bus.has_subscribers
+        assert adapter.root.idle == []
+        assert batches == []
+
+
+class TestMainWindowEvents:
+    """イベントによるMainWindowの更新のテスト"""
+
+    @patch("tkinter.Tk")
+    def test_only_panels_with_events_are_rendered(self, mock_tk):
+        """イベントのあったセッションのパネルだけを描画する"""
+        from claude_session_manager.core.events import OutputAvailable
+        from claude_session_manager.ui.main_window import MainWindow
+
+        window = MainWindow(MagicMock())
+        panels = [MagicMock(), MagicMock()]
+        panels[0].session.session_id = "session-1"
+        panels[1].session.session_id = "session-2"
+        window.session_panels = panels
+
+        window._on_session_events([OutputAvailable("session-2", 4)])
+
+        panels[0].update_output.assert_not_called()
+        panels[1].update_output.assert_called_once()
+
+    @patch("tkinter.Tk")
+    def test_housekeeping_refreshes_busy_panels(self, mock_tk):
+        """定期処理は休止ポリシーを適用し、処理中のパネルだけを描画する"""
+        from claude_session_manager.ui.main_window import HOUSEKEEPING_INTERVAL_MS, MainWindow
+
+        manager = MagicMock()
+        manager.get_session_states.return_value = {"session-1": "idle", "session-2": "busy"}
+        window = MainWindow(manager)
+        panels = [MagicMock(), MagicMock()]
+        panels[0].session.session_id = "session-1"
+        panels[1].session.session_id = "session-2"
+        window.session_panels = panels
+
+        window._housekeeping()
+        window._session_tasks.join()
+
+        manager.apply_hibernation_policy.assert_called_once()
+        panels[0].update_output.assert_not_called()
+        panels[1].update_output.assert_called_once()
+        window.root.after.assert_called_with(HOUSEKEEPING_INTERVAL_MS, window._housekeeping)
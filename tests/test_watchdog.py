@@ -0,0 +1,241 @@
+"""ヘルスウォッチドッグのテスト"""
+
+import queue
+import threading
+import time
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from claude_session_manager.core.watchdog import (
+    HEALTH_DEAD,
+    HEALTH_HEALTHY,
+    HEALTH_STALLED,
+    SessionWatchdog,
+    classify_session,
+)
+
+
+def _fake_session(**attrs):
+    """classify_session()用のセッションの代わり"""
+    running = attrs.pop("running", True)
+    values = {
+        "hibernated": False,
+        "process": object(),
+        "stop_requested": False,
+        "output_ended": False,
+        "prompt_detector": None,
+        "commands_in_flight": 0,
+        "is_running": lambda: running,
+    }
+    values.update(attrs)
+    return SimpleNamespace(**values)
+
+
+class TestClassifySession:
+    """classify_session()のテスト"""
+
+    def test_unmonitored_sessions(self):
+        """未起動・停止要求済み・休止中のセッションは対象外"""
+        assert classify_session(_fake_session(process=None), 0, 60) is None
+        assert classify_session(_fake_session(stop_requested=True), 0, 60) is None
+        assert classify_session(_fake_session(hibernated=True), 0, 60) is None
+
+    def test_dead_sessions(self):
+        """プロセスの終了と読み取りの終了はdead"""
+        assert classify_session(_fake_session(running=False), 0, 60)[0] == HEALTH_DEAD
+        assert classify_session(_fake_session(output_ended=True), 0, 60)[0] == HEALTH_DEAD
+
+    def test_stalled_only_while_busy(self):
+        """処理中のまま出力がない場合だけstalled（アイドルの無出力は正常）"""
+        busy = _fake_session(commands_in_flight=1)
+        assert classify_session(busy, 59, 60) == (HEALTH_HEALTHY, "")
+        assert classify_session(busy, 60, 60)[0] == HEALTH_STALLED
+        assert classify_session(_fake_session(), 600, 60) == (HEALTH_HEALTHY, "")
+
+    def test_invalid_arguments(self):
+        """秒数が正でない場合とbackoff_maxが初期値より小さい場合はValueError"""
+        with pytest.raises(ValueError):
+            SessionWatchdog(None, interval=0)
+        with pytest.raises(ValueError):
+            SessionWatchdog(None, backoff_initial=2, backoff_max=1)
+
+
+posix_only = pytest.mark.skipif(
+    __import__("os").name != "posix", reason="uses sh as a stub shell"
+)
+
+
+@posix_only
+class TestSessionWatchdog:
+    """マネージャーと組み合わせたウォッチドッグのテスト"""
+
+    def _manager(self, **config):
+        """create_session()でshのセッションを作成するマネージャー"""
+        from claude_session_manager.config import SessionManagerConfig
+        from claude_session_manager.core.manager import SessionManager
+
+        return SessionManager(
+            max_sessions=4,
+            config=SessionManagerConfig(
+                warm_pool_size=0, output_encoding="utf-8", **config
+            ),
+        )
+
+    def _create(self, manager, session_id):
+        """shのセッションを作成して起動する"""
+        from claude_session_manager.core.session import PowerShellSession
+
+        with patch(
+            "claude_session_manager.core.manager.PowerShellSession",
+            partial(PowerShellSession, shell_command=["sh"]),
+        ):
+            session = manager.create_session(session_id, ".")
+        session.start()
+        return session
+
+    def _wait(self, predicate, timeout=5):
+        """条件が成り立つまで待つ"""
+        end = time.time() + timeout
+        while not predicate() and time.time() < end:
+            time.sleep(0.01)
+        assert predicate()
+
+    @pytest.mark.parametrize("use_io_reactor", [True, False])
+    def test_exit_is_detected_by_notification(self, use_io_reactor):
+        """シェルの終了は確認間隔を待たずに通知で検出する"""
+        changes = queue.Queue()
+        manager = self._manager(watchdog_interval=60, use_io_reactor=use_io_reactor)
+        manager.watchdog.on_change = changes.put
+        try:
+            session = self._create(manager, "session-1")
+            manager.start_watchdog()
+            session.send_command("exit 1")
+
+            started = time.monotonic()
+            health = changes.get(timeout=5)
+            while health.state != HEALTH_DEAD:
+                health = changes.get(timeout=5)
+
+            assert time.monotonic() - started < 5
+            assert health.session_id == "session-1"
+            assert manager.get_session_health()["session-1"].state == HEALTH_DEAD
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_auto_restart_with_exponential_backoff(self):
+        """終了したセッションは倍々の待ち時間で再起動し、出力を残す"""
+        manager = self._manager(
+            auto_restart=True,
+            restart_backoff_initial=1,
+            restart_backoff_max=4,
+            restart_stable_seconds=100,
+        )
+        watchdog = manager.watchdog
+        try:
+            session = self._create(manager, "session-1")
+            session.send_command("echo before-crash")
+            now = 1000.0
+            delays = []
+            for _ in range(4):
+                session.send_command("exit 1")
+                self._wait(lambda: session.output_ended)
+                health = watchdog.check(now)["session-1"]
+                assert health.state == HEALTH_DEAD
+                delays.append(health.next_restart_in)
+
+                # 期限前は再起動しない
+                watchdog.check(now + health.next_restart_in / 2)
+                assert not session.is_running()
+
+                now += health.next_restart_in
+                health = watchdog.check(now)["session-1"]
+                assert health.state == HEALTH_HEALTHY
+                assert session.is_running()
+
+            assert delays == [1, 2, 4, 4]
+            assert watchdog.health(now)["session-1"].restarts == 4
+
+            # 再起動後しばらく終了しなければ待ち時間を初期値に戻す
+            watchdog.check(now + 100)
+            session.send_command("exit 1")
+            self._wait(lambda: session.output_ended)
+            assert watchdog.check(now + 101)["session-1"].next_restart_in == 1
+
+            assert "before-crash" in session.get_output()
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_failed_restart_is_retried(self, tmp_path):
+        """再起動に失敗した場合は理由を記録し、待ち時間を延ばして再試行する"""
+        working_dir = tmp_path / "work"
+        working_dir.mkdir()
+        manager = self._manager(auto_restart=True, restart_backoff_initial=1)
+        watchdog = manager.watchdog
+        try:
+            from claude_session_manager.core.session import PowerShellSession
+
+            with patch(
+                "claude_session_manager.core.manager.PowerShellSession",
+                partial(PowerShellSession, shell_command=["sh"]),
+            ):
+                session = manager.create_session("session-1", str(working_dir))
+            session.start()
+            session.send_command("exit 1")
+            self._wait(lambda: session.output_ended)
+            watchdog.check(0.0)
+            working_dir.rmdir()
+
+            health = watchdog.check(1.0)["session-1"]
+
+            assert health.state == HEALTH_DEAD
+            assert "Working directory not found" in health.last_error
+            assert health.next_restart_in == 2
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_stalled_session(self):
+        """処理中のまま出力がないセッションはstalledとし、再起動しない"""
+        manager = self._manager(auto_restart=True, watchdog_stall_seconds=30)
+        watchdog = manager.watchdog
+        try:
+            session = self._create(manager, "session-1")
+            worker = threading.Thread(
+                target=session.run_command, args=("sleep 1",), kwargs={"timeout": 5}
+            )
+            worker.start()
+            self._wait(lambda: session.commands_in_flight == 1)
+
+            watchdog.check(0.0)
+            health = watchdog.check(30.0)["session-1"]
+
+            assert health.state == HEALTH_STALLED
+            assert health.next_restart_in is None
+            worker.join(5)
+            assert watchdog.check(31.0)["session-1"].state == HEALTH_HEALTHY
+        finally:
+            manager.shutdown_all(deadline=1)
+
+    def test_stopped_and_hibernated_sessions_are_not_restarted(self, tmp_path):
+        """利用者が停止したセッションと休止中のセッションは監視の対象外"""
+        manager = self._manager(auto_restart=True, hibernation_dir=str(tmp_path))
+        watchdog = manager.watchdog
+        try:
+            stopped = self._create(manager, "session-1")
+            self._create(manager, "session-2")
+            watchdog.check(0.0)
+
+            stopped.stop()
+            manager.hibernate("session-2")
+            health = watchdog.check(100.0)
+
+            assert health == {}
+            assert not stopped.is_running()
+            with pytest.raises(RuntimeError):
+                manager.restart_session("session-2")
+            with pytest.raises(KeyError):
+                manager.restart_session("missing")
+        finally:
+            manager.shutdown_all(deadline=1)